@@ -18,6 +18,7 @@ from ocrmypdf.api import (
     Verbosity,
     configure_logging,
     ocr,
+    ocr_batch,
 )
 from ocrmypdf.exceptions import (
     BadArgsError,
@@ -33,7 +34,7 @@ from ocrmypdf.exceptions import (
     TesseractConfigError,
     UnsupportedImageFormatError,
 )
-from ocrmypdf.pluginspec import OcrEngine, OrientationConfidence
+from ocrmypdf.pluginspec import OcrEngine, OrientationConfidence, PageAnalysis
 
 hookimpl = _HookimplMarker('ocrmypdf')
 
@@ -54,9 +55,11 @@ __all__ = [
     'InputFileError',
     'MissingDependencyError',
     'ocr',
+    'ocr_batch',
     'OcrEngine',
     'OrientationConfidence',
     'OutputFileAccessError',
+    'PageAnalysis',
     'PageContext',
     'pdfa',
     'PdfContext',
@@ -39,6 +39,13 @@ def sigbus(*args):
 
 def run(args=None):
     """Run the ocrmypdf command line interface."""
+    if args is None:
+        args = sys.argv[1:]
+    if args and args[0] == 'serve':
+        from ocrmypdf._server import run_server  # pylint: disable=import-outside-toplevel
+
+        return run_server(args[1:])
+
     _parser, options, plugin_manager = get_parser_options_plugins(args=args)
 
     with suppress(AttributeError, PermissionError):
@@ -0,0 +1,172 @@
+# SPDX-FileCopyrightText: 2024 James R. Barlow
+# SPDX-License-Identifier: MPL-2.0
+
+"""Checkpoint journal that allows an interrupted OCR job to be resumed.
+
+The journal is a JSON lines file in a persistent work folder. The first line
+identifies the job: a hash of the input file and the options that affect the
+output. Each following line records the :class:`PageResult` of a page that
+finished processing. Lines are flushed to disk as soon as they are written, so
+that after a crash, every page in the journal can be reused as is.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from argparse import Namespace
+from pathlib import Path
+
+from ocrmypdf._pipelines._common import PageResult
+from ocrmypdf._version import __version__
+
+log = logging.getLogger(__name__)
+
+JOURNAL_NAME = 'checkpoint.jsonl'
+
+# Options that do not change the pages we produce, or that may reasonably differ
+# when a job is resumed, such as the resources of the machine it is resumed on
+_IGNORED_OPTIONS = frozenset(
+    {
+        'checkpoint_dir',
+        'image_jobs',
+        'input_file',
+        'jobs',
+        'keep_temporary_files',
+        'memory_budget',
+        'ocr_cache_dir',
+        'ocr_cache_size',
+        'ocr_jobs',
+        'output_file',
+        'parallel_graft',
+        'progress_bar',
+        'quiet',
+        'sidecar',
+        'streaming_graft',
+        'tesseract_threads',
+        'use_threads',
+        'verbose',
+    }
+)
+
+
+def _json_default(obj):
+    if isinstance(obj, set | frozenset):
+        return sorted(obj)
+    return str(obj)
+
+
+def job_fingerprint(input_file: Path, options: Namespace) -> str:
+    """Identify a job by its input file and the options that affect its output."""
+    hasher = hashlib.sha256()
+    with open(input_file, 'rb') as f:
+        while chunk := f.read(1 << 20):
+            hasher.update(chunk)
+    settings = {
+        k: v for k, v in sorted(vars(options).items()) if k not in _IGNORED_OPTIONS
+    }
+    settings['ocrmypdf_version'] = __version__
+    hasher.update(json.dumps(settings, default=_json_default).encode())
+    return hasher.hexdigest()
+
+
+class CheckpointJournal:
+    """Records finished pages and recovers them when a job is run again."""
+
+    def __init__(self, work_folder: Path, fingerprint: str):
+        self.work_folder = work_folder
+        self.path = work_folder / JOURNAL_NAME
+        self.fingerprint = fingerprint
+        self._stream = None
+
+    def _relative(self, path: Path | None) -> Path | None:
+        if path is None:
+            return None
+        try:
+            return Path(path).resolve().relative_to(self.work_folder.resolve())
+        except ValueError:
+            return Path(path)
+
+    def _absolute(self, path: Path | None) -> Path | None:
+        if path is None:
+            return None
+        return self.work_folder / path
+
+    def _read_completed(self) -> dict[int, PageResult]:
+        with open(self.path, encoding='utf-8') as f:
+            header = json.loads(f.readline())
+            if header.get('fingerprint') != self.fingerprint:
+                log.warning(
+                    "Checkpoint journal does not match this input file and options; "
+                    "starting over"
+                )
+                return {}
+            completed = {}
+            for line in f:
+                try:
+                    result = PageResult.from_json(line)
+                except (ValueError, TypeError):
+                    # The last line may be incomplete if we crashed while writing
+                    break
+                result = result._replace(
+                    pdf_page_from_image=self._absolute(result.pdf_page_from_image),
+                    ocr=self._absolute(result.ocr),
+                    text=self._absolute(result.text),
+                )
+                files = (result.pdf_page_from_image, result.ocr, result.text)
+                if all(f is None or f.exists() for f in files):
+                    completed[result.pageno] = result
+        return completed
+
+    def open(self) -> dict[int, PageResult]:
+        """Open the journal for writing and return the pages it already holds.
+
+        If the journal belongs to a different job or cannot be read, it is
+        discarded and no pages are returned.
+        """
+        completed: dict[int, PageResult] = {}
+        try:
+            completed = self._read_completed()
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            log.warning("Checkpoint journal is unreadable (%s); starting over", e)
+
+        # Rewrite the journal so that it contains only valid records, replacing
+        # the old journal only once the new one is safely on disk
+        temp_path = self.path.with_suffix('.tmp')
+        self._stream = open(temp_path, 'w', encoding='utf-8')
+        self._write(json.dumps({'fingerprint': self.fingerprint}))
+        for result in completed.values():
+            self.record(result)
+        self._stream.close()
+        os.replace(temp_path, self.path)
+        self._stream = open(self.path, 'a', encoding='utf-8')
+        if completed:
+            log.info(
+                "Resuming from checkpoint: %d pages already processed", len(completed)
+            )
+        return completed
+
+    def _write(self, line: str) -> None:
+        assert self._stream is not None
+        self._stream.write(line + '\n')
+        self._stream.flush()
+        os.fsync(self._stream.fileno())
+
+    def record(self, result: PageResult) -> None:
+        """Record that a page has finished processing."""
+        relative = result._replace(
+            pdf_page_from_image=self._relative(result.pdf_page_from_image),
+            ocr=self._relative(result.ocr),
+            text=self._relative(result.text),
+        )
+        self._write(relative.to_json())
+
+    def close(self) -> None:
+        """Close the journal."""
+        if self._stream:
+            self._stream.close()
+            self._stream = None
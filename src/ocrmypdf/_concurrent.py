@@ -5,14 +5,22 @@
 
 from __future__ import annotations
 
+import logging
 import threading
 from abc import ABC, abstractmethod
-from collections.abc import Callable, Iterable
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from concurrent.futures import Executor as FuturesExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass
+from functools import partial
 from typing import Any, TypeVar
 
 from ocrmypdf._progressbar import NullProgressBar, ProgressBar
 
 T = TypeVar('T')
+log = logging.getLogger(__name__)
 
 
 def _task_noop(*_args, **_kwargs):
@@ -23,11 +31,123 @@ def _task_finished_noop(_result: Any, pbar: ProgressBar):
     pbar.update()
 
 
+class MemoryBudget:
+    """Admits tasks to a worker pool while their estimated memory use fits.
+
+    Tasks are started in the order given, except that a task that would exceed
+    the budget is passed over in favor of later tasks that fit. A task is always
+    started when no other task is running, so a task that is larger than the
+    whole budget still runs, alone.
+    """
+
+    def __init__(self, budget: int, task_memory: Callable[..., int]):
+        """Initialize the budget.
+
+        Args:
+            budget: The maximum total estimated memory of running tasks, in bytes.
+            task_memory: Called with the arguments of a task to estimate the peak
+                memory it will use, in bytes.
+        """
+        self.budget = budget
+        self.task_memory = task_memory
+        self.in_use = 0
+
+    def admits(self, cost: int, *, idle: bool) -> bool:
+        """Return True if a task of this cost may start now."""
+        return idle or self.in_use + cost <= self.budget
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One stage of a pipelined task.
+
+    The first stage is called with the task arguments; each later stage is
+    called with the result of the stage before it. At most ``max_workers``
+    tasks run in each stage at once.
+    """
+
+    task: Callable
+    max_workers: int
+    name: str = ''
+
+
+def _run_stages(tasks: Sequence[Callable], *args):
+    """Run all stages of a pipelined task, one after another."""
+    result = tasks[0](*args)
+    for task in tasks[1:]:
+        result = task(result)
+    return result
+
+
+def run_scheduled(
+    pool: FuturesExecutor,
+    stages: Sequence[Stage],
+    task_arguments: Iterable,
+    memory_budget: MemoryBudget | None = None,
+) -> Iterator:
+    """Submit tasks to a pool of workers, and yield their results.
+
+    Each task passes through ``stages`` in order. A stage starts a task only
+    while it has fewer than its ``max_workers`` tasks running, and, to apply
+    back-pressure, while fewer than ``max_workers`` tasks are waiting for the
+    next stage. Tasks that have reached later stages are started first. If a
+    memory budget is given, tasks must also fit within it in every stage.
+
+    The pool should have at least as many workers as all stages together.
+    Results of the last stage are yielded in order of completion.
+    """
+    queues: list[deque[tuple[int, tuple]]] = [deque() for _ in stages]
+    for args in task_arguments:
+        cost = memory_budget.task_memory(*args) if memory_budget else 0
+        queues[0].append((cost, args))
+    running: dict[Future, tuple[int, int]] = {}
+    busy = [0] * len(stages)
+    while running or any(queues):
+        for n in reversed(range(len(stages))):
+            stage, queue = stages[n], queues[n]
+            held: list[tuple[int, tuple]] = []
+            while queue and busy[n] < stage.max_workers:
+                if n + 1 < len(stages) and len(queues[n + 1]) >= (
+                    stages[n + 1].max_workers
+                ):
+                    break
+                cost, args = queue.popleft()
+                if memory_budget and not memory_budget.admits(cost, idle=not running):
+                    held.append((cost, args))
+                    continue
+                running[pool.submit(stage.task, *args)] = (n, cost)
+                busy[n] += 1
+                if memory_budget:
+                    memory_budget.in_use += cost
+            if held:
+                assert memory_budget is not None
+                log.debug(
+                    "Memory budget: %d tasks waiting, %.0f of %.0f MB in use",
+                    len(held),
+                    memory_budget.in_use / 1_000_000,
+                    memory_budget.budget / 1_000_000,
+                )
+                queue.extendleft(reversed(held))
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            n, cost = running.pop(future)
+            busy[n] -= 1
+            if memory_budget:
+                memory_budget.in_use -= cost
+            result = future.result()
+            if n + 1 < len(stages):
+                queues[n + 1].append((cost, (result,)))
+            else:
+                yield result
+
+
 class Executor(ABC):
     """Abstract concurrent executor."""
 
     pool_lock = threading.Lock()
     pbar_class = NullProgressBar
+    supports_memory_budget = False
+    supports_stages = False
 
     def __init__(self, *, pbar_class=None):
         if pbar_class:
@@ -43,6 +163,9 @@ class Executor(ABC):
         task: Callable[..., T] | None = None,
         task_arguments: Iterable | None = None,
         task_finished: Callable[[T, ProgressBar], None] | None = None,
+        task_memory: Callable[..., int] | None = None,
+        memory_budget: int = 0,
+        stages: Sequence[Stage] | None = None,
     ) -> None:
         """Set up parallel execution and progress reporting.
 
@@ -64,9 +187,32 @@ class Executor(ABC):
             task_arguments: An iterable that generates a group of parameters for each
                 task. This runs in the parent's context, but the parameters must be
                 marshallable to the worker.
+            task_memory: Called with the parameters of each task, in the parent's
+                context, to estimate the peak memory in bytes the task will use.
+            memory_budget: If nonzero, and ``task_memory`` is given, new tasks
+                are only started while the estimated memory of all running tasks
+                stays within this many bytes. Executors that do not support this
+                (``supports_memory_budget`` is ``False``) ignore it.
+            stages: If given, instead of ``task``, each task is a pipeline of
+                stages, and each stage has its own number of workers. Executors
+                that do not support this (``supports_stages`` is ``False``) run
+                all stages of a task one after another in one worker, using
+                ``max_workers`` workers.
         """
         if not task_arguments:
             return  # Nothing to do!
+        execute_kwargs: dict[str, Any] = {}
+        if stages:
+            task = partial(_run_stages, [stage.task for stage in stages])
+            if self.supports_stages:
+                execute_kwargs['stages'] = stages
+        if memory_budget and task_memory:
+            if self.supports_memory_budget:
+                execute_kwargs['memory_budget'] = MemoryBudget(
+                    memory_budget, task_memory
+                )
+            else:
+                log.debug(f"{type(self).__name__} does not support a memory budget")
         if not worker_initializer:
             worker_initializer = _task_noop
         if not task_finished:
@@ -83,6 +229,7 @@ class Executor(ABC):
                 task=task,
                 task_arguments=task_arguments,
                 task_finished=task_finished,
+                **execute_kwargs,
             )
 
     @abstractmethod
@@ -97,7 +244,14 @@ class Executor(ABC):
         task_arguments: Iterable,
         task_finished: Callable,
     ):
-        """Custom executors should override this method."""
+        """Custom executors should override this method.
+
+        Executors that set ``supports_memory_budget`` must also accept a
+        ``memory_budget`` keyword argument, a :class:`MemoryBudget` that should
+        be used to submit the tasks. Likewise, executors that set
+        ``supports_stages`` must accept a ``stages`` keyword argument, a
+        sequence of :class:`Stage`. :func:`run_scheduled` implements both.
+        """
 
 
 def setup_executor(plugin_manager) -> Executor:
@@ -110,8 +264,15 @@ class SerialExecutor(Executor):
 
     The current process/thread will be the worker that executes all tasks
     in order. As such, ``worker_initializer`` will never be called.
+
+    Since no pool is created, it does not take the pool lock, and may be used
+    while another executor is running (for example, in ``task_finished``).
+    Only one task runs at a time, so any memory budget is trivially respected.
     """
 
+    pool_lock = nullcontext()
+    supports_memory_budget = True
+
     def _execute(
         self,
         *,
@@ -122,6 +283,7 @@ class SerialExecutor(Executor):
         task: Callable,
         task_arguments: Iterable,
         task_finished: Callable,
+        memory_budget: MemoryBudget | None = None,
     ):  # pylint: disable=unused-argument
         with self.pbar_class(**progress_kwargs) as pbar:
             for args in task_arguments:
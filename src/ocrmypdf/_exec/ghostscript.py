@@ -1,7 +1,11 @@
 # SPDX-FileCopyrightText: 2022 James R. Barlow
 # SPDX-License-Identifier: MPL-2.0
 
-"""Interface to Ghostscript executable."""
+"""Interface to Ghostscript executable.
+
+When the Ghostscript library is available, it is used to rasterize pages
+instead, falling back to the executable when the library is busy.
+"""
 
 from __future__ import annotations
 
@@ -13,10 +17,13 @@ from io import BytesIO
 from os import fspath
 from pathlib import Path
 from subprocess import PIPE, CalledProcessError
+from tempfile import TemporaryDirectory
+from typing import BinaryIO
 
 from packaging.version import Version
 from PIL import Image, UnidentifiedImageError
 
+from ocrmypdf._exec import libgs
 from ocrmypdf.exceptions import ColorConversionNeededError, SubprocessOutputError
 from ocrmypdf.helpers import Resolution
 from ocrmypdf.subprocess import get_version, run, run_polling_stderr
@@ -33,6 +40,15 @@ COLOR_CONVERSION_STRATEGIES = frozenset(
 # Ghostscript executable - gswin32c is not supported
 GS = 'gswin64c' if os.name == 'nt' else 'gs'
 
+# Uncompressed devices that produce the same image as each raster device, used
+# for images that will only be read by Pillow
+RAW_RASTER_DEVICES = {
+    'pngmono': 'pbmraw',
+    'pnggray': 'pgmraw',
+    'png16m': 'ppmraw',
+    'jpeggray': 'pgmraw',
+}
+
 
 log = logging.getLogger(__name__)
 
@@ -91,24 +107,15 @@ def _gs_devicen_reported(stream) -> bool:
     return bool(match)
 
 
-def rasterize_pdf(
-    input_file: os.PathLike,
-    output_file: os.PathLike,
-    *,
+def _rasterize_args(
     raster_device: str,
     raster_dpi: Resolution,
-    pageno: int = 1,
-    page_dpi: Resolution | None = None,
-    rotation: int | None = None,
-    filter_vector: bool = False,
-    stop_on_error: bool = False,
-):
-    """Rasterize one page of a PDF at resolution raster_dpi in canvas units."""
-    raster_dpi = raster_dpi.round(6)
-    if not page_dpi:
-        page_dpi = raster_dpi
-
-    args_gs = (
+    first_page: int,
+    last_page: int,
+    filter_vector: bool,
+    stop_on_error: bool,
+) -> list[str]:
+    return (
         [
             GS,
             '-dQUIET',
@@ -117,22 +124,28 @@ def rasterize_pdf(
             '-dNOPAUSE',
             '-dInterpolateControl=-1',
             f'-sDEVICE={raster_device}',
-            f'-dFirstPage={pageno}',
-            f'-dLastPage={pageno}',
+            f'-dFirstPage={first_page}',
+            f'-dLastPage={last_page}',
             f'-r{raster_dpi.x:f}x{raster_dpi.y:f}',
         ]
         + (['-dFILTERVECTOR'] if filter_vector else [])
         + (['-dPDFSTOPONERROR'] if stop_on_error else [])
-        + [
-            '-o',
-            '-',
-            '-sstdout=%stderr',  # Literal %s, not string interpolation
-            '-dAutoRotatePages=/None',  # Probably has no effect on raster
-            '-f',
-            fspath(input_file),
-        ]
     )
 
+
+def _run_rasterize(args_gs: list[str]) -> bytes:
+    if libgs.available():
+        try:
+            stdout, stderr = libgs.run(args_gs[1:])
+        except libgs.GhostscriptBusyError:
+            log.debug("Ghostscript library is busy, running executable")
+        except libgs.GhostscriptLibraryError as e:
+            log.error(e.stderr)
+            raise SubprocessOutputError('Ghostscript rasterizing failed') from e
+        else:
+            if _gs_error_reported(stderr):
+                log.error(stderr)
+            return stdout
     try:
         p = run(args_gs, stdout=PIPE, stderr=PIPE, check=True)
     except CalledProcessError as e:
@@ -142,9 +155,21 @@ def rasterize_pdf(
         stderr = p.stderr.decode(errors='replace')
         if _gs_error_reported(stderr):
             log.error(stderr)
+    return p.stdout
+
 
+def save_page_image(
+    image_file: BinaryIO | os.PathLike,
+    output_file: os.PathLike,
+    *,
+    raster_device: str,
+    raster_dpi: Resolution,
+    page_dpi: Resolution,
+    rotation: int | None = None,
+):
+    """Save a page image rendered by Ghostscript, applying rotation and DPI."""
     try:
-        with Image.open(BytesIO(p.stdout)) as im:
+        with Image.open(image_file) as im:
             if rotation is not None:
                 log.debug("Rotating output by %i", rotation)
                 # rotation is a clockwise angle and Image.ROTATE_* is
@@ -166,6 +191,117 @@ def rasterize_pdf(
         raise
 
 
+def rasterize_pdf(
+    input_file: os.PathLike,
+    output_file: os.PathLike,
+    *,
+    raster_device: str,
+    raster_dpi: Resolution,
+    pageno: int = 1,
+    page_dpi: Resolution | None = None,
+    rotation: int | None = None,
+    filter_vector: bool = False,
+    stop_on_error: bool = False,
+):
+    """Rasterize one page of a PDF at resolution raster_dpi in canvas units."""
+    raster_dpi = raster_dpi.round(6)
+    if not page_dpi:
+        page_dpi = raster_dpi
+
+    output_device = RAW_RASTER_DEVICES.get(raster_device, raster_device)
+
+    args_gs = _rasterize_args(
+        output_device, raster_dpi, pageno, pageno, filter_vector, stop_on_error
+    ) + [
+        '-o',
+        '-',
+        '-sstdout=%stderr',  # Literal %s, not string interpolation
+        '-dAutoRotatePages=/None',  # Probably has no effect on raster
+        '-f',
+        fspath(input_file),
+    ]
+    image_data = _run_rasterize(args_gs)
+    save_page_image(
+        BytesIO(image_data),
+        output_file,
+        raster_device=raster_device,
+        raster_dpi=raster_dpi,
+        page_dpi=page_dpi,
+        rotation=rotation,
+    )
+
+
+def _image_suffix(output_device: str) -> str:
+    if output_device in RAW_RASTER_DEVICES.values():
+        return '.pnm'
+    return '.jpg' if output_device.startswith('jpeg') else '.png'
+
+
+def page_image_name(raster_device: str, pageno: int) -> str:
+    """Return the name of a page image saved by :func:`rasterize_pdf_pages`."""
+    output_device = RAW_RASTER_DEVICES.get(raster_device, raster_device)
+    return f'{pageno:06d}{_image_suffix(output_device)}'
+
+
+def rasterize_pdf_pages(
+    input_file: os.PathLike,
+    output_folder: os.PathLike,
+    *,
+    raster_device: str,
+    raster_dpi: Resolution,
+    first_page: int,
+    last_page: int,
+    filter_vector: bool = False,
+    stop_on_error: bool = False,
+) -> list[Path]:
+    """Rasterize a range of pages of a PDF in one Ghostscript process.
+
+    The images are saved in output_folder, named by their page number as
+    given by :func:`page_image_name`, exactly as Ghostscript produced them.
+    Devices that have an uncompressed equivalent are replaced by it, since the
+    images only need to be read by Pillow. Use :func:`save_page_image` to
+    rotate them and set their DPI.
+
+    Returns:
+        The image of each page in the range, in order.
+    """
+    raster_dpi = raster_dpi.round(6)
+    output_folder = Path(output_folder)
+    output_device = RAW_RASTER_DEVICES.get(raster_device, raster_device)
+    # Ghostscript numbers output files from 1, not by page number, so render
+    # to a private folder first in case other ranges share output_folder
+    with TemporaryDirectory(dir=output_folder) as tmpdir:
+        args_gs = _rasterize_args(
+            output_device,
+            raster_dpi,
+            first_page,
+            last_page,
+            filter_vector,
+            stop_on_error,
+        ) + [
+            '-o',
+            # Escape % in the folder name, since Ghostscript would expand it
+            os.path.join(
+                tmpdir.replace('%', '%%'), f'%06d{_image_suffix(output_device)}'
+            ),
+            '-dAutoRotatePages=/None',
+            '-f',
+            fspath(input_file),
+        ]
+        _run_rasterize(args_gs)
+        images = []
+        for n, pageno in enumerate(range(first_page, last_page + 1), start=1):
+            image = output_folder / page_image_name(raster_device, pageno)
+            try:
+                os.replace(Path(tmpdir) / page_image_name(raster_device, n), image)
+            except FileNotFoundError as e:
+                raise SubprocessOutputError(
+                    f"Ghostscript did not produce an image for page {pageno}"
+                ) from e
+            images.append(image)
+    return images
+
+
 class GhostscriptFollower:
     """Parses the output of Ghostscript and uses it to update the progress bar."""
 
@@ -0,0 +1,191 @@
+# SPDX-FileCopyrightText: 2024 James R. Barlow
+# SPDX-License-Identifier: MPL-2.0
+
+"""Interface to the Ghostscript shared library (libgs), through its C API.
+
+Running Ghostscript in-process avoids starting a new process for every page,
+which matters when rasterizing many simple pages. The library is loaded once
+per process, and each call creates and destroys a Ghostscript instance, which
+is much cheaper than starting the executable.
+
+Most builds of Ghostscript only allow one instance per process at a time, so
+only one thread may use the library at once. :func:`run` raises
+:class:`GhostscriptBusyError` rather than waiting, so that the caller can run
+the Ghostscript executable instead.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import threading
+from collections.abc import Sequence
+from functools import lru_cache
+
+from packaging.version import Version
+
+log = logging.getLogger(__name__)
+
+# Oldest version of the library that we use, as for the executable
+MIN_VERSION = Version('9.54')
+
+# gsapi_set_arg_encoding: arguments are UTF-8 encoded
+GS_ARG_ENCODING_UTF8 = 1
+
+# gsapi_init_with_args returns this when Ghostscript quits normally
+GS_ERROR_QUIT = -101
+
+_stdio_callback = ctypes.CFUNCTYPE(
+    ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_int
+)
+
+
+class _Revision(ctypes.Structure):
+    _fields_ = [
+        ('product', ctypes.c_char_p),
+        ('copyright', ctypes.c_char_p),
+        ('revision', ctypes.c_long),
+        ('revisiondate', ctypes.c_long),
+    ]
+
+
+class GhostscriptLibraryError(Exception):
+    """Ghostscript, running as a library, returned an error."""
+
+    def __init__(self, code: int, stderr: str):
+        super().__init__(f"Ghostscript library returned error code {code}")
+        self.code = code
+        self.stderr = stderr
+
+
+class GhostscriptBusyError(Exception):
+    """The Ghostscript library is in use by another thread."""
+
+
+_lock = threading.Lock()
+
+
+def _library_name() -> str | None:
+    if os.name == 'nt':
+        return ctypes.util.find_library('gsdll64')
+    return ctypes.util.find_library('gs')
+
+
+def _revision_to_version(revision: int) -> Version:
+    # Revision 10021 is version 10.02.1, and 9540 is 9.54.0
+    return Version(f'{revision // 1000}.{revision // 10 % 100:02d}.{revision % 10}')
+
+
+@lru_cache(maxsize=1)
+def _load() -> ctypes.CDLL | None:
+    name = _library_name()
+    if not name:
+        return None
+    try:
+        lib = ctypes.CDLL(name)
+        revision = _Revision()
+        if lib.gsapi_revision(ctypes.byref(revision), ctypes.sizeof(revision)) != 0:
+            return None
+    except (OSError, AttributeError) as e:
+        log.debug(f"Could not load Ghostscript library {name}: {e}")
+        return None
+    version = _revision_to_version(revision.revision)
+    if version < MIN_VERSION:
+        log.debug(f"Ghostscript library {name} version {version} is too old")
+        return None
+
+    lib.gsapi_new_instance.argtypes = [
+        ctypes.POINTER(ctypes.c_void_p),
+        ctypes.c_void_p,
+    ]
+    lib.gsapi_set_stdio.argtypes = [
+        ctypes.c_void_p,
+        _stdio_callback,
+        _stdio_callback,
+        _stdio_callback,
+    ]
+    lib.gsapi_set_arg_encoding.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    lib.gsapi_init_with_args.argtypes = [
+        ctypes.c_void_p,
+        ctypes.c_int,
+        ctypes.POINTER(ctypes.c_char_p),
+    ]
+    lib.gsapi_exit.argtypes = [ctypes.c_void_p]
+    lib.gsapi_delete_instance.argtypes = [ctypes.c_void_p]
+    lib.gsapi_delete_instance.restype = None
+    log.debug(f"Using Ghostscript library {name}, version {version}")
+    return lib
+
+
+def available() -> bool:
+    """Return True if a usable Ghostscript library is installed."""
+    return _load() is not None
+
+
+def run(args: Sequence[str]) -> tuple[bytes, str]:
+    """Run Ghostscript in-process with command line arguments.
+
+    Args:
+        args: Arguments, not including the name of the executable. Output that
+            Ghostscript writes to ``%stdout`` is captured and returned.
+
+    Returns:
+        The standard output and standard error of Ghostscript.
+
+    Raises:
+        GhostscriptBusyError: If another thread is using the library.
+        GhostscriptLibraryError: If Ghostscript reports an error.
+    """
+    lib = _load()
+    if lib is None:
+        raise FileNotFoundError("Ghostscript library not available")
+    if not _lock.acquire(blocking=False):
+        raise GhostscriptBusyError()
+    try:
+        return _run_locked(lib, args)
+    finally:
+        _lock.release()
+
+
+def _run_locked(lib: ctypes.CDLL, args: Sequence[str]) -> tuple[bytes, str]:
+    stdout = bytearray()
+    stderr = bytearray()
+
+    def read_stdin(_handle, _buf, _count):
+        return 0  # End of file
+
+    def write_stdout(_handle, buf, count):
+        stdout.extend(ctypes.string_at(buf, count))
+        return count
+
+    def write_stderr(_handle, buf, count):
+        stderr.extend(ctypes.string_at(buf, count))
+        return count
+
+    # Keep references to the callbacks until Ghostscript is finished with them
+    callbacks = (
+        _stdio_callback(read_stdin),
+        _stdio_callback(write_stdout),
+        _stdio_callback(write_stderr),
+    )
+    instance = ctypes.c_void_p()
+    code = lib.gsapi_new_instance(ctypes.byref(instance), None)
+    if code < 0:
+        # Another instance exists, perhaps created by a different library
+        raise GhostscriptBusyError()
+    try:
+        lib.gsapi_set_stdio(instance, *callbacks)
+        lib.gsapi_set_arg_encoding(instance, GS_ARG_ENCODING_UTF8)
+        argv = [b'gs'] + [os.fsencode(arg) for arg in args]
+        c_argv = (ctypes.c_char_p * len(argv))(*argv)
+        code = lib.gsapi_init_with_args(instance, len(argv), c_argv)
+        exit_code = lib.gsapi_exit(instance)
+        if code in (0, GS_ERROR_QUIT):
+            code = exit_code
+    finally:
+        lib.gsapi_delete_instance(instance)
+    if code not in (0, GS_ERROR_QUIT):
+        raise GhostscriptLibraryError(code, stderr.decode(errors='replace'))
+    return bytes(stdout), stderr.decode(errors='replace')
@@ -0,0 +1,814 @@
+# SPDX-FileCopyrightText: 2024 James R. Barlow
+# SPDX-License-Identifier: MPL-2.0
+
+"""Interface to the Tesseract library (libtesseract), through its C API.
+
+Running Tesseract in-process lets a worker keep an initialized engine from one
+page to the next, rather than loading the language data again for every page
+as the executable must. An engine may only be used by one thread at a time, so
+each thread keeps its own engines, one for each set of languages and
+initialization settings.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import threading
+import time
+import unicodedata
+import weakref
+from collections.abc import Mapping, Sequence
+from functools import lru_cache
+from math import copysign, floor, pi
+from os import fspath
+from pathlib import Path
+
+from packaging.version import Version
+from PIL import Image
+
+from ocrmypdf._exec.tesseract import (
+    TesseractVersion,
+    _generate_null_hocr,
+    page_timedout,
+)
+from ocrmypdf.hocrtransform import HocrTransform, OcrPage
+from ocrmypdf.pluginspec import OrientationConfidence, PageAnalysis
+
+log = logging.getLogger(__name__)
+
+# Oldest version of the library that we use, as for the executable
+MIN_VERSION = TesseractVersion('4.1.1')
+
+# Engines are recreated after recognizing this many pages, so that memory that
+# Tesseract leaks or fragments is returned
+MAX_PAGES_PER_ENGINE = 200
+
+# tesseract::PageSegMode
+PSM_OSD_ONLY = 0
+PSM_AUTO_ONLY = 2
+PSM_AUTO = 3
+
+# tesseract::OcrEngineMode
+OEM_DEFAULT = 3
+
+# tesseract::PageIteratorLevel
+RIL_BLOCK = 0
+RIL_PARA = 1
+RIL_TEXTLINE = 2
+RIL_WORD = 3
+
+# tesseract::PolyBlockType of captions, whose lines are written to hOCR as
+# ocr_caption, which the hOCR renderer does not render
+PT_CAPTION_TEXT = 8
+
+# Languages whose paragraphs are written to hOCR without word breaks
+NO_WORD_BREAK_LANGUAGES = {'chi_sim', 'chi_tra', 'jpn', 'kor'}
+
+HOCR_TEMPLATE = '''<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN"
+    "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">
+<html xmlns="http://www.w3.org/1999/xhtml" xml:lang="en" lang="en">
+ <head>
+  <title></title>
+  <meta http-equiv="Content-Type" content="text/html;charset=utf-8"/>
+  <meta name='ocr-system' content='tesseract {version}' />
+  <meta name='ocr-capabilities'
+    content='ocr_page ocr_carea ocr_par ocr_line ocrx_word ocrp_wconf'/>
+ </head>
+ <body>
+{page} </body>
+</html>
+'''
+
+_c_int_p = ctypes.POINTER(ctypes.c_int)
+_c_float_p = ctypes.POINTER(ctypes.c_float)
+_c_char_p_p = ctypes.POINTER(ctypes.c_char_p)
+
+_FUNCTIONS = {
+    # name: (restype, argtypes)
+    'TessVersion': (ctypes.c_char_p, []),
+    'TessDeleteText': (None, [ctypes.c_void_p]),
+    'TessBaseAPICreate': (ctypes.c_void_p, []),
+    'TessBaseAPIDelete': (None, [ctypes.c_void_p]),
+    'TessBaseAPIEnd': (None, [ctypes.c_void_p]),
+    'TessBaseAPIInit4': (
+        ctypes.c_int,
+        [
+            ctypes.c_void_p,
+            ctypes.c_char_p,
+            ctypes.c_char_p,
+            ctypes.c_int,
+            _c_char_p_p,
+            ctypes.c_int,
+            _c_char_p_p,
+            _c_char_p_p,
+            ctypes.c_size_t,
+            ctypes.c_int,
+        ],
+    ),
+    'TessBaseAPISetVariable': (
+        ctypes.c_int,
+        [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_char_p],
+    ),
+    'TessBaseAPISetPageSegMode': (None, [ctypes.c_void_p, ctypes.c_int]),
+    'TessBaseAPISetInputName': (None, [ctypes.c_void_p, ctypes.c_char_p]),
+    'TessBaseAPISetImage': (
+        None,
+        [
+            ctypes.c_void_p,
+            ctypes.c_char_p,
+            ctypes.c_int,
+            ctypes.c_int,
+            ctypes.c_int,
+            ctypes.c_int,
+        ],
+    ),
+    'TessBaseAPISetSourceResolution': (None, [ctypes.c_void_p, ctypes.c_int]),
+    'TessBaseAPIRecognize': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_void_p]),
+    'TessBaseAPIGetHOCRText': (ctypes.c_void_p, [ctypes.c_void_p, ctypes.c_int]),
+    'TessBaseAPIGetUTF8Text': (ctypes.c_void_p, [ctypes.c_void_p]),
+    'TessBaseAPIDetectOrientationScript': (
+        ctypes.c_int,
+        [ctypes.c_void_p, _c_int_p, _c_float_p, _c_char_p_p, _c_float_p],
+    ),
+    'TessBaseAPIAnalyseLayout': (ctypes.c_void_p, [ctypes.c_void_p]),
+    'TessBaseAPIClear': (None, [ctypes.c_void_p]),
+    'TessPageIteratorOrientation': (
+        None,
+        [ctypes.c_void_p, _c_int_p, _c_int_p, _c_int_p, _c_float_p],
+    ),
+    'TessPageIteratorDelete': (None, [ctypes.c_void_p]),
+    'TessPageIteratorIsAtBeginningOf': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_int]),
+    'TessPageIteratorBoundingBox': (
+        ctypes.c_int,
+        [ctypes.c_void_p, ctypes.c_int, _c_int_p, _c_int_p, _c_int_p, _c_int_p],
+    ),
+    'TessPageIteratorBaseline': (
+        ctypes.c_int,
+        [ctypes.c_void_p, ctypes.c_int, _c_int_p, _c_int_p, _c_int_p, _c_int_p],
+    ),
+    'TessPageIteratorBlockType': (ctypes.c_int, [ctypes.c_void_p]),
+    'TessBaseAPIGetIterator': (ctypes.c_void_p, [ctypes.c_void_p]),
+    'TessResultIteratorDelete': (None, [ctypes.c_void_p]),
+    'TessResultIteratorGetPageIterator': (ctypes.c_void_p, [ctypes.c_void_p]),
+    'TessResultIteratorNext': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_int]),
+    'TessResultIteratorGetUTF8Text': (
+        ctypes.c_void_p,
+        [ctypes.c_void_p, ctypes.c_int],
+    ),
+    'TessResultIteratorConfidence': (ctypes.c_float, [ctypes.c_void_p, ctypes.c_int]),
+    'TessResultIteratorWordRecognitionLanguage': (
+        ctypes.c_char_p,
+        [ctypes.c_void_p],
+    ),
+    'TessMonitorCreate': (ctypes.c_void_p, []),
+    'TessMonitorSetDeadlineMSecs': (None, [ctypes.c_void_p, ctypes.c_int]),
+    'TessMonitorDelete': (None, [ctypes.c_void_p]),
+}
+
+
+class TesseractLibraryError(Exception):
+    """Tesseract, running as a library, could not be initialized."""
+
+
+def _library_name() -> str | None:
+    if os.name == 'nt':
+        return ctypes.util.find_library('libtesseract-5') or ctypes.util.find_library(
+            'tesseract'
+        )
+    return ctypes.util.find_library('tesseract')
+
+
+@lru_cache(maxsize=1)
+def _load() -> ctypes.CDLL | None:
+    name = _library_name()
+    if not name:
+        return None
+    try:
+        lib = ctypes.CDLL(name)
+        for func_name, (restype, argtypes) in _FUNCTIONS.items():
+            func = getattr(lib, func_name)
+            func.restype = restype
+            func.argtypes = argtypes
+        lib_version = TesseractVersion(lib.TessVersion().decode())
+    except (OSError, AttributeError, ValueError) as e:
+        log.debug(f"Could not load Tesseract library {name}: {e}")
+        return None
+    if lib_version < MIN_VERSION:
+        log.debug(f"Tesseract library {name} version {lib_version} is too old")
+        return None
+    log.debug(f"Using Tesseract library {name}, version {lib_version}")
+    return lib
+
+
+def available() -> bool:
+    """Return True if a usable Tesseract library is installed."""
+    return _load() is not None
+
+
+def version() -> Version:
+    """Return the version of the Tesseract library."""
+    lib = _load()
+    if lib is None:
+        raise FileNotFoundError("Tesseract library not available")
+    return TesseractVersion(lib.TessVersion().decode())
+
+
+def has_thresholding() -> bool:
+    """Does the Tesseract library have the thresholding_method variable?"""
+    return version() >= Version('5.0')
+
+
+def _c_strings(strings: Sequence[str]):
+    return (ctypes.c_char_p * len(strings))(*(s.encode() for s in strings))
+
+
+class _Engine:
+    """An initialized Tesseract engine, owned by one thread."""
+
+    def __init__(
+        self,
+        lib: ctypes.CDLL,
+        languages: Sequence[str],
+        engine_mode: int | None,
+        configs: Sequence[str],
+        variables: Mapping[str, str],
+    ):
+        self.lib = lib
+        self.pages = 0
+        self.handle = lib.TessBaseAPICreate()
+        self._finalizer = weakref.finalize(self, _delete_engine, lib, self.handle)
+        names, values = list(variables.keys()), list(variables.values())
+        code = lib.TessBaseAPIInit4(
+            self.handle,
+            None,
+            '+'.join(languages).encode(),
+            OEM_DEFAULT if engine_mode is None else engine_mode,
+            _c_strings(configs),
+            len(configs),
+            _c_strings(names),
+            _c_strings(values),
+            len(names),
+            0,
+        )
+        if code != 0:
+            self.close()
+            raise TesseractLibraryError(
+                f"Tesseract library could not load languages {'+'.join(languages)}"
+            )
+
+    def close(self) -> None:
+        self._finalizer()
+
+    def set_image(self, input_file: Path) -> None:
+        """Set the image to recognize, from an image file."""
+        with Image.open(input_file) as im:
+            dpi = im.info.get('dpi')
+            mode = 'L' if im.mode in ('1', 'L') else 'RGB'
+            if im.mode != mode:
+                im = im.convert(mode)
+            bytes_per_pixel = len(mode)
+            # Tesseract copies the image, so it need not outlive this call
+            self.lib.TessBaseAPISetImage(
+                self.handle,
+                im.tobytes(),
+                im.width,
+                im.height,
+                bytes_per_pixel,
+                im.width * bytes_per_pixel,
+            )
+        if dpi:
+            self.lib.TessBaseAPISetSourceResolution(self.handle, round(dpi[0]))
+        self.lib.TessBaseAPISetInputName(self.handle, fspath(input_file).encode())
+
+    def set_variable(self, name: str, value: str) -> None:
+        self.lib.TessBaseAPISetVariable(self.handle, name.encode(), value.encode())
+
+    def recognize(self, timeout: float) -> bool:
+        """Recognize the image, returning False if recognition failed."""
+        monitor = None
+        if timeout:
+            monitor = self.lib.TessMonitorCreate()
+            self.lib.TessMonitorSetDeadlineMSecs(monitor, int(timeout * 1000))
+        try:
+            self.pages += 1
+            return self.lib.TessBaseAPIRecognize(self.handle, monitor) == 0
+        finally:
+            if monitor:
+                self.lib.TessMonitorDelete(monitor)
+
+    def get_text(self, getter, *args) -> str:
+        text_p = getter(self.handle, *args)
+        if not text_p:
+            return ''
+        try:
+            return ctypes.string_at(text_p).decode('utf-8', errors='replace')
+        finally:
+            self.lib.TessDeleteText(text_p)
+
+    def clear(self) -> None:
+        """Free the image and recognition results, but keep the engine."""
+        self.lib.TessBaseAPIClear(self.handle)
+
+
+def _delete_engine(lib: ctypes.CDLL, handle: int) -> None:
+    lib.TessBaseAPIEnd(handle)
+    lib.TessBaseAPIDelete(handle)
+
+
+_local = threading.local()
+
+
+def _limit_threads(lib: ctypes.CDLL, threads: int | None) -> None:
+    """Limit the OpenMP threads that Tesseract uses when called from this thread.
+
+    OMP_THREAD_LIMIT is read only once, when the OpenMP runtime is loaded
+    with the library, so it cannot give each document its own limit. The
+    number of threads set by ``omp_set_num_threads`` applies to parallel work
+    started from the calling thread, which is where this thread's engines run.
+    """
+    if threads is None or getattr(_local, 'threads', None) == threads:
+        return
+    _local.threads = threads
+    try:
+        set_num_threads = lib.omp_set_num_threads
+    except AttributeError:
+        return  # Tesseract was built without OpenMP
+    set_num_threads.restype = None
+    set_num_threads.argtypes = [ctypes.c_int]
+    set_num_threads(threads)
+
+
+def _get_engine(
+    languages: Sequence[str],
+    engine_mode: int | None,
+    configs: Sequence[str] = (),
+    variables: Mapping[str, str] | None = None,
+    threads: int | None = None,
+) -> _Engine:
+    """Return this thread's engine for the given settings, creating it if needed.
+
+    Engines are recreated after :data:`MAX_PAGES_PER_ENGINE` pages. If
+    ``threads`` is given, Tesseract may use that many threads for each page.
+    """
+    lib = _load()
+    if lib is None:
+        raise FileNotFoundError("Tesseract library not available")
+    _limit_threads(lib, threads)
+    # Keep Tesseract's messages off the terminal, where they would disrupt the
+    # progress bar
+    variables = {'debug_file': os.devnull, **(variables or {})}
+    key = (tuple(languages), engine_mode, tuple(configs), tuple(variables.items()))
+    if not hasattr(_local, 'engines'):
+        _local.engines = {}
+    engine = _local.engines.get(key)
+    if engine is not None and engine.pages >= MAX_PAGES_PER_ENGINE:
+        log.debug("Recreating Tesseract engine after %d pages", engine.pages)
+        engine.close()
+        engine = None
+    if engine is None:
+        engine = _Engine(lib, languages, engine_mode, configs, variables)
+        _local.engines[key] = engine
+    return engine
+
+
+def _finished_in_time(start: float, timeout: float, operation: str) -> bool:
+    """Did an operation that started at ``start`` finish within its timeout?
+
+    Orientation detection and layout analysis cannot be given a deadline the
+    way recognition can, so they run to completion and their result is
+    discarded if it took too long, as if the Tesseract executable had been
+    stopped.
+    """
+    elapsed = time.monotonic() - start
+    if elapsed <= timeout:
+        return True
+    log.debug(f"{operation} took {elapsed:.1f} s, longer than {timeout} s; ignoring it")
+    return False
+
+
+def get_orientation(
+    input_file: Path,
+    engine_mode: int | None,
+    timeout: float,
+    threads: int | None = None,
+) -> OrientationConfidence:
+    if timeout == 0:
+        return OrientationConfidence(angle=0, confidence=0.0)
+    start = time.monotonic()
+    engine = _get_engine(['osd'], engine_mode, threads=threads)
+    try:
+        engine.lib.TessBaseAPISetPageSegMode(engine.handle, PSM_OSD_ONLY)
+        engine.set_image(input_file)
+        orient_deg = ctypes.c_int()
+        orient_conf = ctypes.c_float()
+        script_name = ctypes.c_char_p()
+        script_conf = ctypes.c_float()
+        if not engine.lib.TessBaseAPIDetectOrientationScript(
+            engine.handle,
+            ctypes.byref(orient_deg),
+            ctypes.byref(orient_conf),
+            ctypes.byref(script_name),
+            ctypes.byref(script_conf),
+        ):
+            # Too few characters to tell
+            return OrientationConfidence(0, 0)
+    finally:
+        engine.clear()
+    if not _finished_in_time(start, timeout, "Orientation detection"):
+        return OrientationConfidence(angle=0, confidence=0.0)
+    return OrientationConfidence(angle=orient_deg.value, confidence=orient_conf.value)
+
+
+def _layout_deskew(engine: _Engine, timeout: float) -> float:
+    """Analyse the layout of the engine's image, and return its deskew angle.
+
+    Returns 0 if the analysis is skipped because ``timeout`` is 0, or took
+    longer than ``timeout`` seconds.
+    """
+    if timeout == 0:
+        return 0.0
+    start = time.monotonic()
+    iterator = engine.lib.TessBaseAPIAnalyseLayout(engine.handle)
+    if not iterator:
+        return 0.0  # Empty page
+    orientation, direction, order = ctypes.c_int(), ctypes.c_int(), ctypes.c_int()
+    deskew_radians = ctypes.c_float()
+    engine.lib.TessPageIteratorOrientation(
+        iterator,
+        ctypes.byref(orientation),
+        ctypes.byref(direction),
+        ctypes.byref(order),
+        ctypes.byref(deskew_radians),
+    )
+    engine.lib.TessPageIteratorDelete(iterator)
+    if not _finished_in_time(start, timeout, "Layout analysis"):
+        return 0.0
+    deskew_degrees = 180 / pi * deskew_radians.value
+    log.debug(f"Deskew angle: {deskew_degrees:.3f}")
+    return deskew_degrees
+
+
+def get_deskew(
+    input_file: Path,
+    languages: Sequence[str],
+    engine_mode: int | None,
+    timeout: float,
+    threads: int | None = None,
+) -> float:
+    """Gets angle to deskew this page, in degrees."""
+    if timeout == 0:
+        return 0.0
+    engine = _get_engine(languages, engine_mode, threads=threads)
+    try:
+        engine.lib.TessBaseAPISetPageSegMode(engine.handle, PSM_AUTO_ONLY)
+        engine.set_image(input_file)
+        return _layout_deskew(engine, timeout)
+    finally:
+        engine.clear()
+
+
+def _get_hocr_engine(
+    *,
+    languages: list[str],
+    engine_mode: int,
+    tessconfig: list[str],
+    pagesegmode: int,
+    thresholding: int,
+    user_words,
+    user_patterns,
+    threads: int | None = None,
+) -> _Engine:
+    """Return this thread's engine for OCR, set up for the given options."""
+    variables = {}
+    if user_words:
+        variables['user_words_file'] = fspath(user_words)
+    if user_patterns:
+        variables['user_patterns_file'] = fspath(user_patterns)
+    engine = _get_engine(languages, engine_mode, tessconfig, variables, threads)
+    engine.lib.TessBaseAPISetPageSegMode(
+        engine.handle, PSM_AUTO if pagesegmode is None else pagesegmode
+    )
+    if has_thresholding():
+        engine.set_variable('thresholding_method', str(thresholding))
+    return engine
+
+
+def _recognize(engine: _Engine, timeout: float) -> bool:
+    """Recognize the engine's image, returning False if the page is skipped."""
+    if timeout == 0:
+        page_timedout(timeout)
+        return False
+    start = time.monotonic()
+    if not engine.recognize(timeout):
+        if time.monotonic() - start >= timeout:
+            page_timedout(timeout)
+        else:
+            log.warning("[tesseract] could not recognize text on this page")
+        return False
+    return True
+
+
+def _write_hocr(
+    engine: _Engine,
+    input_file: Path,
+    output_hocr: Path,
+    output_text: Path,
+    timeout: float,
+) -> None:
+    """Recognize the engine's image, and write hOCR and text files."""
+    if not _recognize(engine, timeout):
+        _generate_null_hocr(output_hocr, output_text, input_file)
+        return
+    page = engine.get_text(engine.lib.TessBaseAPIGetHOCRText, 0)
+    text = engine.get_text(engine.lib.TessBaseAPIGetUTF8Text)
+    output_hocr.write_text(
+        HOCR_TEMPLATE.format(version=version(), page=page), encoding='utf-8'
+    )
+    output_text.write_text(text, encoding='utf-8')
+
+
+def _c_round(value: float) -> float:
+    """Round half away from zero, as C++ does."""
+    return copysign(floor(abs(value) + 0.5), value)
+
+
+def _is_rtl(words: Sequence[str]) -> bool:
+    """Are most of these words written right to left?"""
+    rtl = ltr = 0
+    for word in words:
+        for char in word:
+            bidi = unicodedata.bidirectional(char)
+            if bidi in ('R', 'AL'):
+                rtl += 1
+                break
+            if bidi == 'L':
+                ltr += 1
+                break
+    return rtl > ltr
+
+
+class _Paragraph:
+    """The lines of a paragraph, collected until its direction is known."""
+
+    def __init__(self, box, language: str):
+        self.box = box
+        self.word_breaks = language not in NO_WORD_BREAK_LANGUAGES
+        self.lines: list = []  # [box, baseline, is rendered, words]
+
+    def add_to(self, page: OcrPage, caption_words: list) -> None:
+        texts = [word[0] for line in self.lines for word in line[3]]
+        if any(texts):
+            page.add_paragraph(self.box)
+        rtl = _is_rtl(texts)
+        for box, baseline, rendered, words in self.lines:
+            if not rendered:
+                caption_words.extend(words)
+                continue
+            page.add_line(box, baseline, rtl=rtl, word_breaks=self.word_breaks)
+            for word in words:
+                page.add_word(*word)
+
+
+def _read_ocr_page(engine: _Engine, image_size: tuple[int, int]) -> OcrPage:
+    """Read the words that the engine recognized, as they would appear in hOCR.
+
+    Tesseract's C API does not give the direction of a paragraph, which its
+    hOCR output takes from the direction of the paragraph's words, so it is
+    found from the text of the words here.
+    """
+    lib = engine.lib
+    page = OcrPage(bbox=(0, 0, *image_size))
+    caption_words: list = []
+    iterator = lib.TessBaseAPIGetIterator(engine.handle)
+    if not iterator:
+        return page
+    page_iterator = lib.TessResultIteratorGetPageIterator(iterator)
+    coords = [ctypes.c_int() for _ in range(4)]
+    refs = [ctypes.byref(coord) for coord in coords]
+
+    def bounding_box(level):
+        if not lib.TessPageIteratorBoundingBox(page_iterator, level, *refs):
+            return None
+        return tuple(coord.value for coord in coords)
+
+    def baseline(line_box):
+        # As in hOCR, relative to the bottom left corner of the line, and
+        # rounded to 3 decimals, of which the hOCR renderer only reads the
+        # integer part of the intercept
+        if line_box is None or not lib.TessPageIteratorBaseline(
+            page_iterator, RIL_TEXTLINE, *refs
+        ):
+            return (0.0, 0.0)
+        x1, y1, x2, y2 = (coord.value for coord in coords)
+        if x1 == x2:
+            return (0.0, 0.0)
+        left, _top, _right, bottom = line_box
+        slope = (y2 - y1) / (x2 - x1)
+        intercept = (y1 - bottom) - slope * (x1 - left)
+        return (
+            _c_round(slope * 1000) / 1000,
+            float(int(_c_round(intercept * 1000) / 1000)),
+        )
+
+    paragraph = None
+    rendered = True
+    try:
+        while True:
+            text_p = lib.TessResultIteratorGetUTF8Text(iterator, RIL_WORD)
+            if text_p:
+                try:
+                    text = ctypes.string_at(text_p).decode('utf-8', errors='replace')
+                finally:
+                    lib.TessDeleteText(text_p)
+                if paragraph is None or lib.TessPageIteratorIsAtBeginningOf(
+                    page_iterator, RIL_BLOCK
+                ):
+                    rendered = lib.TessPageIteratorBlockType(page_iterator) != (
+                        PT_CAPTION_TEXT
+                    )
+                if paragraph is None or lib.TessPageIteratorIsAtBeginningOf(
+                    page_iterator, RIL_PARA
+                ):
+                    if paragraph is not None:
+                        paragraph.add_to(page, caption_words)
+                    language = lib.TessResultIteratorWordRecognitionLanguage(iterator)
+                    paragraph = _Paragraph(
+                        bounding_box(RIL_PARA), (language or b'').decode()
+                    )
+                if not paragraph.lines or lib.TessPageIteratorIsAtBeginningOf(
+                    page_iterator, RIL_TEXTLINE
+                ):
+                    line_box = bounding_box(RIL_TEXTLINE)
+                    paragraph.lines.append([line_box, baseline(line_box), rendered, []])
+                paragraph.lines[-1][3].append(
+                    (
+                        HocrTransform.normalize_text(text.strip()),
+                        bounding_box(RIL_WORD),
+                        int(lib.TessResultIteratorConfidence(iterator, RIL_WORD)),
+                    )
+                )
+            if not lib.TessResultIteratorNext(iterator, RIL_WORD):
+                break
+    finally:
+        lib.TessResultIteratorDelete(iterator)
+    if paragraph is not None:
+        paragraph.add_to(page, caption_words)
+    if not page.line_boxes:
+        # As in hOCR with no lines, render all words on one line
+        page.add_line(page.bbox)
+        for word in caption_words:
+            page.add_word(*word)
+    return page
+
+
+def generate_hocr(
+    *,
+    input_file: Path,
+    output_hocr: Path,
+    output_text: Path,
+    languages: list[str],
+    engine_mode: int,
+    tessconfig: list[str],
+    timeout: float,
+    pagesegmode: int,
+    thresholding: int,
+    user_words,
+    user_patterns,
+    threads: int | None = None,
+) -> None:
+    """Generate a hOCR file, which must be converted to PDF.
+
+    The arguments are the same as :func:`ocrmypdf._exec.tesseract.generate_hocr`.
+    """
+    if timeout == 0:
+        # OCR is disabled, so there is no need to load the languages
+        page_timedout(timeout)
+        _generate_null_hocr(output_hocr, output_text, input_file)
+        return
+    engine = _get_hocr_engine(
+        languages=languages,
+        engine_mode=engine_mode,
+        tessconfig=tessconfig,
+        pagesegmode=pagesegmode,
+        thresholding=thresholding,
+        user_words=user_words,
+        user_patterns=user_patterns,
+        threads=threads,
+    )
+    try:
+        engine.set_image(input_file)
+        _write_hocr(engine, input_file, output_hocr, output_text, timeout)
+    finally:
+        engine.clear()
+
+
+def generate_ocr_page(
+    *,
+    input_file: Path,
+    output_text: Path,
+    languages: list[str],
+    engine_mode: int,
+    tessconfig: list[str],
+    timeout: float,
+    pagesegmode: int,
+    thresholding: int,
+    user_words,
+    user_patterns,
+    threads: int | None = None,
+) -> OcrPage | None:
+    """Recognize an image, returning its words instead of writing a hOCR file.
+
+    The other arguments are the same as for :func:`generate_hocr`.
+
+    Returns:
+        The words, or ``None`` if the page was skipped.
+    """
+    if timeout == 0:
+        page_timedout(timeout)
+        output_text.write_text('[skipped page]', encoding='utf-8')
+        return None
+    engine = _get_hocr_engine(
+        languages=languages,
+        engine_mode=engine_mode,
+        tessconfig=tessconfig,
+        pagesegmode=pagesegmode,
+        thresholding=thresholding,
+        user_words=user_words,
+        user_patterns=user_patterns,
+        threads=threads,
+    )
+    try:
+        engine.set_image(input_file)
+        if not _recognize(engine, timeout):
+            output_text.write_text('[skipped page]', encoding='utf-8')
+            return None
+        with Image.open(input_file) as im:
+            image_size = im.size
+        ocr_page = _read_ocr_page(engine, image_size)
+        output_text.write_text(
+            engine.get_text(engine.lib.TessBaseAPIGetUTF8Text), encoding='utf-8'
+        )
+    finally:
+        engine.clear()
+    return ocr_page
+
+
+def analyze_page(
+    *,
+    input_file: Path,
+    output_hocr: Path,
+    output_text: Path,
+    rotate_pages: bool,
+    rotate_pages_threshold: float,
+    deskew: bool,
+    languages: list[str],
+    engine_mode: int,
+    tessconfig: list[str],
+    timeout: float,
+    non_ocr_timeout: float,
+    pagesegmode: int,
+    thresholding: int,
+    user_words,
+    user_patterns,
+    threads: int | None = None,
+    orientation: OrientationConfidence | None = None,
+    deskew_angle: float | None = None,
+) -> PageAnalysis:
+    """Find the orientation and skew of a page, and recognize it if upright.
+
+    The layout analysis used to find the skew angle is kept and reused for
+    recognition, so the page is only analysed once. An orientation or skew
+    angle that is already known, such as an estimate, is used instead of
+    asking Tesseract. Finding the orientation and skew angle is limited by
+    ``non_ocr_timeout``, and recognition by ``timeout``.
+    """
+    if rotate_pages and orientation is None:
+        orientation = get_orientation(input_file, engine_mode, non_ocr_timeout, threads)
+    analysis = PageAnalysis(orientation, deskew_angle, recognized=False)
+    if analysis.needs_correction(rotate_pages_threshold):
+        # The skew is found again once the page is upright
+        return analysis
+    engine = _get_hocr_engine(
+        languages=languages,
+        engine_mode=engine_mode,
+        tessconfig=tessconfig,
+        pagesegmode=pagesegmode,
+        thresholding=thresholding,
+        user_words=user_words,
+        user_patterns=user_patterns,
+        threads=threads,
+    )
+    try:
+        engine.set_image(input_file)
+        if deskew and deskew_angle is None:
+            analysis = analysis._replace(deskew=_layout_deskew(engine, non_ocr_timeout))
+            if analysis.needs_correction(rotate_pages_threshold):
+                return analysis
+        _write_hocr(engine, input_file, output_hocr, output_text, timeout)
+    finally:
+        engine.clear()
+    return analysis._replace(recognized=True)
@@ -6,7 +6,9 @@
 from __future__ import annotations
 
 import logging
+import os
 import re
+from collections.abc import Sequence
 from contextlib import suppress
 from math import pi
 from os import fspath
@@ -154,8 +156,23 @@ def _parse_tesseract_output(binary_output: bytes) -> dict[str, str]:
     return dict(gen())
 
 
+def tesseract_env(threads: int | None) -> dict[str, str] | None:
+    """Return the environment in which to run Tesseract with a thread limit.
+
+    Tesseract uses OpenMP, which by default starts a thread for every CPU in
+    each Tesseract process; ``OMP_THREAD_LIMIT`` limits this. Returns ``None``,
+    meaning the environment of this process, if there is no limit.
+    """
+    if threads is None:
+        return None
+    return {**os.environ, 'OMP_THREAD_LIMIT': str(threads)}
+
+
 def get_orientation(
-    input_file: Path, engine_mode: int | None, timeout: float
+    input_file: Path,
+    engine_mode: int | None,
+    timeout: float,
+    threads: int | None = None,
 ) -> OrientationConfidence:
     args_tesseract = tess_base_args(['osd'], engine_mode) + [
         '--psm',
@@ -165,7 +182,14 @@ def get_orientation(
     ]
 
     try:
-        p = run(args_tesseract, stdout=PIPE, stderr=STDOUT, timeout=timeout, check=True)
+        p = run(
+            args_tesseract,
+            stdout=PIPE,
+            stderr=STDOUT,
+            timeout=timeout,
+            check=True,
+            env=tesseract_env(threads),
+        )
     except TimeoutExpired:
         return OrientationConfidence(angle=0, confidence=0.0)
     except CalledProcessError as e:
@@ -187,7 +211,11 @@ def get_orientation(
 
 
 def get_deskew(
-    input_file: Path, languages: list[str], engine_mode: int | None, timeout: float
+    input_file: Path,
+    languages: list[str],
+    engine_mode: int | None,
+    timeout: float,
+    threads: int | None = None,
 ) -> float:
     """Gets angle to deskew this page, in degrees."""
     args_tesseract = tess_base_args(languages, engine_mode) + [
@@ -198,7 +226,14 @@ def get_deskew(
     ]
 
     try:
-        p = run(args_tesseract, stdout=PIPE, stderr=STDOUT, timeout=timeout, check=True)
+        p = run(
+            args_tesseract,
+            stdout=PIPE,
+            stderr=STDOUT,
+            timeout=timeout,
+            check=True,
+            env=tesseract_env(threads),
+        )
     except TimeoutExpired:
         return 0.0
     except CalledProcessError as e:
@@ -218,11 +253,19 @@ def get_deskew(
     return deskew_degrees
 
 
-def tesseract_log_output(stream: bytes) -> None:
+def tesseract_log_output(stream: bytes, *, quiet: bool = False) -> None:
+    """Log the messages Tesseract printed.
+
+    If ``quiet``, messages are logged at debug level, as when Tesseract
+    recognized several pages and its messages cannot be attributed to one.
+    """
     tlog = TesseractLoggerAdapter(
         log,
         extra=log.extra if hasattr(log, 'extra') else None,  # type: ignore
     )
+    info, warning, error = tlog.info, tlog.warning, tlog.error
+    if quiet:
+        info = warning = error = tlog.debug
 
     if not stream:
         return
@@ -238,25 +281,25 @@ def tesseract_log_output(stream: bytes) -> None:
         elif line.startswith("Warning in pixReadMem"):
             continue
         elif 'diacritics' in line:
-            tlog.warning("lots of diacritics - possibly poor OCR")
+            warning("lots of diacritics - possibly poor OCR")
         elif line.startswith('OSD: Weak margin'):
-            tlog.warning("unsure about page orientation")
+            warning("unsure about page orientation")
         elif 'Error in pixScanForForeground' in line:
             pass  # Appears to be spurious/problem with nonwhite borders
         elif 'Error in boxClipToRectangle' in line:
             pass  # Always appears with pixScanForForeground message
         elif 'parameter not found: ' in line.lower():
-            tlog.error(line.strip())
+            error(line.strip())
             problem = line.split('found: ')[1]
             raise TesseractConfigError(problem)
         elif 'error' in line.lower() or 'exception' in line.lower():
-            tlog.error(line.strip())
+            error(line.strip())
         elif 'warning' in line.lower():
-            tlog.warning(line.strip())
+            warning(line.strip())
         elif 'read_params_file' in line.lower():
-            tlog.error(line.strip())
+            error(line.strip())
         else:
-            tlog.info(line.strip())
+            info(line.strip())
 
 
 def page_timedout(timeout: float) -> None:
@@ -274,23 +317,15 @@ def _generate_null_hocr(output_hocr: Path, output_text: Path, image: Path) -> No
     output_text.write_text('[skipped page]', encoding='utf-8')
 
 
-def generate_hocr(
-    *,
-    input_file: Path,
-    output_hocr: Path,
-    output_text: Path,
+def _hocr_args(
     languages: list[str],
     engine_mode: int,
-    tessconfig: list[str],
-    timeout: float,
     pagesegmode: int,
     thresholding: int,
     user_words,
     user_patterns,
-) -> None:
-    """Generate a hOCR file, which must be converted to PDF."""
-    prefix = output_hocr.with_suffix('')
-
+) -> list[str]:
+    """Return the arguments for Tesseract that precede the input and output files."""
     args_tesseract = tess_base_args(languages, engine_mode)
 
     if pagesegmode is not None:
@@ -304,13 +339,44 @@ def generate_hocr(
 
     if user_patterns:
         args_tesseract.extend(['--user-patterns', user_patterns])
+    return args_tesseract
+
+
+def generate_hocr(
+    *,
+    input_file: Path,
+    output_hocr: Path,
+    output_text: Path,
+    languages: list[str],
+    engine_mode: int,
+    tessconfig: list[str],
+    timeout: float,
+    pagesegmode: int,
+    thresholding: int,
+    user_words,
+    user_patterns,
+    threads: int | None = None,
+) -> None:
+    """Generate a hOCR file, which must be converted to PDF."""
+    prefix = output_hocr.with_suffix('')
+
+    args_tesseract = _hocr_args(
+        languages, engine_mode, pagesegmode, thresholding, user_words, user_patterns
+    )
 
     # Reminder: test suite tesseract test plugins will break after any changes
     # to the number of order parameters here
     args_tesseract.extend([fspath(input_file), fspath(prefix), 'hocr', 'txt'])
     args_tesseract.extend(tessconfig)
     try:
-        p = run(args_tesseract, stdout=PIPE, stderr=STDOUT, timeout=timeout, check=True)
+        p = run(
+            args_tesseract,
+            stdout=PIPE,
+            stderr=STDOUT,
+            timeout=timeout,
+            check=True,
+            env=tesseract_env(threads),
+        )
         stdout = p.stdout
     except TimeoutExpired:
         # Generate a HOCR file with no recognized text if tesseract times out
@@ -333,6 +399,154 @@ def generate_hocr(
             prefix.with_suffix('.txt').replace(output_text)
 
 
+def split_hocr_pages(hocr: str, *, partial: bool = False) -> list[str]:
+    """Split a multi-page hOCR document into a document for each page.
+
+    If ``partial``, the document may have been cut off, because Tesseract was
+    stopped; then the pages that are followed by another page are returned.
+    """
+    starts = [m.start() for m in re.finditer(r'<div class=[\'"]ocr_page[\'"]', hocr)]
+    end = hocr.rfind('</body>')
+    if not starts:
+        return []
+    if end > starts[-1]:
+        footer = hocr[end:]
+        bounds = starts + [end]
+    elif partial:
+        footer = '</body>\n</html>\n'
+        bounds = starts
+    else:
+        return []
+    header = hocr[: starts[0]]
+    return [
+        header + hocr[start:stop].rstrip() + '\n ' + footer
+        for start, stop in zip(bounds, bounds[1:])
+    ]
+
+
+def _recover_hocr_batch(batch: Sequence[tuple[Path, Path, Path]], prefix: Path) -> int:
+    """Keep the pages that a stopped batch run of Tesseract had finished.
+
+    Tesseract appends to its output files as it finishes each image, so when
+    it is stopped, a page is finished if the next page has begun in both files.
+
+    Returns:
+        The number of pages, from the start of the batch, that were kept.
+    """
+    try:
+        hocr = prefix.with_suffix('.hocr').read_text(encoding='utf-8')
+        text = prefix.with_suffix('.txt').read_text(encoding='utf-8')
+    except FileNotFoundError:
+        return 0
+    pages = split_hocr_pages(hocr, partial=True)
+    texts = text.split('\f')[:-1]
+    finished = min(len(pages), len(texts), len(batch))
+    for (_, output_hocr, output_text), page, text in zip(
+        batch[:finished], pages, texts
+    ):
+        output_hocr.write_text(page, encoding='utf-8')
+        output_text.write_text(text, encoding='utf-8')
+    if finished:
+        log.debug("Keeping %d pages that Tesseract finished together", finished)
+    return finished
+
+
+def generate_hocr_batch(
+    *,
+    batch: Sequence[tuple[Path, Path, Path]],
+    languages: list[str],
+    engine_mode: int,
+    tessconfig: list[str],
+    timeout: float,
+    pagesegmode: int,
+    thresholding: int,
+    user_words,
+    user_patterns,
+    threads: int | None = None,
+) -> None:
+    """Generate hOCR files for several images with one run of Tesseract.
+
+    Tesseract is given a list of the images, and produces one hOCR file and one
+    text file for all of them, which are split into files for each image.
+    The whole run is limited to ``timeout`` seconds, as one image would be. If
+    the run fails or times out, the images that Tesseract had finished are
+    kept, and the others are recognized on their own, so that errors, timeouts
+    and empty pages are handled for the image responsible. An image that hangs
+    Tesseract thus holds up a worker for at most twice the timeout.
+    Tesseract's messages about the batch are logged at debug level, since they
+    cannot be attributed to one image.
+    """
+    kwargs = dict(
+        languages=languages,
+        engine_mode=engine_mode,
+        tessconfig=tessconfig,
+        timeout=timeout,
+        pagesegmode=pagesegmode,
+        thresholding=thresholding,
+        user_words=user_words,
+        user_patterns=user_patterns,
+        threads=threads,
+    )
+    if len(batch) > 1 and timeout > 0:
+        first_hocr = batch[0][1]
+        prefix = first_hocr.with_name(f'{first_hocr.stem}_batch')
+        image_list = prefix.with_suffix('.list')
+        image_list.write_text(
+            ''.join(f'{fspath(input_file)}\n' for input_file, _, _ in batch),
+            encoding='utf-8',
+        )
+        args_tesseract = _hocr_args(
+            languages, engine_mode, pagesegmode, thresholding, user_words, user_patterns
+        )
+        args_tesseract.extend([fspath(image_list), fspath(prefix), 'hocr', 'txt'])
+        args_tesseract.extend(tessconfig)
+        try:
+            p = run(
+                args_tesseract,
+                stdout=PIPE,
+                stderr=STDOUT,
+                timeout=timeout,
+                check=True,
+                env=tesseract_env(threads),
+            )
+        except TimeoutExpired:
+            log.debug("Tesseract took too long to OCR pages together")
+            batch = batch[_recover_hocr_batch(batch, prefix) :]
+        except CalledProcessError as e:
+            log.debug("Tesseract could not OCR pages together: %s", e)
+            tesseract_log_output(e.output, quiet=True)
+            batch = batch[_recover_hocr_batch(batch, prefix) :]
+        else:
+            tesseract_log_output(p.stdout, quiet=True)
+            pages = split_hocr_pages(
+                prefix.with_suffix('.hocr').read_text(encoding='utf-8')
+            )
+            texts = prefix.with_suffix('.txt').read_text(encoding='utf-8').split('\f')
+            if len(texts) == len(batch) + 1 and not texts[-1].strip():
+                del texts[-1]  # Tesseract versions that end every page with \f
+            if len(pages) == len(texts) == len(batch):
+                for (_, output_hocr, output_text), page, text in zip(
+                    batch, pages, texts
+                ):
+                    output_hocr.write_text(page, encoding='utf-8')
+                    output_text.write_text(text, encoding='utf-8')
+                return
+            log.debug(
+                "Tesseract produced %d pages of hOCR and %d of text for %d images",
+                len(pages),
+                len(texts),
+                len(batch),
+            )
+
+    for input_file, output_hocr, output_text in batch:
+        generate_hocr(
+            input_file=input_file,
+            output_hocr=output_hocr,
+            output_text=output_text,
+            **kwargs,
+        )
+
+
 def use_skip_page(output_pdf: Path, output_text: Path) -> None:
     output_text.write_text('[skipped page]', encoding='utf-8')
 
@@ -353,6 +567,7 @@ def generate_pdf(
     thresholding: int,
     user_words,
     user_patterns,
+    threads: int | None = None,
 ) -> None:
     """Generate a PDF using Tesseract's internal PDF generator.
 
@@ -383,7 +598,14 @@ def generate_pdf(
     args_tesseract.extend([fspath(input_file), fspath(prefix), 'pdf', 'txt'])
     args_tesseract.extend(tessconfig)
     try:
-        p = run(args_tesseract, stdout=PIPE, stderr=STDOUT, timeout=timeout, check=True)
+        p = run(
+            args_tesseract,
+            stdout=PIPE,
+            stderr=STDOUT,
+            timeout=timeout,
+            check=True,
+            env=tesseract_env(threads),
+        )
         stdout = p.stdout
         with suppress(FileNotFoundError):
             prefix.with_suffix('.txt').replace(output_text)
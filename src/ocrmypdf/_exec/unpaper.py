@@ -27,6 +27,9 @@ from ocrmypdf.subprocess import get_version, run
 
 UNPAPER_IMAGE_PIXEL_LIMIT = 256 * 1024 * 1024
 
+# Image formats (as named by Pillow) that unpaper reads
+UNPAPER_INPUT_FORMATS = frozenset(['PNG', 'PPM'])
+
 DecFloat = Decimal | float
 
 log = logging.getLogger(__name__)
@@ -53,18 +56,25 @@ def version() -> Version:
 
 @contextmanager
 def _setup_unpaper_io(input_file: Path) -> Iterator[tuple[Path, Path, Path]]:
-    with Image.open(input_file) as im:
-        if im.width * im.height >= UNPAPER_IMAGE_PIXEL_LIMIT:
-            raise UnpaperImageTooLargeError(w=im.width, h=im.height)
-
     with TemporaryDirectory(ignore_cleanup_errors=True) as tmpdir:
         tmppath = Path(tmpdir)
-        # No changes, PNG input, just use the file we already have
-        input_png = input_file
+        with Image.open(input_file) as im:
+            if im.width * im.height >= UNPAPER_IMAGE_PIXEL_LIMIT:
+                raise UnpaperImageTooLargeError(w=im.width, h=im.height)
+            if im.format in UNPAPER_INPUT_FORMATS:
+                # No changes, just use the file we already have
+                input_image = input_file
+            else:
+                # Other formats such as TIFF may not be readable by unpaper,
+                # so convert to uncompressed PNM, which is fast to write
+                input_image = tmppath / 'input.pnm'
+                if im.mode not in ('1', 'L', 'RGB'):
+                    im = im.convert('RGB')
+                im.save(input_image, format='PPM')
         # unpaper can write .png too, but it seems to write them slowly
         # adds a few seconds to test suite - so just use pnm
         output_pnm = tmppath / 'output.pnm'
-        yield input_png, output_pnm, tmppath
+        yield input_image, output_pnm, tmppath
 
 
 def run_unpaper(
@@ -72,7 +82,7 @@ def run_unpaper(
 ) -> None:
     args_unpaper = ['unpaper', '-v', '--dpi', str(round(dpi, 6))] + mode_args
 
-    with _setup_unpaper_io(input_file) as (input_png, output_pnm, tmpdir):
+    with _setup_unpaper_io(input_file) as (input_image, output_pnm, tmpdir):
         # To prevent any shenanigans from accepting arbitrary parameters in
         # --unpaper-args, we:
         # 1) run with cwd set to a tmpdir with only unpaper's files
@@ -80,7 +90,7 @@ def run_unpaper(
         # 3) append absolute paths for the input and output file
         # This should ensure that a user cannot clobber some other file with
         # their unpaper arguments (whether intentionally or otherwise)
-        args_unpaper.extend([os.fspath(input_png), os.fspath(output_pnm)])
+        args_unpaper.extend([os.fspath(input_image), os.fspath(output_pnm)])
         run(
             args_unpaper,
             close_fds=True,
@@ -6,14 +6,20 @@
 from __future__ import annotations
 
 import logging
+from bisect import bisect_right
+from collections.abc import Iterator, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import suppress
 from enum import Enum
 from pathlib import Path
+from typing import Generic, NamedTuple, TypeVar
 
 from pikepdf import (
+    Array,
     Dictionary,
     Matrix,
     Name,
+    Object,
     Operator,
     Page,
     Pdf,
@@ -23,7 +29,10 @@ from pikepdf import (
     unparse_content_stream,
 )
 
+from ocrmypdf._concurrent import Executor
 from ocrmypdf._jobcontext import PdfContext
+from ocrmypdf.hocrtransform._font import GlyphlessFont
+from ocrmypdf.hocrtransform._textlayer import TextLayer
 
 
 class RenderMode(Enum):
@@ -33,6 +42,11 @@ class RenderMode(Enum):
 
 log = logging.getLogger(__name__)
 MAX_REPLACE_PAGES = 100
+MAX_REORDER_PAGES = 100
+MAX_STREAMING_PAGES = 100
+MIN_PARTITION_PAGES = 100
+
+T = TypeVar('T')
 
 
 def _ensure_dictionary(obj: Dictionary | Stream, name: Name):
@@ -85,10 +99,158 @@ def strip_invisible_text(pdf: Pdf, page: Page):
     page.Contents = Stream(pdf, content_stream)
 
 
+class ReorderBuffer(Generic[T]):
+    """Release items in index order when they arrive in arbitrary order.
+
+    Items are held until all items with a lower index have been released.
+    The buffer is bounded: if more than ``capacity`` items are waiting on a
+    straggler, the lowest indexed waiting item is released early, out of order,
+    so that the number of items held never exceeds ``capacity``.
+    """
+
+    def __init__(self, capacity: int, start: int = 0):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.next_index = start
+        self._pending: dict[int, T] = {}
+        # Indexes after next_index that were released early
+        self._released: set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def push(self, index: int, item: T) -> Iterator[T]:
+        """Add an item and yield all items that are now ready, in order."""
+        self._pending[index] = item
+        yield from self._release_ready()
+        while len(self._pending) > self.capacity:
+            lowest = min(self._pending)
+            log.debug("Reorder buffer full, releasing item %d out of order", lowest)
+            self._released.add(lowest)
+            yield self._pending.pop(lowest)
+
+    def _release_ready(self) -> Iterator[T]:
+        while True:
+            if self.next_index in self._pending:
+                yield self._pending.pop(self.next_index)
+            elif self.next_index in self._released:
+                self._released.remove(self.next_index)
+            else:
+                return
+            self.next_index += 1
+
+    def drain(self) -> Iterator[T]:
+        """Yield all remaining items in index order."""
+        for index in sorted(self._pending):
+            yield self._pending.pop(index)
+            self.next_index = index + 1
+        self._released.clear()
+
+
+def _is_direct(obj) -> bool:
+    """Whether obj, and everything it contains, is a direct object."""
+    if not isinstance(obj, Object):
+        return True
+    if obj.is_indirect:
+        return False
+    if isinstance(obj, Array):
+        return all(_is_direct(item) for item in obj)
+    if isinstance(obj, Dictionary):
+        return all(_is_direct(value) for value in obj.values())
+    return True
+
+
+class ImagePage(NamedTuple):
+    """A page that draws a single image, as bytes rather than as a PDF.
+
+    Workers send pages this way so that the grafter can build them in the base
+    PDF without opening a PDF for each page. The image data is kept exactly as
+    it is encoded in the PDF the page was taken from.
+    """
+
+    page: bytes
+    """The page dictionary, without its Contents, Resources and Parent."""
+    content: bytes
+    """The content stream of the page."""
+    image_name: str
+    """Resource name of the image."""
+    image: bytes
+    """The image dictionary, without its Length."""
+    image_data: bytes
+    """The encoded image data."""
+
+    @classmethod
+    def from_page(cls, page: Page) -> ImagePage | None:
+        """Take a page that draws a single image apart.
+
+        Returns None if the page has other resources, or refers to any other
+        objects, such as an ICC profile, which would be lost.
+        """
+        resources = page.obj.get(Name.Resources)
+        contents = page.obj.get(Name.Contents)
+        if not isinstance(resources, Dictionary) or set(resources.keys()) != {
+            '/XObject'
+        }:
+            return None
+        if not isinstance(contents, Stream) or len(resources.XObject) != 1:
+            return None
+        ((image_name, image),) = resources.XObject.items()
+        if not isinstance(image, Stream) or image.get(Name.Subtype) != Name.Image:
+            return None
+        page_dict = Dictionary(
+            {
+                key: value
+                for key, value in page.obj.items()
+                if key not in ('/Contents', '/Resources', '/Parent')
+            }
+        )
+        image_dict = Dictionary(
+            {key: value for key, value in image.stream_dict.items() if key != '/Length'}
+        )
+        if not (_is_direct(page_dict) and _is_direct(image_dict)):
+            return None
+        return cls(
+            page=page_dict.unparse(),
+            content=contents.read_bytes(),
+            image_name=str(image_name),
+            image=image_dict.unparse(),
+            image_data=image.read_raw_bytes(),
+        )
+
+    def to_page(self, pdf: Pdf) -> Page:
+        """Build the page in pdf, outside of its page tree."""
+        page = Object.parse(self.page)
+        image = pdf.make_stream(self.image_data, Object.parse(self.image))
+        page.Resources = Dictionary(XObject=Dictionary({self.image_name: image}))
+        page.Contents = pdf.make_stream(self.content)
+        return Page(pdf.make_indirect(page))
+
+
+class _GraftRequest(NamedTuple):
+    pageno: int
+    image: Path | ImagePage | None
+    textpdf: Path | TextLayer | None
+    autorotate_correction: int
+
+
 class OcrGrafter:
-    """Manages grafting text-only PDFs onto regular PDFs."""
+    """Manages grafting text-only PDFs onto regular PDFs.
+
+    In the default mode, pages are grafted as soon as they are delivered and the
+    working PDF is saved and reloaded every ``MAX_REPLACE_PAGES`` emplacements to
+    keep a lid on memory usage.
+
+    In streaming mode, delivered pages are held in a bounded reorder buffer and
+    grafted in page order as they become contiguous. Every
+    ``MAX_STREAMING_PAGES`` pages, the pages grafted so far are written out as a
+    partition, containing only those pages, and the input PDF is reopened, so
+    that memory use does not grow with the number of pages. The working PDF is
+    never saved and reopened; :meth:`finalize` merges the partitions into the
+    input PDF and writes it once.
+    """
 
-    def __init__(self, context: PdfContext):
+    def __init__(self, context: PdfContext, *, streaming: bool = False):
         self.context = context
         self.path_base = context.origin
 
@@ -103,21 +265,58 @@ class OcrGrafter:
         self.interim_count = 0
         self.render_mode = RenderMode.UNDERNEATH
 
+        self.streaming = streaming
+        self.reorder_buffer: ReorderBuffer[_GraftRequest] | None = (
+            ReorderBuffer(MAX_REORDER_PAGES) if streaming else None
+        )
+
+        # Pages grafted since the last partition was written, pages replaced by
+        # their image, and the text layers added to each page
+        self.grafted_pages: list[int] = []
+        self.emplaced_pages: set[int] = set()
+        self.text_layers: dict[int, list[Name]] = {}
+        self.partitions: list[GraftedPartition] = []
+
     def graft_page(
         self,
         *,
         pageno: int,
-        image: Path | None,
-        textpdf: Path | None,
+        image: Path | ImagePage | None,
+        textpdf: Path | TextLayer | None,
         autorotate_correction: int,
     ):
+        """Graft the image and text layer of a page onto the base PDF.
+
+        The image and text layer may be files, or the objects themselves, in
+        which case no PDF needs to be opened to graft them.
+
+        In streaming mode, the page may be held until all preceding pages have
+        been delivered.
+        """
+        request = _GraftRequest(pageno, image, textpdf, autorotate_correction)
+        if self.reorder_buffer is None:
+            self._graft_page(request)
+            return
+        for ready in self.reorder_buffer.push(pageno, request):
+            self._graft_page(ready)
+
+    def _graft_page(self, request: _GraftRequest):
+        pageno, image, textpdf, autorotate_correction = request
         if textpdf and not self.font:
             self.font, self.font_key = self._find_font(textpdf)
 
         emplaced_page = False
         content_rotation = self.pdfinfo[pageno].rotation
-        path_image = Path(image).resolve() if image else None
-        if path_image is not None and path_image != self.path_base:
+        path_image = Path(image).resolve() if isinstance(image, Path) else None
+        if isinstance(image, ImagePage):
+            log.debug("Emplacement update")
+            self.emplacements += 1
+            self.pdf_base.pages[pageno].emplace(
+                image.to_page(self.pdf_base), retain=(Name.Parent,)
+            )
+            self.emplaced_pages.add(pageno)
+            emplaced_page = True
+        elif path_image is not None and path_image != self.path_base:
             # We are updating the old page with a rasterized PDF of the new
             # page (without changing objgen, to preserve references)
             log.debug("Emplacement update")
@@ -130,6 +329,7 @@ class OcrGrafter:
                     local_image_page, retain=(Name.Parent,)
                 )
                 del self.pdf_base.pages[-1]
+            self.emplaced_pages.add(pageno)
             emplaced_page = True
 
         # Calculate if the text is misaligned compared to the content
@@ -166,7 +366,12 @@ class OcrGrafter:
             f"Page rotation: (content, auto) -> page = "
             f"({content_rotation}, {autorotate_correction}) -> {page_rotation}"
         )
-        if self.emplacements % MAX_REPLACE_PAGES == 0:
+        self.grafted_pages.append(pageno)
+        if self.streaming:
+            if len(self.grafted_pages) >= MAX_STREAMING_PAGES:
+                self._write_partition()
+                self.pdf_base = Pdf.open(self.path_base)
+        elif self.emplacements % MAX_REPLACE_PAGES == 0:
             self.save_and_reload()
 
     def save_and_reload(self) -> None:
@@ -200,14 +405,83 @@ class OcrGrafter:
         self.interim_count += 1
 
     def finalize(self):
+        if self.streaming:
+            return merge_partitions(self.context, self.finalize_partitions())
         self.pdf_base.save(self.output_file)
         self.pdf_base.close()
         return self.output_file
 
-    def _find_font(self, text: Path) -> tuple[Dictionary | None, Name | None]:
-        """Copy a font from the filename text into pdf_base."""
+    def finalize_partitions(self) -> list[GraftedPartition]:
+        """Write the pages not yet written, and return all partitions written.
+
+        The partitions are to be merged by :func:`merge_partitions`.
+        """
+        if self.reorder_buffer is not None:
+            for request in self.reorder_buffer.drain():
+                self._graft_page(request)
+        if self.grafted_pages:
+            self._write_partition()
+        self.pdf_base.close()
+        return self.partitions
+
+    def _write_partition(self) -> None:
+        """Write the pages grafted since the last partition, alone.
+
+        Pages that were replaced by their image are written whole. Other pages
+        are written with only their rotation and, if text layers were grafted
+        onto them, their new content stream and text layers, so that the
+        resources they already had are not copied.
+        """
+        pagenos = self.grafted_pages
+        output_file = self.output_file.with_suffix(f'.part{pagenos[0] + 1:06d}.pdf')
+        with Pdf.new() as pdf:
+            for pageno in pagenos:
+                page = self.pdf_base.pages[pageno]
+                if pageno in self.emplaced_pages:
+                    pdf.pages.append(page)
+                    continue
+                changes = Dictionary(
+                    Type=Name.Page, MediaBox=page.mediabox, Rotate=page.Rotate
+                )
+                if text_layers := self.text_layers.get(pageno):
+                    changes.Contents = page.Contents
+                    changes.Resources = Dictionary(
+                        XObject=Dictionary(
+                            {
+                                str(name): page.Resources.XObject[name]
+                                for name in text_layers
+                            }
+                        )
+                    )
+                pdf.pages.append(Page(self.pdf_base.make_indirect(changes)))
+            pdf.save(output_file)
+        self.pdf_base.close()
+        self.partitions.append(
+            GraftedPartition(output_file, pagenos, sorted(self.emplaced_pages))
+        )
+        self.grafted_pages = []
+        self.emplaced_pages = set()
+        self.text_layers = {}
+        # The font was added to the closed PDF
+        self.font, self.font_key = None, None
+
+    def _find_font(
+        self, text: Path | TextLayer
+    ) -> tuple[Dictionary | None, Name | None]:
+        """Copy a font from the filename text into pdf_base.
+
+        Text layers do not contain their font, so the glyphless font is added to
+        pdf_base instead.
+        """
         font, font_key = None, None
         possible_font_names = ('/f-0-0', '/F1')
+        try:
+            layer = text if isinstance(text, TextLayer) else TextLayer.read(text)
+        except FileNotFoundError:
+            return None, None
+        if layer is not None:
+            font_key = Name(layer.font)
+            return self._glyphless_font(font_key), font_key
         try:
             with Pdf.open(text) as pdf_text:
                 try:
@@ -235,92 +509,331 @@ class OcrGrafter:
             # PdfError occurs if a 0-length file is written e.g. due to OCR timeout
             return None, None
 
+    def _glyphless_font(self, font_key: Name) -> Dictionary:
+        """Return the glyphless font of pdf_base, adding it if necessary."""
+        if self.interim_count > 0:
+            # save_and_reload attached the font we added earlier to page 1
+            with suppress(AttributeError, KeyError):
+                font = self.pdf_base.pages[0].Resources.Font[font_key]
+                if font.get(Name.BaseFont) == Name.GlyphLessFont:
+                    return font
+        return GlyphlessFont().register(self.pdf_base)
+
     def _graft_text_layer(
         self,
         *,
         page_num: int,
-        textpdf: Path,
+        textpdf: Path | TextLayer,
         font: Dictionary,
         font_key: Name,
         text_rotation: int,
         strip_old_text: bool,
     ):
-        """Insert the text layer from text page 0 on to pdf_base at page_num."""
+        """Insert the text layer, or text page 0, on to pdf_base at page_num."""
         # pylint: disable=invalid-name
 
         log.debug("Grafting")
-        if Path(textpdf).stat().st_size == 0:
+        if isinstance(textpdf, TextLayer):
+            layer = textpdf
+        elif Path(textpdf).stat().st_size == 0:
             return
+        else:
+            layer = TextLayer.read(textpdf)
+        if layer is None:
+            with Pdf.open(textpdf) as pdf_text:
+                mediabox = pdf_text.pages[0].mediabox
+                layer = TextLayer(
+                    pdf_text.pages[0].Contents.read_bytes(),
+                    float(mediabox[2] - mediabox[0]),
+                    float(mediabox[3] - mediabox[1]),
+                )
 
         # This is a pointer indicating a specific page in the base file
-        with Pdf.open(textpdf) as pdf_text:
-            pdf_text_contents = pdf_text.pages[0].Contents.read_bytes()
-
-            base_page = self.pdf_base.pages.p(page_num)
-
-            # The text page always will be oriented up by this stage but the original
-            # content may have a rotation applied. Wrap the text stream with a rotation
-            # so it will be oriented the same way as the rest of the page content.
-            # (Previous versions OCRmyPDF rotated the content layer to match the text.)
-            mediabox = pdf_text.pages[0].mediabox
-            wt, ht = mediabox[2] - mediabox[0], mediabox[3] - mediabox[1]
-
-            mediabox = base_page.mediabox
-            wp, hp = mediabox[2] - mediabox[0], mediabox[3] - mediabox[1]
-
-            translate = Matrix().translated(-wt / 2, -ht / 2)
-            untranslate = Matrix().translated(wp / 2, hp / 2)
-            corner = Matrix().translated(mediabox[0], mediabox[1])
-            # -rotation because the input is a clockwise angle and this formula
-            # uses CCW
-            text_rotation = -text_rotation % 360
-            rotate = Matrix().rotated(text_rotation)
-
-            # Because of rounding of DPI, we might get a text layer that is not
-            # identically sized to the target page. Scale to adjust. Normally this
-            # is within 0.998.
-            if text_rotation in (90, 270):
-                wt, ht = ht, wt
-            scale_x = wp / wt
-            scale_y = hp / ht
-
-            # log.debug('%r', scale_x, scale_y)
-            scale = Matrix().scaled(scale_x, scale_y)
-
-            # Translate the text so it is centered at (0, 0), rotate it there, adjust
-            # for a size different between initial and text PDF, then untranslate, and
-            # finally move the lower left corner to match the mediabox.
-            ctm = translate @ rotate @ scale @ untranslate @ corner
-            log.debug("Grafting with ctm %r", ctm)
-
-            base_resources = _ensure_dictionary(base_page.obj, Name.Resources)
-            base_xobjs = _ensure_dictionary(base_resources, Name.XObject)
-            text_xobj_name = Name.random(prefix="OCR-")
-            xobj = self.pdf_base.make_stream(pdf_text_contents)
-            base_xobjs[text_xobj_name] = xobj
-            xobj.Type = Name.XObject
-            xobj.Subtype = Name.Form
-            xobj.FormType = 1
-            xobj.BBox = mediabox
-            _update_resources(obj=xobj, font=font, font_key=font_key)
-
-            pdf_draw_xobj = (
-                (b'q %s cm\n' % ctm.encode()) + (b'%s Do\n' % text_xobj_name) + b'\nQ\n'
+        base_page = self.pdf_base.pages.p(page_num)
+
+        # The text page always will be oriented up by this stage but the original
+        # content may have a rotation applied. Wrap the text stream with a rotation
+        # so it will be oriented the same way as the rest of the page content.
+        # (Previous versions OCRmyPDF rotated the content layer to match the text.)
+        wt, ht = layer.width, layer.height
+
+        mediabox = base_page.mediabox
+        wp, hp = float(mediabox[2] - mediabox[0]), float(mediabox[3] - mediabox[1])
+
+        translate = Matrix().translated(-wt / 2, -ht / 2)
+        untranslate = Matrix().translated(wp / 2, hp / 2)
+        corner = Matrix().translated(mediabox[0], mediabox[1])
+        # -rotation because the input is a clockwise angle and this formula
+        # uses CCW
+        text_rotation = -text_rotation % 360
+        rotate = Matrix().rotated(text_rotation)
+
+        # Because of rounding of DPI, we might get a text layer that is not
+        # identically sized to the target page. Scale to adjust. Normally this
+        # is within 0.998.
+        if text_rotation in (90, 270):
+            wt, ht = ht, wt
+        scale_x = wp / wt
+        scale_y = hp / ht
+
+        # log.debug('%r', scale_x, scale_y)
+        scale = Matrix().scaled(scale_x, scale_y)
+
+        # Translate the text so it is centered at (0, 0), rotate it there, adjust
+        # for a size different between initial and text PDF, then untranslate, and
+        # finally move the lower left corner to match the mediabox.
+        ctm = translate @ rotate @ scale @ untranslate @ corner
+        log.debug("Grafting with ctm %r", ctm)
+
+        base_resources = _ensure_dictionary(base_page.obj, Name.Resources)
+        base_xobjs = _ensure_dictionary(base_resources, Name.XObject)
+        text_xobj_name = Name.random(prefix="OCR-")
+        xobj = self.pdf_base.make_stream(layer.content)
+        if layer.compressed:
+            xobj.Filter = Name.FlateDecode
+        base_xobjs[text_xobj_name] = xobj
+        xobj.Type = Name.XObject
+        xobj.Subtype = Name.Form
+        xobj.FormType = 1
+        xobj.BBox = mediabox
+        _update_resources(obj=xobj, font=font, font_key=font_key)
+
+        pdf_draw_xobj = (
+            (b'q %s cm\n' % ctm.encode()) + (b'%s Do\n' % text_xobj_name) + b'\nQ\n'
+        )
+        new_text_layer = Stream(self.pdf_base, pdf_draw_xobj)
+
+        if strip_old_text:
+            strip_invisible_text(self.pdf_base, base_page)
+        base_page.contents_coalesce()
+        if self.render_mode == RenderMode.ON_TOP:
+            # Add q/Q to ensure content we append is drawn correctly
+            # Strictly speaking this needs to trace the whole q/Q stack in case
+            # stack is not balanced.
+            original = base_page.Contents.read_bytes()
+            base_page.Contents.write(b'q\n' + original + b'\nQ\n')
+        base_page.contents_add(
+            new_text_layer, prepend=self.render_mode == RenderMode.UNDERNEATH
+        )
+        base_page.contents_coalesce()
+
+        _update_resources(obj=base_page.obj, font=font, font_key=font_key)
+        self.text_layers.setdefault(page_num - 1, []).append(text_xobj_name)
+
+
+class GraftedPartition(NamedTuple):
+    """Pages grafted in streaming mode, written by :class:`OcrGrafter`."""
+
+    path: Path
+    """PDF of the grafted pages, in order."""
+    pagenos: list[int]
+    """Page numbers of the pages, 0-based."""
+    emplaced: list[int]
+    """Page numbers of the pages that were replaced by their image."""
+
+
+def partition_pages(npages: int, max_partitions: int) -> list[range]:
+    """Split the pages of a document into ranges of pages to graft in parallel.
+
+    Each partition has at least ``MIN_PARTITION_PAGES`` pages, since each one
+    is written to a file and merged.
+    """
+    count = max(1, min(max_partitions, npages // MIN_PARTITION_PAGES))
+    bounds = [npages * n // count for n in range(count + 1)]
+    return [range(start, stop) for start, stop in zip(bounds, bounds[1:])]
+
+
+def graft_partition(
+    context: PdfContext, requests: Sequence[_GraftRequest]
+) -> list[GraftedPartition]:
+    """Graft a partition of pages onto a copy of the input PDF, in a worker."""
+    grafter = OcrGrafter(context, streaming=True)
+    for request in requests:
+        grafter._graft_page(request)
+    return grafter.finalize_partitions()
+
+
+def _share_font(obj: Dictionary | Stream, font: Dictionary | None) -> Dictionary | None:
+    """Make the text layers of obj use font, or return their font if font is None.
+
+    Each partition has its own copy of the font of the text layers, so all but
+    one copy are dropped when they are merged.
+    """
+    fonts = obj.get(Name.Resources, Dictionary()).get(Name.Font, Dictionary())
+    for font_key in list(fonts.keys()):
+        if font is None:
+            font = fonts[font_key]
+        else:
+            fonts[font_key] = font
+    return font
+
+
+def _merge_page(
+    base_page: Page, page: Dictionary, *, emplaced: bool, font: Dictionary | None
+) -> Dictionary | None:
+    """Merge a page written by :class:`OcrGrafter` into base_page.
+
+    page holds the entries of the page, other than its Type and Parent, copied
+    into the PDF of base_page. Returns the font of the text layers, which is font
+    unless font is None.
+    """
+    if emplaced:
+        # As Page.emplace does, except that page is not a page
+        for key in list(base_page.obj.keys()):
+            if key not in page and key not in ('/Parent', '/Type'):
+                del base_page.obj[key]
+        for key, value in page.items():
+            base_page.obj[key] = value
+        font = _share_font(base_page.obj, font)
+    else:
+        base_page.Rotate = page.Rotate
+        if Name.Contents not in page:
+            # No text layers were grafted onto the page
+            return font
+        base_page.Contents = page.Contents
+        base_resources = _ensure_dictionary(base_page.obj, Name.Resources)
+        base_xobjs = _ensure_dictionary(base_resources, Name.XObject)
+        for name, xobj in page.Resources.XObject.items():
+            base_xobjs[name] = xobj
+    for xobj in page.Resources.get(Name.XObject, Dictionary()).values():
+        if xobj.get(Name.Subtype) != Name.Form:
+            continue
+        font = _share_font(xobj, font)
+        for font_key in xobj.Resources.get(Name.Font, Dictionary()).keys():
+            _update_resources(obj=base_page.obj, font=font, font_key=Name(font_key))
+    return font
+
+
+def merge_partitions(
+    context: PdfContext, partitions: Sequence[GraftedPartition]
+) -> Path:
+    """Merge grafted partitions into the input PDF.
+
+    Pages are updated in place, as :class:`OcrGrafter` does, so that the
+    annotations, outlines and links that refer to them are kept.
+    """
+    output_file = context.get_path('graft_layers.pdf')
+    font: Dictionary | None = None
+    with Pdf.open(context.origin) as pdf_base:
+        for partition in partitions:
+            emplaced = set(partition.emplaced)
+            with Pdf.open(partition.path) as pdf_part:
+                for pageno, part_page in zip(partition.pagenos, pdf_part.pages):
+                    # Pages cannot be copied between PDFs without adding them to
+                    # the page tree, which is slow, but their entries can be
+                    entries = pdf_part.make_indirect(
+                        Dictionary(
+                            {
+                                key: value
+                                for key, value in part_page.obj.items()
+                                if key not in ('/Parent', '/Type')
+                            }
+                        )
+                    )
+                    font = _merge_page(
+                        pdf_base.pages[pageno],
+                        pdf_base.copy_foreign(entries),
+                        emplaced=pageno in emplaced,
+                        font=font,
+                    )
+            if not context.options.keep_temporary_files:
+                partition.path.unlink()
+        pdf_base.save(output_file)
+    return output_file
+
+
+class PartitionedGrafter:
+    """Grafts pages in parallel, in partitions of consecutive pages.
+
+    Each partition is grafted onto its own copy of the input PDF, and then the
+    partitions are merged into the input PDF. While pages are still being
+    processed, a partition whose pages have all finished is grafted at once,
+    in a background thread. The partitions still waiting when :meth:`finalize`
+    is called are grafted in worker processes. Documents too short to be
+    partitioned are grafted by :class:`OcrGrafter` instead.
+    """
+
+    def __init__(self, context: PdfContext, executor: Executor):
+        self.context = context
+        self.executor = executor
+        self.partitions = partition_pages(len(context.pdfinfo), context.options.jobs)
+        self.requests: dict[int, _GraftRequest] = {}
+        self.remaining = [len(pagenos) for pagenos in self.partitions]
+        self.early: dict[int, Future[list[GraftedPartition]]] = {}
+        self._early_pool: ThreadPoolExecutor | None = None
+        if len(self.partitions) > 1:
+            self._early_pool = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix='graft'
             )
-            new_text_layer = Stream(self.pdf_base, pdf_draw_xobj)
-
-            if strip_old_text:
-                strip_invisible_text(self.pdf_base, base_page)
-            base_page.contents_coalesce()
-            if self.render_mode == RenderMode.ON_TOP:
-                # Add q/Q to ensure content we append is drawn correctly
-                # Strictly speaking this needs to trace the whole q/Q stack in case
-                # stack is not balanced.
-                original = base_page.Contents.read_bytes()
-                base_page.Contents.write(b'q\n' + original + b'\nQ\n')
-            base_page.contents_add(
-                new_text_layer, prepend=self.render_mode == RenderMode.UNDERNEATH
+
+    def _partition_requests(self, n: int) -> list[_GraftRequest]:
+        return [self.requests[m] for m in self.partitions[n] if m in self.requests]
+
+    def graft_page(
+        self,
+        *,
+        pageno: int,
+        image: Path | ImagePage | None,
+        textpdf: Path | TextLayer | None,
+        autorotate_correction: int,
+    ):
+        """Hold a finished page, and graft its partition if it is complete."""
+        self.requests[pageno] = _GraftRequest(
+            pageno, image, textpdf, autorotate_correction
+        )
+        if self._early_pool is None:
+            return
+        n = bisect_right([pagenos.start for pagenos in self.partitions], pageno) - 1
+        self.remaining[n] -= 1
+        if self.remaining[n] == 0:
+            log.debug("Grafting partition %d while pages are processed", n + 1)
+            self.early[n] = self._early_pool.submit(
+                graft_partition, self.context, self._partition_requests(n)
             )
-            base_page.contents_coalesce()
 
-            _update_resources(obj=base_page.obj, font=font, font_key=font_key)
+    def finalize(self) -> Path:
+        """Graft the remaining partitions and merge them into the output PDF."""
+        options = self.context.options
+        if self._early_pool is None:
+            grafter = OcrGrafter(self.context, streaming=True)
+            for request in self._partition_requests(0):
+                grafter._graft_page(request)
+            return grafter.finalize()
+
+        # Partitions not yet started in the background are grafted in parallel
+        self._early_pool.shutdown(wait=False, cancel_futures=True)
+        waiting = [
+            n
+            for n in range(len(self.partitions))
+            if n not in self.early or self.early[n].cancelled()
+        ]
+        grafted: list[GraftedPartition] = []
+
+        def partition_finished(result: list[GraftedPartition], pbar):
+            grafted.extend(result)
+            pbar.update()
+
+        if waiting:
+            log.info("Grafting %d partitions concurrently", len(waiting))
+        self.executor(
+            # Grafting holds the GIL, so partitions only run in parallel in
+            # separate processes
+            use_threads=False,
+            max_workers=len(waiting),
+            progress_kwargs=dict(
+                total=len(waiting),
+                desc='Grafting',
+                unit='partition',
+                disable=not options.progress_bar,
+            ),
+            task=graft_partition,
+            task_arguments=[
+                (self.context, self._partition_requests(n)) for n in waiting
+            ],
+            task_finished=partition_finished,
+        )
+        for future in self.early.values():
+            if not future.cancelled():
+                grafted.extend(future.result())
+        grafted.sort(key=lambda partition: partition.pagenos[0])
+        return merge_partitions(self.context, grafted)
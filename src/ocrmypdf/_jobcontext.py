@@ -7,7 +7,7 @@ from __future__ import annotations
 
 import os
 from argparse import Namespace
-from collections.abc import Iterator
+from collections.abc import Iterable, Iterator
 from copy import copy
 from pathlib import Path
 
@@ -17,6 +17,16 @@ from ocrmypdf.pdfinfo import PdfInfo
 from ocrmypdf.pdfinfo.info import PageInfo
 
 
+def _picklable_options(options: Namespace) -> Namespace:
+    """Copy options, replacing input and output streams, which cannot be pickled."""
+    options = copy(options)
+    if not isinstance(options.input_file, str | bytes | os.PathLike):
+        options.input_file = 'stream'
+    if not isinstance(options.output_file, str | bytes | os.PathLike):
+        options.output_file = 'stream'
+    return options
+
+
 class PdfContext:
     """Holds the context for a particular run of the pipeline."""
 
@@ -24,6 +34,10 @@ class PdfContext:
     origin: Path  #: The filename of the original input file.
     pdfinfo: PdfInfo  #: Detailed data for this PDF.
     plugin_manager: PluginManager  #: PluginManager for processing the current PDF.
+    #: Whether finished pages may be returned as objects rather than files.
+    pages_in_memory: bool
+    #: Pages of all documents in a batch, which share the workers; 0 if no batch.
+    batch_pages: int
 
     def __init__(
         self,
@@ -32,12 +46,17 @@ class PdfContext:
         origin: Path,
         pdfinfo: PdfInfo,
         plugin_manager,
+        *,
+        pages_in_memory: bool = False,
+        batch_pages: int = 0,
     ):
         self.options = options
         self.work_folder = work_folder
         self.origin = origin
         self.pdfinfo = pdfinfo
         self.plugin_manager = plugin_manager
+        self.pages_in_memory = pages_in_memory
+        self.batch_pages = batch_pages
 
     def get_path(self, name: str) -> Path:
         """Generate a ``Path`` for an intermediate file involved in processing.
@@ -47,16 +66,28 @@ class PdfContext:
         """
         return self.work_folder / name
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['options'] = _picklable_options(self.options)
+        return state
+
     def get_page_contexts(self) -> Iterator[PageContext]:
         """Get all ``PageContext`` for this PDF."""
         npages = len(self.pdfinfo)
         for n in range(npages):
             yield PageContext(self, n)
 
-    def get_page_context_args(self) -> Iterator[tuple[PageContext]]:
-        """Get all ``PageContext`` for this PDF packaged in tuple for args-splatting."""
-        npages = len(self.pdfinfo)
-        for n in range(npages):
+    def get_page_context_args(
+        self, pagenos: Iterable[int] | None = None
+    ) -> Iterator[tuple[PageContext]]:
+        """Get all ``PageContext`` for this PDF packaged in tuple for args-splatting.
+
+        Args:
+            pagenos: If given, only these pages (zero-based) are included.
+        """
+        if pagenos is None:
+            pagenos = range(len(self.pdfinfo))
+        for n in pagenos:
             yield (PageContext(self, n),)
 
 
@@ -72,6 +103,8 @@ class PageContext:
     pageno: int  #: This page number (zero-based).
     pageinfo: PageInfo  #: Information on this page.
     plugin_manager: PluginManager  #: PluginManager for processing the current PDF.
+    #: Whether finished pages may be returned as objects rather than files.
+    pages_in_memory: bool
 
     def __init__(self, pdf_context: PdfContext, pageno):
         self.work_folder = pdf_context.work_folder
@@ -80,6 +113,7 @@ class PageContext:
         self.pageno = pageno
         self.pageinfo = pdf_context.pdfinfo[pageno]
         self.plugin_manager = pdf_context.plugin_manager
+        self.pages_in_memory = pdf_context.pages_in_memory
 
     def get_path(self, name: str) -> Path:
         """Generate a ``Path`` for a file that is part of processing this page.
@@ -91,10 +125,5 @@ class PageContext:
 
     def __getstate__(self):
         state = self.__dict__.copy()
-
-        state['options'] = copy(self.options)
-        if not isinstance(state['options'].input_file, str | bytes | os.PathLike):
-            state['options'].input_file = 'stream'
-        if not isinstance(state['options'].output_file, str | bytes | os.PathLike):
-            state['options'].output_file = 'stream'
+        state['options'] = _picklable_options(self.options)
         return state
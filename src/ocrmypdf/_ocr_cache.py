@@ -0,0 +1,222 @@
+# SPDX-FileCopyrightText: 2024 James R. Barlow
+# SPDX-License-Identifier: MPL-2.0
+
+"""Persistent, content-addressed cache of OCR engine results.
+
+Each entry is keyed by a hash of the image sent to the OCR engine, the identity
+and version of the OCR engine, and the options that affect OCR. An entry is a
+folder that holds the files the engine produced for that image (for example,
+``hocr`` and ``txt``).
+
+The cache may be shared by several concurrent ocrmypdf processes. Entries are
+assembled in a temporary folder and renamed into place, so readers never see a
+partially written entry. If two workers produce the same entry at the same time,
+the first rename wins and the other copy is discarded. Least recently used
+entries are evicted when the cache grows beyond its size limit.
+"""
+
+from __future__ import annotations
+
+import errno
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from argparse import Namespace
+from collections.abc import Mapping
+from contextlib import suppress
+from functools import lru_cache
+from pathlib import Path
+from tempfile import mkdtemp
+
+from ocrmypdf.pluginspec import OcrEngine
+
+log = logging.getLogger(__name__)
+
+STALE_TEMP_SECONDS = 3600
+
+# Options that change what the OCR engine produces for a given image. Image
+# preprocessing options are not listed because their effect is already captured
+# by the image hash.
+OCR_OPTION_NAMES = (
+    'languages',
+    'pdf_renderer',
+    'tesseract_oem',
+    'tesseract_pagesegmode',
+    'tesseract_thresholding',
+)
+OCR_OPTION_FILES = ('tesseract_config', 'user_words', 'user_patterns')
+
+# Lookups are counted per thread, so that each page task can report its own
+# hits and misses with its results, whether it ran in a thread or a process
+_lookups = threading.local()
+
+
+def _count_lookup(hit: bool) -> None:
+    if hit:
+        _lookups.hits = getattr(_lookups, 'hits', 0) + 1
+    else:
+        _lookups.misses = getattr(_lookups, 'misses', 0) + 1
+
+
+def take_lookup_counts() -> tuple[int, int]:
+    """Return the cache hits and misses of this thread, and reset them.
+
+    Returns:
+        The number of hits and misses since the last call in this thread.
+    """
+    hits, misses = getattr(_lookups, 'hits', 0), getattr(_lookups, 'misses', 0)
+    _lookups.hits = _lookups.misses = 0
+    return hits, misses
+
+
+def _hash_file(hasher, path: Path) -> None:
+    with open(path, 'rb') as f:
+        while chunk := f.read(1 << 20):
+            hasher.update(chunk)
+
+
+def _option_file_digest(value: str | os.PathLike) -> str:
+    """Digest a file named by an option, so that edits to the file are noticed."""
+    hasher = hashlib.sha256()
+    try:
+        _hash_file(hasher, Path(value))
+    except OSError:
+        # Tesseract config names may refer to Tesseract's own configs folder
+        return str(value)
+    return hasher.hexdigest()
+
+
+@lru_cache(maxsize=8)
+def _engine_fingerprint(engine_class: type[OcrEngine]) -> str:
+    """Identify an OCR engine and its version, once per process."""
+    engine_name = f'{engine_class.__module__}.{engine_class.__qualname__}'
+    return f'{engine_name} {engine_class.version()}'
+
+
+class OcrResultCache:
+    """A size-bounded, on-disk LRU cache of OCR engine output files."""
+
+    def __init__(self, folder: Path, max_bytes: int):
+        self.folder = Path(folder)
+        self.max_bytes = max_bytes
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def key(self, image: Path, ocr_engine: OcrEngine, options: Namespace) -> str:
+        """Calculate the cache key for an OCR input image."""
+        hasher = hashlib.sha256()
+        _hash_file(hasher, image)
+        settings: dict[str, object] = {
+            name: getattr(options, name, None) for name in OCR_OPTION_NAMES
+        }
+        for name in OCR_OPTION_FILES:
+            value = getattr(options, name, None)
+            if not value:
+                settings[name] = None
+            elif isinstance(value, str | os.PathLike):
+                settings[name] = _option_file_digest(value)
+            else:
+                settings[name] = [_option_file_digest(v) for v in value]
+        settings['engine'] = _engine_fingerprint(type(ocr_engine))
+        hasher.update(json.dumps(settings, sort_keys=True, default=str).encode())
+        return hasher.hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.folder / key[:2] / key
+
+    def fetch(self, key: str, outputs: Mapping[str, Path]) -> bool:
+        """Copy a cached result to the output files, if there is one.
+
+        Args:
+            key: Cache key from :meth:`key`.
+            outputs: Maps each artifact name to the file it should be copied to.
+
+        Returns:
+            True on a cache hit.
+        """
+        entry = self._entry(key)
+        try:
+            for name, output_file in outputs.items():
+                shutil.copyfile(entry / name, output_file)
+            os.utime(entry)  # Mark as recently used
+        except FileNotFoundError:
+            # Not cached, or evicted by another process while we were reading
+            log.debug("OCR cache miss %s", key)
+            _count_lookup(hit=False)
+            return False
+        log.debug("OCR cache hit %s", key)
+        _count_lookup(hit=True)
+        return True
+
+    def store(self, key: str, outputs: Mapping[str, Path]) -> None:
+        """Add the output files produced by the OCR engine to the cache.
+
+        Results that are missing or empty files are not stored, since they
+        indicate that the engine skipped the page or timed out.
+        """
+        try:
+            if any(Path(f).stat().st_size == 0 for f in outputs.values()):
+                log.debug("Not caching empty OCR result %s", key)
+                return
+        except FileNotFoundError:
+            log.debug("Not caching incomplete OCR result %s", key)
+            return
+        entry = self._entry(key)
+        entry.parent.mkdir(exist_ok=True)
+        temp_entry = Path(mkdtemp(prefix='.tmp-', dir=self.folder))
+        try:
+            for name, output_file in outputs.items():
+                shutil.copyfile(output_file, temp_entry / name)
+            os.rename(temp_entry, entry)
+        except OSError as e:
+            shutil.rmtree(temp_entry, ignore_errors=True)
+            if isinstance(e, FileExistsError) or e.errno == errno.ENOTEMPTY:
+                # Another worker stored this entry first; keep theirs
+                return
+            log.warning("Could not store OCR result in the cache: %s", e)
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits its limit."""
+        now = time.time()
+        for temp_entry in self.folder.glob('.tmp-*'):
+            with suppress(OSError):
+                if now - temp_entry.stat().st_mtime > STALE_TEMP_SECONDS:
+                    shutil.rmtree(temp_entry, ignore_errors=True)
+
+        entries = []
+        total = 0
+        for entry in self.folder.glob('??/*'):
+            with suppress(OSError):
+                size = sum(f.stat().st_size for f in entry.iterdir())
+                entries.append((entry.stat().st_mtime, size, entry))
+                total += size
+        entries.sort()
+        for _mtime, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            with self._lock:
+                self.evictions += 1
+        log.debug("OCR cache size is %d bytes", total)
+
+
+_caches: dict[tuple[Path, int], OcrResultCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_ocr_cache(options: Namespace) -> OcrResultCache | None:
+    """Return this process's OCR result cache, if one was requested."""
+    if not getattr(options, 'ocr_cache_dir', None):
+        return None
+    folder = Path(options.ocr_cache_dir).resolve()
+    max_bytes = int(options.ocr_cache_size * 1_000_000)
+    with _caches_lock:
+        if (folder, max_bytes) not in _caches:
+            _caches[folder, max_bytes] = OcrResultCache(folder, max_bytes)
+        return _caches[folder, max_bytes]
@@ -7,24 +7,37 @@
 from __future__ import annotations
 
 import logging
+import math
 import os
 import re
 import sys
+from collections import defaultdict
 from collections.abc import Iterable, Iterator, Sequence
 from contextlib import suppress
 from io import BytesIO
+from math import isclose
 from pathlib import Path
 from shutil import copyfileobj
-from typing import Any, BinaryIO, TypeVar, cast
+from typing import Any, BinaryIO, NamedTuple, TypeVar, cast
 
 import img2pdf
 import pikepdf
+from pikepdf import PdfImage
 from PIL import Image, ImageColor, ImageDraw
 
 from ocrmypdf._concurrent import Executor
 from ocrmypdf._exec import unpaper
+from ocrmypdf._graft import ImagePage
 from ocrmypdf._jobcontext import PageContext, PdfContext
 from ocrmypdf._metadata import repair_docinfo_nuls
+from ocrmypdf._ocr_cache import get_ocr_cache
+from ocrmypdf._regions import (
+    crop_regions,
+    may_ocr_regions,
+    merge_region_hocr,
+    merge_region_text,
+    plan_ocr_regions,
+)
 from ocrmypdf.exceptions import (
     DigitalSignatureError,
     DpiError,
@@ -35,11 +48,18 @@ from ocrmypdf.exceptions import (
     UnsupportedImageFormatError,
 )
 from ocrmypdf.helpers import IMG2PDF_KWARGS, Resolution, safe_symlink
-from ocrmypdf.hocrtransform import DebugRenderOptions, HocrTransform
+from ocrmypdf.hocrtransform import (
+    DebugRenderOptions,
+    HocrTransform,
+    OcrPage,
+    TextLayer,
+)
 from ocrmypdf.hocrtransform._font import Courier
+from ocrmypdf.imageops import bytes_per_pixel
 from ocrmypdf.pdfa import generate_pdfa_ps
 from ocrmypdf.pdfinfo import Colorspace, Encoding, PageInfo, PdfInfo
-from ocrmypdf.pluginspec import OrientationConfidence
+from ocrmypdf.pdfinfo.info import ImageInfo
+from ocrmypdf.pluginspec import MIN_DESKEW_ANGLE, OrientationConfidence, PageAnalysis
 
 try:
     from pi_heif import register_heif_opener
@@ -54,6 +74,34 @@ log = logging.getLogger(__name__)
 
 VECTOR_PAGE_DPI = 400
 
+# Processing a page that must be rasterized in color takes longer than one
+# that can be rasterized in grayscale or monochrome
+COLOR_PAGE_COST_FACTOR = 1.5
+
+# Rough model of the peak memory used to process one page: a few copies of the
+# page image exist at once (in Ghostscript, Pillow and Tesseract), plus a fixed
+# amount for Tesseract's language models
+PAGE_MEMORY_IMAGE_COPIES = 3
+PAGE_MEMORY_OVERHEAD = 100_000_000
+
+RASTER_DEVICE_MODES = {'pngmono': '1', 'pnggray': 'L', 'png256': 'P', 'png16m': 'RGB'}
+
+# Orientation is detected on a preview image with at most this resolution
+PREVIEW_DPI = 300.0
+
+# Modes of page images that can be used without rasterizing the page
+PASSTHROUGH_IMAGE_MODES = frozenset(RASTER_DEVICE_MODES.values())
+
+# Plugin whose rendering of such pages is the page image itself
+BUILTIN_RASTERIZER = 'ocrmypdf.builtin_plugins.ghostscript'
+
+# Counterclockwise rotations, in degrees
+PIL_ROTATIONS = {
+    90: Image.Transpose.ROTATE_90,
+    180: Image.Transpose.ROTATE_180,
+    270: Image.Transpose.ROTATE_270,
+}
+
 
 register_heif_opener()
 
@@ -241,7 +289,9 @@ def validate_pdfinfo_options(context: PdfContext) -> None:
             )
         else:
             raise TaggedPDFError()
-    context.plugin_manager.hook.validate(pdfinfo=pdfinfo, options=options)
+    context.plugin_manager.hook.validate(
+        pdfinfo=pdfinfo, options=options, batch_pages=context.batch_pages
+    )
 
 
 def _vector_page_dpi(pageinfo: PageInfo) -> int:
@@ -374,27 +424,86 @@ def is_ocr_required(page_context: PageContext) -> bool:
     return ocr_required
 
 
-def rasterize_preview(input_file: Path, page_context: PageContext) -> Path:
-    """Generate a lower quality preview image."""
-    output_file = page_context.get_path('rasterize_preview.jpg')
-    canvas_dpi = Resolution(300.0, 300.0).take_min(
-        [get_canvas_square_dpi(page_context)]
-    )
-    page_dpi = Resolution(300.0, 300.0).take_min([get_page_square_dpi(page_context)])
-    page_context.plugin_manager.hook.rasterize_pdf_page(
-        input_file=input_file,
-        output_file=output_file,
-        raster_device='jpeggray',
-        raster_dpi=canvas_dpi,
-        pageno=page_context.pageinfo.pageno + 1,
-        page_dpi=page_dpi,
-        rotation=0,
-        filter_vector=False,
-        stop_on_soft_error=not page_context.options.continue_on_soft_render_error,
+def _raster_megapixels(page_context: PageContext) -> float:
+    """Return the size of the page image that will be rasterized, in megapixels."""
+    pageinfo = page_context.pageinfo
+    dpi = get_canvas_square_dpi(page_context, calculate_image_dpi(page_context))
+    return (
+        float(pageinfo.width_inches)
+        * float(pageinfo.height_inches)
+        * dpi.x
+        * dpi.y
+        / 1_000_000
     )
+
+
+def estimate_page_cost(page_context: PageContext) -> float:
+    """Estimate the relative cost of processing a page.
+
+    The estimate is the size of the page image in megapixels, weighted up for
+    pages that must be rasterized in color. It is only used to decide the order
+    in which pages are processed, so options that affect every page equally
+    (such as ``--deskew``) are not considered.
+    """
+    color = get_raster_device(page_context.pageinfo) == 'png16m'
+    return _raster_megapixels(page_context) * (COLOR_PAGE_COST_FACTOR if color else 1.0)
+
+
+def estimate_page_memory(page_context: PageContext) -> int:
+    """Estimate the peak memory in bytes needed to process a page.
+
+    This is used for ``--memory-budget``, to avoid processing too many large
+    pages at the same time.
+    """
+    mode = RASTER_DEVICE_MODES[get_raster_device(page_context.pageinfo)]
+    image_bytes = _raster_megapixels(page_context) * 1_000_000 * bytes_per_pixel(mode)
+    return int(image_bytes * PAGE_MEMORY_IMAGE_COPIES) + PAGE_MEMORY_OVERHEAD
+
+
+def create_orientation_preview(image: Path, page_context: PageContext) -> Path:
+    """Create a lower quality preview image from the page image.
+
+    The preview is downsampled from the page image in memory, rather than
+    rendered again, since it only needs to be good enough to find the
+    orientation of the page.
+    """
+    output_file = page_context.get_path('rasterize_preview.jpg')
+    with Image.open(image) as im:
+        if 'dpi' in im.info:
+            dpi = Resolution(*im.info['dpi'])
+        else:
+            dpi = get_page_square_dpi(page_context, calculate_image_dpi(page_context))
+        scale = min(1.0, PREVIEW_DPI / max(dpi.x, dpi.y))
+        preview = im.convert('L')
+    if scale < 1.0:
+        size = (max(1, round(im.width * scale)), max(1, round(im.height * scale)))
+        preview = preview.resize(size, Image.Resampling.BOX)
+    with preview:
+        preview.save(
+            output_file,
+            format='JPEG',
+            dpi=Resolution(dpi.x * scale, dpi.y * scale).to_int(),
+        )
     return output_file
 
 
+def rotate_page_image(image: Path, correction: int) -> None:
+    """Apply an orientation correction to a page image, in place.
+
+    Rotating by multiples of 90 degrees is lossless, so this gives the same
+    image as rasterizing the page again with the correction.
+    """
+    if correction == 0:
+        return
+    with Image.open(image) as im:
+        dpi = Resolution(*im.info['dpi']) if 'dpi' in im.info else None
+        rotated = im.transpose(PIL_ROTATIONS[correction])
+    if dpi and correction % 180 == 90:
+        dpi = dpi.flip_axis()
+    with rotated:
+        rotated.save(image, dpi=dpi, compression=None)
+
+
 def describe_rotation(
     page_context: PageContext, orient_conf: OrientationConfidence, correction: int
 ) -> str:
@@ -427,22 +536,31 @@ def describe_rotation(
 def get_orientation_correction(preview: Path, page_context: PageContext) -> int:
     """Work out orientation correction for each page.
 
-    We ask Ghostscript to draw a preview page, which will rasterize with the
-    current /Rotate applied, and then ask OCR which way the page is
+    The preview is made from the page image, which was rasterized with the
+    current /Rotate applied, and then we ask OCR which way the page is
     oriented. If the value of /Rotate is correct (e.g., a user already
     manually fixed rotation), then OCR will say the page is pointing
     up and the correction is zero. Otherwise, the orientation found by
     OCR represents the clockwise rotation, or the counterclockwise
     correction to rotation.
 
-    When we draw the real page for OCR, we rotate it by the CCW correction,
-    which points it (hopefully) upright. _graft.py takes care of the orienting
+    The page image is then rotated by the CCW correction, which points it
+    (hopefully) upright. _graft.py takes care of the orienting
     the image and text layers.
     """
     orient_conf = page_context.plugin_manager.hook.get_ocr_engine().get_orientation(
         preview, page_context.options
     )
+    return choose_orientation_correction(orient_conf, page_context)
 
+
+def choose_orientation_correction(
+    orient_conf: OrientationConfidence, page_context: PageContext
+) -> int:
+    """Return the orientation correction for the orientation found by OCR.
+
+    The correction is zero unless OCR is confident enough about the orientation.
+    """
     correction = orient_conf.angle % 360
     log.info(describe_rotation(page_context, orient_conf, correction))
     if (
@@ -465,7 +583,7 @@ def calculate_image_dpi(page_context: PageContext) -> Resolution:
     return image_dpi
 
 
-def calculate_raster_dpi(page_context: PageContext):
+def calculate_raster_dpi(page_context: PageContext, *, warn: bool = True):
     """Calculate the DPI for rasterization."""
     # Produce the page image with square resolution or else deskew and OCR
     # will not work properly.
@@ -473,7 +591,7 @@ def calculate_raster_dpi(page_context: PageContext):
     dpi_profile = page_context.pageinfo.page_dpi_profile()
     canvas_dpi = get_canvas_square_dpi(page_context, image_dpi)
     page_dpi = get_page_square_dpi(page_context, image_dpi)
-    if dpi_profile and dpi_profile.average_to_max_dpi_ratio < 0.8:
+    if warn and dpi_profile and dpi_profile.average_to_max_dpi_ratio < 0.8:
         log.warning(
             "Weighted average image DPI is %0.1f, max DPI is %0.1f. "
             "The discrepancy may indicate a high detail region on this page, "
@@ -486,6 +604,292 @@ def calculate_raster_dpi(page_context: PageContext):
     return canvas_dpi, page_dpi
 
 
+def get_raster_device(pageinfo: PageInfo) -> str:
+    """Choose the least capable Ghostscript PNG device that can render a page."""
+    colorspaces = ['pngmono', 'pnggray', 'png256', 'png16m']
+    device_idx = 0
+
+    def at_least(colorspace):
+        return max(device_idx, colorspaces.index(colorspace))
+
+    for image in pageinfo.images:
+        if image.type_ != 'image':
+            continue  # ignore masks
+        if image.bpc > 1:
+            if image.color == Colorspace.index:
+                device_idx = at_least('png256')
+            elif image.color == Colorspace.gray:
+                device_idx = at_least('pnggray')
+            else:
+                device_idx = at_least('png16m')
+
+    if pageinfo.has_vector:
+        device_idx = at_least('png16m')
+
+    return colorspaces[device_idx]
+
+
+class RasterRun(NamedTuple):
+    """A range of consecutive pages to rasterize with the same settings."""
+
+    input_file: Path
+    raster_device: str
+    raster_dpi: Resolution
+    first_pageno: int
+    last_pageno: int
+    filter_vector: bool
+    stop_on_soft_error: bool
+
+
+def _raster_settings(page_context: PageContext) -> list[tuple[str, Resolution, bool]]:
+    """Return the device, DPI and vector filtering of each image of a page.
+
+    This must match the calls to ``rasterize_pdf_page`` that processing the page
+    will make, or pages will be rasterized in advance for no benefit.
+    """
+    if _can_pass_through(page_context):
+        return []
+    device = get_raster_device(page_context.pageinfo)
+    canvas_dpi, _page_dpi = calculate_raster_dpi(page_context, warn=False)
+    settings = [(device, canvas_dpi, False)]
+    if page_context.options.remove_vectors:
+        settings.append((device, canvas_dpi, True))
+    return settings
+
+
+def plan_raster_runs(
+    page_contexts: Iterable[PageContext], max_pages: int
+) -> list[RasterRun]:
+    """Group the images of pages into runs that can be rasterized together.
+
+    Each run covers consecutive pages of one input file that are rasterized with
+    the same settings, and has at least two and at most ``max_pages`` pages.
+    """
+    pagenos: dict[tuple, list[int]] = defaultdict(list)
+    dpis: dict[tuple, Resolution] = {}
+    for page_context in page_contexts:
+        stop_on_soft_error = not page_context.options.continue_on_soft_render_error
+        for device, dpi, filter_vector in _raster_settings(page_context):
+            dpi = dpi.round(6)
+            key = (
+                page_context.origin,
+                device,
+                (dpi.x, dpi.y),
+                filter_vector,
+                stop_on_soft_error,
+            )
+            dpis[key] = dpi
+            pagenos[key].append(page_context.pageno + 1)
+
+    runs = []
+    for key, key_pagenos in pagenos.items():
+        origin, device, _dpi, filter_vector, stop_on_soft_error = key
+        for first, last in _consecutive_ranges(sorted(key_pagenos), max_pages):
+            if last > first:
+                runs.append(
+                    RasterRun(
+                        origin,
+                        device,
+                        dpis[key],
+                        first,
+                        last,
+                        filter_vector,
+                        stop_on_soft_error,
+                    )
+                )
+    return runs
+
+
+def _consecutive_ranges(
+    pagenos: Sequence[int], max_pages: int
+) -> Iterator[tuple[int, int]]:
+    """Split sorted page numbers into ranges of consecutive pages.
+
+    Ranges longer than ``max_pages`` are split into ranges of nearly equal length.
+    """
+    start = 0
+    for n in range(1, len(pagenos) + 1):
+        if n < len(pagenos) and pagenos[n] == pagenos[n - 1] + 1:
+            continue
+        length = n - start
+        parts = math.ceil(length / max_pages)
+        for part in range(parts):
+            first = start + part * length // parts
+            last = start + (part + 1) * length // parts - 1
+            yield pagenos[first], pagenos[last]
+        start = n
+
+
+def _selected_plugin(hook) -> str | None:
+    """Return the name of the plugin whose implementation of a hook runs first.
+
+    For a firstresult hook, this is the implementation that is used, unless it
+    returns None.
+    """
+    impls = [
+        impl
+        for impl in hook.get_hookimpls()
+        if not (impl.hookwrapper or getattr(impl, 'wrapper', False))
+    ]
+    return impls[-1].plugin_name if impls else None
+
+
+def can_rasterize_runs(plugin_manager) -> bool:
+    """Will pages rasterized in runs be used when each page is rasterized?
+
+    Only the plugin that rasterizes each page knows where to find the images of
+    a run, so runs are only rasterized if that plugin also rasterizes runs.
+    """
+    rasterizer = _selected_plugin(plugin_manager.hook.rasterize_pdf_page)
+    return rasterizer is not None and rasterizer == _selected_plugin(
+        plugin_manager.hook.rasterize_pdf_pages
+    )
+
+
+def rasterize_run(run: RasterRun, plugin_manager) -> bool:
+    """Rasterize a run of pages in advance, if the rasterizer supports it.
+
+    Failure is not fatal, since pages that were not rasterized in advance are
+    rasterized individually, which reports the error for the page responsible.
+    """
+    try:
+        return bool(plugin_manager.hook.rasterize_pdf_pages(**run._asdict()))
+    except Exception as e:  # pylint: disable=broad-except
+        log.debug(
+            "Could not rasterize pages %d-%d together: %s",
+            run.first_pageno,
+            run.last_pageno,
+            e,
+        )
+        return False
+
+
+def plan_ocr_batches(
+    page_contexts: Sequence[PageContext], max_pages: int
+) -> list[tuple[PageContext, ...]]:
+    """Group small pages into batches that the OCR engine recognizes together.
+
+    Consecutive pages whose images are smaller than ``--ocr-batch-below`` form
+    batches of at most ``max_pages`` pages, if the OCR engine supports this.
+    Every other page is a batch of its own. Batches keep the order of
+    ``page_contexts``, each placed where the first of its pages appears.
+    """
+    if not page_contexts:
+        return []
+    options = page_contexts[0].options
+    ocr_engine = page_contexts[0].plugin_manager.hook.get_ocr_engine()
+    if (
+        not options.ocr_batch_below
+        or not options.pdf_renderer.startswith('hocr')
+        or not ocr_engine.supports_hocr_batch
+        or get_ocr_cache(options)
+    ):
+        return [(page_context,) for page_context in page_contexts]
+
+    small = {
+        page_context.pageno + 1: page_context
+        for page_context in page_contexts
+        if _raster_megapixels(page_context) < options.ocr_batch_below
+        and not may_ocr_regions(page_context)
+    }
+    batch_of: dict[int, tuple[PageContext, ...]] = {}
+    for first, last in _consecutive_ranges(sorted(small), max_pages):
+        batch = tuple(small[pageno] for pageno in range(first, last + 1))
+        for pageno in range(first, last + 1):
+            batch_of[pageno] = batch
+
+    batches = []
+    started: set[int] = set()
+    for page_context in page_contexts:
+        batch = batch_of.get(page_context.pageno + 1, (page_context,))
+        if batch[0].pageno not in started:
+            started.add(batch[0].pageno)
+            batches.append(batch)
+    return batches
+
+
+def get_passthrough_image(pageinfo: PageInfo) -> ImageInfo | None:
+    """Return the image of a page that can be used as its raster image, if any.
+
+    A page qualifies if it contains only one image, which covers the page
+    exactly and is drawn upright at the same square resolution that the page
+    would be rasterized at. Such pages are usually produced by scanners, and
+    rasterizing them would only reproduce the image's pixels.
+    """
+    if pageinfo.has_text or pageinfo.has_vector or float(pageinfo.userunit) != 1.0:
+        return None
+    if len(pageinfo.images) != 1:
+        return None
+    image = pageinfo.images[0]
+    if image.type_ != 'image' or image.shorthand is None:
+        return None
+    a, b, c, d, e, f = (float(v) for v in image.shorthand)
+    x0, y0, x1, y1 = (float(v) for v in pageinfo.mediabox)
+    tolerance = 0.5  # PDF units
+    if b != 0 or c != 0 or a <= 0 or d <= 0:
+        return None
+    if not all(
+        isclose(actual, expected, abs_tol=tolerance)
+        for actual, expected in ((e, x0), (f, y0), (a, x1 - x0), (d, y1 - y0))
+    ):
+        return None
+    if not image.dpi.is_square:
+        return None
+    return image
+
+
+def _can_pass_through(page_context: PageContext) -> bool:
+    """Can the page image be used instead of rasterizing the page?
+
+    Only when pages would be rasterized by the built-in rasterizer, since a
+    plugin that rasterizes pages may render them differently.
+    """
+    rasterizer = _selected_plugin(page_context.plugin_manager.hook.rasterize_pdf_page)
+    if rasterizer != BUILTIN_RASTERIZER:
+        return False
+    image = get_passthrough_image(page_context.pageinfo)
+    if image is None:
+        return False
+    canvas_dpi, _page_dpi = calculate_raster_dpi(page_context, warn=False)
+    return canvas_dpi == image.dpi
+
+
+def _pass_through_image(
+    input_file: Path,
+    page_context: PageContext,
+    output_file: Path,
+    correction: int,
+    page_dpi: Resolution,
+) -> bool:
+    """Save the only image of a page as its raster image, without rendering.
+
+    Returns:
+        ``True`` if successful, or ``False`` if the image could not be
+        extracted, in which case the page should be rasterized as usual.
+    """
+    image = get_passthrough_image(page_context.pageinfo)
+    assert image is not None
+    try:
+        with pikepdf.open(input_file) as pdf:
+            page = pdf.pages[page_context.pageno]
+            pim = PdfImage(page.Resources.XObject[image.name])
+            im = pim.as_pil_image()
+    except Exception as e:  # pylint: disable=broad-except
+        log.debug(f"Could not extract page image, rasterizing instead: {e}")
+        return False
+    with im:
+        if im.mode not in PASSTHROUGH_IMAGE_MODES:
+            log.debug(f"Page image has mode {im.mode}, rasterizing instead")
+            return False
+        # /Rotate turns the page clockwise, and the correction counterclockwise
+        rotation = (correction - page_context.pageinfo.rotation) % 360
+        if rotation:
+            im = im.transpose(PIL_ROTATIONS[rotation])
+        im.save(output_file, dpi=page_dpi, compression=None)
+    log.debug("Using the page image without rasterizing")
+    return True
+
+
 def rasterize(
     input_file: Path,
     page_context: PageContext,
@@ -493,7 +897,7 @@ def rasterize(
     output_tag: str = '',
     remove_vectors: bool | None = None,
 ) -> Path:
-    """Rasterize a PDF page to a PNG image.
+    """Rasterize a PDF page to an image.
 
     Args:
         input_file: The input PDF file path.
@@ -505,41 +909,30 @@ def rasterize(
             is True or False, it will override the page context options.
 
     Returns:
-        Path: The output PNG file path.
+        Path: The output image file path.
     """
-    colorspaces = ['pngmono', 'pnggray', 'png256', 'png16m']
-    device_idx = 0
-
     if remove_vectors is None:
         remove_vectors = page_context.options.remove_vectors
 
-    output_file = page_context.get_path(f'rasterize{output_tag}.png')
+    # Intermediate page images are saved as uncompressed TIFF, which keeps their
+    # DPI and is much faster to write and read than PNG. Images are only
+    # compressed when they are added to the output PDF.
+    output_file = page_context.get_path(f'rasterize{output_tag}.tif')
     pageinfo = page_context.pageinfo
 
-    def at_least(colorspace):
-        return max(device_idx, colorspaces.index(colorspace))
-
-    for image in pageinfo.images:
-        if image.type_ != 'image':
-            continue  # ignore masks
-        if image.bpc > 1:
-            if image.color == Colorspace.index:
-                device_idx = at_least('png256')
-            elif image.color == Colorspace.gray:
-                device_idx = at_least('pnggray')
-            else:
-                device_idx = at_least('png16m')
-
     if pageinfo.has_vector:
         log.debug("Page has vector content, using png16m")
-        device_idx = at_least('png16m')
-
-    device = colorspaces[device_idx]
+    device = get_raster_device(pageinfo)
 
     log.debug(f"Rasterize with {device}, rotation {correction}")
 
     canvas_dpi, page_dpi = calculate_raster_dpi(page_context)
 
+    if _can_pass_through(page_context) and _pass_through_image(
+        input_file, page_context, output_file, correction, page_dpi
+    ):
+        return output_file
+
     page_context.plugin_manager.hook.rasterize_pdf_page(
         input_file=input_file,
         output_file=output_file,
@@ -565,21 +958,32 @@ def preprocess_remove_background(input_file: Path, page_context: PageContext) ->
     return input_file
 
 
-def preprocess_deskew(input_file: Path, page_context: PageContext) -> Path:
+def preprocess_deskew(
+    input_file: Path, page_context: PageContext, angle: float | None = None
+) -> Path:
     """Deskews the input image using the OCR engine and saves the output to a file.
 
     Args:
         input_file: The input image file to deskew.
         page_context: The context of the page being processed.
+        angle: The deskew angle in degrees, if it is already known. Otherwise
+            the OCR engine is asked for it.
 
     Returns:
-        Path: The path to the deskewed image file.
+        Path: The path to the deskewed image file, or the input file if the
+        skew is too small to correct.
     """
-    output_file = page_context.get_path('pp_deskew.png')
-    dpi = get_page_square_dpi(page_context, calculate_image_dpi(page_context))
+    if angle is None:
+        ocr_engine = page_context.plugin_manager.hook.get_ocr_engine()
+        deskew_angle_degrees = ocr_engine.get_deskew(input_file, page_context.options)
+    else:
+        deskew_angle_degrees = angle
+    if abs(deskew_angle_degrees) < MIN_DESKEW_ANGLE:
+        log.debug("%4d: skew too small to correct", page_context.pageno + 1)
+        return input_file
 
-    ocr_engine = page_context.plugin_manager.hook.get_ocr_engine()
-    deskew_angle_degrees = ocr_engine.get_deskew(input_file, page_context.options)
+    output_file = page_context.get_path('pp_deskew.tif')
+    dpi = get_page_square_dpi(page_context, calculate_image_dpi(page_context))
 
     with Image.open(input_file) as im:
         # According to Pillow docs, .rotate() will automatically use Image.NEAREST
@@ -596,7 +1000,7 @@ def preprocess_deskew(input_file: Path, page_context: PageContext) -> Path:
 
 def preprocess_clean(input_file: Path, page_context: PageContext) -> Path:
     """Clean the input image using unpaper."""
-    output_file = page_context.get_path('pp_clean.png')
+    output_file = page_context.get_path('pp_clean.tif')
     dpi = get_page_square_dpi(page_context, calculate_image_dpi(page_context))
     return unpaper.clean(
         input_file,
@@ -612,7 +1016,7 @@ def create_ocr_image(image: Path, page_context: PageContext) -> Path:
     Might not be the same as the display image depending on preprocessing.
     This image will never be shown to the user.
     """
-    output_file = page_context.get_path('ocr.png')
+    output_file = page_context.get_path('ocr.tif')
     options = page_context.options
     with Image.open(image) as im:
         log.debug('resolution %r', im.info['dpi'])
@@ -662,15 +1066,203 @@ def ocr_engine_hocr(input_file: Path, page_context: PageContext) -> tuple[Path,
     options = page_context.options
 
     ocr_engine = page_context.plugin_manager.hook.get_ocr_engine()
-    ocr_engine.generate_hocr(
+    ocr_cache = get_ocr_cache(options)
+    cache_outputs = {'hocr': hocr_out, 'txt': hocr_text_out}
+    if ocr_cache:
+        cache_key = ocr_cache.key(input_file, ocr_engine, options)
+        if ocr_cache.fetch(cache_key, cache_outputs):
+            return hocr_out, hocr_text_out
+
+    regions = plan_ocr_regions(input_file, page_context)
+    if regions is not None:
+        ocr_engine_hocr_regions(input_file, regions, page_context)
+    else:
+        ocr_engine.generate_hocr(
+            input_file=input_file,
+            output_hocr=hocr_out,
+            output_text=hocr_text_out,
+            options=options,
+        )
+    if ocr_cache:
+        ocr_cache.store(cache_key, cache_outputs)
+    return hocr_out, hocr_text_out
+
+
+def can_ocr_page_in_memory(page_context: PageContext) -> bool:
+    """Can the OCR engine return the words of a page, rather than write hOCR?
+
+    A hOCR file is still written when it is kept, cached, or combined from the
+    hOCR of several regions of the page.
+    """
+    options = page_context.options
+    if options.keep_temporary_files or get_ocr_cache(options):
+        return False
+    if may_ocr_regions(page_context):
+        return False
+    ocr_engine = page_context.plugin_manager.hook.get_ocr_engine()
+    return ocr_engine.supports_ocr_page
+
+
+def can_keep_page_in_memory(page_context: PageContext) -> bool:
+    """Can the finished page be returned to the grafter as objects, not files?
+
+    Pipelines that graft pages as they are finished ask for this with
+    :attr:`PdfContext.pages_in_memory`. Files are still written when they are
+    kept, or recorded in a checkpoint journal.
+    """
+    options = page_context.options
+    if options.keep_temporary_files or options.checkpoint_dir:
+        return False
+    return page_context.pages_in_memory
+
+
+def _has_pdf_page_filter(page_context: PageContext) -> bool:
+    """Does a plugin other than the builtin one implement filter_pdf_page?"""
+    hook = page_context.plugin_manager.hook.filter_pdf_page
+    return any(
+        impl.plugin_name != 'ocrmypdf.builtin_plugins.default_filters'
+        for impl in hook.get_hookimpls()
+    )
+
+
+def ocr_engine_ocr_page(
+    input_file: Path, page_context: PageContext
+) -> tuple[Path | OcrPage | None, Path]:
+    """Run the OCR engine, keeping its results in memory if it can.
+
+    Returns:
+        The hOCR file, or the words the OCR engine returned instead (``None``
+        if it skipped the page), and the text file.
+    """
+    if not can_ocr_page_in_memory(page_context):
+        return ocr_engine_hocr(input_file, page_context)
+    hocr_text_out = page_context.get_path('ocr_hocr.txt')
+    ocr_engine = page_context.plugin_manager.hook.get_ocr_engine()
+    ocr_page = ocr_engine.generate_ocr_page(
         input_file=input_file,
-        output_hocr=hocr_out,
         output_text=hocr_text_out,
-        options=options,
+        options=page_context.options,
+    )
+    return ocr_page, hocr_text_out
+
+
+def ocr_engine_hocr_regions(
+    input_file: Path,
+    regions: Sequence[tuple[int, int, int, int]],
+    page_context: PageContext,
+) -> tuple[Path, Path]:
+    """Run the OCR engine on regions of an image, and combine their hOCR.
+
+    The regions are recognized together if the OCR engine supports it.
+    """
+    hocr_out = page_context.get_path('ocr_hocr.hocr')
+    hocr_text_out = page_context.get_path('ocr_hocr.txt')
+    options = page_context.options
+    crops = crop_regions(input_file, regions, page_context)
+    batch = [
+        (crop, crop.with_suffix('.hocr'), crop.with_suffix('.txt')) for crop in crops
+    ]
+    ocr_engine = page_context.plugin_manager.hook.get_ocr_engine()
+    if len(batch) > 1 and ocr_engine.supports_hocr_batch:
+        ocr_engine.generate_hocr_batch(batch=batch, options=options)
+    else:
+        for crop, crop_hocr, crop_text in batch:
+            ocr_engine.generate_hocr(
+                input_file=crop,
+                output_hocr=crop_hocr,
+                output_text=crop_text,
+                options=options,
+            )
+    with Image.open(input_file) as im:
+        image_size = im.size
+    merge_region_hocr(
+        [(crop_hocr, region) for (_, crop_hocr, _), region in zip(batch, regions)],
+        image_size,
+        hocr_out,
     )
+    merge_region_text([crop_text for _, _, crop_text in batch], hocr_text_out)
     return hocr_out, hocr_text_out
 
 
+def ocr_engine_hocr_batch(
+    batch: Sequence[tuple[Path, PageContext]],
+) -> list[tuple[Path, Path]]:
+    """Run the OCR engine on the images of several pages at once.
+
+    Args:
+        batch: The image for OCR of each page, and its page context.
+
+    Returns:
+        The hOCR and text files of each page.
+    """
+    outputs = [
+        (page_context.get_path('ocr_hocr.hocr'), page_context.get_path('ocr_hocr.txt'))
+        for _image, page_context in batch
+    ]
+    page_context = batch[0][1]
+    ocr_engine = page_context.plugin_manager.hook.get_ocr_engine()
+    ocr_engine.generate_hocr_batch(
+        batch=[
+            (image, hocr_out, hocr_text_out)
+            for (image, _page_context), (hocr_out, hocr_text_out) in zip(batch, outputs)
+        ],
+        options=page_context.options,
+    )
+    return outputs
+
+
+def can_analyze_page(page_context: PageContext) -> bool:
+    """Can the OCR engine find the orientation, skew and text of a page at once?
+
+    This is only worthwhile when the orientation or skew is needed, and only
+    possible when the image for OCR is the rasterized page, corrected for
+    orientation and skew but otherwise unchanged.
+    """
+    options = page_context.options
+    if not (options.rotate_pages or options.deskew):
+        return False
+    if not options.pdf_renderer.startswith('hocr'):
+        return False
+    if any(
+        [
+            options.clean,
+            options.clean_final,
+            options.remove_background,
+            options.remove_vectors,
+        ]
+    ):
+        return False
+    if options.redo_ocr and page_context.pageinfo.has_text:
+        # Existing text is blanked out of the image for OCR
+        return False
+    if get_ocr_cache(options):
+        # Cached results are found by the image for OCR, after correction
+        return False
+    ocr_engine = page_context.plugin_manager.hook.get_ocr_engine()
+    return ocr_engine.supports_page_analysis
+
+
+def analyze_page(
+    input_file: Path, page_context: PageContext
+) -> tuple[PageAnalysis, Path, Path]:
+    """Find the orientation and skew of a page, and recognize it if upright.
+
+    Returns:
+        The analysis, and the hOCR and text files, which exist only if the
+        analysis says the page was recognized.
+    """
+    hocr_out = page_context.get_path('ocr_hocr.hocr')
+    hocr_text_out = page_context.get_path('ocr_hocr.txt')
+    ocr_engine = page_context.plugin_manager.hook.get_ocr_engine()
+    analysis = ocr_engine.analyze_page(
+        input_file=input_file,
+        output_hocr=hocr_out,
+        output_text=hocr_text_out,
+        options=page_context.options,
+    )
+    return analysis, hocr_out, hocr_text_out
+
+
 def should_visible_page_image_use_jpg(pageinfo: PageInfo) -> bool:
     """Determines whether the visible page image should be saved as a JPEG.
 
@@ -694,7 +1286,7 @@ def create_visible_page_jpg(image: Path, page_context: PageContext) -> Path:
     """
     output_file = page_context.get_path('visible.jpg')
     with Image.open(image) as im:
-        # At this point the image should be a .png, but deskew, unpaper
+        # At this point the image should be a .tif, but deskew, unpaper
         # might have removed the DPI information. In this case, fall back to
         # square DPI used to rasterize. When the preview image was
         # rasterized, it was also converted to square resolution, which is
@@ -712,8 +1304,12 @@ def create_visible_page_jpg(image: Path, page_context: PageContext) -> Path:
 
 def create_pdf_page_from_image(
     image: Path, page_context: PageContext, orientation_correction: int
-) -> Path:
-    """Create a PDF page from a page image."""
+) -> Path | ImagePage:
+    """Create a PDF page from a page image.
+
+    If the page can be kept in memory, and no plugin filters the PDF page, the
+    page is returned as an :class:`ImagePage` instead of a file.
+    """
     # We rasterize a square DPI version of each page because most image
     # processing tools don't support rectangular DPI. Use the square DPI as it
     # accurately describes the image. It would be possible to resample the image
@@ -746,6 +1342,13 @@ def create_pdf_page_from_image(
 
     # img2pdf does not generate boxes correctly, so we fix them
     bio.seek(0)
+    if can_keep_page_in_memory(page_context) and not _has_pdf_page_filter(page_context):
+        with pikepdf.open(bio) as pdf:
+            _fix_page_boxes(pdf.pages[0], page_context, swap_axis)
+            image_page = ImagePage.from_page(pdf.pages[0])
+        if image_page is not None:
+            return image_page
+        bio.seek(0)
     fix_pagepdf_boxes(bio, output_file, page_context, swap_axis=swap_axis)
 
     output_file = page_context.plugin_manager.hook.filter_pdf_page(
@@ -754,37 +1357,60 @@ def create_pdf_page_from_image(
     return output_file
 
 
-def render_hocr_page(hocr: Path, page_context: PageContext) -> Path:
-    """Render the hOCR page to a PDF."""
+def render_hocr_page(
+    hocr: Path | OcrPage | None, page_context: PageContext, *, in_memory: bool = False
+) -> Path | TextLayer | None:
+    """Render the hOCR page, or the words returned by the OCR engine, as text.
+
+    Normally the text is written as a text layer, a content stream without a
+    PDF around it, which is faster to write and to graft. The hocrdebug renderer
+    writes a PDF.
+
+    Args:
+        hocr: The hOCR file, or the words returned by the OCR engine.
+        page_context: The page context.
+        in_memory: Return the text layer, compressed, instead of writing it, or
+            None if the page has no text. The hocrdebug renderer always writes
+            a PDF.
+    """
     options = page_context.options
-    output_file = page_context.get_path('ocr_hocr.pdf')
-    if hocr.stat().st_size == 0:
-        # If hOCR file is empty (skipped page marker), create an empty PDF file
+    debug = options.pdf_renderer == 'hocrdebug'
+    in_memory = in_memory and not debug
+    output_file = page_context.get_path('ocr_hocr.pdf' if debug else 'ocr_hocr.layer')
+    if hocr is None or (isinstance(hocr, Path) and hocr.stat().st_size == 0):
+        if in_memory:
+            return None
+        # If hOCR file is empty (skipped page marker), create an empty file
         output_file.touch()
         return output_file
 
     dpi = get_page_square_dpi(page_context, calculate_image_dpi(page_context))
-    debug_kwargs = {}
-    if options.pdf_renderer == 'hocrdebug':
-        debug_kwargs = dict(
-            debug_render_options=DebugRenderOptions(
-                render_baseline=True,
-                render_triangle=True,
-                render_line_bbox=False,
-                render_word_bbox=True,
-                render_paragraph_bbox=False,
-                render_space_bbox=False,
-            ),
-            font=Courier(),
-        )
+    source = (
+        dict(ocr_page=hocr) if isinstance(hocr, OcrPage) else dict(hocr_filename=hocr)
+    )
+    if not debug:
+        layer = HocrTransform(**source, dpi=dpi.to_scalar()).to_text_layer()
+        if in_memory:
+            return layer.compress()
+        layer.write(output_file)
+        return output_file
+
     HocrTransform(
-        hocr_filename=hocr,
-        dpi=dpi.to_scalar(),
-        **debug_kwargs,  # square
+        **source,
+        dpi=dpi.to_scalar(),  # square
+        debug_render_options=DebugRenderOptions(
+            render_baseline=True,
+            render_triangle=True,
+            render_line_bbox=False,
+            render_word_bbox=True,
+            render_paragraph_bbox=False,
+            render_space_bbox=False,
+        ),
+        font=Courier(),
     ).to_pdf(
         out_filename=output_file,
         image_filename=None,
-        invisible_text=True if not debug_kwargs else False,
+        invisible_text=False,
     )
     return output_file
 
@@ -798,12 +1424,21 @@ def ocr_engine_textonly_pdf(
     options = page_context.options
 
     ocr_engine = page_context.plugin_manager.hook.get_ocr_engine()
+    ocr_cache = get_ocr_cache(options)
+    cache_outputs = {'pdf': output_pdf, 'txt': output_text}
+    if ocr_cache:
+        cache_key = ocr_cache.key(input_image, ocr_engine, options)
+        if ocr_cache.fetch(cache_key, cache_outputs):
+            return output_pdf, output_text
+
     ocr_engine.generate_pdf(
         input_file=input_image,
         output_pdf=output_pdf,
         output_text=output_text,
         options=options,
     )
+    if ocr_cache:
+        ocr_cache.store(cache_key, cache_outputs)
     return output_pdf, output_text
 
 
@@ -841,22 +1476,28 @@ def fix_pagepdf_boxes(
     """
     with pikepdf.open(infile) as pdf:
         for page in pdf.pages:
-            # page.BleedBox = page_context.pageinfo.bleedbox
-            # page.ArtBox = page_context.pageinfo.artbox
-            mediabox = page_context.pageinfo.mediabox
-            offset = mediabox[0], mediabox[1]
-            cropbox = _offset_rect(page_context.pageinfo.cropbox, offset)
-            trimbox = _offset_rect(page_context.pageinfo.trimbox, offset)
-
-            if swap_axis:
-                cropbox = cropbox[1], cropbox[0], cropbox[3], cropbox[2]
-                trimbox = trimbox[1], trimbox[0], trimbox[3], trimbox[2]
-            page.CropBox = cropbox
-            page.TrimBox = trimbox
+            _fix_page_boxes(page, page_context, swap_axis)
         pdf.save(out_file)
     return pdf
 
 
+def _fix_page_boxes(
+    page: pikepdf.Page, page_context: PageContext, swap_axis: bool
+) -> None:
+    # page.BleedBox = page_context.pageinfo.bleedbox
+    # page.ArtBox = page_context.pageinfo.artbox
+    mediabox = page_context.pageinfo.mediabox
+    offset = mediabox[0], mediabox[1]
+    cropbox = _offset_rect(page_context.pageinfo.cropbox, offset)
+    trimbox = _offset_rect(page_context.pageinfo.trimbox, offset)
+
+    if swap_axis:
+        cropbox = cropbox[1], cropbox[0], cropbox[3], cropbox[2]
+        trimbox = trimbox[1], trimbox[0], trimbox[3], trimbox[2]
+    page.CropBox = cropbox
+    page.TrimBox = trimbox
+
+
 def generate_postscript_stub(context: PdfContext) -> Path:
     """Generates a PostScript file stub for the given PDF context.
 
@@ -7,38 +7,54 @@ import argparse
 import json
 import logging
 import logging.handlers
+import math
 import os
 import shutil
 import sys
 import threading
-from collections.abc import Callable, Sequence
+import time
+from collections.abc import Callable, Iterable, Sequence
 from concurrent.futures.process import BrokenProcessPool
 from concurrent.futures.thread import BrokenThreadPool
 from contextlib import contextmanager
 from dataclasses import dataclass
 from pathlib import Path
-from typing import NamedTuple, cast
+from typing import Any, NamedTuple
 
 import PIL
 
-from ocrmypdf._concurrent import Executor, setup_executor
+from ocrmypdf._concurrent import Executor, Stage, setup_executor
+from ocrmypdf._graft import ImagePage
 from ocrmypdf._jobcontext import PageContext, PdfContext
 from ocrmypdf._logging import PageNumberFilter
 from ocrmypdf._metadata import metadata_fixup
+from ocrmypdf._ocr_cache import get_ocr_cache
 from ocrmypdf._pipeline import (
+    RasterRun,
+    analyze_page,
+    can_analyze_page,
+    can_rasterize_runs,
+    choose_orientation_correction,
     convert_to_pdfa,
     create_ocr_image,
+    create_orientation_preview,
     create_pdf_page_from_image,
     create_visible_page_jpg,
+    estimate_page_cost,
+    estimate_page_memory,
     generate_postscript_stub,
     get_orientation_correction,
     get_pdf_save_settings,
+    is_ocr_required,
     optimize_pdf,
+    plan_ocr_batches,
+    plan_raster_runs,
     preprocess_clean,
     preprocess_deskew,
     preprocess_remove_background,
     rasterize,
-    rasterize_preview,
+    rasterize_run,
+    rotate_page_image,
     should_linearize,
     should_visible_page_image_use_jpg,
 )
@@ -49,16 +65,30 @@ from ocrmypdf._validation import (
 from ocrmypdf.exceptions import ExitCode, ExitCodeException
 from ocrmypdf.helpers import (
     available_cpu_count,
+    cgroup_memory_limit,
     check_pdf,
     pikepdf_enable_mmap,
     samefile,
 )
+from ocrmypdf.hocrtransform import TextLayer
 from ocrmypdf.pdfa import file_claims_pdfa
 
 log = logging.getLogger(__name__)
 tls = threading.local()
 tls.pageno = None
 
+# Fraction of a cgroup memory limit to use as the default --memory-budget
+MEMORY_LIMIT_BUDGET_FRACTION = 0.75
+
+# Most pages to rasterize in one run; longer runs delay the first page's OCR
+RASTERIZE_RUN_MAX_PAGES = 50
+
+# Runs of pages to plan for each worker, so that runs are spread evenly
+RASTERIZE_RUNS_PER_WORKER = 4
+
+# Most pages to recognize with one OCR engine invocation
+OCR_BATCH_MAX_PAGES = 16
+
 
 def _set_logging_tls(tls):
     """Inject current page number (when available) into log records."""
@@ -87,11 +117,11 @@ class PageResult(NamedTuple):
     pageno: int
     """Page number, 0-based."""
 
-    pdf_page_from_image: Path | None = None
-    """Single page PDF from image."""
+    pdf_page_from_image: Path | ImagePage | None = None
+    """Single page PDF from image, or the page itself."""
 
-    ocr: Path | None = None
-    """Single page OCR PDF."""
+    ocr: Path | TextLayer | None = None
+    """Single page OCR PDF or text layer file, or the text layer itself."""
 
     text: Path | None = None
     """Single page text file."""
@@ -99,6 +129,34 @@ class PageResult(NamedTuple):
     orientation_correction: int = 0
     """Orientation correction in degrees."""
 
+    ocr_cache_hits: int = 0
+    """Number of OCR results for this page found in the OCR result cache."""
+
+    ocr_cache_misses: int = 0
+    """Number of OCR results for this page not found in the OCR result cache."""
+
+    @classmethod
+    def from_json(cls, json_str: str) -> PageResult:
+        """Create an instance from a JSON string."""
+        return cls(
+            **{
+                k: (Path(v) if k in _PAGE_RESULT_PATHS and v is not None else v)
+                for k, v in json.loads(json_str).items()
+            }
+        )
+
+    def to_json(self) -> str:
+        """Serialize to a JSON string."""
+        return json.dumps(
+            {
+                k: (str(v) if k in _PAGE_RESULT_PATHS and v is not None else v)
+                for k, v in self._asdict().items()
+            }
+        )
+
+
+_PAGE_RESULT_PATHS = ('pdf_page_from_image', 'ocr', 'text')
+
 
 @dataclass
 class HOCRResult:
@@ -119,6 +177,12 @@ class HOCRResult:
     orientation_correction: int = 0
     """Orientation correction in degrees."""
 
+    ocr_cache_hits: int = 0
+    """Number of OCR results for this page found in the OCR result cache."""
+
+    ocr_cache_misses: int = 0
+    """Number of OCR results for this page not found in the OCR result cache."""
+
     def __getstate__(self):
         """Return state values to be pickled."""
         return {
@@ -153,6 +217,25 @@ class HOCRResult:
         return json.dumps(self.__getstate__())
 
 
+class PageImages(NamedTuple):
+    """Images of a page that are ready for OCR."""
+
+    page_context: PageContext
+    """The page context."""
+
+    ocr_image: Path
+    """Image to be sent to the OCR engine."""
+
+    pdf_page_from_image: Path | ImagePage | None
+    """Single page PDF from image, or the page itself."""
+
+    orientation_correction: int
+    """Orientation correction in degrees."""
+
+    ocr_result: tuple[Path, Path] | None = None
+    """hOCR and text files, if the page was recognized while preparing images."""
+
+
 def configure_debug_logging(
     log_filename: Path, prefix: str = ''
 ) -> tuple[logging.FileHandler, Callable[[], None]]:
@@ -230,6 +313,37 @@ def manage_work_folder(*, work_folder: Path, retain: bool, print_location: bool)
             shutil.rmtree(work_folder, ignore_errors=True)
 
 
+def report_exception(e: Exception, options: argparse.Namespace) -> ExitCode:
+    """Log an exception raised by the pipeline and return its exit code."""
+    if isinstance(e, ExitCodeException):
+        if options.verbose >= 1:
+            log.error("ExitCodeException", exc_info=e)
+        elif str(e):
+            log.error("%s: %s", type(e).__name__, str(e))
+        else:
+            log.error(type(e).__name__)
+        return e.exit_code
+    if isinstance(e, PIL.Image.DecompressionBombError):
+        log.error(
+            "A decompression bomb error was encountered while executing the "
+            "pipeline. Use the argument --max-image-mpixels to raise the maximum "
+            "image pixel limit.",
+            exc_info=e,
+        )
+        return ExitCode.other_error
+    if isinstance(e, BrokenProcessPool | BrokenThreadPool):
+        log.error(
+            "A worker process was terminated unexpectedly. This is known to occur if "
+            "processing your file takes all available swap space and RAM. It may "
+            "help to try again with a smaller number of jobs, using the --jobs "
+            "argument.",
+            exc_info=e,
+        )
+        return ExitCode.child_process_error
+    log.error("An exception occurred while executing the pipeline", exc_info=e)
+    return ExitCode.other_error
+
+
 def cli_exception_handler(
     fn: Callable[[argparse.Namespace, OcrmypdfPluginManager], ExitCode],
     options: argparse.Namespace,
@@ -253,36 +367,8 @@ def cli_exception_handler(
         else:
             log.error("KeyboardInterrupt")
         return ExitCode.ctrl_c
-    except ExitCodeException as e:
-        e = cast(ExitCodeException, e)
-        if options.verbose >= 1:
-            log.exception("ExitCodeException")
-        elif str(e):
-            log.error("%s: %s", type(e).__name__, str(e))
-        else:
-            log.error(type(e).__name__)
-        return e.exit_code
-    except PIL.Image.DecompressionBombError:
-        log.exception(
-            "A decompression bomb error was encountered while executing the "
-            "pipeline. Use the argument --max-image-mpixels to raise the maximum "
-            "image pixel limit."
-        )
-        return ExitCode.other_error
-    except (
-        BrokenProcessPool,
-        BrokenThreadPool,
-    ):
-        log.exception(
-            "A worker process was terminated unexpectedly. This is known to occur if "
-            "processing your file takes all available swap space and RAM. It may "
-            "help to try again with a smaller number of jobs, using the --jobs "
-            "argument."
-        )
-        return ExitCode.child_process_error
-    except Exception:  # pylint: disable=broad-except
-        log.exception("An exception occurred while executing the pipeline")
-        return ExitCode.other_error
+    except Exception as e:  # pylint: disable=broad-except
+        return report_exception(e, options)
 
 
 def setup_pipeline(
@@ -294,6 +380,16 @@ def setup_pipeline(
     # options.input_file, options.pdf_renderer are already bound.)
     if not options.jobs:
         options.jobs = available_cpu_count()
+    if options.memory_budget is None:
+        memory_limit = cgroup_memory_limit()
+        if memory_limit:
+            # Leave room for the main process and the rest of the container
+            budget = memory_limit * MEMORY_LIMIT_BUDGET_FRACTION
+            options.memory_budget = budget / 1_000_000
+            log.debug(
+                "Using a memory budget of %.0f MB, from the cgroup memory limit",
+                options.memory_budget,
+            )
 
     pikepdf_enable_mmap()
     executor = setup_executor(plugin_manager)
@@ -306,30 +402,41 @@ def preprocess(
     remove_background: bool,
     deskew: bool,
     clean: bool,
+    deskew_angle: float | None = None,
 ) -> Path:
     """Preprocess an image."""
     if remove_background:
         image = preprocess_remove_background(image, page_context)
     if deskew:
-        image = preprocess_deskew(image, page_context)
+        image = preprocess_deskew(image, page_context, deskew_angle)
     if clean:
         image = preprocess_clean(image, page_context)
     return image
 
 
 def make_intermediate_images(
-    page_context: PageContext, orientation_correction: int
+    page_context: PageContext,
+    orientation_correction: int,
+    rasterize_out: Path | None = None,
+    deskew_angle: float | None = None,
 ) -> tuple[Path, Path | None]:
-    """Create intermediate and preprocessed images for OCR."""
+    """Create intermediate and preprocessed images for OCR.
+
+    If the page has already been rasterized, with the orientation correction
+    applied, pass the image as ``rasterize_out`` so that it is not rasterized
+    again. If the deskew angle of that image is already known, pass it as
+    ``deskew_angle``.
+    """
     options = page_context.options
 
     ocr_image = preprocess_out = None
-    rasterize_out = rasterize(
-        page_context.origin,
-        page_context,
-        correction=orientation_correction,
-        remove_vectors=False,
-    )
+    if rasterize_out is None:
+        rasterize_out = rasterize(
+            page_context.origin,
+            page_context,
+            correction=orientation_correction,
+            remove_vectors=False,
+        )
 
     if not any([options.clean, options.clean_final, options.remove_vectors]):
         ocr_image = preprocess_out = preprocess(
@@ -338,6 +445,7 @@ def make_intermediate_images(
             options.remove_background,
             options.deskew,
             clean=False,
+            deskew_angle=deskew_angle,
         )
     else:
         if not options.lossless_reconstruction:
@@ -347,6 +455,7 @@ def make_intermediate_images(
                 options.remove_background,
                 options.deskew,
                 clean=options.clean_final,
+                deskew_angle=deskew_angle,
             )
         if options.remove_vectors:
             rasterize_ocr_out = rasterize(
@@ -373,23 +482,52 @@ def make_intermediate_images(
                 options.remove_background,
                 options.deskew,
                 clean=options.clean,
+                deskew_angle=deskew_angle,
             )
     return ocr_image, preprocess_out
 
 
-def process_page(page_context: PageContext) -> tuple[Path, Path | None, int]:
+def process_page(page_context: PageContext) -> PageImages:
     """Process page to create OCR image, visible page image and orientation."""
     options = page_context.options
     orientation_correction = 0
-    if options.rotate_pages:
-        # Rasterize
-        rasterize_preview_out = rasterize_preview(page_context.origin, page_context)
+    rasterize_out = None
+    deskew_angle = None
+    ocr_result = None
+    if can_analyze_page(page_context):
+        # Find orientation and skew, and recognize the page if it needs no
+        # correction, in one pass of the OCR engine
+        rasterize_out = rasterize(
+            page_context.origin, page_context, remove_vectors=False
+        )
+        analysis, hocr_out, hocr_text_out = analyze_page(
+            create_ocr_image(rasterize_out, page_context), page_context
+        )
+        if analysis.orientation is not None:
+            orientation_correction = choose_orientation_correction(
+                analysis.orientation, page_context
+            )
+        if orientation_correction == 0:
+            # Otherwise the skew must be found again, once the page is upright
+            deskew_angle = analysis.deskew
+            if analysis.recognized and not analysis.needs_correction(
+                options.rotate_pages_threshold
+            ):
+                ocr_result = (hocr_out, hocr_text_out)
+        rotate_page_image(rasterize_out, orientation_correction)
+    elif options.rotate_pages:
+        # Rasterize once, and check orientation on a preview made from that
+        rasterize_out = rasterize(
+            page_context.origin, page_context, remove_vectors=False
+        )
+        rasterize_preview_out = create_orientation_preview(rasterize_out, page_context)
         orientation_correction = get_orientation_correction(
             rasterize_preview_out, page_context
         )
+        rotate_page_image(rasterize_out, orientation_correction)
 
     ocr_image, preprocess_out = make_intermediate_images(
-        page_context, orientation_correction
+        page_context, orientation_correction, rasterize_out, deskew_angle
     )
     ocr_image_out = create_ocr_image(ocr_image, page_context)
 
@@ -407,7 +545,54 @@ def process_page(page_context: PageContext) -> tuple[Path, Path | None, int]:
         pdf_page_from_image_out = create_pdf_page_from_image(
             visible_image_out, page_context, orientation_correction
         )
-    return ocr_image_out, pdf_page_from_image_out, orientation_correction
+    return PageImages(
+        page_context,
+        ocr_image_out,
+        pdf_page_from_image_out,
+        orientation_correction,
+        ocr_result,
+    )
+
+
+def prepare_page_images(page_context: PageContext) -> PageImages:
+    """Prepare the images of a page for OCR.
+
+    This is the first stage of processing a page, before OCR.
+    """
+    set_thread_pageno(page_context.pageno + 1)
+    start = time.monotonic()
+    images = process_page(page_context)
+    log.debug(
+        "Page images prepared in %.2f s (estimated cost %.1f)",
+        time.monotonic() - start,
+        estimate_page_cost(page_context),
+    )
+    return images
+
+
+def prepare_pages_images(*args: RasterRun | PageContext) -> list[PageImages]:
+    """Prepare the images of several pages for OCR, one page after another.
+
+    Runs of pages among the arguments are rasterized first, each at once; see
+    :func:`plan_page_tasks`.
+    """
+    page_contexts = [arg for arg in args if isinstance(arg, PageContext)]
+    for run in args:
+        if isinstance(run, RasterRun):
+            rasterize_run(run, page_contexts[0].plugin_manager)
+    return [prepare_page_images(page_context) for page_context in page_contexts]
+
+
+def discard_page_images(page_context: PageContext) -> None:
+    """Delete the intermediate images of a page once it has been processed.
+
+    Intermediate images are uncompressed, so keeping them for every page of a
+    long document could use a lot of temporary storage.
+    """
+    if page_context.options.keep_temporary_files:
+        return
+    for image in page_context.work_folder.glob(f'{page_context.pageno + 1:06d}_*.tif'):
+        image.unlink(missing_ok=True)
 
 
 def postprocess(
@@ -427,6 +612,187 @@ def postprocess(
     return optimize_pdf(pdf_out, context, executor)
 
 
+def schedule_pages(
+    context: PdfContext, pagenos: Iterable[int] | None = None
+) -> tuple[list[PageContext], list[int]]:
+    """Decide which pages need processing, and in what order.
+
+    Pages that do not need OCR are returned separately, so that the caller can
+    finish them without occupying a worker. The remaining pages are ordered by
+    their estimated cost, most expensive first, so that a large page near the
+    end of the document does not hold up the job after the other workers have
+    run out of pages.
+
+    Args:
+        context: The PDF context.
+        pagenos: If given, only these pages (zero-based) are considered.
+
+    Returns:
+        The pages to process, in order, and the page numbers of skipped pages.
+    """
+    pending: list[tuple[float, PageContext]] = []
+    skipped: list[int] = []
+    for (page_context,) in context.get_page_context_args(pagenos):
+        set_thread_pageno(page_context.pageno + 1)
+        try:
+            if is_ocr_required(page_context):
+                pending.append((estimate_page_cost(page_context), page_context))
+            else:
+                skipped.append(page_context.pageno)
+        finally:
+            set_thread_pageno(None)
+    pending.sort(key=lambda item: item[0], reverse=True)
+    if pending:
+        log.debug(
+            "Page processing order (estimated cost): %s",
+            ', '.join(f'{pc.pageno + 1} ({cost:.1f})' for cost, pc in pending),
+        )
+    return [page_context for _cost, page_context in pending], skipped
+
+
+def plan_page_tasks(
+    page_contexts: Sequence[PageContext], options: argparse.Namespace
+) -> list[tuple[RasterRun | PageContext, ...]]:
+    """Group pages into the tasks that process them.
+
+    Rasterizing pages one at a time means the input file must be parsed again
+    for each page, which can take longer than rendering a simple page. Instead,
+    each run of consecutive pages that have the same raster settings is
+    processed by one task, which rasterizes the run before processing its
+    pages. Runs are kept short, so that some workers recognize the pages of
+    their runs while others are rasterizing, and only the page images of the
+    runs being processed are kept. Other pages are grouped by
+    :func:`batch_small_pages`.
+
+    Tasks keep the order of ``page_contexts``, each placed where the first of
+    its pages appears.
+    """
+    runs: list[RasterRun] = []
+    if page_contexts and can_rasterize_runs(page_contexts[0].plugin_manager):
+        runs_wanted = options.jobs * RASTERIZE_RUNS_PER_WORKER
+        run_pages = max(2, math.ceil(len(page_contexts) / runs_wanted))
+        runs = plan_raster_runs(page_contexts, min(run_pages, RASTERIZE_RUN_MAX_PAGES))
+    if runs:
+        log.debug(
+            "Rasterizing pages in runs: %s",
+            ', '.join(f'{run.first_pageno}-{run.last_pageno}' for run in runs),
+        )
+
+    # With --remove-vectors, each run of pages has a run for each image
+    run_pages_of: dict[tuple[int, int], list[RasterRun]] = {}
+    for run in runs:
+        run_pages_of.setdefault((run.first_pageno, run.last_pageno), []).append(run)
+    group_of: dict[int, tuple[int, int]] = {}
+    for first, last in run_pages_of:
+        for pageno in range(first, last + 1):
+            group_of.setdefault(pageno, (first, last))
+
+    groups: dict[tuple[int, int], list[PageContext]] = {}
+    others: list[PageContext] = []
+    for page_context in page_contexts:
+        if (group := group_of.get(page_context.pageno + 1)) is not None:
+            groups.setdefault(group, []).append(page_context)
+        else:
+            others.append(page_context)
+    tasks: list[tuple[RasterRun | PageContext, ...]] = [
+        (*run_pages_of[group], *sorted(pages, key=lambda pc: pc.pageno))
+        for group, pages in groups.items()
+    ]
+    tasks.extend(batch_small_pages(others, options))
+
+    order = {page_context.pageno: n for n, page_context in enumerate(page_contexts)}
+    tasks.sort(
+        key=lambda task: min(
+            order[arg.pageno] for arg in task if isinstance(arg, PageContext)
+        )
+    )
+    return tasks
+
+
+def batch_small_pages(
+    page_contexts: Sequence[PageContext], options: argparse.Namespace
+) -> list[tuple[PageContext, ...]]:
+    """Group runs of small pages so that each run is recognized in one OCR task.
+
+    Runs are limited so that the pages are still spread across all workers.
+    """
+    batch_pages = max(2, math.ceil(len(page_contexts) / options.jobs))
+    batches = plan_ocr_batches(page_contexts, min(batch_pages, OCR_BATCH_MAX_PAGES))
+    if len(batches) < len(page_contexts):
+        log.debug(
+            "Recognizing small pages together: %s",
+            ', '.join(
+                f'{batch[0].pageno + 1}-{batch[-1].pageno + 1}'
+                for batch in batches
+                if len(batch) > 1
+            ),
+        )
+    return batches
+
+
+def page_stages(
+    options: argparse.Namespace,
+    npages: int,
+    image_task: Callable[..., Any],
+    ocr_task: Callable[[Any], Any],
+) -> list[Stage] | None:
+    """Return the stages to process pages with ``--image-jobs``/``--ocr-jobs``.
+
+    Returns ``None`` unless either option is given, in which case each page is
+    processed in one task. If only one option is given, the other stage gets
+    the rest of ``--jobs``, and at least one worker.
+    """
+    if not (options.image_jobs or options.ocr_jobs):
+        return None
+    image_jobs = options.image_jobs or max(1, options.jobs - options.ocr_jobs)
+    ocr_jobs = options.ocr_jobs or max(1, options.jobs - options.image_jobs)
+    image_jobs = min(npages, image_jobs)
+    ocr_jobs = min(npages, ocr_jobs)
+    log.info(
+        "Processing pages in two stages, with %d image and %d OCR workers",
+        image_jobs,
+        ocr_jobs,
+    )
+    return [Stage(image_task, image_jobs, 'image'), Stage(ocr_task, ocr_jobs, 'ocr')]
+
+
+def page_memory_kwargs(options: argparse.Namespace) -> dict:
+    """Return the executor arguments that apply ``--memory-budget`` to page tasks.
+
+    The page contexts of a task must be among its arguments. A task with
+    several pages processes them one at a time, so it needs as much memory as
+    its largest page.
+    """
+    if not options.memory_budget:
+        return {}
+    return dict(
+        task_memory=lambda *args: max(
+            estimate_page_memory(arg) for arg in args if isinstance(arg, PageContext)
+        ),
+        memory_budget=int(options.memory_budget * 1_000_000),
+    )
+
+
+def report_ocr_cache(options: argparse.Namespace, hits: int, misses: int) -> None:
+    """Trim the OCR result cache to its size limit and report its use.
+
+    Args:
+        options: The options of the run.
+        hits: Total of the cache hits of the page results.
+        misses: Total of the cache misses of the page results.
+    """
+    ocr_cache = get_ocr_cache(options)
+    if not ocr_cache:
+        return
+    ocr_cache.evict()
+    log.info(
+        "OCR cache: %d hits, %d misses, %d evictions",
+        hits,
+        misses,
+        ocr_cache.evictions,
+    )
+
+
 def report_output_pdf(options, start_input_file, optimize_messages) -> ExitCode:
     if options.output_file == '-':
         log.info("Output sent to stdout")
@@ -59,7 +59,7 @@ def exec_hocr_to_ocr_pdf(context: PdfContext, executor: Executor) -> Sequence[st
     if max_workers > 1:
         log.info("Continue processing %d pages concurrently", max_workers)
 
-    ocrgraft = OcrGrafter(context)
+    ocrgraft = OcrGrafter(context, streaming=options.streaming_graft)
 
     def graft_page(result: HOCRResult, pbar: ProgressBar):
         """Graft text only PDF on to main PDF's page."""
@@ -9,6 +9,8 @@ from __future__ import annotations
 import argparse
 import logging
 import logging.handlers
+import time
+from collections import Counter
 from collections.abc import Sequence
 from functools import partial
 from pathlib import Path
@@ -16,51 +18,68 @@ from tempfile import mkdtemp
 
 import PIL
 
+from ocrmypdf._checkpoint import CheckpointJournal, job_fingerprint
 from ocrmypdf._concurrent import Executor
-from ocrmypdf._graft import OcrGrafter
+from ocrmypdf._graft import OcrGrafter, PartitionedGrafter
 from ocrmypdf._jobcontext import PageContext, PdfContext
+from ocrmypdf._ocr_cache import take_lookup_counts
 from ocrmypdf._pipeline import (
+    RasterRun,
+    can_keep_page_in_memory,
     copy_final,
     get_pdfinfo,
-    is_ocr_required,
     merge_sidecars,
-    ocr_engine_hocr,
+    ocr_engine_hocr_batch,
+    ocr_engine_ocr_page,
     ocr_engine_textonly_pdf,
+    plan_ocr_batches,
     render_hocr_page,
     triage,
     validate_pdfinfo_options,
 )
 from ocrmypdf._pipelines._common import (
+    OCR_BATCH_MAX_PAGES,
+    PageImages,
     PageResult,
     cli_exception_handler,
+    discard_page_images,
     manage_debug_log_handler,
     manage_work_folder,
+    page_memory_kwargs,
+    page_stages,
+    plan_page_tasks,
     postprocess,
-    process_page,
+    prepare_page_images,
+    prepare_pages_images,
+    report_ocr_cache,
     report_output_pdf,
+    schedule_pages,
     set_thread_pageno,
     setup_pipeline,
     worker_init,
 )
 from ocrmypdf._plugin_manager import OcrmypdfPluginManager
-from ocrmypdf._progressbar import ProgressBar
+from ocrmypdf._progressbar import NullProgressBar, ProgressBar
 from ocrmypdf._validation import (
     check_requested_output_file,
     create_input_file,
 )
 from ocrmypdf.exceptions import ExitCode
+from ocrmypdf.hocrtransform import TextLayer
 
 log = logging.getLogger(__name__)
 
 
 def _image_to_ocr_text(
     page_context: PageContext, ocr_image_out: Path
-) -> tuple[Path, Path]:
+) -> tuple[Path | TextLayer | None, Path]:
     """Run OCR engine on image to create OCR PDF and text file."""
     options = page_context.options
     if options.pdf_renderer.startswith('hocr'):
-        hocr_out, text_out = ocr_engine_hocr(ocr_image_out, page_context)
-        ocr_out = render_hocr_page(hocr_out, page_context)
+        ocr_result, text_out = ocr_engine_ocr_page(ocr_image_out, page_context)
+        ocr_out = render_hocr_page(
+            ocr_result, page_context, in_memory=can_keep_page_in_memory(page_context)
+        )
     elif options.pdf_renderer == 'sandwich':
         ocr_out, text_out = ocr_engine_textonly_pdf(ocr_image_out, page_context)
     else:
@@ -68,41 +87,115 @@ def _image_to_ocr_text(
     return ocr_out, text_out
 
 
-def _exec_page_sync(page_context: PageContext) -> PageResult:
-    """Execute a pipeline for a single page synchronously."""
+def _exec_page_ocr_sync(images: PageImages) -> PageResult:
+    """Run OCR on the prepared images of a single page."""
+    page_context = images.page_context
     set_thread_pageno(page_context.pageno + 1)
-
-    if not is_ocr_required(page_context):
-        return PageResult(pageno=page_context.pageno)
-
-    ocr_image_out, pdf_page_from_image_out, orientation_correction = process_page(
-        page_context
-    )
-    ocr_out, text_out = _image_to_ocr_text(page_context, ocr_image_out)
+    start = time.monotonic()
+    if images.ocr_result:
+        hocr_out, text_out = images.ocr_result
+        ocr_out = render_hocr_page(
+            hocr_out, page_context, in_memory=can_keep_page_in_memory(page_context)
+        )
+    else:
+        ocr_out, text_out = _image_to_ocr_text(page_context, images.ocr_image)
+    log.debug("Page OCR finished in %.2f s", time.monotonic() - start)
+    discard_page_images(page_context)
+    ocr_cache_hits, ocr_cache_misses = take_lookup_counts()
     return PageResult(
         pageno=page_context.pageno,
-        pdf_page_from_image=pdf_page_from_image_out,
+        pdf_page_from_image=images.pdf_page_from_image,
         ocr=ocr_out,
         text=text_out,
-        orientation_correction=orientation_correction,
+        orientation_correction=images.orientation_correction,
+        ocr_cache_hits=ocr_cache_hits,
+        ocr_cache_misses=ocr_cache_misses,
     )
 
 
-def exec_concurrent(context: PdfContext, executor: Executor) -> Sequence[str]:
-    """Execute the OCR pipeline concurrently."""
+def _exec_page_sync(page_context: PageContext) -> PageResult:
+    """Execute a pipeline for a single page synchronously.
+
+    The page must be one that requires OCR; see :func:`schedule_pages`.
+    """
+    return _exec_page_ocr_sync(prepare_page_images(page_context))
+
+
+def _exec_pages_ocr_sync(pages: Sequence[PageImages]) -> list[PageResult]:
+    """Run OCR on the prepared images of several pages.
+
+    Runs of small pages that still need OCR are recognized with one invocation
+    of the OCR engine each, and then rendered one at a time.
+    """
+    pending = {
+        images.page_context.pageno: images for images in pages if not images.ocr_result
+    }
+    if len(pending) > 1:
+        for batch in plan_ocr_batches(
+            [images.page_context for images in pending.values()],
+            OCR_BATCH_MAX_PAGES,
+        ):
+            if len(batch) < 2:
+                continue
+            set_thread_pageno(batch[0].pageno + 1)
+            start = time.monotonic()
+            ocr_results = ocr_engine_hocr_batch(
+                [(pending[pc.pageno].ocr_image, pc) for pc in batch]
+            )
+            log.debug(
+                "OCR of %d pages finished in %.2f s",
+                len(batch),
+                time.monotonic() - start,
+            )
+            for page_context, ocr_result in zip(batch, ocr_results):
+                pending[page_context.pageno] = pending[page_context.pageno]._replace(
+                    ocr_result=ocr_result
+                )
+    return [
+        _exec_page_ocr_sync(pending.get(images.page_context.pageno, images))
+        for images in pages
+    ]
+
+
+def _exec_pages_sync(*args: RasterRun | PageContext) -> list[PageResult]:
+    """Execute a pipeline for several pages; see :func:`plan_page_tasks`."""
+    return _exec_pages_ocr_sync(prepare_pages_images(*args))
+
+
+def exec_concurrent(
+    context: PdfContext,
+    executor: Executor,
+    journal: CheckpointJournal | None = None,
+) -> Sequence[str]:
+    """Execute the OCR pipeline concurrently.
+
+    If a checkpoint journal is given, pages it records as finished are grafted
+    without being processed again, and newly finished pages are added to it.
+    """
     options = context.options
-    max_workers = min(len(context.pdfinfo), options.jobs)
+    completed = journal.open() if journal else {}
+    pending_pages, skipped_pages = schedule_pages(
+        context, [n for n in range(len(context.pdfinfo)) if n not in completed]
+    )
+    tasks = plan_page_tasks(pending_pages, options)
+    max_workers = min(len(tasks), options.jobs)
     if max_workers > 1:
         log.info("Start processing %d pages concurrently", max_workers)
 
     sidecars: list[Path | None] = [None] * len(context.pdfinfo)
-    ocrgraft = OcrGrafter(context)
+    ocrgraft: OcrGrafter | PartitionedGrafter
+    if options.parallel_graft:
+        ocrgraft = PartitionedGrafter(context, executor)
+    else:
+        ocrgraft = OcrGrafter(context, streaming=options.streaming_graft)
 
     def update_page(result: PageResult, pbar: ProgressBar):
         """After OCR is complete for a page, update the PDF."""
         try:
             set_thread_pageno(result.pageno + 1)
             sidecars[result.pageno] = result.text
+            if journal and result.pageno not in completed:
+                journal.record(result)
             pbar.update(0.5)
             ocrgraft.graft_page(
                 pageno=result.pageno,
@@ -114,20 +207,49 @@ def exec_concurrent(context: PdfContext, executor: Executor) -> Sequence[str]:
         finally:
             set_thread_pageno(None)
 
-    executor(
-        use_threads=options.use_threads,
-        max_workers=max_workers,
-        progress_kwargs=dict(
-            total=len(context.pdfinfo),
-            desc='OCR' if options.tesseract_timeout > 0 else 'Image processing',
-            unit='page',
-            disable=not options.progress_bar,
-        ),
-        worker_initializer=partial(worker_init, PIL.Image.MAX_IMAGE_PIXELS),
-        task=_exec_page_sync,
-        task_arguments=context.get_page_context_args(),
-        task_finished=update_page,
-    )
+    ocr_cache_use: Counter[str] = Counter()
+
+    def update_pages(results: list[PageResult], pbar: ProgressBar):
+        for result in results:
+            ocr_cache_use.update(
+                hits=result.ocr_cache_hits, misses=result.ocr_cache_misses
+            )
+            update_page(result, pbar)
+
+    for result in completed.values():
+        update_page(result, NullProgressBar())
+    for pageno in skipped_pages:
+        update_page(PageResult(pageno=pageno), NullProgressBar())
+
+    try:
+        if pending_pages:
+            executor(
+                use_threads=options.use_threads,
+                max_workers=max_workers,
+                progress_kwargs=dict(
+                    total=len(pending_pages),
+                    desc=(
+                        'OCR' if options.tesseract_timeout > 0 else 'Image processing'
+                    ),
+                    unit='page',
+                    disable=not options.progress_bar,
+                ),
+                worker_initializer=partial(worker_init, PIL.Image.MAX_IMAGE_PIXELS),
+                task=_exec_pages_sync,
+                task_arguments=tasks,
+                task_finished=update_pages,
+                stages=page_stages(
+                    options,
+                    len(tasks),
+                    prepare_pages_images,
+                    _exec_pages_ocr_sync,
+                ),
+                **page_memory_kwargs(options),
+            )
+    finally:
+        if journal:
+            journal.close()
+    report_ocr_cache(options, ocr_cache_use['hits'], ocr_cache_use['misses'])
 
     # Output sidecar text
     if options.sidecar:
@@ -153,14 +275,22 @@ def _run_pipeline(
     options: argparse.Namespace,
     plugin_manager: OcrmypdfPluginManager,
 ) -> ExitCode:
+    if options.checkpoint_dir:
+        work_folder = Path(options.checkpoint_dir)
+        work_folder.mkdir(parents=True, exist_ok=True)
+    else:
+        work_folder = Path(mkdtemp(prefix="ocrmypdf.io."))
     with (
         manage_work_folder(
-            work_folder=Path(mkdtemp(prefix="ocrmypdf.io.")),
-            retain=options.keep_temporary_files,
+            work_folder=work_folder,
+            retain=options.keep_temporary_files or bool(options.checkpoint_dir),
             print_location=options.keep_temporary_files,
         ) as work_folder,
         manage_debug_log_handler(options=options, work_folder=work_folder),
     ):
+        # The job is identified by the options as given, before the pipeline
+        # fills in values derived from this machine's CPUs and memory
+        job_options = argparse.Namespace(**vars(options))
         executor = setup_pipeline(options, plugin_manager)
         check_requested_output_file(options)
         start_input_file, original_filename = create_input_file(options, work_folder)
@@ -181,13 +311,28 @@ def _run_pipeline(
             check_pages=options.pages,
         )
 
-        context = PdfContext(options, work_folder, origin_pdf, pdfinfo, plugin_manager)
+        context = PdfContext(
+            options,
+            work_folder,
+            origin_pdf,
+            pdfinfo,
+            plugin_manager,
+            # Pages are held until they are grafted in parallel, so they
+            # should not be held in memory
+            pages_in_memory=not options.parallel_graft,
+        )
 
         # Validate options are okay for this pdf
         validate_pdfinfo_options(context)
 
+        journal = None
+        if options.checkpoint_dir:
+            journal = CheckpointJournal(
+                work_folder, job_fingerprint(start_input_file, job_options)
+            )
+
         # Execute the pipeline
-        optimize_messages = exec_concurrent(context, executor)
+        optimize_messages = exec_concurrent(context, executor, journal)
 
         exitcode = report_output_pdf(options, start_input_file, optimize_messages)
         return exitcode
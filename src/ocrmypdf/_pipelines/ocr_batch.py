@@ -0,0 +1,380 @@
+# SPDX-FileCopyrightText: 2024 James R. Barlow
+# SPDX-License-Identifier: MPL-2.0
+
+"""Implements the OCR pipeline for a batch of documents sharing one worker pool."""
+
+from __future__ import annotations
+
+import argparse
+import logging
+from collections import Counter
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import partial
+from pathlib import Path
+from tempfile import mkdtemp
+
+import PIL
+
+from ocrmypdf._concurrent import Executor, SerialExecutor
+from ocrmypdf._graft import OcrGrafter
+from ocrmypdf._jobcontext import PageContext, PdfContext
+from ocrmypdf._pipeline import (
+    RasterRun,
+    copy_final,
+    estimate_page_cost,
+    get_pdfinfo,
+    merge_sidecars,
+    triage,
+    validate_pdfinfo_options,
+)
+from ocrmypdf._pipelines._common import (
+    PageImages,
+    PageResult,
+    manage_work_folder,
+    page_memory_kwargs,
+    page_stages,
+    plan_page_tasks,
+    postprocess,
+    prepare_pages_images,
+    report_exception,
+    report_ocr_cache,
+    report_output_pdf,
+    schedule_pages,
+    set_thread_pageno,
+    setup_pipeline,
+    worker_init,
+)
+from ocrmypdf._pipelines.ocr import _exec_pages_ocr_sync, _exec_pages_sync
+from ocrmypdf._plugin_manager import OcrmypdfPluginManager
+from ocrmypdf._progressbar import NullProgressBar, ProgressBar
+from ocrmypdf._validation import check_requested_output_file, create_input_file
+from ocrmypdf.exceptions import ExitCode
+
+log = logging.getLogger(__name__)
+
+
+def _exec_batch_pages_sync(
+    docno: int, *args: RasterRun | PageContext
+) -> tuple[int, int, list[PageResult] | Exception]:
+    """Execute the pipeline for some pages of a document in a batch.
+
+    Errors are returned rather than raised, so that a failure in one document
+    does not stop the others. The number of pages is returned too.
+    """
+    npages = sum(isinstance(arg, PageContext) for arg in args)
+    try:
+        return docno, npages, _exec_pages_sync(*args)
+    except Exception as e:  # pylint: disable=broad-except
+        return docno, npages, e
+
+
+def _exec_batch_pages_images_sync(
+    docno: int, *args: RasterRun | PageContext
+) -> tuple[int, int, list[PageImages] | Exception]:
+    """Prepare the images of some pages of a document in a batch."""
+    npages = sum(isinstance(arg, PageContext) for arg in args)
+    try:
+        return docno, npages, prepare_pages_images(*args)
+    except Exception as e:  # pylint: disable=broad-except
+        return docno, npages, e
+
+
+def _exec_batch_pages_ocr_sync(
+    item: tuple[int, int, list[PageImages] | Exception],
+) -> tuple[int, int, list[PageResult] | Exception]:
+    """Run OCR on the prepared images of some pages of a document in a batch."""
+    docno, npages, images = item
+    if isinstance(images, Exception):
+        return docno, npages, images
+    try:
+        return docno, npages, _exec_pages_ocr_sync(images)
+    except Exception as e:  # pylint: disable=broad-except
+        return docno, npages, e
+
+
+class _BatchDocument:
+    """A document in a batch, and its progress through the pipeline."""
+
+    def __init__(self, options: argparse.Namespace):
+        self.options = options
+        self.exit_code: ExitCode | None = None
+        self.context: PdfContext | None = None
+        self.start_input_file: Path | None = None
+        self.ocrgraft: OcrGrafter | None = None
+        self.sidecars: list[Path | None] = []
+        self.pages_remaining = 0
+        self.cleanup = ExitStack()
+
+    def prepare(self, plugin_manager: OcrmypdfPluginManager, executor: Executor):
+        """Triage the input file and analyze it."""
+        options = self.options
+        work_folder = self.cleanup.enter_context(
+            manage_work_folder(
+                work_folder=Path(mkdtemp(prefix="ocrmypdf.io.")),
+                retain=options.keep_temporary_files,
+                print_location=options.keep_temporary_files,
+            )
+        )
+        check_requested_output_file(options)
+        self.start_input_file, original_filename = create_input_file(
+            options, work_folder
+        )
+        origin_pdf = triage(
+            original_filename,
+            self.start_input_file,
+            work_folder / 'origin.pdf',
+            options,
+        )
+        pdfinfo = get_pdfinfo(
+            origin_pdf,
+            executor=executor,
+            detailed_analysis=options.redo_ocr,
+            progbar=False,
+            max_workers=1,
+            use_threads=True,
+            check_pages=options.pages,
+        )
+        self.context = PdfContext(
+            options,
+            work_folder,
+            origin_pdf,
+            pdfinfo,
+            plugin_manager,
+            pages_in_memory=True,
+        )
+
+    @property
+    def npages(self) -> int:
+        """The number of pages that will be processed."""
+        assert self.context is not None
+        npages = len(self.context.pdfinfo)
+        if self.options.pages:
+            npages = min(len(self.options.pages), npages)
+        return npages
+
+    def validate(self, batch_pages: int):
+        """Validate the options against the input file, ready to queue its pages.
+
+        Args:
+            batch_pages: The number of pages of every document in the batch,
+                which share the workers.
+        """
+        assert self.context is not None
+        self.context.batch_pages = batch_pages
+        validate_pdfinfo_options(self.context)
+        self.ocrgraft = OcrGrafter(self.context, streaming=self.options.streaming_graft)
+        self.sidecars = [None] * len(self.context.pdfinfo)
+        self.pages_remaining = len(self.context.pdfinfo)
+
+    def graft_page(self, result: PageResult):
+        """Graft a finished page into the output."""
+        assert self.ocrgraft is not None
+        self.sidecars[result.pageno] = result.text
+        self.ocrgraft.graft_page(
+            pageno=result.pageno,
+            image=result.pdf_page_from_image,
+            textpdf=result.ocr,
+            autorotate_correction=result.orientation_correction,
+        )
+        self.pages_remaining -= 1
+
+    def finalize(self, executor: Executor) -> ExitCode:
+        """Write the output file once all pages are grafted."""
+        assert self.context is not None and self.ocrgraft is not None
+        options = self.options
+        if options.sidecar:
+            text = merge_sidecars(self.sidecars, self.context)
+            copy_final(text, options.sidecar, options.input_file)
+
+        pdf = self.ocrgraft.finalize()
+        messages: Sequence[str] = []
+        if options.output_type != 'none':
+            log.info("Postprocessing %s...", options.input_file)
+            pdf, messages = postprocess(pdf, self.context, executor)
+            copy_final(pdf, options.output_file, options.input_file)
+        return report_output_pdf(options, self.start_input_file, messages)
+
+    def fail(self, e: Exception):
+        """Record that this document could not be processed."""
+        log.error("%s: could not be processed", self.options.input_file)
+        self.exit_code = report_exception(e, self.options)
+        self.cleanup.close()
+
+
+def _finalize_document(doc: _BatchDocument, executor: Executor) -> None:
+    """Write the output of a document whose pages are all grafted."""
+    try:
+        doc.exit_code = doc.finalize(executor)
+        doc.cleanup.close()
+    except Exception as e:  # pylint: disable=broad-except
+        doc.fail(e)
+
+
+def exec_batch_concurrent(
+    documents: Sequence[_BatchDocument],
+    executor: Executor,
+    serial_executor: Executor,
+) -> None:
+    """Execute the pages of all documents concurrently in one worker pool.
+
+    The pages of all documents are queued together, most expensive first, so
+    that the pool is not left waiting on one large page at the end. Each
+    document is finalized by a background thread as soon as its last page is
+    done, while the pool continues working on the pages of other documents.
+    """
+    options = documents[0].options
+    tasks: list[tuple[float, int, tuple[RasterRun | PageContext, ...]]] = []
+    skipped: list[tuple[int, int, list[PageResult]]] = []
+    npages = 0
+    for docno, doc in enumerate(documents):
+        if doc.context is None or doc.exit_code is not None:
+            continue
+        try:
+            pending_pages, skipped_pages = schedule_pages(doc.context)
+            doc_tasks = plan_page_tasks(pending_pages, options)
+        except Exception as e:  # pylint: disable=broad-except
+            doc.fail(e)
+            continue
+        tasks.extend(
+            (
+                max(
+                    estimate_page_cost(arg)
+                    for arg in task
+                    if isinstance(arg, PageContext)
+                ),
+                docno,
+                task,
+            )
+            for task in doc_tasks
+        )
+        npages += len(pending_pages)
+        skipped.extend((docno, 0, [PageResult(pageno=n)]) for n in skipped_pages)
+    tasks.sort(key=lambda task: task[0], reverse=True)
+    task_arguments = [(docno, *task) for _cost, docno, task in tasks]
+
+    max_workers = min(len(task_arguments), options.jobs)
+    if max_workers > 1:
+        log.info(
+            "Start processing %d pages of %d documents, %d concurrently",
+            npages,
+            sum(1 for doc in documents if doc.exit_code is None),
+            max_workers,
+        )
+
+    ocr_cache_use: Counter[str] = Counter()
+
+    def update_pages(
+        item: tuple[int, int, list[PageResult] | Exception], pbar: ProgressBar
+    ):
+        docno, task_pages, results = item
+        doc = documents[docno]
+        pbar.update(task_pages)
+        if not isinstance(results, Exception):
+            for result in results:
+                ocr_cache_use.update(
+                    hits=result.ocr_cache_hits, misses=result.ocr_cache_misses
+                )
+        if doc.exit_code is not None:
+            return  # Document already failed, so its other pages are discarded
+        try:
+            if isinstance(results, Exception):
+                raise results
+            for result in results:
+                set_thread_pageno(result.pageno + 1)
+                doc.graft_page(result)
+                set_thread_pageno(None)
+            if doc.pages_remaining == 0:
+                finalizer.submit(_finalize_document, doc, serial_executor)
+        except Exception as e:  # pylint: disable=broad-except
+            set_thread_pageno(None)
+            doc.fail(e)
+
+    # Finished documents are written by another thread, so that the results of
+    # other documents' pages keep being taken from the pool in the meantime
+    finalizer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='finalize')
+    try:
+        for item in skipped:
+            update_pages(item, NullProgressBar())
+        executor(
+            use_threads=options.use_threads,
+            max_workers=max_workers,
+            progress_kwargs=dict(
+                total=npages,
+                desc='OCR' if options.tesseract_timeout > 0 else 'Image processing',
+                unit='page',
+                disable=not options.progress_bar,
+            ),
+            worker_initializer=partial(worker_init, PIL.Image.MAX_IMAGE_PIXELS),
+            task=_exec_batch_pages_sync,
+            task_arguments=task_arguments,
+            task_finished=update_pages,
+            stages=page_stages(
+                options,
+                len(task_arguments),
+                _exec_batch_pages_images_sync,
+                _exec_batch_pages_ocr_sync,
+            ),
+            **page_memory_kwargs(options),
+        )
+    except BaseException:
+        # Only finish writing the documents that were already started
+        finalizer.shutdown(cancel_futures=True)
+        raise
+    finalizer.shutdown()
+    report_ocr_cache(options, ocr_cache_use['hits'], ocr_cache_use['misses'])
+
+
+def run_batch_pipeline(
+    options_list: Sequence[argparse.Namespace],
+    *,
+    plugin_manager: OcrmypdfPluginManager,
+) -> list[ExitCode]:
+    """Run the OCR pipeline on several documents, sharing one worker pool.
+
+    Errors that affect only one document are logged and reported as that
+    document's exit code; the other documents are still processed.
+
+    Args:
+        options_list: The parsed options for each document.
+        plugin_manager: The plugin manager to use.
+
+    Returns:
+        The exit code for each document, in the same order as ``options_list``.
+    """
+    if not options_list:
+        return []
+    executor = setup_pipeline(options_list[0], plugin_manager)
+    for options in options_list[1:]:
+        options.jobs = options_list[0].jobs
+        options.memory_budget = options_list[0].memory_budget
+        options.image_jobs = options_list[0].image_jobs
+        options.ocr_jobs = options_list[0].ocr_jobs
+    # Work that is done for one document at a time, and work done while the
+    # shared pool is running, uses a serial executor rather than starting new
+    # pools
+    serial_executor = SerialExecutor()
+
+    documents = [_BatchDocument(options) for options in options_list]
+    try:
+        for doc in documents:
+            try:
+                doc.prepare(plugin_manager, serial_executor)
+            except Exception as e:  # pylint: disable=broad-except
+                doc.fail(e)
+        prepared = [doc for doc in documents if doc.exit_code is None]
+        batch_pages = sum(doc.npages for doc in prepared)
+        for doc in prepared:
+            try:
+                doc.validate(batch_pages)
+            except Exception as e:  # pylint: disable=broad-except
+                doc.fail(e)
+        exec_batch_concurrent(documents, executor, serial_executor)
+    finally:
+        for doc in documents:
+            doc.cleanup.close()
+    return [
+        doc.exit_code if doc.exit_code is not None else ExitCode.other_error
+        for doc in documents
+    ]
@@ -10,27 +10,37 @@ import argparse
 import logging
 import logging.handlers
 import shutil
+from collections import Counter
 from functools import partial
 
 import PIL
 
 from ocrmypdf._concurrent import Executor
 from ocrmypdf._jobcontext import PageContext, PdfContext
+from ocrmypdf._ocr_cache import take_lookup_counts
 from ocrmypdf._pipeline import (
+    RasterRun,
     get_pdfinfo,
-    is_ocr_required,
     ocr_engine_hocr,
     validate_pdfinfo_options,
 )
 from ocrmypdf._pipelines._common import (
     HOCRResult,
+    PageImages,
+    discard_page_images,
     manage_work_folder,
-    process_page,
+    page_memory_kwargs,
+    page_stages,
+    plan_page_tasks,
+    prepare_pages_images,
+    report_ocr_cache,
+    schedule_pages,
     set_thread_pageno,
     setup_pipeline,
     worker_init,
 )
 from ocrmypdf._plugin_manager import OcrmypdfPluginManager
+from ocrmypdf._progressbar import ProgressBar
 from ocrmypdf._validation import (
     set_lossless_reconstruction,
 )
@@ -38,50 +48,84 @@ from ocrmypdf._validation import (
 log = logging.getLogger(__name__)
 
 
-def _exec_page_hocr_sync(page_context: PageContext) -> HOCRResult:
-    """Execute a pipeline for a single page hOCR."""
+def _exec_page_hocr_ocr_sync(images: PageImages) -> HOCRResult:
+    """Run OCR on the prepared images of a single page, producing hOCR."""
+    page_context = images.page_context
     set_thread_pageno(page_context.pageno + 1)
-
-    if not is_ocr_required(page_context):
-        return HOCRResult(pageno=page_context.pageno)
-
-    ocr_image_out, pdf_page_from_image_out, orientation_correction = process_page(
-        page_context
-    )
-    hocr_out, _ = ocr_engine_hocr(ocr_image_out, page_context)
+    if images.ocr_result:
+        hocr_out, _ = images.ocr_result
+    else:
+        hocr_out, _ = ocr_engine_hocr(images.ocr_image, page_context)
+    discard_page_images(page_context)
+    ocr_cache_hits, ocr_cache_misses = take_lookup_counts()
 
     result = HOCRResult(
         pageno=page_context.pageno,
-        pdf_page_from_image=pdf_page_from_image_out,
+        pdf_page_from_image=images.pdf_page_from_image,
         hocr=hocr_out,
-        orientation_correction=orientation_correction,
+        orientation_correction=images.orientation_correction,
+        ocr_cache_hits=ocr_cache_hits,
+        ocr_cache_misses=ocr_cache_misses,
     )
     page_context.get_path('hocr.json').write_text(result.to_json())
     return result
 
 
+def _exec_pages_hocr_ocr_sync(pages: list[PageImages]) -> list[HOCRResult]:
+    """Run OCR on the prepared images of several pages, producing hOCR."""
+    return [_exec_page_hocr_ocr_sync(images) for images in pages]
+
+
+def _exec_pages_hocr_sync(*args: RasterRun | PageContext) -> list[HOCRResult]:
+    """Execute a pipeline for several pages hOCR; see :func:`plan_page_tasks`.
+
+    The pages must be ones that require OCR; see :func:`schedule_pages`.
+    """
+    return _exec_pages_hocr_ocr_sync(prepare_pages_images(*args))
+
+
 def exec_pdf_to_hocr(context: PdfContext, executor: Executor) -> None:
     """Execute the OCR pipeline concurrently and output hOCR."""
     # Run exec_page_sync on every page
     options = context.options
-    max_workers = min(len(context.pdfinfo), options.jobs)
+    pending_pages, _skipped_pages = schedule_pages(context)
+    tasks = plan_page_tasks(pending_pages, options)
+    max_workers = min(len(tasks), options.jobs)
     if max_workers > 1:
         log.info("Start processing %d pages concurrently", max_workers)
 
+    ocr_cache_use: Counter[str] = Counter()
+
+    def update_pages(results: list[HOCRResult], pbar: ProgressBar):
+        for result in results:
+            ocr_cache_use.update(
+                hits=result.ocr_cache_hits, misses=result.ocr_cache_misses
+            )
+        pbar.update(len(results))
+
     executor(
         use_threads=options.use_threads,
         max_workers=max_workers,
         progress_kwargs=dict(
-            total=(2 * len(context.pdfinfo)),
+            total=(2 * len(pending_pages)),
             desc='hOCR',
             unit='page',
             unit_scale=0.5,
             disable=not options.progress_bar,
         ),
         worker_initializer=partial(worker_init, PIL.Image.MAX_IMAGE_PIXELS),
-        task=_exec_page_hocr_sync,
-        task_arguments=context.get_page_context_args(),
+        task=_exec_pages_hocr_sync,
+        task_arguments=tasks,
+        task_finished=update_pages,
+        stages=page_stages(
+            options,
+            len(tasks),
+            prepare_pages_images,
+            _exec_pages_hocr_ocr_sync,
+        ),
+        **page_memory_kwargs(options),
     )
+    report_ocr_cache(options, ocr_cache_use['hits'], ocr_cache_use['misses'])
 
 
 def run_hocr_pipeline(
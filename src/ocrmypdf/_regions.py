@@ -0,0 +1,181 @@
+# SPDX-FileCopyrightText: 2024 James R. Barlow
+# SPDX-License-Identifier: MPL-2.0
+
+"""OCR of only the regions of a page that are not already covered by text.
+
+With ``--redo-ocr``, existing text is blanked out of the image for OCR, so on a
+mostly digital page with one scanned figure, the OCR engine would spend most
+of its time on blank paper. Instead, the regions of the image that still
+contain anything are cropped and recognized on their own, and their hOCR is
+combined into one hOCR page in the coordinates of the whole image.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from collections.abc import Sequence
+from pathlib import Path
+from xml.etree import ElementTree
+
+from PIL import Image
+
+from ocrmypdf._jobcontext import PageContext
+from ocrmypdf.imageanalysis import content_regions
+
+log = logging.getLogger(__name__)
+
+XHTML = 'http://www.w3.org/1999/xhtml'
+
+REGION_PADDING = 0.1
+"""Blank margin around each region, in inches, which helps the OCR engine."""
+
+REGION_OCR_MAX_REGIONS = 32
+"""Pages with more regions than this are recognized as a whole."""
+
+Region = tuple[int, int, int, int]
+
+_bbox_pattern = re.compile(r'bbox (\d+) (\d+) (\d+) (\d+)')
+
+
+def may_ocr_regions(page_context: PageContext) -> bool:
+    """Might only some regions of this page be recognized?"""
+    options = page_context.options
+    return bool(
+        options.redo_ocr
+        and options.ocr_regions_below
+        and options.pdf_renderer.startswith('hocr')
+        and page_context.pageinfo.has_text
+    )
+
+
+def plan_ocr_regions(image: Path, page_context: PageContext) -> list[Region] | None:
+    """Choose the regions of the image for OCR to recognize, if not all of it.
+
+    Only regions that contain anything are recognized, if they cover less than
+    ``--ocr-regions-below`` of the page.
+
+    Returns:
+        The regions to recognize, in pixel coordinates of the image, or
+        ``None`` if the whole image should be recognized. If the image is
+        blank, there are no regions.
+    """
+    if not may_ocr_regions(page_context):
+        return None
+    with Image.open(image) as im:
+        im.load()
+    regions = content_regions(im)
+    if len(regions) > REGION_OCR_MAX_REGIONS:
+        log.debug("Too many regions to recognize separately: %d", len(regions))
+        return None
+    dpi = im.info.get('dpi', (300, 300))
+    x_pad = round(REGION_PADDING * float(dpi[0]))
+    y_pad = round(REGION_PADDING * float(dpi[1]))
+    regions = [
+        (
+            max(0, left - x_pad),
+            max(0, upper - y_pad),
+            min(im.width, right + x_pad),
+            min(im.height, lower + y_pad),
+        )
+        for left, upper, right, lower in regions
+    ]
+    area = sum(
+        (right - left) * (lower - upper) for left, upper, right, lower in regions
+    )
+    if area >= page_context.options.ocr_regions_below * im.width * im.height:
+        log.debug("Regions cover too much of the page to recognize separately")
+        return None
+    log.debug(
+        "Recognizing %d regions covering %.0f%% of the page",
+        len(regions),
+        100 * area / (im.width * im.height),
+    )
+    return regions
+
+
+def crop_regions(
+    image: Path, regions: Sequence[Region], page_context: PageContext
+) -> list[Path]:
+    """Crop each region out of the image for OCR into an image of its own."""
+    crops = []
+    with Image.open(image) as im:
+        # Pillow requires integer DPI
+        dpi = tuple(round(float(coord)) for coord in im.info.get('dpi', (300, 300)))
+        for n, region in enumerate(regions, start=1):
+            crop = page_context.get_path(f'ocr_region_{n:03d}.tif')
+            im.crop(region).save(crop, dpi=dpi)
+            crops.append(crop)
+    return crops
+
+
+def _shift_bbox(title: str, x: int, y: int) -> str:
+    return _bbox_pattern.sub(
+        lambda m: (
+            f'bbox {int(m[1]) + x} {int(m[2]) + y} {int(m[3]) + x} {int(m[4]) + y}'
+        ),
+        title,
+    )
+
+
+def merge_region_hocr(
+    region_hocrs: Sequence[tuple[Path, Region]],
+    image_size: tuple[int, int],
+    output_hocr: Path,
+) -> None:
+    """Combine the hOCR of several regions into one hOCR page.
+
+    The content of each region is moved to the position of the region in the
+    whole image, and the page is given the size of the whole image. Regions
+    whose hOCR is empty, because the OCR engine skipped them, are left out.
+    If all were skipped, the output is empty too.
+
+    Args:
+        region_hocrs: The hOCR file of each region, and the region.
+        image_size: The size of the whole image, in pixels.
+        output_hocr: The hOCR file to write.
+    """
+    page_tree = page = None
+    for n, (hocr, (left, upper, _right, _lower)) in enumerate(region_hocrs, start=1):
+        if hocr.stat().st_size == 0:
+            continue
+        tree = ElementTree.parse(hocr)
+        region_page = tree.find(f".//{{{XHTML}}}div[@class='ocr_page']")
+        if region_page is None:
+            region_page = tree.find(".//div[@class='ocr_page']")
+        if region_page is None:
+            continue
+        content = list(region_page)
+        if page is None:
+            page_tree, page = tree, region_page
+            for element in content:
+                page.remove(element)
+            page.set(
+                'title',
+                _bbox_pattern.sub(
+                    f'bbox 0 0 {image_size[0]} {image_size[1]}',
+                    page.get('title', ''),
+                ),
+            )
+        for element in content:
+            for child in element.iter():
+                if title := child.get('title'):
+                    child.set('title', _shift_bbox(title, left, upper))
+                if element_id := child.get('id'):
+                    # Keep ids unique across regions
+                    child.set('id', f'{element_id}_{n}')
+            page.append(element)
+    if page_tree is None:
+        output_hocr.write_text('', encoding='utf-8')
+        return
+    ElementTree.register_namespace('', XHTML)
+    page_tree.write(output_hocr, encoding='utf-8', xml_declaration=True)
+
+
+def merge_region_text(region_texts: Sequence[Path], output_text: Path) -> None:
+    """Combine the OCR text of several regions, in order, into one file."""
+    texts = [text.read_text(encoding='utf-8').strip() for text in region_texts]
+    output_text.write_text(
+        '\n\n'.join(text for text in texts if text and text != '[skipped page]'),
+        encoding='utf-8',
+    )
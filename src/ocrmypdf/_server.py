@@ -0,0 +1,593 @@
+# SPDX-FileCopyrightText: 2024 James R. Barlow
+# SPDX-License-Identifier: MPL-2.0
+
+"""Long-running OCR service, started with ``ocrmypdf serve``.
+
+The server keeps a pool of worker processes in which the plugins are already
+loaded and the versions of external programs are already known, so that each
+job starts without those costs. Jobs are submitted over HTTP, on a localhost
+port or a Unix domain socket.
+
+The HTTP interface is::
+
+    POST   /jobs              Submit a job. The request body is the input file.
+                              Options go in the X-OCRmyPDF-Options header, as a
+                              JSON object of keyword arguments to ocrmypdf.ocr().
+                              Returns 202 and the job status, or 503 if the
+                              queue is full.
+    POST   /ocr               Submit a job and wait for it. Returns 200 and the
+                              output file, or the job status on failure.
+    GET    /jobs/ID           Job status, as JSON.
+    GET    /jobs/ID/events    Stream the job status as JSON lines, one for
+                              each change, until the job finishes.
+    GET    /jobs/ID/output    The output file of a finished job.
+    DELETE /jobs/ID           Discard a finished job and its files.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import signal
+import socketserver
+import threading
+import time
+import uuid
+from collections.abc import Callable, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import suppress
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from tempfile import mkdtemp
+from typing import BinaryIO
+
+from ocrmypdf import hookimpl
+from ocrmypdf._concurrent import Executor as OcrExecutor
+from ocrmypdf._concurrent import setup_executor
+from ocrmypdf._plugin_manager import get_plugin_manager
+from ocrmypdf._validation import check_options
+from ocrmypdf._version import PROGRAM_NAME, __version__
+from ocrmypdf.api import Verbosity, configure_logging, create_options, get_parser, ocr
+from ocrmypdf.exceptions import ExitCode, ExitCodeException
+from ocrmypdf.helpers import available_cpu_count
+
+log = logging.getLogger(__name__)
+
+# Options that name files or code on the server, which clients may not choose
+SERVER_ONLY_OPTIONS = frozenset(
+    {
+        'checkpoint_dir',
+        'keep_temporary_files',
+        'ocr_cache_dir',
+        'plugin_manager',
+        'plugins',
+        'sidecar',
+        'tesseract_config',
+        'user_patterns',
+        'user_words',
+    }
+)
+
+_plugin_manager = None
+
+
+class _WorkerExecutor:
+    """Gives every job in a worker process the executor made when it started."""
+
+    def __init__(self, executor: OcrExecutor):
+        self.executor = executor
+
+    @hookimpl
+    def get_executor(self, progressbar_class):  # pylint: disable=unused-argument
+        return self.executor
+
+
+def _worker_init(plugins: Sequence[str]) -> None:
+    """Prepare a worker process to run jobs."""
+    global _plugin_manager  # pylint: disable=global-statement
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _plugin_manager = get_plugin_manager(plugins)
+    _plugin_manager.hook.initialize(plugin_manager=_plugin_manager)
+    _plugin_manager.register(
+        _WorkerExecutor(setup_executor(_plugin_manager)), name='server_executor'
+    )
+
+    # Check the options once, so that external program versions are cached
+    parser = get_parser()
+    _plugin_manager.hook.add_options(parser=parser)
+    try:
+        options = create_options(
+            input_file='warmup.pdf', output_file=os.devnull, parser=parser
+        )
+        check_options(options, _plugin_manager)
+    except Exception as e:  # pylint: disable=broad-except
+        log.warning("Worker could not check default options: %s", e)
+
+
+def _worker_ready() -> None:
+    return
+
+
+class _MessageCollector(logging.Handler):
+    def __init__(self):
+        super().__init__(level=logging.INFO)
+        self.messages: list[str] = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def run_job(
+    input_file: str, output_file: str, options: dict
+) -> tuple[ExitCode, list[str]]:
+    """Run one job in a worker process, and return its exit code and messages."""
+    collector = _MessageCollector()
+    ocrmypdf_log = logging.getLogger('ocrmypdf')
+    ocrmypdf_log.addHandler(collector)
+    if ocrmypdf_log.getEffectiveLevel() > logging.INFO:
+        ocrmypdf_log.setLevel(logging.INFO)
+    try:
+        exit_code = ocr(
+            input_file,
+            output_file,
+            plugin_manager=_plugin_manager,
+            progress_bar=False,
+            **options,
+        )
+    except ExitCodeException as e:
+        collector.messages.append(f"{type(e).__name__}: {e}")
+        exit_code = e.exit_code
+    except (TypeError, ValueError) as e:
+        collector.messages.append(f"Invalid options: {e}")
+        exit_code = ExitCode.bad_args
+    except Exception as e:  # pylint: disable=broad-except
+        collector.messages.append(f"{type(e).__name__}: {e}")
+        exit_code = ExitCode.other_error
+    finally:
+        ocrmypdf_log.removeHandler(collector)
+    return ExitCode(exit_code), collector.messages
+
+
+class QueueFullError(Exception):
+    """The server is running and queueing as many jobs as it may."""
+
+
+class Job:
+    """A job submitted to the server."""
+
+    def __init__(self, work_folder: Path, options: dict):
+        self.id = uuid.uuid4().hex
+        self.work_folder = work_folder
+        self.input_file = work_folder / 'input'
+        self.output_file = work_folder / 'output.pdf'
+        self.options = options
+        self.status = 'queued'
+        self.exit_code: ExitCode | None = None
+        self.messages: list[str] = []
+        self.finished_at: float | None = None
+        self.events: list[dict] = [self.to_dict()]
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ('done', 'failed')
+
+    def to_dict(self) -> dict:
+        return dict(
+            id=self.id,
+            status=self.status,
+            exit_code=self.exit_code.name if self.exit_code is not None else None,
+            messages=self.messages,
+        )
+
+
+class JobManager:
+    """Queues jobs and runs them in a pool of worker processes.
+
+    At most ``max_jobs`` jobs run at a time, and at most ``queue_depth`` more
+    wait for a worker. Further submissions are refused with
+    :class:`QueueFullError` until a job finishes. Finished jobs are kept until
+    they are deleted, or for ``keep_results`` seconds. The CPUs are shared
+    among the jobs that run at once, unless a job sets its own ``jobs``.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_jobs: int,
+        queue_depth: int,
+        executor: Executor,
+        keep_results: float = 600,
+        task: Callable[[str, str, dict], tuple[ExitCode, list[str]]] = run_job,
+    ):
+        self.max_jobs = max_jobs
+        self.cpus_per_job = max(1, available_cpu_count() // max_jobs)
+        self.queue_depth = queue_depth
+        self.executor = executor
+        self.keep_results = keep_results
+        self.task = task
+        self.jobs: dict[str, Job] = {}
+        self.changed = threading.Condition()
+        self._active = 0
+        self._slots = threading.BoundedSemaphore(max_jobs)
+
+    def create(self, options: dict) -> Job:
+        """Reserve a place in the queue for a new job, or raise QueueFullError."""
+        rejected = SERVER_ONLY_OPTIONS.intersection(options)
+        if rejected:
+            raise ValueError(f"Options not allowed: {', '.join(sorted(rejected))}")
+        self._expire()
+        with self.changed:
+            if self._active >= self.max_jobs + self.queue_depth:
+                raise QueueFullError()
+            self._active += 1
+            job = Job(Path(mkdtemp(prefix='ocrmypdf.serve.')), options)
+            self.jobs[job.id] = job
+        return job
+
+    def start(self, job: Job) -> None:
+        """Queue a job whose input file has been written."""
+        threading.Thread(target=self._run, args=(job,), daemon=True).start()
+
+    def abandon(self, job: Job) -> None:
+        """Release a job that could not be started."""
+        with self.changed:
+            self._active -= 1
+            self.jobs.pop(job.id, None)
+        shutil.rmtree(job.work_folder, ignore_errors=True)
+
+    def _update(self, job: Job, **changes) -> None:
+        with self.changed:
+            for name, value in changes.items():
+                setattr(job, name, value)
+            job.events.append(job.to_dict())
+            self.changed.notify_all()
+
+    def _run(self, job: Job) -> None:
+        with self._slots:
+            self._update(job, status='running')
+            try:
+                exit_code, messages = self.executor.submit(
+                    self.task,
+                    str(job.input_file),
+                    str(job.output_file),
+                    {'jobs': self.cpus_per_job, **job.options},
+                ).result()
+            except Exception as e:  # pylint: disable=broad-except
+                log.exception("Job %s", job.id)
+                exit_code, messages = ExitCode.child_process_error, [str(e)]
+        with self.changed:
+            self._active -= 1
+        self._update(
+            job,
+            status='done' if exit_code == ExitCode.ok else 'failed',
+            exit_code=exit_code,
+            messages=messages,
+            finished_at=time.monotonic(),
+        )
+        log.info("Job %s finished: %s", job.id, exit_code.name)
+
+    def wait(self, job: Job, seen: int = 0) -> list[dict]:
+        """Wait until a job has status changes beyond the first ``seen``."""
+        with self.changed:
+            self.changed.wait_for(lambda: len(job.events) > seen)
+            return job.events[seen:]
+
+    def wait_finished(self, job: Job) -> None:
+        """Wait until a job has finished."""
+        with self.changed:
+            self.changed.wait_for(lambda: job.finished)
+
+    def delete(self, job: Job) -> None:
+        """Discard a finished job."""
+        with self.changed:
+            self.jobs.pop(job.id, None)
+        shutil.rmtree(job.work_folder, ignore_errors=True)
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        with self.changed:
+            expired = [
+                job
+                for job in self.jobs.values()
+                if job.finished_at is not None
+                and now - job.finished_at > self.keep_results
+            ]
+        for job in expired:
+            self.delete(job)
+
+    def close(self) -> None:
+        """Discard all jobs."""
+        for job in list(self.jobs.values()):
+            self.delete(job)
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """HTTP interface to a :class:`JobManager`."""
+
+    server_version = f'{PROGRAM_NAME}/{__version__}'
+    manager: JobManager
+    max_upload_bytes: int
+
+    def address_string(self):
+        # Unix domain sockets have no client address
+        return self.client_address[0] if self.client_address else 'local'
+
+    def log_message(self, format, *args):  # noqa: A002
+        log.debug("%s %s", self.address_string(), format % args)
+
+    def _send_json(self, status: HTTPStatus, obj: dict) -> None:
+        body = json.dumps(obj).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: HTTPStatus, message: str) -> None:
+        self._send_json(status, dict(error=message))
+
+    def _find_job(self) -> tuple[Job | None, str]:
+        parts = self.path.strip('/').split('/')
+        if len(parts) not in (2, 3) or parts[0] != 'jobs':
+            self._send_error(HTTPStatus.NOT_FOUND, "No such resource")
+            return None, ''
+        job = self.manager.jobs.get(parts[1])
+        if job is None:
+            self._send_error(HTTPStatus.NOT_FOUND, "No such job")
+        return job, parts[2] if len(parts) == 3 else ''
+
+    def _read_body(self, length: int, output: BinaryIO | None) -> None:
+        """Copy the request body to output, or discard it if output is None."""
+        remaining = length
+        while remaining > 0:
+            chunk = self.rfile.read(min(remaining, 1 << 20))
+            if not chunk:
+                raise ConnectionError("Client closed connection")
+            if output:
+                output.write(chunk)
+            remaining -= len(chunk)
+
+    def _submit(self) -> Job | None:
+        try:
+            length = int(self.headers['Content-Length'])
+        except (TypeError, ValueError):
+            self.close_connection = True
+            self._send_error(HTTPStatus.LENGTH_REQUIRED, "Content-Length required")
+            return None
+        if length > self.max_upload_bytes:
+            self.close_connection = True
+            self._send_error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Input too large")
+            return None
+        try:
+            options = json.loads(self.headers.get('X-OCRmyPDF-Options') or '{}')
+            if not isinstance(options, dict):
+                raise ValueError("Options must be a JSON object")
+            job = self.manager.create(options)
+        except ValueError as e:
+            self._read_body(length, None)
+            self._send_error(HTTPStatus.BAD_REQUEST, str(e))
+            return None
+        except QueueFullError:
+            self._read_body(length, None)
+            self.send_response(HTTPStatus.SERVICE_UNAVAILABLE)
+            self.send_header('Retry-After', '1')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return None
+        try:
+            with open(job.input_file, 'wb') as f:
+                self._read_body(length, f)
+        except OSError:
+            self.manager.abandon(job)
+            raise
+        self.manager.start(job)
+        return job
+
+    def do_POST(self):  # noqa: D102
+        if self.path == '/jobs':
+            job = self._submit()
+            if job:
+                self._send_json(HTTPStatus.ACCEPTED, job.to_dict())
+        elif self.path == '/ocr':
+            job = self._submit()
+            if job:
+                self.manager.wait_finished(job)
+                self._send_result(job)
+                self.manager.delete(job)
+        else:
+            self._send_error(HTTPStatus.NOT_FOUND, "No such resource")
+
+    def _send_result(self, job: Job) -> None:
+        if job.status != 'done':
+            self._send_json(HTTPStatus.UNPROCESSABLE_ENTITY, job.to_dict())
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Content-Length', str(job.output_file.stat().st_size))
+        self.end_headers()
+        with open(job.output_file, 'rb') as f:
+            shutil.copyfileobj(f, self.wfile)
+
+    def do_GET(self):  # noqa: D102
+        job, resource = self._find_job()
+        if job is None:
+            return
+        if resource == '':
+            self._send_json(HTTPStatus.OK, job.to_dict())
+        elif resource == 'events':
+            self.send_response(HTTPStatus.OK)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            seen = 0
+            while True:
+                events = self.manager.wait(job, seen)
+                seen += len(events)
+                for event in events:
+                    self.wfile.write(json.dumps(event).encode() + b'\n')
+                self.wfile.flush()
+                if events[-1]['status'] in ('done', 'failed'):
+                    break
+        elif resource == 'output':
+            if not job.finished:
+                self._send_error(HTTPStatus.CONFLICT, "Job has not finished")
+            else:
+                self._send_result(job)
+        else:
+            self._send_error(HTTPStatus.NOT_FOUND, "No such resource")
+
+    def do_DELETE(self):  # noqa: D102
+        job, resource = self._find_job()
+        if job is None:
+            return
+        if resource or not job.finished:
+            self._send_error(HTTPStatus.CONFLICT, "Job has not finished")
+            return
+        self.manager.delete(job)
+        self.send_response(HTTPStatus.NO_CONTENT)
+        self.end_headers()
+
+
+class ThreadingUnixHTTPServer(
+    socketserver.ThreadingMixIn, socketserver.UnixStreamServer
+):
+    """HTTP server on a Unix domain socket."""
+
+    daemon_threads = True
+
+
+def get_server_parser() -> argparse.ArgumentParser:
+    """Get the parser for ``ocrmypdf serve``."""
+    parser = argparse.ArgumentParser(
+        prog=f'{PROGRAM_NAME} serve',
+        description="Run OCRmyPDF as a service that accepts jobs over HTTP.",
+    )
+    listen = parser.add_mutually_exclusive_group()
+    listen.add_argument(
+        '--socket',
+        metavar='PATH',
+        help="Listen on this Unix domain socket.",
+    )
+    listen.add_argument(
+        '--port',
+        type=int,
+        default=8471,
+        help="Listen on this TCP port (default: %(default)s).",
+    )
+    parser.add_argument(
+        '--host',
+        default='127.0.0.1',
+        help="Listen on this address when using --port (default: %(default)s).",
+    )
+    parser.add_argument(
+        '--max-jobs',
+        type=int,
+        default=max(1, available_cpu_count() // 4),
+        metavar='N',
+        help="Run up to N jobs at once, each in its own worker process "
+        "(default: %(default)s).",
+    )
+    parser.add_argument(
+        '--queue-depth',
+        type=int,
+        default=32,
+        metavar='N',
+        help="Queue up to N more jobs while all workers are busy; refuse jobs "
+        "beyond that with HTTP 503 (default: %(default)s).",
+    )
+    parser.add_argument(
+        '--max-upload-mb',
+        type=float,
+        default=200,
+        metavar='MB',
+        help="Refuse input files larger than this (default: %(default)s).",
+    )
+    parser.add_argument(
+        '--keep-results',
+        type=float,
+        default=600,
+        metavar='SECONDS',
+        help="Discard finished jobs that were not deleted after this long "
+        "(default: %(default)s).",
+    )
+    parser.add_argument(
+        '--plugin',
+        dest='plugins',
+        action='append',
+        default=[],
+        help="Load this plugin in every worker.",
+    )
+    parser.add_argument('-q', '--quiet', action='store_true')
+    parser.add_argument('-v', '--verbose', action='count', default=0)
+    return parser
+
+
+def _sigterm(*_args):
+    raise KeyboardInterrupt()
+
+
+def run_server(args: Sequence[str]) -> ExitCode:
+    """Run ``ocrmypdf serve`` until interrupted."""
+    options = get_server_parser().parse_args(args)
+    if options.max_jobs < 1 or options.queue_depth < 0:
+        log.error("--max-jobs must be at least 1 and --queue-depth at least 0")
+        return ExitCode.bad_args
+    configure_logging(
+        Verbosity.quiet if options.quiet else Verbosity(min(options.verbose, 2)),
+        progress_bar_friendly=False,
+        manage_root_logger=True,
+    )
+
+    executor = ProcessPoolExecutor(
+        max_workers=options.max_jobs,
+        initializer=_worker_init,
+        initargs=(options.plugins,),
+    )
+    # Start every worker now, before the server creates any threads, so that
+    # the first jobs do not wait for workers to start
+    log.debug("Starting %d worker processes", options.max_jobs)
+    for future in [executor.submit(_worker_ready) for _ in range(options.max_jobs)]:
+        future.result()
+
+    manager = JobManager(
+        max_jobs=options.max_jobs,
+        queue_depth=options.queue_depth,
+        executor=executor,
+        keep_results=options.keep_results,
+    )
+    handler = type(
+        'Handler',
+        (RequestHandler,),
+        dict(
+            manager=manager,
+            max_upload_bytes=int(options.max_upload_mb * 1_000_000),
+        ),
+    )
+    server: socketserver.BaseServer
+    if options.socket:
+        with suppress(FileNotFoundError):
+            os.unlink(options.socket)
+        server = ThreadingUnixHTTPServer(options.socket, handler)
+        log.info("Listening on %s", options.socket)
+    else:
+        server = ThreadingHTTPServer((options.host, options.port), handler)
+        log.info("Listening on http://%s:%d/", options.host, options.port)
+
+    with suppress(AttributeError, ValueError):
+        signal.signal(signal.SIGTERM, _sigterm)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        log.info("Shutting down")
+    finally:
+        server.server_close()
+        executor.shutdown(wait=False, cancel_futures=True)
+        manager.close()
+        if options.socket:
+            with suppress(OSError):
+                os.unlink(options.socket)
+    return ExitCode.ok
@@ -196,6 +196,11 @@ def check_options_ocr_behavior(options: Namespace) -> None:
         options.pages = _pages_from_ranges(options.pages)
 
 
+def check_options_graft(options: Namespace) -> None:
+    if options.streaming_graft and options.parallel_graft:
+        raise BadArgsError("Choose only one of --streaming-graft, --parallel-graft.")
+
+
 def check_options_metadata(options: Namespace) -> None:
     docinfo = [options.title, options.author, options.keywords, options.subject]
     for s in (m for m in docinfo if m):
@@ -223,6 +228,7 @@ def _check_plugin_invariant_options(options: Namespace) -> None:
     check_options_sidecar(options)
     check_options_preprocessing(options)
     check_options_ocr_behavior(options)
+    check_options_graft(options)
     check_options_pillow(options)
 
 
@@ -0,0 +1,243 @@
+# SPDX-FileCopyrightText: 2024 James R. Barlow
+# SPDX-License-Identifier: MPL-2.0
+
+"""An asyncio interface to OCRmyPDF.
+
+:func:`ocr` is a coroutine equivalent to :func:`ocrmypdf.ocr`. The pipeline
+runs in a worker thread, so the event loop is not blocked, and its own worker
+threads or processes do the CPU-bound work as usual. Cancelling the task that
+awaits :func:`ocr` kills the external programs (Ghostscript, Tesseract and so
+on) that the job is running, and waits for the job to clean up its temporary
+files before the cancellation is propagated.
+
+Example:
+    .. code-block:: python
+
+        import asyncio
+
+        import ocrmypdf.aio
+
+        async def main():
+            progress = ocrmypdf.aio.ProgressStream()
+            task = asyncio.create_task(
+                ocrmypdf.aio.ocr('input.pdf', 'output.pdf', progress=progress)
+            )
+            async for event in progress:
+                print(event.desc, event.completed, event.total)
+            await task
+
+        asyncio.run(main())
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Iterable
+from contextlib import suppress
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+
+from ocrmypdf import api, hookimpl
+from ocrmypdf._plugin_manager import get_plugin_manager
+from ocrmypdf.exceptions import ExitCode
+from ocrmypdf.subprocess import CancelScope, cancel_scope
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    """Progress of one stage of an OCR job."""
+
+    desc: str | None
+    """Description of the stage, such as ``'OCR'``."""
+
+    unit: str | None
+    """The unit of work of this stage, such as ``'page'``."""
+
+    total: float | None
+    """The number of units of work in this stage, if known."""
+
+    completed: float
+    """The number of units of work completed so far."""
+
+
+class ProgressStream:
+    """An asynchronous iterator of :class:`ProgressEvent`.
+
+    Pass an instance to :func:`ocr` to receive its progress. Iteration ends when
+    the job finishes, whether or not it succeeds. Each instance may be used for
+    only one job.
+    """
+
+    def __init__(self):
+        """Initialize the stream."""
+        self._queue: asyncio.Queue[ProgressEvent | None] = asyncio.Queue()
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def __aiter__(self):
+        """Return the iterator, which is the stream itself."""
+        return self
+
+    async def __anext__(self) -> ProgressEvent:
+        """Wait for the next progress event."""
+        event = await self._queue.get()
+        if event is None:
+            raise StopAsyncIteration
+        return event
+
+    def _put_threadsafe(self, event: ProgressEvent) -> None:
+        assert self._loop is not None
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+
+    def _close(self) -> None:
+        self._queue.put_nowait(None)
+
+
+class _ProgressPlugin:
+    """Plugin that reports progress to a stream, and stops cancelled jobs.
+
+    OCRmyPDF updates progress bars from the thread that runs the pipeline, so
+    checking for cancellation there stops work that does not involve external
+    programs, such as scanning the input file, as soon as it makes progress.
+    """
+
+    def __init__(self, scope: CancelScope, stream: ProgressStream | None):
+        self.scope = scope
+        self.stream = stream
+
+    @hookimpl
+    def get_progressbar_class(self):
+        return partial(_ProgressBar, self.scope, self.stream)
+
+
+class _ProgressBar:
+    def __init__(
+        self,
+        scope: CancelScope,
+        stream: ProgressStream | None,
+        *,
+        total: float | None = None,
+        desc: str | None = None,
+        unit: str | None = None,
+        **_kwargs,
+    ):
+        self.scope = scope
+        self.stream = stream
+        self.desc = desc
+        self.unit = unit
+        self.total = total
+        self.completed = 0.0
+
+    def _report(self):
+        self.scope.check()
+        if self.stream is not None:
+            self.stream._put_threadsafe(
+                ProgressEvent(self.desc, self.unit, self.total, self.completed)
+            )
+
+    def __enter__(self):
+        self._report()
+        return self
+
+    def __exit__(self, *_args):
+        return False
+
+    def update(self, n=1, *, completed=None):
+        if completed is not None:
+            self.completed = completed
+        else:
+            self.completed += n
+        self._report()
+
+
+def _run_job(
+    scope: CancelScope,
+    progress: ProgressStream | None,
+    plugins: list[str | Path],
+    plugin_manager,
+    kwargs: dict,
+) -> ExitCode:
+    # Hold the API lock for the whole job, since only one cancel scope may be
+    # active at a time
+    with api._api_lock:  # pylint: disable=protected-access
+        if plugin_manager is None:
+            plugin_manager = get_plugin_manager(plugins)
+        progress_plugin = _ProgressPlugin(scope, progress)
+        plugin_manager.register(progress_plugin)
+        try:
+            with cancel_scope(scope):
+                scope.check()
+                return api.ocr(plugin_manager=plugin_manager, **kwargs)
+        finally:
+            plugin_manager.unregister(progress_plugin)
+
+
+async def ocr(
+    input_file: api.PathOrIO,
+    output_file: api.PathOrIO,
+    *,
+    progress: ProgressStream | None = None,
+    plugins: Iterable[api.StrPath] | None = None,
+    plugin_manager=None,
+    **kwargs,
+) -> ExitCode:
+    """Run OCRmyPDF on one PDF or image, as a coroutine.
+
+    Arguments and exceptions are the same as :func:`ocrmypdf.ocr`.
+
+    Jobs in the same process run one at a time, as for :func:`ocrmypdf.ocr`,
+    but waiting for another job does not block the event loop. To run several
+    jobs at once, run them in separate processes, for example with
+    ``ocrmypdf serve``.
+
+    Args:
+        input_file: Input PDF file path or file object.
+        output_file: Output PDF file path or file object.
+        progress: If given, progress is reported to this stream.
+        plugins: Plugins to load, as for :func:`ocrmypdf.ocr`.
+        plugin_manager: Plugin manager to use, as for :func:`ocrmypdf.ocr`.
+        **kwargs: Keyword arguments, as for :func:`ocrmypdf.ocr`.
+
+    Returns:
+        :class:`ocrmypdf.ExitCode`
+    """
+    if plugins and plugin_manager:
+        raise ValueError("plugins= and plugin_manager are mutually exclusive")
+    if not plugins:
+        plugins = []
+    elif isinstance(plugins, str | Path):
+        plugins = [plugins]
+    else:
+        plugins = list(plugins)
+
+    loop = asyncio.get_running_loop()
+    if progress is not None:
+        progress._loop = loop
+    scope = CancelScope()
+    job = partial(
+        _run_job,
+        scope,
+        progress,
+        plugins,
+        plugin_manager,
+        dict(input_file=input_file, output_file=output_file, **kwargs),
+    )
+    future = loop.run_in_executor(None, job)
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        log.debug("Cancelling OCR job")
+        scope.cancel()
+        # Let the job clean up before reporting that it was cancelled
+        with suppress(Exception):
+            await future
+        raise
+    finally:
+        if progress is not None:
+            progress._close()
+
+
+__all__ = ['ProgressEvent', 'ProgressStream', 'ocr']
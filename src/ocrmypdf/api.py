@@ -22,10 +22,12 @@ import pluggy
 from ocrmypdf._logging import PageNumberFilter
 from ocrmypdf._pipelines.hocr_to_ocr_pdf import run_hocr_to_ocr_pdf_pipeline
 from ocrmypdf._pipelines.ocr import run_pipeline, run_pipeline_cli
+from ocrmypdf._pipelines.ocr_batch import run_batch_pipeline
 from ocrmypdf._pipelines.pdf_to_hocr import run_hocr_pipeline
 from ocrmypdf._plugin_manager import get_plugin_manager
 from ocrmypdf._validation import check_options
 from ocrmypdf.cli import ArgumentParser, get_parser
+from ocrmypdf.exceptions import ExitCode
 from ocrmypdf.helpers import is_iterable_notstr
 
 StrPath = Path | AnyStr
@@ -33,8 +35,9 @@ PathOrIO = BinaryIO | StrPath
 
 # Installing plugins affects the global state of the Python interpreter,
 # so we need to use a lock to prevent multiple threads from installing
-# plugins at the same time.
-_api_lock = threading.Lock()
+# plugins at the same time. It is re-entrant so that ocrmypdf.aio can hold it
+# for the whole of a job, including the call to ocr().
+_api_lock = threading.RLock()
 
 
 class Verbosity(IntEnum):
@@ -237,6 +240,9 @@ def ocr(  # noqa: D417
     output_type: str | None = None,
     sidecar: PathOrIO | None = None,
     jobs: int | None = None,
+    image_jobs: int | None = None,
+    ocr_jobs: int | None = None,
+    memory_budget: float | None = None,
     use_threads: bool | None = None,
     title: str | None = None,
     author: str | None = None,
@@ -271,6 +277,8 @@ def ocr(  # noqa: D417
     tesseract_non_ocr_timeout: float | None = None,
     tesseract_downsample_above: int | None = None,
     tesseract_downsample_large_images: bool | None = None,
+    tesseract_fast_analysis: bool | None = None,
+    tesseract_threads: int | None = None,
     rotate_pages_threshold: float | None = None,
     pdfa_image_compression: str | None = None,
     color_conversion_strategy: str | None = None,
@@ -279,8 +287,15 @@ def ocr(  # noqa: D417
     fast_web_view: float | None = None,
     continue_on_soft_render_error: bool | None = None,
     invalidate_digital_signatures: bool | None = None,
+    ocr_cache_dir: os.PathLike | None = None,
+    ocr_cache_size: float | None = None,
+    ocr_batch_below: float | None = None,
+    ocr_regions_below: float | None = None,
+    streaming_graft: bool | None = None,
+    parallel_graft: bool | None = None,
     plugins: Iterable[StrPath] | None = None,
     plugin_manager=None,
+    checkpoint_dir: os.PathLike | None = None,
     keep_temporary_files: bool | None = None,
     progress_bar: bool | None = None,
     **kwargs,
@@ -357,7 +372,7 @@ def ocr(  # noqa: D417
     create_options_kwargs = {
         k: v
         for k, v in locals().items()
-        if k not in {'input_file', 'output_file', 'kwargs'}
+        if k not in {'input_file', 'output_file', 'kwargs', 'plugin_manager'}
     }
     create_options_kwargs.update(kwargs)
 
@@ -380,6 +395,78 @@ def ocr(  # noqa: D417
         return run_pipeline(options=options, plugin_manager=plugin_manager)
 
 
+def ocr_batch(
+    input_files: Sequence[PathOrIO],
+    output_files: Sequence[PathOrIO],
+    *,
+    plugins: Iterable[StrPath] | None = None,
+    plugin_manager=None,
+    **kwargs,
+) -> list[ExitCode]:
+    """Run OCRmyPDF on several PDFs or images, sharing one pool of workers.
+
+    The pages of all documents are queued to a single pool of worker threads or
+    processes, so that a batch of short documents keeps all workers busy. Each
+    output file is written as soon as all of its pages are done.
+
+    Keyword arguments are the same as for :func:`ocr` and apply to every
+    document. Since they are shared, ``sidecar`` and ``checkpoint_dir`` are not
+    supported. Nor is ``parallel_graft``, since each document is grafted as its
+    pages are finished.
+
+    Unlike :func:`ocr`, errors that affect only one document (for example, an
+    input file that cannot be read, or an OCR failure on one of its pages) are
+    logged and reported as the exit code for that document, and the other
+    documents are still processed.
+
+    Args:
+        input_files: Input file paths or file objects.
+        output_files: Output file paths or file objects, one for each input file.
+        plugins: Plugins to load, as for :func:`ocr`.
+        plugin_manager: Plugin manager to use, as for :func:`ocr`.
+        **kwargs: Keyword arguments, as for :func:`ocr`.
+
+    Returns:
+        A list of :class:`ocrmypdf.ExitCode`, one for each input file.
+    """
+    if len(input_files) != len(output_files):
+        raise ValueError("input_files and output_files must have the same length")
+    for keyword in ('sidecar', 'checkpoint_dir', 'parallel_graft'):
+        if kwargs.get(keyword) is not None:
+            raise ValueError(f"ocr_batch does not support {keyword}=")
+    if plugins and plugin_manager:
+        raise ValueError("plugins= and plugin_manager are mutually exclusive")
+
+    if not plugins:
+        plugins = []
+    elif isinstance(plugins, str | Path):
+        plugins = [plugins]
+    else:
+        plugins = list(plugins)
+
+    parser = get_parser()
+    with _api_lock:
+        if not plugin_manager:
+            plugin_manager = get_plugin_manager(plugins)
+        plugin_manager.hook.add_options(parser=parser)  # pylint: disable=no-member
+
+        if 'verbose' in kwargs:
+            warn("ocrmypdf.ocr(verbose=) is ignored. Use ocrmypdf.configure_logging().")
+
+        options_list = []
+        for input_file, output_file in zip(input_files, output_files):
+            options = create_options(
+                input_file=input_file,
+                output_file=output_file,
+                parser=parser,
+                plugins=plugins,
+                **kwargs,
+            )
+            check_options(options, plugin_manager)
+            options_list.append(options)
+        return run_batch_pipeline(options_list, plugin_manager=plugin_manager)
+
+
 def _pdf_to_hocr(  # noqa: D417
     input_pdf: Path,
     output_folder: Path,
@@ -387,6 +474,9 @@ def _pdf_to_hocr(  # noqa: D417
     language: Iterable[str] | None = None,
     image_dpi: int | None = None,
     jobs: int | None = None,
+    image_jobs: int | None = None,
+    ocr_jobs: int | None = None,
+    memory_budget: float | None = None,
     use_threads: bool | None = None,
     title: str | None = None,
     author: str | None = None,
@@ -414,11 +504,15 @@ def _pdf_to_hocr(  # noqa: D417
     tesseract_non_ocr_timeout: float | None = None,
     tesseract_downsample_above: int | None = None,
     tesseract_downsample_large_images: bool | None = None,
+    tesseract_fast_analysis: bool | None = None,
+    tesseract_threads: int | None = None,
     rotate_pages_threshold: float | None = None,
     user_words: os.PathLike | None = None,
     user_patterns: os.PathLike | None = None,
     continue_on_soft_render_error: bool | None = None,
     invalidate_digital_signatures: bool | None = None,
+    ocr_cache_dir: os.PathLike | None = None,
+    ocr_cache_size: float | None = None,
     plugin_manager=None,
     plugins: Sequence[StrPath] | None = None,
     keep_temporary_files: bool | None = None,
@@ -552,6 +646,7 @@ __all__ = [
     'get_parser',
     'get_plugin_manager',
     'ocr',
+    'ocr_batch',
     'run_pipeline',
     'run_pipeline_cli',
 ]
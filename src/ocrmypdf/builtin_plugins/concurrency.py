@@ -12,7 +12,7 @@ import queue
 import signal
 import sys
 import threading
-from collections.abc import Callable, Iterable
+from collections.abc import Callable, Iterable, Sequence
 from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from contextlib import suppress
 from typing import Union
@@ -20,6 +20,7 @@ from typing import Union
 from rich.console import Console as RichConsole
 
 from ocrmypdf import Executor, hookimpl
+from ocrmypdf._concurrent import MemoryBudget, Stage, run_scheduled
 from ocrmypdf._logging import RichLoggingHandler
 from ocrmypdf._progressbar import RichProgressBar
 from ocrmypdf.exceptions import InputFileError
@@ -99,6 +100,9 @@ def thread_init(q: Queue, user_init: UserInit, loglevel) -> None:
 class StandardExecutor(Executor):
     """Standard OCRmyPDF concurrent task executor."""
 
+    supports_memory_budget = True
+    supports_stages = True
+
     def _execute(
         self,
         *,
@@ -109,7 +113,11 @@ class StandardExecutor(Executor):
         task: Callable,
         task_arguments: Iterable,
         task_finished: Callable,
+        memory_budget: MemoryBudget | None = None,
+        stages: Sequence[Stage] | None = None,
     ):
+        if stages:
+            max_workers = sum(stage.max_workers for stage in stages)
         if use_threads:
             log_queue: Queue = queue.Queue(-1)
             executor_class: FuturesExecutorClass = ThreadPoolExecutor
@@ -138,10 +146,18 @@ class StandardExecutor(Executor):
                 initargs=(log_queue, worker_initializer, logging.getLogger("").level),
             ) as executor,
         ):
-            futures = [executor.submit(task, *args) for args in task_arguments]
             try:
-                for future in as_completed(futures):
-                    result = future.result()
+                if stages or memory_budget is not None:
+                    results = run_scheduled(
+                        executor,
+                        stages or [Stage(task, max_workers)],
+                        task_arguments,
+                        memory_budget,
+                    )
+                else:
+                    futures = [executor.submit(task, *args) for args in task_arguments]
+                    results = (future.result() for future in as_completed(futures))
+                for result in results:
                     task_finished(result, pbar)
             except KeyboardInterrupt:
                 # Terminate pool so we exit instantly
@@ -5,12 +5,14 @@
 from __future__ import annotations
 
 import logging
+from pathlib import Path
 
 from packaging.version import Version
 
 from ocrmypdf import hookimpl
 from ocrmypdf._exec import ghostscript
 from ocrmypdf.exceptions import MissingDependencyError
+from ocrmypdf.helpers import Resolution
 from ocrmypdf.subprocess import check_external_program
 
 log = logging.getLogger(__name__)
@@ -20,6 +22,21 @@ log = logging.getLogger(__name__)
 BLACKLISTED_GS_VERSIONS: frozenset[Version] = frozenset()
 
 
+def _batch_folder(
+    input_file: Path, raster_device: str, raster_dpi: Resolution, filter_vector: bool
+) -> Path:
+    """Return the folder for pages rasterized in advance with these settings.
+
+    The folder is beside the input file, which is in the temporary folder for
+    the job.
+    """
+    raster_dpi = raster_dpi.round(6)
+    name = f'{raster_device}_{raster_dpi.x:f}x{raster_dpi.y:f}'
+    if filter_vector:
+        name += '_novector'
+    return Path(input_file).parent / 'rasterize_batch' / name
+
+
 @hookimpl
 def add_options(parser):
     gs = parser.add_argument_group("Ghostscript", "Advanced control of Ghostscript")
@@ -102,6 +119,21 @@ def rasterize_pdf_page(
     stop_on_soft_error,
 ):
     """Rasterize a single page of a PDF file using Ghostscript."""
+    batch_image = _batch_folder(
+        input_file, raster_device, raster_dpi, filter_vector
+    ) / ghostscript.page_image_name(raster_device, pageno)
+    if batch_image.exists():
+        log.debug("Using page image rasterized in advance")
+        ghostscript.save_page_image(
+            batch_image,
+            output_file,
+            raster_device=raster_device,
+            raster_dpi=raster_dpi,
+            page_dpi=page_dpi or raster_dpi.round(6),
+            rotation=rotation,
+        )
+        batch_image.unlink()
+        return output_file
     ghostscript.rasterize_pdf(
         input_file,
         output_file,
@@ -116,6 +148,32 @@ def rasterize_pdf_page(
     return output_file
 
 
+@hookimpl
+def rasterize_pdf_pages(
+    input_file,
+    raster_device,
+    raster_dpi,
+    first_pageno,
+    last_pageno,
+    filter_vector,
+    stop_on_soft_error,
+):
+    """Rasterize a range of pages of a PDF file in one Ghostscript process."""
+    output_folder = _batch_folder(input_file, raster_device, raster_dpi, filter_vector)
+    output_folder.mkdir(parents=True, exist_ok=True)
+    ghostscript.rasterize_pdf_pages(
+        input_file,
+        output_folder,
+        raster_device=raster_device,
+        raster_dpi=raster_dpi,
+        first_page=first_pageno,
+        last_page=last_pageno,
+        filter_vector=filter_vector,
+        stop_on_error=stop_on_soft_error,
+    )
+    return True
+
+
 @hookimpl
 def generate_pdfa(
     pdf_pages,
@@ -10,18 +10,23 @@ import os
 
 from PIL import Image
 
-from ocrmypdf import hookimpl
+from ocrmypdf import hookimpl, imageanalysis
 from ocrmypdf._exec import tesseract
 from ocrmypdf._jobcontext import PageContext
 from ocrmypdf.cli import numeric, str_to_int
 from ocrmypdf.exceptions import BadArgsError, MissingDependencyError
 from ocrmypdf.helpers import clamp
 from ocrmypdf.imageops import calculate_downsample, downsample_image
-from ocrmypdf.pluginspec import OcrEngine
+from ocrmypdf.pluginspec import OcrEngine, OrientationConfidence
 from ocrmypdf.subprocess import check_external_program
 
 log = logging.getLogger(__name__)
 
+# Tesseract reports orientation confidence in arbitrary units, up to about 30 for
+# a page full of clear text; estimates from 0 to 1 are rescaled to match, since
+# they are compared with --rotate-pages-threshold
+TESSERACT_ORIENTATION_CONFIDENCE_SCALE = 30.0
+
 
 @hookimpl
 def add_options(parser):
@@ -93,6 +98,30 @@ def add_options(parser):
             "because these operations are not as expensive as OCR."
         ),
     )
+    tess.add_argument(
+        '--tesseract-threads',
+        type=numeric(int, 1),
+        metavar='N',
+        help=(
+            "Number of threads each Tesseract process may use. By default, the "
+            "CPUs allowed by --jobs are shared among the pages that are processed "
+            "at the same time, so that documents with fewer pages than CPUs use "
+            "several threads per page. If the OMP_THREAD_LIMIT environment "
+            "variable is set, it is used instead."
+        ),
+    )
+    tess.add_argument(
+        '--tesseract-fast-analysis',
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help=(
+            "Estimate page skew and orientation with a fast built-in image "
+            "analysis, and only ask Tesseract when the estimate is uncertain. "
+            "Pages that may need to be rotated are always checked by Tesseract. "
+            "Much faster with --deskew and --rotate-pages, but the skew angles "
+            "found may differ slightly from Tesseract's."
+        ),
+    )
     tess.add_argument(
         '--tesseract-downsample-large-images',
         action=argparse.BooleanOptionalAction,
@@ -181,22 +210,37 @@ def check_options(options):
         )
 
 
+def tesseract_threads(jobs: int, npages: int) -> int:
+    """Return the number of threads each Tesseract process may use.
+
+    The CPUs allowed by ``jobs`` are divided among the workers, of which there
+    are no more than there are pages to process.
+    """
+    workers = clamp(npages, 1, jobs)
+    return max(1, jobs // workers)
+
+
 @hookimpl
-def validate(pdfinfo, options):
-    # Tesseract 4.x can be multithreaded, and we also run multiple workers. We want
-    # to manage how many threads it uses to avoid creating total threads than cores.
-    # Performance testing shows we're better off
-    # parallelizing ocrmypdf and forcing Tesseract to be single threaded, which we
-    # get by setting the envvar OMP_THREAD_LIMIT to 1. But if the page count of the
-    # input file is small, then we allow Tesseract to use threads, subject to the
-    # constraint: (ocrmypdf workers) * (tesseract threads) <= max_workers.
-    # As of Tesseract 4.1, 3 threads is the most effective on a 4 core/8 thread system.
-    if not os.environ.get('OMP_THREAD_LIMIT', '').isnumeric():
-        tess_threads = clamp(options.jobs // len(pdfinfo), 1, 3)
-        os.environ['OMP_THREAD_LIMIT'] = str(tess_threads)
-    else:
-        tess_threads = int(os.environ['OMP_THREAD_LIMIT'])
-    log.debug("Using Tesseract OpenMP thread limit %d", tess_threads)
+def validate(pdfinfo, options, batch_pages):
+    # Tesseract can be multithreaded, and we also run multiple workers. Each
+    # Tesseract process is given its share of the CPUs, so that the total number
+    # of threads, (ocrmypdf workers) * (tesseract threads), does not exceed --jobs.
+    # A user's own OMP_THREAD_LIMIT is inherited by Tesseract instead.
+    if options.tesseract_threads is None:
+        if os.environ.get('OMP_THREAD_LIMIT', '').isnumeric():
+            log.debug(
+                "Using Tesseract OpenMP thread limit %s from the environment",
+                os.environ['OMP_THREAD_LIMIT'],
+            )
+        else:
+            npages = len(pdfinfo)
+            if options.pages:
+                npages = min(len(options.pages), npages)
+            # In a batch, the pages of every document share the workers
+            npages = max(npages, batch_pages)
+            options.tesseract_threads = tesseract_threads(options.jobs, npages)
+    if options.tesseract_threads is not None:
+        log.debug("Using Tesseract OpenMP thread limit %d", options.tesseract_threads)
 
     if (
         options.tesseract_downsample_above != 32767
@@ -227,9 +271,51 @@ def filter_ocr_image(page: PageContext, image: Image.Image) -> Image.Image:
     return image
 
 
+def estimated_orientation(input_file, options) -> OrientationConfidence | None:
+    """Return the orientation of the image if it is confidently upright.
+
+    Returns ``None`` if Tesseract should be asked instead.
+    """
+    if not options.tesseract_fast_analysis:
+        return None
+    estimate = imageanalysis.estimate_orientation(input_file)
+    if (
+        estimate.angle != 0
+        or estimate.confidence < imageanalysis.ORIENTATION_CONFIDENCE_THRESHOLD
+    ):
+        return None
+    return OrientationConfidence(
+        angle=0,
+        confidence=estimate.confidence * TESSERACT_ORIENTATION_CONFIDENCE_SCALE,
+    )
+
+
+def estimated_deskew(input_file, options) -> float | None:
+    """Return the deskew angle of the image, if it can be estimated confidently.
+
+    Returns ``None`` if Tesseract should be asked instead.
+    """
+    if not options.tesseract_fast_analysis:
+        return None
+    estimate = imageanalysis.estimate_skew(input_file)
+    if estimate.confidence < imageanalysis.SKEW_CONFIDENCE_THRESHOLD:
+        return None
+    return estimate.angle
+
+
 class TesseractOcrEngine(OcrEngine):
     """Implements OCR with Tesseract."""
 
+    supports_hocr_batch = True
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if 'generate_hocr' in vars(cls) and 'generate_hocr_batch' not in vars(cls):
+            # Batches would bypass the subclass's own generate_hocr
+            cls.supports_hocr_batch = False
+        if 'generate_hocr' in vars(cls) and 'generate_ocr_page' not in vars(cls):
+            cls.supports_ocr_page = False
+
     @staticmethod
     def version():
         return str(tesseract.version())
@@ -248,19 +334,25 @@ class TesseractOcrEngine(OcrEngine):
 
     @staticmethod
     def get_orientation(input_file, options):
+        if orient_conf := estimated_orientation(input_file, options):
+            return orient_conf
         return tesseract.get_orientation(
             input_file,
             engine_mode=options.tesseract_oem,
             timeout=options.tesseract_non_ocr_timeout,
+            threads=options.tesseract_threads,
         )
 
     @staticmethod
     def get_deskew(input_file, options) -> float:
+        if (angle := estimated_deskew(input_file, options)) is not None:
+            return angle
         return tesseract.get_deskew(
             input_file,
             languages=options.languages,
             engine_mode=options.tesseract_oem,
             timeout=options.tesseract_non_ocr_timeout,
+            threads=options.tesseract_threads,
         )
 
     @staticmethod
@@ -277,6 +369,22 @@ class TesseractOcrEngine(OcrEngine):
             thresholding=options.tesseract_thresholding,
             user_words=options.user_words,
             user_patterns=options.user_patterns,
+            threads=options.tesseract_threads,
+        )
+
+    @staticmethod
+    def generate_hocr_batch(batch, options):
+        tesseract.generate_hocr_batch(
+            batch=batch,
+            languages=options.languages,
+            engine_mode=options.tesseract_oem,
+            tessconfig=options.tesseract_config,
+            timeout=options.tesseract_timeout,
+            pagesegmode=options.tesseract_pagesegmode,
+            thresholding=options.tesseract_thresholding,
+            user_words=options.user_words,
+            user_patterns=options.user_patterns,
+            threads=options.tesseract_threads,
         )
 
     @staticmethod
@@ -293,6 +401,7 @@ class TesseractOcrEngine(OcrEngine):
             thresholding=options.tesseract_thresholding,
             user_words=options.user_words,
             user_patterns=options.user_patterns,
+            threads=options.tesseract_threads,
         )
 
 
@@ -234,6 +234,33 @@ Online documentation is located at:
         type=numeric(int, 0, 256),
         help="Use up to N CPU cores simultaneously (default: use all).",
     )
+    jobcontrol.add_argument(
+        '--image-jobs',
+        metavar='N',
+        type=numeric(int, 1, 256),
+        help="Process pages in two pipelined stages, and use N workers for the "
+        "first stage, which rasterizes and preprocesses page images. Pages "
+        "are passed to the OCR stage as soon as their images are ready. "
+        "(default: --jobs minus --ocr-jobs, if --ocr-jobs is given)",
+    )
+    jobcontrol.add_argument(
+        '--ocr-jobs',
+        metavar='N',
+        type=numeric(int, 1, 256),
+        help="Process pages in two pipelined stages, and use N workers for the "
+        "second stage, which runs OCR on page images. "
+        "(default: --jobs minus --image-jobs, if --image-jobs is given)",
+    )
+    jobcontrol.add_argument(
+        '--memory-budget',
+        metavar='MEGABYTES',
+        type=numeric(float, 0),
+        help="Limit the estimated memory used by pages that are processed at "
+        "the same time. Pages are started only while they fit within this "
+        "limit, so that several large pages do not run at once. A page larger "
+        "than the limit is processed alone. Defaults to the container (cgroup) "
+        "memory limit, if there is one. Use 0 for no limit.",
+    )
     jobcontrol.add_argument(
         '-q', '--quiet', action='store_true', help="Suppress INFO messages"
     )
@@ -263,6 +290,14 @@ Online documentation is located at:
         dest='use_threads',
         help=argparse.SUPPRESS,
     )
+    jobcontrol.add_argument(
+        '--checkpoint-dir',
+        metavar='DIR',
+        help="Use this folder as a persistent work folder and record each "
+        "finished page in a checkpoint journal there. If processing is "
+        "interrupted, running the same command again resumes from the pages "
+        "that were not finished. The folder is kept after processing.",
+    )
 
     metadata = parser.add_argument_group(
         "Metadata options",
@@ -430,6 +465,60 @@ Online documentation is located at:
         "rendered, but may result in visual differences compared to the input "
         "file. Missing fonts are a typical source of these errors.",
     )
+    advanced.add_argument(
+        '--ocr-cache-dir',
+        metavar='DIR',
+        help="Cache OCR results in this folder and reuse them whenever the same "
+        "page image is OCRed again with the same OCR settings. The folder may be "
+        "shared by several concurrent ocrmypdf processes.",
+    )
+    advanced.add_argument(
+        '--ocr-cache-size',
+        type=numeric(float, 0),
+        default=1000.0,
+        metavar='MEGABYTES',
+        help="Maximum size of the --ocr-cache-dir folder. Least recently used "
+        "results are removed when it grows beyond this size.",
+    )
+    advanced.add_argument(
+        '--ocr-batch-below',
+        type=numeric(float, 0),
+        default=0.0,
+        metavar='MPIXELS',
+        help="Recognize runs of consecutive pages whose images are smaller than "
+        "this many megapixels with one invocation of the OCR engine, if the "
+        "engine supports it. For small pages, starting the OCR engine can take "
+        "longer than recognizing the page. The OCR text may differ slightly from "
+        "recognizing each page separately, which is the default (0).",
+    )
+    advanced.add_argument(
+        '--ocr-regions-below',
+        type=numeric(float, 0, 1),
+        default=0.0,
+        metavar='FRACTION',
+        help="With --redo-ocr, if the content of a page that is not already "
+        "text covers less than this fraction of the page, for example 0.5, "
+        "recognize only the regions with that content instead of the whole page. "
+        "Each region is recognized without the rest of the page, so the OCR text "
+        "and word order may differ from recognizing the whole page, which is the "
+        "default (0).",
+    )
+    advanced.add_argument(
+        '--streaming-graft',
+        action='store_true',
+        help="Assemble the output PDF in a single pass, grafting finished pages in "
+        "page order through a bounded reorder buffer, instead of periodically "
+        "saving and reopening the partially assembled PDF. Faster for documents "
+        "with many pages.",
+    )
+    advanced.add_argument(
+        '--parallel-graft',
+        action='store_true',
+        help="Assemble the output PDF in partitions of consecutive pages, one per "
+        "job, grafting each partition as soon as its pages are finished, and "
+        "merge them at the end. Grafting then runs in parallel, which is faster "
+        "for documents with thousands of pages.",
+    )
     advanced.add_argument(
         '--plugin',
         dest='plugins',
@@ -90,6 +90,13 @@ class SubprocessOutputError(ExitCodeException):
     exit_code = ExitCode.child_process_error
 
 
+class JobCancelledError(ExitCodeException):
+    """The job was cancelled while it was running."""
+
+    exit_code = ExitCode.ctrl_c
+    message = "The job was cancelled"
+
+
 class EncryptedPdfError(ExitCodeException):
     """Input PDF is encrypted."""
 
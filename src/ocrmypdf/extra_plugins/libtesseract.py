@@ -0,0 +1,154 @@
+# SPDX-FileCopyrightText: 2024 James R. Barlow
+# SPDX-License-Identifier: MPL-2.0
+"""OCR engine that runs Tesseract in-process, using the Tesseract library.
+
+The standard Tesseract OCR engine runs the ``tesseract`` executable for every
+orientation check, deskew and OCR of a page, and each run loads the language
+data again, which for several languages can take longer than recognizing a
+simple page. This engine keeps an initialized Tesseract engine in each worker
+and reuses it for every page, getting the words and text of each page directly
+from memory, without writing hOCR unless it is needed.
+
+To use it, load it as a plugin::
+
+    ocrmypdf --plugin ocrmypdf.extra_plugins.libtesseract input.pdf output.pdf
+
+If the Tesseract library is not installed, the standard engine is used instead.
+The ``tesseract`` executable is still required, to list the installed
+languages and for the sandwich renderer, which this engine does not implement.
+"""
+
+from __future__ import annotations
+
+import logging
+from functools import lru_cache
+
+from ocrmypdf import hookimpl
+from ocrmypdf._exec import libtesseract
+from ocrmypdf.builtin_plugins.tesseract_ocr import (
+    TesseractOcrEngine,
+    estimated_deskew,
+    estimated_orientation,
+)
+
+log = logging.getLogger(__name__)
+
+
+class LibTesseractOcrEngine(TesseractOcrEngine):
+    """Implements OCR with the Tesseract library, reusing engines across pages."""
+
+    def __str__(self):
+        """Return the name and version of the Tesseract library."""
+        return f"Tesseract OCR library {libtesseract.version()}"
+
+    @staticmethod
+    def get_orientation(input_file, options):
+        """Return the orientation of the image."""
+        if orient_conf := estimated_orientation(input_file, options):
+            return orient_conf
+        return libtesseract.get_orientation(
+            input_file,
+            engine_mode=options.tesseract_oem,
+            timeout=options.tesseract_non_ocr_timeout,
+            threads=options.tesseract_threads,
+        )
+
+    @staticmethod
+    def get_deskew(input_file, options) -> float:
+        """Return the deskew angle of the image, in degrees."""
+        if (angle := estimated_deskew(input_file, options)) is not None:
+            return angle
+        return libtesseract.get_deskew(
+            input_file,
+            languages=options.languages,
+            engine_mode=options.tesseract_oem,
+            timeout=options.tesseract_non_ocr_timeout,
+            threads=options.tesseract_threads,
+        )
+
+    supports_page_analysis = True
+
+    @staticmethod
+    def analyze_page(input_file, output_hocr, output_text, options):
+        """Find orientation and skew, and recognize the page if upright."""
+        orientation = deskew_angle = None
+        if options.rotate_pages:
+            orientation = estimated_orientation(input_file, options)
+        if options.deskew:
+            deskew_angle = estimated_deskew(input_file, options)
+        return libtesseract.analyze_page(
+            input_file=input_file,
+            output_hocr=output_hocr,
+            output_text=output_text,
+            rotate_pages=options.rotate_pages,
+            rotate_pages_threshold=options.rotate_pages_threshold,
+            deskew=options.deskew,
+            languages=options.languages,
+            engine_mode=options.tesseract_oem,
+            tessconfig=options.tesseract_config,
+            timeout=options.tesseract_timeout,
+            non_ocr_timeout=options.tesseract_non_ocr_timeout,
+            pagesegmode=options.tesseract_pagesegmode,
+            thresholding=options.tesseract_thresholding,
+            user_words=options.user_words,
+            user_patterns=options.user_patterns,
+            threads=options.tesseract_threads,
+            orientation=orientation,
+            deskew_angle=deskew_angle,
+        )
+
+    @staticmethod
+    def generate_hocr(input_file, output_hocr, output_text, options):
+        """Recognize the image and write hOCR and text files."""
+        libtesseract.generate_hocr(
+            input_file=input_file,
+            output_hocr=output_hocr,
+            output_text=output_text,
+            languages=options.languages,
+            engine_mode=options.tesseract_oem,
+            tessconfig=options.tesseract_config,
+            timeout=options.tesseract_timeout,
+            non_ocr_timeout=options.tesseract_non_ocr_timeout,
+            pagesegmode=options.tesseract_pagesegmode,
+            thresholding=options.tesseract_thresholding,
+            user_words=options.user_words,
+            user_patterns=options.user_patterns,
+            threads=options.tesseract_threads,
+        )
+
+    supports_ocr_page = True
+
+    @staticmethod
+    def generate_ocr_page(input_file, output_text, options):
+        """Recognize the image, returning its words without writing hOCR."""
+        return libtesseract.generate_ocr_page(
+            input_file=input_file,
+            output_text=output_text,
+            languages=options.languages,
+            engine_mode=options.tesseract_oem,
+            tessconfig=options.tesseract_config,
+            timeout=options.tesseract_timeout,
+            non_ocr_timeout=options.tesseract_non_ocr_timeout,
+            pagesegmode=options.tesseract_pagesegmode,
+            thresholding=options.tesseract_thresholding,
+            user_words=options.user_words,
+            user_patterns=options.user_patterns,
+            threads=options.tesseract_threads,
+        )
+
+
+@lru_cache(maxsize=1)
+def _warn_unavailable():
+    log.warning(
+        "The Tesseract library was not found, so the Tesseract executable "
+        "will be used instead."
+    )
+
+
+@hookimpl
+def get_ocr_engine():
+    """Return the library OCR engine, if the Tesseract library is installed."""
+    if not libtesseract.available():
+        _warn_unavailable()
+        return None  # Let the standard Tesseract engine be used
+    return LibTesseractOcrEngine()
@@ -209,15 +209,70 @@ def page_number(input_file: os.PathLike) -> int:
 
 
 def available_cpu_count() -> int:
-    """Returns number of CPUs in the system."""
+    """Returns number of CPUs available to this process.
+
+    This is the number of CPUs in the system, reduced to those the process may
+    run on, and to the CPU quota of its cgroup, if any.
+    """
     try:
-        return multiprocessing.cpu_count()
+        count = multiprocessing.cpu_count()
     except NotImplementedError:
-        pass
-    warnings.warn(
-        "Could not get CPU count. Assuming one (1) CPU. Use -j N to set manually."
-    )
-    return 1
+        warnings.warn(
+            "Could not get CPU count. Assuming one (1) CPU. Use -j N to set manually."
+        )
+        return 1
+    with suppress(AttributeError, OSError):
+        count = min(count, len(os.sched_getaffinity(0)))
+    cpu_limit = cgroup_cpu_limit()
+    if cpu_limit:
+        count = min(count, max(1, round(cpu_limit)))
+    return count
+
+
+def cgroup_cpu_limit() -> float | None:
+    """Returns the CPU quota of this process's cgroup, in CPUs, if any.
+
+    Containers may be limited to a fraction of the CPU time of the host, even
+    though all of the host's CPUs are visible. Both cgroup v2 and v1 are checked.
+    Returns ``None`` if there is no quota, or it cannot be determined.
+    """
+    try:
+        quota, period = Path('/sys/fs/cgroup/cpu.max').read_text().split()[:2]
+    except (OSError, ValueError):
+        try:
+            quota = Path('/sys/fs/cgroup/cpu/cpu.cfs_quota_us').read_text().strip()
+            period = Path('/sys/fs/cgroup/cpu/cpu.cfs_period_us').read_text().strip()
+        except OSError:
+            return None
+    # 'max' (v2) or -1 (v1) means no quota
+    if not quota.isdigit() or not period.isdigit() or int(period) == 0:
+        return None
+    return int(quota) / int(period)
+
+
+def cgroup_memory_limit() -> int | None:
+    """Returns the memory limit of this process's cgroup in bytes, if any.
+
+    Containers usually have a memory limit enforced by cgroups that is much
+    lower than the memory of the host. Both cgroup v2 and v1 are checked.
+    Returns ``None`` if there is no limit, or it cannot be determined.
+    """
+    for limit_file in (
+        '/sys/fs/cgroup/memory.max',
+        '/sys/fs/cgroup/memory/memory.limit_in_bytes',
+    ):
+        try:
+            text = Path(limit_file).read_text().strip()
+        except OSError:
+            continue
+        if not text.isdigit():
+            return None  # 'max' means unlimited
+        limit = int(text)
+        # cgroup v1 reports "unlimited" as a huge value near the maximum int64
+        if limit >= 2**62:
+            return None
+        return limit
+    return None
 
 
 def is_file_writable(test_file: os.PathLike) -> bool:
@@ -10,9 +10,30 @@ from ocrmypdf.hocrtransform._hocr import (
     HocrTransform,
     HocrTransformError,
 )
+from ocrmypdf.hocrtransform._hocrreader import (
+    HocrLine,
+    HocrPage,
+    HocrParagraph,
+    HocrTitle,
+    HocrWord,
+    iter_hocr,
+    parse_title,
+)
+from ocrmypdf.hocrtransform._ocrpage import OcrLine, OcrPage
+from ocrmypdf.hocrtransform._textlayer import TextLayer
 
 __all__ = (
     'HocrTransform',
     'HocrTransformError',
     'DebugRenderOptions',
+    'HocrLine',
+    'HocrPage',
+    'HocrParagraph',
+    'HocrTitle',
+    'HocrWord',
+    'iter_hocr',
+    'parse_title',
+    'OcrLine',
+    'OcrPage',
+    'TextLayer',
 )
@@ -8,7 +8,6 @@
 from __future__ import annotations
 
 import logging
-import os
 import re
 import unicodedata
 from dataclasses import dataclass
@@ -33,6 +32,15 @@ from pikepdf.canvas import (
 
 from ocrmypdf.hocrtransform._font import EncodableFont as Font
 from ocrmypdf.hocrtransform._font import GlyphlessFont
+from ocrmypdf.hocrtransform._hocrreader import (
+    HocrLine,
+    HocrPage,
+    HocrParagraph,
+    HocrWord,
+    iter_hocr,
+)
+from ocrmypdf.hocrtransform._ocrpage import NO_BOX, OcrLine, OcrPage
+from ocrmypdf.hocrtransform._textlayer import TextLayer, pdf_matrix, pdf_real
 
 log = logging.getLogger(__name__)
 
@@ -86,14 +94,19 @@ class HocrTransform:
     def __init__(
         self,
         *,
-        hocr_filename: str | Path,
+        hocr_filename: str | Path | None = None,
         dpi: float,
         debug: bool = False,
         fontname: Name = Name("/f-0-0"),
         font: Font = GlyphlessFont(),
         debug_render_options: DebugRenderOptions | None = None,
+        ocr_page: OcrPage | None = None,
     ):
-        """Initialize the HocrTransform object."""
+        """Initialize the HocrTransform object.
+
+        The OCR results are read from ``hocr_filename``, or given already read
+        as ``ocr_page``.
+        """
         if debug:
             log.warning("Use debug_render_options instead", DeprecationWarning)
             self.render_options = DebugRenderOptions(
@@ -107,33 +120,68 @@ class HocrTransform:
         else:
             self.render_options = debug_render_options or DebugRenderOptions()
         self.dpi = dpi
-        self.hocr = ElementTree.parse(os.fspath(hocr_filename))
+        if ocr_page is None:
+            if hocr_filename is None:
+                raise ValueError("hocr_filename or ocr_page is required")
+            ocr_page = self.read_hocr(hocr_filename)
+        self.ocr_page = ocr_page
         self._fontname = fontname
         self._font = font
+        self.width = ocr_page.width / (self.dpi / INCH)
+        self.height = ocr_page.height / (self.dpi / INCH)
+
+    @classmethod
+    def read_hocr(cls, hocr_filename: str | Path) -> OcrPage:
+        """Read the words of a hOCR file, and their positions.
 
-        # if the hOCR file has a namespace, ElementTree requires its use to
-        # find elements
-        matches = re.match(r'({.*})html', self.hocr.getroot().tag)
-        self.xmlns = ''
-        if matches:
-            self.xmlns = matches.group(1)
-
-        for div in self.hocr.findall(self._child_xpath('div', 'ocr_page')):
-            coords = self.element_coordinates(div)
-            if not coords:
-                raise HocrTransformError("hocr file is missing page dimensions")
-            self.width = (coords.urx - coords.llx) / (self.dpi / INCH)
-            self.height = (coords.ury - coords.lly) / (self.dpi / INCH)
-            # Stop after first div that has page coordinates
-            break
-
-    def _get_element_text(self, element: Element) -> str:
-        """Return the textual content of the element and its children."""
-        text = element.text if element.text is not None else ''
-        for child in element:
-            text += self._get_element_text(child)
-        text += element.tail if element.tail is not None else ''
-        return text
+        Only the first page sets the page size, but the paragraphs and lines of
+        every page are read. The file is read incrementally, so only the
+        OcrPage is kept in memory, not the elements of the file.
+        """
+        page: OcrPage | None = None
+        first_page: HocrPage | None = None
+        # Words that are not in any line, in case the first page has no lines
+        loose_words: list[HocrWord] = []
+        collect_loose_words = False
+        for item in iter_hocr(hocr_filename):
+            if isinstance(item, HocrLine):
+                if page is None:
+                    continue
+                page.add_line(
+                    item.box, item.baseline, rtl=item.rtl, word_breaks=item.word_breaks
+                )
+                for word in item.words:
+                    page.add_word(word.text, word.box, word.confidence)
+                collect_loose_words = False
+                loose_words.clear()
+            elif isinstance(item, HocrWord):
+                if collect_loose_words:
+                    loose_words.append(item)
+            elif isinstance(item, HocrParagraph):
+                if page is not None and item.box and item.has_text:
+                    page.add_paragraph(item.box)
+            elif first_page is None:
+                first_page = item
+                if not item.box:
+                    raise HocrTransformError("hocr file is missing page dimensions")
+                page = OcrPage(bbox=item.box)
+                collect_loose_words = True
+            else:
+                collect_loose_words = False
+        if page is None or first_page is None:
+            raise HocrTransformError("hocr file has no page")
+
+        if not page.line_boxes:
+            # Tesseract did not report any lines (just words)
+            page.add_line(
+                first_page.box,
+                first_page.baseline,
+                rtl=first_page.rtl,
+                word_breaks=True,
+            )
+            for word in loose_words:
+                page.add_word(word.text, word.box, word.confidence)
+        return page
 
     @classmethod
     def element_coordinates(cls, element: Element) -> Rectangle | None:
@@ -156,12 +204,6 @@ class HocrTransform:
             return (0.0, 0.0)
         return float(matches.group(1)), int(matches.group(2))
 
-    def _child_xpath(self, html_tag: str, html_class: str | None = None) -> str:
-        xpath = f".//{self.xmlns}{html_tag}"
-        if html_class:
-            xpath += f"[@class='{html_class}']"
-        return xpath
-
     @classmethod
     def normalize_text(cls, s: str) -> str:
         """Normalize the given text using the NFKC normalization form."""
@@ -203,39 +245,8 @@ class HocrTransform:
         log.debug(page_matrix)
         with canvas.do.save_state(cm=page_matrix):
             self._debug_draw_paragraph_boxes(canvas)
-            found_lines = False
-            for par in self.hocr.iterfind(self._child_xpath('p', 'ocr_par')):
-                for line in (
-                    element
-                    for element in par.iterfind(self._child_xpath('span'))
-                    if 'class' in element.attrib
-                    and element.attrib['class']
-                    in {'ocr_header', 'ocr_line', 'ocr_textfloat'}
-                ):
-                    found_lines = True
-                    direction = self._get_text_direction(par)
-                    inject_word_breaks = self._get_inject_word_breaks(par)
-                    self._do_line(
-                        canvas,
-                        line,
-                        "ocrx_word",
-                        invisible_text,
-                        direction,
-                        inject_word_breaks,
-                    )
-
-            if not found_lines:
-                # Tesseract did not report any lines (just words)
-                root = self.hocr.find(self._child_xpath('div', 'ocr_page'))
-                direction = self._get_text_direction(root)
-                self._do_line(
-                    canvas,
-                    root,
-                    "ocrx_word",
-                    invisible_text,
-                    direction,
-                    True,
-                )
+            for line in self.ocr_page.lines():
+                self._do_line(canvas, line, invisible_text)
         # put the image on the page, scaled to fill the page
         if image_filename is not None:
             canvas.do.draw_image(
@@ -245,29 +256,119 @@ class HocrTransform:
         # finish up the page and save it
         canvas.to_pdf().save(out_filename)
 
-    def _get_text_direction(self, par):
-        """Get the text direction of the paragraph.
+    def to_text_layer(self, *, invisible_text: bool = True) -> TextLayer:
+        """Format the text of the page as a content stream, without a PDF.
 
-        Arabic, Hebrew, Persian, are right-to-left languages.
+        The content stream is the same as that of the page written by
+        :meth:`to_pdf` without an image, but is formatted directly rather than
+        built one operator at a time, which is several times faster. Debug
+        rendering options are not supported, and the font must be the glyphless
+        font.
         """
-        return (
-            TextDirection.RTL
-            if par.attrib.get('dir', 'ltr') == 'rtl'
-            else TextDirection.LTR
+        if not isinstance(self._font, GlyphlessFont):
+            raise HocrTransformError("Text layers can only use the glyphless font")
+        text_width = self._font.text_width
+        ocr_page = self.ocr_page
+        word_coords = ocr_page.word_boxes
+        page_matrix = (
+            Matrix()
+            .translated(0, self.height)
+            .scaled(1, -1)
+            .scaled(INCH / self.dpi, INCH / self.dpi)
+        )
+        parts = ['q\nq\n', pdf_matrix(page_matrix.shorthand), ' cm\n']
+        font_ops = f'{self._fontname} %s Tf\n{3 if invisible_text else 0} Tr\n'
+        for line in ocr_page.lines():
+            line_box = line.box
+            if not line_box:
+                continue
+            if line_box.ury <= line_box.lly:
+                log.error(
+                    "line box is invalid so we cannot render it: box=%s text=%s",
+                    line_box,
+                    ' '.join(ocr_page.word_text(n) for n in line.words),
+                )
+                continue
+            slope, intercept = line.baseline
+            if abs(slope) < 0.005:
+                slope = 0.0
+            angle = atan(slope)
+            line_matrix = (
+                Matrix()
+                .translated(line_box.llx, line_box.ury)
+                .translated(0, intercept)
+                .rotated(angle / pi * 180)
+            )
+            fontsize = abs(line_box.height) / cos(angle) + intercept
+            parts += [
+                'q\n',
+                pdf_matrix(line_matrix.shorthand),
+                ' cm\n0 0 0 rg\nBT\n',
+                font_ops % pdf_real(fontsize),
+            ]
+            # Only the horizontal extent of each word's box in line coordinates
+            # is needed, so transform the x coordinates of its corners
+            a, _b, c, _d, e, _f = line_matrix.inverse().shorthand
+            rtl = line.rtl
+            space_width = text_width(' ', fontsize)
+            prev_right = None
+            for n in line.words:
+                left, top, right, bottom = word_coords[4 * n : 4 * n + 4]
+                if left == NO_BOX:
+                    prev_right = None
+                    continue
+                xs = (
+                    a * left + c * top + e,
+                    a * left + c * bottom + e,
+                    a * right + c * top + e,
+                    a * right + c * bottom + e,
+                )
+                llx, urx = min(xs), max(xs)
+                if prev_right is not None and line.word_breaks and space_width > 0:
+                    # Space between the previous word and this one
+                    space_llx, space_urx = (
+                        (prev_right, llx) if not rtl else (urx, prev_right)
+                    )
+                    parts.append(
+                        self._text_layer_show(
+                            space_llx, space_urx - space_llx, space_width, ' ', rtl
+                        )
+                    )
+                prev_right = None
+                word_text = ocr_page.word_text(n)
+                if not word_text:
+                    continue
+                prev_right = urx if not rtl else llx
+                font_width = text_width(word_text, fontsize)
+                if rtl:
+                    log.info("RTL: %s", word_text)
+                if font_width > 0:
+                    parts.append(
+                        self._text_layer_show(
+                            llx, urx - llx, font_width, word_text, rtl
+                        )
+                    )
+            parts.append('ET\nQ\n')
+        parts.append('Q\nQ\n')
+        return TextLayer(
+            ''.join(parts).encode('ascii'),
+            self.width,
+            self.height,
+            str(self._fontname),
         )
 
-    def _get_inject_word_breaks(self, par):
-        """Determine whether word breaks should be injected.
-
-        In Chinese, Japanese, and Korean, word breaks are not injected, because
-        words are usually one or two characters and separators are usually explicit.
-        In all other languages, we inject word breaks to help word segmentation.
-        """
-        lang = par.attrib.get('lang', '')
-        log.debug(lang)
-        if lang in {'chi_sim', 'chi_tra', 'jpn', 'kor'}:
-            return False
-        return True
+    def _text_layer_show(
+        self, llx: float, width: float, font_width: float, text: str, rtl: bool
+    ) -> str:
+        """Format the operators that show text stretched across a box."""
+        encoded = self._font.text_encode(text).hex()
+        scale = pdf_real(100 * width / font_width)
+        if rtl:
+            return (
+                f'-1 0 0 -1 {pdf_real(llx + width)} 0 Tm\n{scale} Tz\n'
+                f'/ReversedChars BMC\n[ <{encoded}> ] TJ\nEMC\n'
+            )
+        return f'1 0 0 -1 {pdf_real(llx)} 0 Tm\n{scale} Tz\n[ <{encoded}> ] TJ\n'
 
     @classmethod
     def polyval(cls, poly, x):  # pragma: no cover
@@ -277,27 +378,22 @@ class HocrTransform:
     def _do_line(
         self,
         canvas: Canvas,
-        line: Element | None,
-        elemclass: str,
+        line: OcrLine,
         invisible_text: bool,
-        text_direction: TextDirection,
-        inject_word_breaks: bool,
     ):
         """Render the text for a given line.
 
         The canvas's coordinate system must be configured so that hOCR pixel
         coordinates are mapped to PDF coordinates.
         """
-        if line is None:
-            return
-        line_box = self.element_coordinates(line)
+        line_box = line.box
         if not line_box:
             return
         if line_box.ury <= line_box.lly:
             log.error(
                 "line box is invalid so we cannot render it: box=%s text=%s",
                 line_box,
-                self._get_element_text(line),
+                ' '.join(self.ocr_page.word_text(n) for n in line.words),
             )
             return
 
@@ -307,10 +403,11 @@ class HocrTransform:
         # text baseline relative to the bottom left corner of the line bounding
         # box.
         bottom_left_corner = line_box.llx, line_box.ury
-        slope, intercept = self.baseline(line)
+        slope, intercept = line.baseline
         if abs(slope) < 0.005:
             slope = 0.0
         angle = atan(slope)
+        text_direction = TextDirection.RTL if line.rtl else TextDirection.LTR
 
         # Setup a new coordinate system on the line box's intercept and rotated by
         # its slope.
@@ -337,42 +434,40 @@ class HocrTransform:
             )
 
             canvas.do.fill_color(BLACK)  # text in black
-            elements = line.findall(self._child_xpath('span', elemclass))
-            for elem, next_elem in pairwise(elements + [None]):
+            inverse_line_matrix = line_matrix.inverse()
+            for word, next_word in pairwise([*line.words, None]):
                 self._do_line_word(
                     canvas,
-                    line_matrix,
+                    inverse_line_matrix,
                     text,
                     fontsize,
-                    elem,
-                    next_elem,
+                    word,
+                    next_word,
                     text_direction,
-                    inject_word_breaks,
+                    line.word_breaks,
                 )
             canvas.do.draw_text(text)
 
     def _do_line_word(
         self,
         canvas: Canvas,
-        line_matrix: Matrix,
+        inverse_line_matrix: Matrix,
         text: Text,
         fontsize: float,
-        elem: Element,
-        next_elem: Element | None,
+        word: int,
+        next_word: int | None,
         text_direction: TextDirection,
         inject_word_breaks: bool,
     ):
         """Render the text for a single word."""
-        if elem is None:
-            return
-        elemtxt = self.normalize_text(self._get_element_text(elem).strip())
+        elemtxt = self.ocr_page.word_text(word)
         if elemtxt == '':
             return
 
-        hocr_box = self.element_coordinates(elem)
+        hocr_box = self.ocr_page.word_box(word)
         if hocr_box is None:
             return
-        box = line_matrix.inverse().transform(hocr_box)
+        box = inverse_line_matrix.transform(hocr_box)
         font_width = self._font.text_width(elemtxt, fontsize)
 
         # Debug sketches
@@ -392,7 +487,7 @@ class HocrTransform:
 
         # Get coordinates of the next word (if there is one)
         hocr_next_box = (
-            self.element_coordinates(next_elem) if next_elem is not None else None
+            self.ocr_page.word_box(next_word) if next_word is not None else None
         )
         if hocr_next_box is None:
             return
@@ -402,7 +497,7 @@ class HocrTransform:
         # avoid combiningthewordstogether.
         if not inject_word_breaks:
             return
-        next_box = line_matrix.inverse().transform(hocr_next_box)
+        next_box = inverse_line_matrix.transform(hocr_next_box)
         if text_direction == TextDirection.LTR:
             space_box = Rectangle(box.urx, box.lly, next_box.llx, next_box.ury)
         elif text_direction == TextDirection.RTL:
@@ -426,13 +521,7 @@ class HocrTransform:
         with canvas.do.save_state():
             # draw box around paragraph
             canvas.do.stroke_color(color).line_width(0.1)
-            for elem in self.hocr.iterfind(self._child_xpath('p', 'ocr_par')):
-                elemtxt = self._get_element_text(elem).strip()
-                if len(elemtxt) == 0:
-                    continue
-                ocr_par = self.element_coordinates(elem)
-                if ocr_par is None:
-                    continue
+            for ocr_par in self.ocr_page.paragraphs():
                 canvas.do.rect(
                     ocr_par.llx, ocr_par.lly, ocr_par.width, ocr_par.height, fill=0
                 )
@@ -0,0 +1,237 @@
+# SPDX-FileCopyrightText: 2024 James R. Barlow
+# SPDX-License-Identifier: MIT
+
+"""Incremental reader for hOCR files.
+
+hOCR files of large pages, such as engineering drawings and newspapers, can
+contain tens of thousands of words. Rather than parsing the whole file into an
+element tree, :func:`iter_hocr` yields its pages, lines and words as they are
+read, and discards each part of the tree once it has been read, so that memory
+use does not depend on the size of the page.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import unicodedata
+from collections.abc import Iterator
+from typing import NamedTuple
+from xml.etree import ElementTree
+
+Element = ElementTree.Element
+Box = tuple[int, int, int, int]
+
+LINE_CLASSES = frozenset({'ocr_header', 'ocr_line', 'ocr_textfloat'})
+# In Chinese, Japanese, and Korean, words are usually one or two characters and
+# separators are usually explicit, so no word breaks are injected between words
+NO_WORD_BREAK_LANGUAGES = frozenset({'chi_sim', 'chi_tra', 'jpn', 'kor'})
+
+_box_pattern = re.compile(r'bbox\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)')
+_baseline_pattern = re.compile(r'baseline\s+([\-\+]?\d*\.?\d*)\s+([\-\+]?\d+)')
+_confidence_pattern = re.compile(r'x_wconf\s+(\d+)')
+
+
+class HocrTitle(NamedTuple):
+    """The properties in the title attribute of a hOCR element."""
+
+    box: Box | None
+    """Bounding box as (left, top, right, bottom), if the element has one."""
+    baseline: tuple[float, float] = (0.0, 0.0)
+    """Slope and intercept of the baseline."""
+    confidence: int = -1
+    """Word confidence from 0 to 100, or -1 if not given."""
+
+
+def parse_title(title: str) -> HocrTitle:
+    """Parse the bounding box, baseline and confidence from a title attribute."""
+    box = baseline = confidence = None
+    if match := _box_pattern.search(title):
+        box = (int(match[1]), int(match[2]), int(match[3]), int(match[4]))
+    if 'baseline' in title and (match := _baseline_pattern.search(title)):
+        baseline = (float(match[1]), int(match[2]))
+    if 'x_wconf' in title and (match := _confidence_pattern.search(title)):
+        confidence = int(match[1])
+    return HocrTitle(
+        box,
+        (0.0, 0.0) if baseline is None else baseline,
+        -1 if confidence is None else confidence,
+    )
+
+
+class HocrPage(NamedTuple):
+    """The start of an ``ocr_page``, yielded before its contents."""
+
+    box: Box | None
+    baseline: tuple[float, float]
+    rtl: bool
+
+
+class HocrWord(NamedTuple):
+    """An ``ocrx_word``, with its text stripped and NFKC normalized."""
+
+    text: str
+    box: Box | None
+    confidence: int
+
+
+class HocrLine(NamedTuple):
+    """A line of a paragraph, with its words.
+
+    The direction and word breaking of the line are those of its paragraph.
+    """
+
+    box: Box | None
+    baseline: tuple[float, float]
+    rtl: bool
+    word_breaks: bool
+    words: list[HocrWord]
+
+
+class HocrParagraph(NamedTuple):
+    """An ``ocr_par``, yielded after its lines."""
+
+    box: Box | None
+    has_text: bool
+    """Whether the paragraph contains any text other than whitespace."""
+
+
+class _OpenParagraph:
+    __slots__ = ('element', 'rtl', 'word_breaks', 'has_text', 'parent')
+
+    def __init__(self, element: Element, parent: _OpenParagraph | None):
+        self.element = element
+        self.rtl = _is_rtl(element)
+        self.word_breaks = element.get('lang', '') not in NO_WORD_BREAK_LANGUAGES
+        self.has_text = False
+        self.parent = parent
+
+
+def _is_rtl(element: Element) -> bool:
+    return element.get('dir', 'ltr') == 'rtl'
+
+
+def _has_text(element: Element) -> bool:
+    """Whether the element, its children or its tail contain any text."""
+    if element.tail and not element.tail.isspace():
+        return True
+    return any(text and not text.isspace() for text in element.itertext())
+
+
+def _read_word(word: Element) -> HocrWord:
+    title = parse_title(word.get('title', ''))
+    text = (''.join(word.itertext()) + (word.tail or '')).strip()
+    if not text.isascii():
+        # NFKC: split ligatures, combine diacritics
+        text = unicodedata.normalize('NFKC', text)
+    return HocrWord(text, title.box, title.confidence)
+
+
+def iter_hocr(
+    hocr_filename: str | os.PathLike,
+) -> Iterator[HocrPage | HocrParagraph | HocrLine | HocrWord]:
+    """Read a hOCR file incrementally.
+
+    Yields, in the order they appear in the file:
+
+    * a :class:`HocrPage` at the start of each page;
+    * a :class:`HocrLine` at the end of each line of a paragraph, with its
+      words;
+    * a :class:`HocrParagraph` at the end of each paragraph;
+    * a :class:`HocrWord` for each word that is not in the line of a
+      paragraph.
+
+    Each element of the file is discarded once it has been read, so only the
+    elements that are still open are kept in memory. Since the text that follows
+    an element is only known once the next element starts, each part of the file
+    is yielded when the next one starts.
+
+    Args:
+        hocr_filename: The hOCR file to read.
+    """
+    div_tag = p_tag = span_tag = ''
+    open_elements: list[Element] = []
+    paragraph: _OpenParagraph | None = None
+    # A line or word whose children are read along with it, once it ends
+    held: Element | None = None
+    # Elements that have ended, with their parent, innermost paragraph, and
+    # whether they are a line
+    ended: list[tuple[Element, Element | None, _OpenParagraph | None, bool]] = []
+
+    def finish(
+        element: Element,
+        parent: Element | None,
+        par: _OpenParagraph | None,
+        is_line: bool,
+    ) -> Iterator[HocrParagraph | HocrLine | HocrWord]:
+        if par is not None and par.element is element:
+            has_text = par.has_text or _has_text(element)
+            if has_text and par.parent is not None:
+                par.parent.has_text = True
+            yield HocrParagraph(parse_title(element.get('title', '')).box, has_text)
+        else:
+            if par is not None and not par.has_text and _has_text(element):
+                par.has_text = True
+            if is_line and par is not None:
+                title = parse_title(element.get('title', ''))
+                yield HocrLine(
+                    title.box,
+                    title.baseline,
+                    par.rtl,
+                    par.word_breaks,
+                    [
+                        _read_word(word)
+                        for word in element.iter(span_tag)
+                        if word.get('class') == 'ocrx_word'
+                    ],
+                )
+            elif element.get('class') == 'ocrx_word':
+                yield _read_word(element)
+        element.clear()
+        if parent is not None:
+            parent.remove(element)
+
+    for event, element in ElementTree.iterparse(
+        os.fspath(hocr_filename), events=('start', 'end')
+    ):
+        # The tails of ended elements are complete now that the parser has
+        # moved on
+        for args in ended:
+            yield from finish(*args)
+        ended.clear()
+
+        if event == 'start':
+            if not open_elements:
+                # If the hOCR file has a namespace, ElementTree includes it in
+                # the tag of every element
+                matches = re.match(r'({.*})html', element.tag)
+                xmlns = matches.group(1) if matches else ''
+                div_tag, p_tag, span_tag = f'{xmlns}div', f'{xmlns}p', f'{xmlns}span'
+            open_elements.append(element)
+            if held is not None:
+                continue
+            tag, cls = element.tag, element.get('class')
+            if tag == div_tag and cls == 'ocr_page':
+                title = parse_title(element.get('title', ''))
+                yield HocrPage(title.box, title.baseline, _is_rtl(element))
+            elif tag == p_tag and cls == 'ocr_par':
+                paragraph = _OpenParagraph(element, paragraph)
+            elif tag == span_tag and (
+                cls == 'ocrx_word' or (cls in LINE_CLASSES and paragraph is not None)
+            ):
+                held = element
+            continue
+
+        open_elements.pop()
+        is_line = False
+        if held is not None:
+            if element is not held:
+                continue
+            held = None
+            is_line = element.get('class') != 'ocrx_word'
+        parent = open_elements[-1] if open_elements else None
+        ended.append((element, parent, paragraph, is_line))
+        if paragraph is not None and paragraph.element is element:
+            paragraph = paragraph.parent
+    for args in ended:
+        yield from finish(*args)
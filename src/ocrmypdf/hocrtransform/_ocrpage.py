@@ -0,0 +1,154 @@
+# SPDX-FileCopyrightText: 2024 James R. Barlow
+# SPDX-License-Identifier: MIT
+
+"""Compact, array-backed representation of the OCR results of one page."""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+from pikepdf import Rectangle
+
+NO_BOX = -1
+"""Coordinate stored for a missing bounding box."""
+
+LINE_RTL = 1
+"""Line flag: the line is written right to left."""
+
+LINE_NO_WORD_BREAKS = 2
+"""Line flag: no spaces should be inserted between words of the line."""
+
+
+class OcrLine(NamedTuple):
+    """A line of text, and the range of its words in the page."""
+
+    box: Rectangle | None
+    baseline: tuple[float, float]
+    rtl: bool
+    word_breaks: bool
+    words: range
+
+
+def _box(coords: array, index: int) -> Rectangle | None:
+    left, top, right, bottom = coords[4 * index : 4 * index + 4]
+    if left == NO_BOX:
+        return None
+    return Rectangle(left, top, right, bottom)
+
+
+@dataclass
+class OcrPage:
+    """The words of a page found by OCR, with their positions.
+
+    This holds the same information that is rendered from hOCR, but in flat
+    arrays rather than a tree of XML elements, so that it is quick to build, to
+    render and to send to another process. All coordinates are in pixels of the
+    page image, in the order left, top, right, bottom; a missing bounding box is
+    stored as :data:`NO_BOX`.
+
+    Build a page with :meth:`add_paragraph`, :meth:`add_line` and
+    :meth:`add_word`, in reading order. Words belong to the last line added.
+    """
+
+    bbox: tuple[int, int, int, int]
+    """Bounding box of the page."""
+    paragraph_boxes: array = field(default_factory=lambda: array('i'))
+    """Bounding boxes of paragraphs that contain text, four values each."""
+    line_boxes: array = field(default_factory=lambda: array('i'))
+    """Bounding boxes of lines, four values each."""
+    line_baselines: array = field(default_factory=lambda: array('d'))
+    """Slope and intercept of the baseline of each line."""
+    line_flags: array = field(default_factory=lambda: array('B'))
+    """Combination of ``LINE_*`` flags for each line."""
+    line_first_words: array = field(default_factory=lambda: array('I'))
+    """Index of the first word of each line."""
+    word_boxes: array = field(default_factory=lambda: array('i'))
+    """Bounding boxes of words, four values each."""
+    word_confidences: array = field(default_factory=lambda: array('b'))
+    """Confidence of each word from 0 to 100, or -1 if unknown."""
+    word_offsets: array = field(default_factory=lambda: array('I', [0]))
+    """Offset of the text of each word in :attr:`text`, and the end of the text."""
+    text: bytearray = field(default_factory=bytearray)
+    """Text of all words, encoded as UTF-8 and concatenated."""
+
+    def add_paragraph(self, box: tuple[int, int, int, int]) -> None:
+        """Add the bounding box of a paragraph that contains text."""
+        self.paragraph_boxes.extend(box)
+
+    def add_line(
+        self,
+        box: tuple[int, int, int, int] | None,
+        baseline: tuple[float, float] = (0.0, 0.0),
+        *,
+        rtl: bool = False,
+        word_breaks: bool = True,
+    ) -> None:
+        """Start a new line, which the following words belong to."""
+        self.line_boxes.extend(box if box is not None else (NO_BOX,) * 4)
+        self.line_baselines.extend(baseline)
+        self.line_flags.append(
+            (LINE_RTL if rtl else 0) | (0 if word_breaks else LINE_NO_WORD_BREAKS)
+        )
+        self.line_first_words.append(len(self.word_confidences))
+
+    def add_word(
+        self,
+        text: str,
+        box: tuple[int, int, int, int] | None,
+        confidence: int = -1,
+    ) -> None:
+        """Add a word to the current line.
+
+        Words with no text or no bounding box are not rendered, but are kept,
+        because they still separate the words on either side of them.
+        """
+        self.word_boxes.extend(box if box is not None else (NO_BOX,) * 4)
+        self.word_confidences.append(confidence)
+        self.text += text.encode('utf-8')
+        self.word_offsets.append(len(self.text))
+
+    @property
+    def width(self) -> int:
+        """Width of the page, in pixels."""
+        return self.bbox[2] - self.bbox[0]
+
+    @property
+    def height(self) -> int:
+        """Height of the page, in pixels."""
+        return self.bbox[3] - self.bbox[1]
+
+    def __len__(self) -> int:
+        """Return the number of words."""
+        return len(self.word_confidences)
+
+    def lines(self) -> Iterator[OcrLine]:
+        """Iterate over the lines of the page."""
+        ends = [*self.line_first_words[1:], len(self)]
+        for n, (first, end) in enumerate(zip(self.line_first_words, ends)):
+            flags = self.line_flags[n]
+            yield OcrLine(
+                box=_box(self.line_boxes, n),
+                baseline=(self.line_baselines[2 * n], self.line_baselines[2 * n + 1]),
+                rtl=bool(flags & LINE_RTL),
+                word_breaks=not flags & LINE_NO_WORD_BREAKS,
+                words=range(first, end),
+            )
+
+    def paragraphs(self) -> Iterator[Rectangle]:
+        """Iterate over the bounding boxes of paragraphs that contain text."""
+        for n in range(len(self.paragraph_boxes) // 4):
+            box = _box(self.paragraph_boxes, n)
+            assert box is not None
+            yield box
+
+    def word_box(self, index: int) -> Rectangle | None:
+        """Return the bounding box of a word, if it has one."""
+        return _box(self.word_boxes, index)
+
+    def word_text(self, index: int) -> str:
+        """Return the text of a word."""
+        start, end = self.word_offsets[index], self.word_offsets[index + 1]
+        return self.text[start:end].decode('utf-8')
@@ -0,0 +1,78 @@
+# SPDX-FileCopyrightText: 2024 James R. Barlow
+# SPDX-License-Identifier: MIT
+
+"""Invisible text layers, as PDF content streams without a PDF around them."""
+
+from __future__ import annotations
+
+import os
+import zlib
+from pathlib import Path
+from typing import NamedTuple
+
+TEXT_LAYER_HEADER = b'%OCRmyPDF-text-layer'
+
+
+def pdf_real(value: float) -> str:
+    """Format a number as it appears in a content stream written by pikepdf."""
+    text = f'{value:.6f}'.rstrip('0')
+    return text[:-1] if text.endswith('.') else text
+
+
+def pdf_matrix(shorthand: tuple[float, ...]) -> str:
+    """Format the six numbers of a transformation matrix."""
+    return ' '.join(pdf_real(value) for value in shorthand)
+
+
+class TextLayer(NamedTuple):
+    """The content stream of an invisible text layer, and the size of its page.
+
+    The content stream draws text with the glyphless font, under the resource
+    name :attr:`font`, which whoever draws the content stream must provide.
+    """
+
+    content: bytes
+    """The content stream."""
+    width: float
+    """Width of the page, in PDF units."""
+    height: float
+    """Height of the page, in PDF units."""
+    font: str = '/f-0-0'
+    """Resource name of the glyphless font."""
+    compressed: bool = False
+    """Whether :attr:`content` is compressed, for use with the FlateDecode filter."""
+
+    def compress(self) -> TextLayer:
+        """Return the text layer with its content stream compressed.
+
+        Compressing the text layer where it is rendered spares whoever draws it
+        the work of compressing it when the PDF is saved.
+        """
+        if self.compressed:
+            return self
+        return self._replace(content=zlib.compress(self.content), compressed=True)
+
+    def write(self, path: os.PathLike) -> None:
+        """Write the text layer to a file.
+
+        The file starts with a comment that gives the page size, so it is still
+        a valid content stream.
+        """
+        header = b'%s %s %s %s\n' % (
+            TEXT_LAYER_HEADER,
+            pdf_real(self.width).encode(),
+            pdf_real(self.height).encode(),
+            self.font.encode(),
+        )
+        content = zlib.decompress(self.content) if self.compressed else self.content
+        Path(path).write_bytes(header + content)
+
+    @classmethod
+    def read(cls, path: os.PathLike) -> TextLayer | None:
+        """Read a text layer from a file, or return None if it is not one."""
+        with open(path, 'rb') as f:
+            header = f.readline()
+            if not header.startswith(TEXT_LAYER_HEADER):
+                return None
+            _, width, height, font = header.split()
+            return cls(f.read(), float(width), float(height), font.decode())
@@ -0,0 +1,313 @@
+# SPDX-FileCopyrightText: 2024 James R. Barlow
+# SPDX-License-Identifier: MPL-2.0
+
+"""Fast estimates of the skew, orientation and content of page images.
+
+These estimates are made by analyzing the lines of text on a downsampled,
+binarized copy of the page image, in much less time than an OCR engine's
+layout analysis takes. Each estimate comes with a confidence, so that the
+OCR engine can be asked instead when the estimate is uncertain, for example
+on pages that contain little text.
+
+The same copy of the page image can be used to find the regions of the page
+that contain anything at all, so that only those are given to the OCR engine.
+"""
+
+from __future__ import annotations
+
+import logging
+from math import ceil, radians, tan
+from pathlib import Path
+from typing import NamedTuple
+
+from PIL import Image, ImageStat
+
+log = logging.getLogger(__name__)
+
+ANALYSIS_SIZE = 1000
+"""Page images are downsampled to about this many pixels on their long side."""
+
+MAX_SKEW = 10
+"""The largest skew angle that is estimated, in degrees."""
+
+PROFILE_STRIPS = 16
+"""The number of vertical strips the page is divided into to measure skew."""
+
+MIN_TEXT_LINES = 5
+"""The fewest lines of text needed to estimate orientation."""
+
+SKEW_CONFIDENCE_THRESHOLD = 0.5
+"""Skew estimates with less confidence than this should not be relied on."""
+
+ORIENTATION_CONFIDENCE_THRESHOLD = 0.2
+"""Orientation estimates with less confidence than this should not be relied on."""
+
+REGION_GAP = 0.02
+"""Content regions are separated by blank paper at least this fraction of the
+long side of the page wide."""
+
+MIN_REGION_SIZE = 3
+"""Content smaller than this many pixels of the downsampled image in both
+directions is treated as dust, not a region."""
+
+
+class Estimate(NamedTuple):
+    """An estimated angle of a page image.
+
+    Attributes:
+        angle: The angle in degrees. For skew, this is the counterclockwise
+            rotation that straightens the page; for orientation, it is the
+            clockwise rotation of the page, either 0 or 180.
+        confidence: The confidence in the estimate, from 0 (none) to 1.
+    """
+
+    angle: float
+    confidence: float
+
+
+def _otsu_threshold(histogram: list[int]) -> int:
+    """Return the threshold that best separates ink from paper in a histogram."""
+    total = sum(histogram)
+    total_sum = sum(value * count for value, count in enumerate(histogram))
+    background = background_sum = 0
+    best_variance, threshold = 0.0, 127
+    for value, count in enumerate(histogram):
+        background += count
+        foreground = total - background
+        if background == 0:
+            continue
+        if foreground == 0:
+            break
+        background_sum += value * count
+        mean_difference = (
+            background_sum / background - (total_sum - background_sum) / foreground
+        )
+        variance = background * foreground * mean_difference**2
+        if variance > best_variance:
+            best_variance, threshold = variance, value
+    return threshold
+
+
+def _ink_image(image: Path | Image.Image) -> Image.Image:
+    """Return a small binarized copy of a page image, with ink white on black."""
+    if isinstance(image, Path):
+        with Image.open(image) as im:
+            gray = im.convert('L')
+    else:
+        gray = image.convert('L')
+    factor = max(gray.size) // ANALYSIS_SIZE
+    if factor > 1:
+        gray = gray.reduce(factor)
+    threshold = _otsu_threshold(gray.histogram())
+    return gray.point([255 if value <= threshold else 0 for value in range(256)])
+
+
+def _skew(ink: Image.Image) -> Estimate:
+    """Estimate the skew of a binarized page image.
+
+    The image is divided into vertical strips, and the amount of ink in each
+    row of each strip is measured. Then, for each candidate angle, the strips
+    are shifted vertically to follow lines at that angle, and their rows are
+    summed. Lines of text produce sharp peaks in the row sums when the angle
+    matches their skew, so the angle with the greatest variance of row sums
+    is the skew. This is much faster than rotating the whole image for each
+    candidate angle.
+    """
+    width, height = ink.size
+    if width < PROFILE_STRIPS or height < PROFILE_STRIPS:
+        return Estimate(0.0, 0.0)
+    strips = ink.resize((PROFILE_STRIPS, height), Image.Resampling.BOX)
+    strip_width = width / PROFILE_STRIPS
+    scores: dict[float, float] = {}
+
+    def score(angle: float) -> float:
+        if angle not in scores:
+            # Shear the strips about the center of the page
+            shift = tan(radians(angle)) * strip_width
+            sheared = strips.transform(
+                strips.size,
+                Image.Transform.AFFINE,
+                (1, 0, 0, shift, 1, -shift * PROFILE_STRIPS / 2),
+                Image.Resampling.NEAREST,
+            )
+            profile = sheared.reduce((PROFILE_STRIPS, 1))
+            scores[angle] = ImageStat.Stat(profile).var[0]
+        return scores[angle]
+
+    coarse = {angle: score(angle) for angle in range(-MAX_SKEW, MAX_SKEW + 1)}
+    mean_score = sum(coarse.values()) / len(coarse)
+    coarse_angle = max(coarse, key=coarse.__getitem__)
+    if mean_score == 0 or abs(coarse_angle) == MAX_SKEW:
+        # Blank page, or skewed more than we search for
+        return Estimate(0.0, 0.0)
+    fine = [round(coarse_angle + step / 10, 1) for step in range(-5, 6)]
+    angle = max(fine, key=score)
+    return Estimate(angle, 1 - mean_score / scores[angle])
+
+
+def estimate_skew(image: Path | Image.Image) -> Estimate:
+    """Estimate the angle needed to deskew a page image.
+
+    The angle has the same meaning as that returned by
+    :meth:`ocrmypdf.pluginspec.OcrEngine.get_deskew`. Skew angles larger than
+    :data:`MAX_SKEW` are not detected, and give an estimate with no confidence.
+
+    Args:
+        image: The page image, or the path to it.
+    """
+    estimate = _skew(_ink_image(image))
+    log.debug(
+        "Estimated deskew angle %.1f, confidence %.2f",
+        estimate.angle,
+        estimate.confidence,
+    )
+    return estimate
+
+
+def _ascender_descender_ink(ink: Image.Image) -> tuple[int, int, int]:
+    """Measure the ink above and below the middle of each line of text.
+
+    Returns:
+        The ink above and below the middle band of the lines (where lowercase
+        letters are), and the number of lines.
+    """
+    height = ink.height
+    profile = ink.resize((1, height), Image.Resampling.BOX).tobytes()
+    gap = max(profile) * 0.02
+    above = below = lines = 0
+    y = 0
+    while y < height:
+        if profile[y] <= gap:
+            y += 1
+            continue
+        start = y
+        while y < height and profile[y] > gap:
+            y += 1
+        line = profile[start:y]
+        if len(line) < 4:
+            continue
+        middle = max(line) / 2
+        middle_rows = [n for n, value in enumerate(line) if value >= middle]
+        above += sum(line[: middle_rows[0]])
+        below += sum(line[middle_rows[-1] + 1 :])
+        lines += 1
+    return above, below, lines
+
+
+def estimate_orientation(image: Path | Image.Image) -> Estimate:
+    """Estimate whether a page image is upright or upside down.
+
+    Lines of text in most Latin, Cyrillic and Greek scripts have more ink
+    above their lowercase letters, in ascenders and capitals, than below, in
+    descenders. The page is upright if this holds for its lines. Pages whose
+    lines of text are not horizontal, such as pages turned by 90 degrees, or
+    that have too few lines, give an estimate with no confidence.
+
+    Args:
+        image: The page image, or the path to it.
+    """
+    ink = _ink_image(image)
+    skew = _skew(ink)
+    if skew.confidence < SKEW_CONFIDENCE_THRESHOLD:
+        estimate = Estimate(0, 0.0)
+    else:
+        if skew.angle:
+            ink = ink.rotate(skew.angle, resample=Image.Resampling.NEAREST)
+        above, below, lines = _ascender_descender_ink(ink)
+        if lines < MIN_TEXT_LINES or above + below == 0:
+            estimate = Estimate(0, 0.0)
+        else:
+            asymmetry = (above - below) / (above + below)
+            estimate = Estimate(0 if asymmetry >= 0 else 180, abs(asymmetry))
+    log.debug(
+        "Estimated orientation %d, confidence %.2f",
+        estimate.angle,
+        estimate.confidence,
+    )
+    return estimate
+
+
+def _ink_runs(profile: bytes, gap: int) -> list[tuple[int, int]]:
+    """Return the runs of ink in a projection, split at blanks of ``gap`` or more."""
+    runs: list[tuple[int, int]] = []
+    start = end = -1
+    for n, value in enumerate(profile):
+        if not value:
+            continue
+        if end < 0:
+            start = n
+        elif n - end >= gap:
+            runs.append((start, end))
+            start = n
+        end = n + 1
+    if end >= 0:
+        runs.append((start, end))
+    return runs
+
+
+def _xy_cut(ink: Image.Image, gap: int) -> list[tuple[int, int, int, int]]:
+    """Divide a binarized image into boxes of ink separated by blank paper.
+
+    Each box is trimmed to its ink, then split along blank rows, or if there
+    are none, along blank columns, until no box can be split further.
+    """
+    boxes = []
+    pending = [(0, 0, ink.width, ink.height)]
+    while pending:
+        left, upper, right, lower = pending.pop()
+        trim = ink.crop((left, upper, right, lower)).getbbox()
+        if not trim:
+            continue
+        left, upper, right, lower = (
+            left + trim[0],
+            upper + trim[1],
+            left + trim[2],
+            upper + trim[3],
+        )
+        columns, rows = ink.crop((left, upper, right, lower)).getprojection()
+        if len(row_runs := _ink_runs(rows, gap)) > 1:
+            pending.extend((left, upper + a, right, upper + b) for a, b in row_runs)
+        elif len(column_runs := _ink_runs(columns, gap)) > 1:
+            pending.extend((left + a, upper, left + b, lower) for a, b in column_runs)
+        elif right - left >= MIN_REGION_SIZE or lower - upper >= MIN_REGION_SIZE:
+            boxes.append((left, upper, right, lower))
+    return boxes
+
+
+def content_regions(image: Path | Image.Image) -> list[tuple[int, int, int, int]]:
+    """Find the regions of a page image that contain ink.
+
+    The page is divided along strips of blank paper, first across and then
+    down, until each region is a block of content such as a paragraph or a
+    figure. Specks of dust are ignored.
+
+    Args:
+        image: The page image, or the path to it.
+
+    Returns:
+        The ``(left, upper, right, lower)`` pixel coordinates of each region in
+        the page image, from top to bottom and left to right. A blank page
+        has no regions.
+    """
+    if isinstance(image, Path):
+        with Image.open(image) as im:
+            im.load()
+            image = im
+    ink = _ink_image(image)
+    gap = max(1, round(max(ink.size) * REGION_GAP))
+    x_scale = image.width / ink.width
+    y_scale = image.height / ink.height
+    regions = sorted(
+        (
+            (
+                int(left * x_scale),
+                int(upper * y_scale),
+                min(image.width, ceil(right * x_scale)),
+                min(image.height, ceil(lower * y_scale)),
+            )
+            for left, upper, right, lower in _xy_cut(ink, gap)
+        ),
+        key=lambda region: (region[1], region[0]),
+    )
+    log.debug("Found %d content regions", len(regions))
+    return regions
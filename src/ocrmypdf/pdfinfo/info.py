@@ -463,6 +463,11 @@ class ImageInfo:
         """Height of the image in pixels."""
         return self._height
 
+    @property
+    def shorthand(self) -> tuple[float, float, float, float, float, float]:
+        """Transformation matrix that draws the image, as (a, b, c, d, e, f)."""
+        return self._shorthand
+
     @property
     def bpc(self):
         """Bits per component."""
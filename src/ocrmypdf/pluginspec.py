@@ -17,12 +17,14 @@ import pluggy
 from ocrmypdf import Executor, PdfContext
 from ocrmypdf._progressbar import ProgressBar
 from ocrmypdf.helpers import Resolution
+from ocrmypdf.hocrtransform import HocrTransform
 
 if TYPE_CHECKING:
     from PIL import Image
 
     # pylint: disable=ungrouped-imports
     from ocrmypdf._jobcontext import PageContext
+    from ocrmypdf.hocrtransform import OcrPage
     from ocrmypdf.pdfinfo import PdfInfo
 
     # pylint: enable=ungrouped-imports
@@ -156,7 +158,7 @@ def get_progressbar_class() -> type[ProgressBar]:
 
 
 @hookspec
-def validate(pdfinfo: PdfInfo, options: Namespace) -> None:
+def validate(pdfinfo: PdfInfo, options: Namespace, batch_pages: int) -> None:
     """Called to give a plugin an opportunity to review *options* and *pdfinfo*.
 
     *options* contains the "work order" to process a particular file. *pdfinfo*
@@ -165,6 +167,10 @@ def validate(pdfinfo: PdfInfo, options: Namespace) -> None:
     that a certain type of file should be treated with ``options.force_ocr = True``
     based on information in its *pdfinfo*.
 
+    When several documents are processed together by :func:`ocrmypdf.ocr_batch`,
+    *batch_pages* is the number of pages of all of them, which share the
+    workers; otherwise it is 0. Plugins need not accept this argument.
+
     Raises:
         ocrmypdf.exceptions.ExitCodeException: If options or pdfinfo are not acceptable
             and the application should terminate gracefully with an informative
@@ -223,6 +229,60 @@ def rasterize_pdf_page(
     """
 
 
+@hookspec(firstresult=True)
+def rasterize_pdf_pages(
+    input_file: Path,
+    raster_device: str,
+    raster_dpi: Resolution,
+    first_pageno: int,
+    last_pageno: int,
+    filter_vector: bool,
+    stop_on_soft_error: bool,
+) -> bool | None:
+    """Rasterize a range of pages of a PDF in advance, in one operation.
+
+    Before the pages of a range of consecutive pages that will be rasterized
+    with the same settings are processed, this hook may be called for the range,
+    in the worker that will process them. Rendering many pages at once can be
+    much faster than rendering each page separately, because the input file is
+    only opened and parsed once.
+
+    The implementation should keep the images where its implementation of
+    :meth:`rasterize_pdf_page` will find them. :meth:`rasterize_pdf_page` is
+    still called for every page, and remains responsible for rotating the
+    image and setting its DPI.
+
+    Args:
+        input_file: The PDF to rasterize.
+        raster_device: Type of image to produce.
+        raster_dpi: Resolution in dots per inch at which to rasterize pages.
+        first_pageno: First page number to rasterize (beginning at page 1).
+        last_pageno: Last page number to rasterize, inclusive.
+        filter_vector: If True, remove vector graphics objects.
+        stop_on_soft_error: As for :meth:`rasterize_pdf_page`.
+
+    Returns:
+        ``True`` if the pages were rasterized in advance. ``False`` or ``None``
+        if they were not, in which case :meth:`rasterize_pdf_page` rasterizes
+        each page on its own. If this hook raises an exception, the pages are
+        also rasterized individually, so that any error is reported for the
+        page responsible.
+
+    Note:
+        This hook is only called if the plugin whose implementation of
+        :meth:`rasterize_pdf_page` is used also implements this hook, so that
+        pages are not rendered by another plugin's implementation that will
+        not be used.
+
+    Note:
+        This hook will be called from child processes. Modifying global state
+        will not affect the main process or other child processes.
+
+    Note:
+        This is a :ref:`firstresult hook<firstresult>`.
+    """
+
+
 @hookspec(firstresult=True)
 def filter_ocr_image(page: PageContext, image: Image.Image) -> Image.Image:
     """Called to filter the image before it is sent to OCR.
@@ -352,6 +412,41 @@ class OrientationConfidence(NamedTuple):
     confidence: float
 
 
+MIN_DESKEW_ANGLE = 0.05
+"""Deskew angles smaller than this, in degrees, are too small to correct."""
+
+
+class PageAnalysis(NamedTuple):
+    """The orientation and skew of a page, found while recognizing its text.
+
+    Attributes:
+        orientation: The orientation of the page, as :meth:`OcrEngine.get_orientation`
+            would return, or ``None`` if it was not requested.
+        deskew: The deskew angle of the page in degrees, as
+            :meth:`OcrEngine.get_deskew` would return, or ``None`` if it was not
+            requested.
+        recognized: ``True`` if the hOCR and text files were produced.
+    """
+
+    orientation: OrientationConfidence | None
+    deskew: float | None
+    recognized: bool
+
+    def needs_correction(self, rotate_pages_threshold: float) -> bool:
+        """Whether the page must be rotated or deskewed before it is recognized.
+
+        Args:
+            rotate_pages_threshold: The confidence needed to rotate the page.
+        """
+        if (
+            self.orientation is not None
+            and self.orientation.angle % 360 != 0
+            and self.orientation.confidence >= rotate_pages_threshold
+        ):
+            return True
+        return self.deskew is not None and abs(self.deskew) >= MIN_DESKEW_ANGLE
+
+
 class OcrEngine(ABC):
     """A class representing an OCR engine with capabilities similar to Tesseract OCR.
 
@@ -404,6 +499,55 @@ class OcrEngine(ABC):
         """Returns the deskew angle of the image, in degrees."""
         return 0.0
 
+    supports_page_analysis: bool = False
+    """Whether the engine implements :meth:`analyze_page`."""
+
+    def analyze_page(
+        self,
+        input_file: Path,
+        output_hocr: Path,
+        output_text: Path,
+        options: Namespace,
+    ) -> PageAnalysis:
+        """Find the orientation and skew of a page image, and recognize its text.
+
+        Engines that can do all of this in one pass over the image, such as
+        one invocation or session of the engine, may implement this and set
+        :attr:`supports_page_analysis`. Then, when ``--rotate-pages`` or
+        ``--deskew`` is used, OCRmyPDF calls this instead of
+        :meth:`get_orientation`, :meth:`get_deskew` and :meth:`generate_hocr`.
+
+        The orientation should be found if ``options.rotate_pages`` is set, and
+        the deskew angle if ``options.deskew`` is set. The text should be
+        recognized only if the page needs no correction: that is, if the
+        orientation angle is 0 or its confidence is below
+        ``options.rotate_pages_threshold``, and the deskew angle is smaller
+        than :data:`MIN_DESKEW_ANGLE`. Otherwise OCRmyPDF corrects the image
+        and calls :meth:`generate_hocr` on it, so recognizing the text would be
+        wasted.
+
+        The default implementation calls :meth:`get_orientation`,
+        :meth:`get_deskew` and :meth:`generate_hocr` in turn.
+
+        This function executes in a worker thread or worker process.
+
+        Args:
+            input_file: A page image, before any orientation or skew correction.
+            output_hocr: The expected name of the output hOCR file.
+            output_text: The expected name of a text file containing the
+                recognized text.
+            options: The command line options.
+        """
+        orientation = None
+        if options.rotate_pages:
+            orientation = self.get_orientation(input_file, options)
+        deskew = self.get_deskew(input_file, options) if options.deskew else None
+        analysis = PageAnalysis(orientation, deskew, recognized=False)
+        if analysis.needs_correction(options.rotate_pages_threshold):
+            return analysis
+        self.generate_hocr(input_file, output_hocr, output_text, options)
+        return analysis._replace(recognized=True)
+
     @staticmethod
     @abstractmethod
     def generate_hocr(
@@ -427,6 +571,72 @@ class OcrEngine(ABC):
             options: The command line options.
         """
 
+    supports_hocr_batch: bool = False
+    """Whether the engine implements :meth:`generate_hocr_batch`."""
+
+    def generate_hocr_batch(
+        self, batch: Sequence[tuple[Path, Path, Path]], options: Namespace
+    ) -> None:
+        """Produce hOCR and sidecar text files for several page images at once.
+
+        Engines that take a long time to start, compared to the time they take
+        to recognize a small page, may implement this and set
+        :attr:`supports_hocr_batch`. Then OCRmyPDF gives runs of consecutive
+        pages whose images are smaller than ``--ocr-batch-below`` to one call of
+        this function, instead of calling :meth:`generate_hocr` for each.
+
+        The results must be the same as calling :meth:`generate_hocr` for each
+        page, including when a page times out or has no text. The default
+        implementation does exactly that.
+
+        This function executes in a worker thread or worker process.
+
+        Args:
+            batch: For each page, the page image on which to perform OCR, and
+                the expected names of the output hOCR and text files, as they
+                would be given to :meth:`generate_hocr`.
+            options: The command line options.
+        """
+        for input_file, output_hocr, output_text in batch:
+            self.generate_hocr(input_file, output_hocr, output_text, options)
+
+    supports_ocr_page: bool = False
+    """Whether the engine implements :meth:`generate_ocr_page`."""
+
+    def generate_ocr_page(
+        self, input_file: Path, output_text: Path, options: Namespace
+    ) -> OcrPage | None:
+        """Recognize a page image, returning its words rather than writing hOCR.
+
+        Engines that hold their results in memory may implement this and set
+        :attr:`supports_ocr_page`. Then, with the hOCR renderer, OCRmyPDF calls
+        this instead of :meth:`generate_hocr` and renders the page directly,
+        without writing and parsing a hOCR file. :meth:`generate_hocr` is still
+        used when a hOCR file is needed, such as with
+        ``--keep-temporary-files`` or when the OCR cache is in use.
+
+        The words, lines and paragraphs must be those that would be written to
+        the hOCR file, in the same order. The default implementation calls
+        :meth:`generate_hocr` and reads the hOCR file it writes.
+
+        This function executes in a worker thread or worker process.
+
+        Args:
+            input_file: A page image on which to perform OCR.
+            output_text: The expected name of a text file containing the
+                recognized text.
+            options: The command line options.
+
+        Returns:
+            The recognized words, or ``None`` if the page was skipped, where
+            :meth:`generate_hocr` would write an empty hOCR file.
+        """
+        output_hocr = output_text.with_suffix('.hocr')
+        self.generate_hocr(input_file, output_hocr, output_text, options)
+        if output_hocr.stat().st_size == 0:
+            return None
+        return HocrTransform.read_hocr(output_hocr)
+
     @staticmethod
     @abstractmethod
     def generate_pdf(
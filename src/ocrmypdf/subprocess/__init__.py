@@ -8,15 +8,23 @@ import logging
 import os
 import re
 import sys
-from collections.abc import Callable, Mapping, Sequence
-from contextlib import suppress
+import threading
+from collections.abc import Callable, Iterator, Mapping, Sequence
+from contextlib import contextmanager, nullcontext, suppress
 from pathlib import Path
-from subprocess import PIPE, STDOUT, CalledProcessError, CompletedProcess, Popen
+from subprocess import (
+    PIPE,
+    STDOUT,
+    CalledProcessError,
+    CompletedProcess,
+    Popen,
+    TimeoutExpired,
+)
 from subprocess import run as subprocess_run
 
 from packaging.version import Version
 
-from ocrmypdf.exceptions import MissingDependencyError
+from ocrmypdf.exceptions import JobCancelledError, MissingDependencyError
 
 # pylint: disable=logging-format-interpolation
 
@@ -26,6 +34,102 @@ Args = Sequence[Path | str]
 OsEnviron = os._Environ  # pylint: disable=protected-access
 
 
+class CancelScope:
+    """Tracks the external programs run by a job, so that it can be cancelled.
+
+    While a scope is active (see :func:`cancel_scope`), every program run by
+    :func:`run` or :func:`run_polling_stderr` is registered with it. Cancelling
+    the scope kills those programs, and makes this and any later call to
+    :func:`run` raise :class:`ocrmypdf.exceptions.JobCancelledError`.
+    Programs run by worker processes, rather than worker threads, are not
+    tracked.
+    """
+
+    def __init__(self):
+        """Initialize the scope."""
+        self._lock = threading.Lock()
+        self._processes: set[Popen] = set()
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """Cancel the job, and kill any programs it is running."""
+        with self._lock:
+            self.cancelled = True
+            processes = list(self._processes)
+        for proc in processes:
+            with suppress(OSError):
+                proc.kill()
+
+    def check(self) -> None:
+        """Raise :class:`JobCancelledError` if the job was cancelled."""
+        if self.cancelled:
+            raise JobCancelledError()
+
+    @contextmanager
+    def track(self, proc: Popen) -> Iterator[Popen]:
+        """Register a running process while the context is active."""
+        with self._lock:
+            self._processes.add(proc)
+            if self.cancelled:
+                proc.kill()
+        try:
+            yield proc
+        finally:
+            with self._lock:
+                self._processes.discard(proc)
+
+    def run(
+        self,
+        args: Args,
+        *,
+        input=None,  # pylint: disable=redefined-builtin
+        timeout: float | None = None,
+        check: bool = False,
+        capture_output: bool = False,
+        **kwargs,
+    ) -> CompletedProcess:
+        """Equivalent to :py:func:`subprocess.run`, for a tracked process."""
+        self.check()
+        if input is not None:
+            kwargs['stdin'] = PIPE
+        if capture_output:
+            kwargs['stdout'] = kwargs['stderr'] = PIPE
+        with Popen(args, **kwargs) as proc, self.track(proc):
+            try:
+                stdout, stderr = proc.communicate(input, timeout=timeout)
+            except TimeoutExpired as e:
+                proc.kill()
+                e.stdout, e.stderr = proc.communicate()
+                raise
+            except BaseException:
+                proc.kill()
+                raise
+        self.check()
+        if check and proc.returncode:
+            raise CalledProcessError(
+                proc.returncode, args, output=stdout, stderr=stderr
+            )
+        return CompletedProcess(args, proc.returncode, stdout, stderr)
+
+
+_active_scope: CancelScope | None = None
+
+
+@contextmanager
+def cancel_scope(scope: CancelScope) -> Iterator[CancelScope]:
+    """Track the programs run while the context is active with *scope*.
+
+    Only one scope may be active at a time, so the caller must hold the lock
+    that prevents concurrent jobs in this process.
+    """
+    global _active_scope  # pylint: disable=global-statement
+    _active_scope = scope
+    try:
+        yield scope
+    finally:
+        _active_scope = None
+
+
 def run(
     args: Args,
     *,
@@ -58,8 +162,12 @@ def run(
 
     stderr = None
     stderr_name = 'stderr' if not logs_errors_to_stdout else 'stdout'
+    scope = _active_scope
     try:
-        proc = subprocess_run(args, env=env, check=check, **kwargs)
+        if scope is not None:
+            proc = scope.run(args, env=env, check=check, **kwargs)
+        else:
+            proc = subprocess_run(args, env=env, check=check, **kwargs)
     except CalledProcessError as e:
         stderr = getattr(e, stderr_name, None)
         raise
@@ -98,7 +206,13 @@ def run_polling_stderr(
     args, env, process_log, text = _fix_process_args(args, env, kwargs)
     assert text, "Must use text=True"
 
-    with Popen(args, env=env, **kwargs) as proc:
+    scope = _active_scope
+    if scope is not None:
+        scope.check()
+    with (
+        Popen(args, env=env, **kwargs) as proc,
+        scope.track(proc) if scope is not None else nullcontext(),
+    ):
         lines = []
         while proc.poll() is None:
             if proc.stderr is None:
@@ -109,6 +223,8 @@ def run_polling_stderr(
                 callback(msg)
                 lines.append(msg)
         stderr = ''.join(lines)
+        if scope is not None:
+            scope.check()
 
         if check and proc.returncode != 0:
             raise CalledProcessError(proc.returncode, args, output=None, stderr=stderr)
@@ -146,6 +262,10 @@ def get_version(
 ) -> str:
     """Get the version of the specified program.
 
+    When ``env`` is not given, the version is remembered for the life of the
+    process (for as long as ``PATH`` is unchanged), so that long-running
+    processes do not need to run the program again for every job.
+
     Arguments:
         program: The program to version check.
         version_arg: The argument needed to ask for its version, e.g. ``--version``.
@@ -153,6 +273,26 @@ def get_version(
             version.
         env: Custom ``os.environ`` in which to run program.
     """
+    if env is None:
+        cache_key = (program, version_arg, regex, os.environ.get('PATH'))
+        with suppress(KeyError):
+            return _version_cache[cache_key]
+        version = _get_version(program, version_arg=version_arg, regex=regex)
+        _version_cache[cache_key] = version
+        return version
+    return _get_version(program, version_arg=version_arg, regex=regex, env=env)
+
+
+_version_cache: dict[tuple[str, str, str, str | None], str] = {}
+
+
+def _get_version(
+    program: str,
+    *,
+    version_arg: str,
+    regex: str,
+    env: OsEnviron | None = None,
+) -> str:
     args_prog = [program, version_arg]
     try:
         proc = run(
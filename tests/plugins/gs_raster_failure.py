@@ -28,7 +28,10 @@ def rasterize_pdf_page(
     rotation=None,
     filter_vector=False,
 ) -> Path:
-    with patch('ocrmypdf._exec.ghostscript.run') as mock:
+    with (
+        patch('ocrmypdf._exec.libgs.available', return_value=False),
+        patch('ocrmypdf._exec.ghostscript.run') as mock,
+    ):
         mock.side_effect = raise_gs_fail
         ghostscript.rasterize_pdf_page(
             input_file=input_file,
@@ -30,7 +30,10 @@ def rasterize_pdf_page(
     filter_vector,
     stop_on_soft_error,
 ) -> Path:
-    with patch('ocrmypdf._exec.ghostscript.run') as mock:
+    with (
+        patch('ocrmypdf._exec.libgs.available', return_value=False),
+        patch('ocrmypdf._exec.ghostscript.run') as mock,
+    ):
         mock.side_effect = fail_if_stoponerror
         ghostscript.rasterize_pdf_page(
             input_file=input_file,
@@ -0,0 +1,83 @@
+# SPDX-FileCopyrightText: 2024 James R. Barlow
+# SPDX-License-Identifier: MIT
+"""Tesseract no-op plugin that finds orientation while recognizing the page.
+
+In orientation check mode, report 0, 90, 180, 270... based on page number.
+
+The sidecar text of each page records whether the page was recognized during
+page analysis or by generating hOCR separately.
+"""
+
+from __future__ import annotations
+
+from PIL import Image
+
+from ocrmypdf import OcrEngine, OrientationConfidence, PageAnalysis, hookimpl
+from ocrmypdf.helpers import page_number
+
+HOCR_TEMPLATE = '''<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN"
+    "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">
+<html xmlns="http://www.w3.org/1999/xhtml" xml:lang="en" lang="en">
+ <head>
+  <title></title>
+  <meta http-equiv="Content-Type" content="text/html; charset=utf-8" />
+  <meta name='ocr-system' content='tesseract 4.1.1' />
+ </head>
+ <body>
+  <div class='ocr_page' id='page_1' title='image "x.tif"; bbox 0 0 {0} {1}; ppageno 0'>
+  </div>
+ </body>
+</html>'''
+
+
+def _write_hocr(input_file, output_hocr, output_text, text):
+    with Image.open(input_file) as im:
+        w, h = im.size
+    output_hocr.write_text(HOCR_TEMPLATE.format(w, h), encoding='utf-8')
+    output_text.write_text(text, encoding='utf-8')
+
+
+class AnalyzeNoopOcrEngine(OcrEngine):
+    supports_page_analysis = True
+
+    @staticmethod
+    def version():
+        return '4.1.1'
+
+    @staticmethod
+    def creator_tag(options):
+        return f"NO-OP -hOCR {AnalyzeNoopOcrEngine.version()}"
+
+    def __str__(self):
+        return f"NO-OP {AnalyzeNoopOcrEngine.version()}"
+
+    @staticmethod
+    def languages(options):
+        return {'eng'}
+
+    @staticmethod
+    def get_orientation(input_file, options):
+        angle = ((page_number(input_file) - 1) * 90) % 360
+        return OrientationConfidence(angle=angle, confidence=99.9)
+
+    @staticmethod
+    def analyze_page(input_file, output_hocr, output_text, options):
+        orientation = AnalyzeNoopOcrEngine.get_orientation(input_file, options)
+        if orientation.angle != 0:
+            return PageAnalysis(orientation, 0.0, recognized=False)
+        _write_hocr(input_file, output_hocr, output_text, 'analyzed')
+        return PageAnalysis(orientation, 0.0, recognized=True)
+
+    @staticmethod
+    def generate_hocr(input_file, output_hocr, output_text, options):
+        _write_hocr(input_file, output_hocr, output_text, 'generated')
+
+    @staticmethod
+    def generate_pdf(input_file, output_pdf, output_text, options):
+        raise NotImplementedError()
+
+
+@hookimpl
+def get_ocr_engine():
+    return AnalyzeNoopOcrEngine()
@@ -0,0 +1,30 @@
+# SPDX-FileCopyrightText: 2024 James R. Barlow
+# SPDX-License-Identifier: MIT
+"""Tesseract plugin that never finishes OCR, to test cancellation."""
+
+from __future__ import annotations
+
+import sys
+
+from ocrmypdf import hookimpl
+from ocrmypdf.builtin_plugins.tesseract_ocr import TesseractOcrEngine
+from ocrmypdf.subprocess import run
+
+
+def hang():
+    run([sys.executable, '-c', 'import time; time.sleep(60)'], check=True)
+
+
+class HangOcrEngine(TesseractOcrEngine):
+    @staticmethod
+    def generate_hocr(input_file, output_hocr, output_text, options):
+        hang()
+
+    @staticmethod
+    def generate_pdf(input_file, output_pdf, output_text, options):
+        hang()
+
+
+@hookimpl
+def get_ocr_engine():
+    return HangOcrEngine()
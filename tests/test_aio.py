@@ -0,0 +1,74 @@
+# SPDX-FileCopyrightText: 2024 James R. Barlow
+# SPDX-License-Identifier: MPL-2.0
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+
+import pytest
+
+import ocrmypdf.aio
+from ocrmypdf.exceptions import ExitCode, JobCancelledError
+from ocrmypdf.subprocess import CancelScope, cancel_scope, run
+
+
+def test_cancel_scope_kills_process():
+    scope = CancelScope()
+    threading.Timer(0.5, scope.cancel).start()
+    start = time.monotonic()
+    with cancel_scope(scope), pytest.raises(JobCancelledError):
+        run([sys.executable, '-c', 'import time; time.sleep(60)'])
+    assert time.monotonic() - start < 30
+    with cancel_scope(scope), pytest.raises(JobCancelledError):
+        run([sys.executable, '--version'])
+
+
+def test_aio_ocr(resources, outpdf):
+    async def main():
+        progress = ocrmypdf.aio.ProgressStream()
+        task = asyncio.create_task(
+            ocrmypdf.aio.ocr(
+                resources / 'trivial.pdf',
+                outpdf,
+                progress=progress,
+                output_type='pdf',
+                plugins=['tests/plugins/tesseract_noop.py'],
+            )
+        )
+        events = [event async for event in progress]
+        return await task, events
+
+    exitcode, events = asyncio.run(main())
+    assert exitcode == ExitCode.ok
+    assert outpdf.exists()
+    ocr_events = [event for event in events if event.desc == 'OCR']
+    assert ocr_events[-1].completed == ocr_events[-1].total == 1
+
+
+def test_aio_cancel(resources, outpdf):
+    async def main():
+        progress = ocrmypdf.aio.ProgressStream()
+        task = asyncio.create_task(
+            ocrmypdf.aio.ocr(
+                resources / 'trivial.pdf',
+                outpdf,
+                progress=progress,
+                output_type='pdf',
+                plugins=['tests/plugins/tesseract_hang.py'],
+            )
+        )
+        async for event in progress:
+            if event.desc == 'OCR':
+                break
+        await asyncio.sleep(1)
+        start = time.monotonic()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return time.monotonic() - start
+
+    assert asyncio.run(main()) < 30
+    assert not outpdf.exists()
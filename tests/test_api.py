@@ -3,6 +3,7 @@
 
 from __future__ import annotations
 
+import threading
 from io import BytesIO
 from pathlib import Path
 
@@ -11,6 +12,7 @@ from pdfminer.high_level import extract_text
 
 import ocrmypdf
 import ocrmypdf.api
+from ocrmypdf._pipelines import ocr_batch
 
 
 def test_language_list():
@@ -75,3 +77,57 @@ def test_hocr_to_pdf_api(resources: Path, outdir: Path, outpdf: Path):
     text = extract_text(outpdf)
     assert 'hocr' in text and 'the' not in text
 
+
+def test_ocr_batch(resources: Path, outdir: Path):
+    inputs = [
+        resources / 'multipage.pdf',
+        outdir / 'missing.pdf',
+        resources / 'ccitt.pdf',
+    ]
+    outputs = [outdir / f'out{n}.pdf' for n in range(len(inputs))]
+    exit_codes = ocrmypdf.ocr_batch(
+        inputs,
+        outputs,
+        output_type='pdf',
+        skip_text=True,
+        plugins=['tests/plugins/tesseract_noop.py'],
+    )
+    assert exit_codes == [
+        ocrmypdf.ExitCode.ok,
+        ocrmypdf.ExitCode.input_file,
+        ocrmypdf.ExitCode.ok,
+    ]
+    assert outputs[0].exists()
+    assert not outputs[1].exists()
+    assert outputs[2].exists()
+
+
+def test_ocr_batch_finalizes_in_background(resources: Path, outdir: Path, monkeypatch):
+    finalize = ocr_batch._BatchDocument.finalize
+    threads = []
+
+    def finalize_in_thread(self, executor):
+        threads.append(threading.current_thread())
+        return finalize(self, executor)
+
+    monkeypatch.setattr(ocr_batch._BatchDocument, 'finalize', finalize_in_thread)
+    inputs = [resources / 'multipage.pdf', resources / 'ccitt.pdf']
+    outputs = [outdir / f'out{n}.pdf' for n in range(len(inputs))]
+    exit_codes = ocrmypdf.ocr_batch(
+        inputs,
+        outputs,
+        output_type='pdf',
+        skip_text=True,
+        plugins=['tests/plugins/tesseract_noop.py'],
+    )
+    assert exit_codes == [ocrmypdf.ExitCode.ok, ocrmypdf.ExitCode.ok]
+    assert all(output.exists() for output in outputs)
+    assert len(threads) == 2
+    assert threading.main_thread() not in threads
+
+
+def test_ocr_batch_rejects_sidecar(resources: Path, outdir: Path):
+    with pytest.raises(ValueError):
+        ocrmypdf.ocr_batch(
+            [resources / 'ccitt.pdf'], [outdir / 'out.pdf'], sidecar=outdir / 'out.txt'
+        )
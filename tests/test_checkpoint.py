@@ -0,0 +1,137 @@
+# SPDX-FileCopyrightText: 2024 James R. Barlow
+# SPDX-License-Identifier: MPL-2.0
+
+from __future__ import annotations
+
+import logging
+from argparse import Namespace
+
+import pytest
+
+from ocrmypdf._checkpoint import CheckpointJournal, job_fingerprint
+from ocrmypdf._pipelines import _common
+from ocrmypdf._pipelines._common import PageResult
+
+from .conftest import check_ocrmypdf
+
+
+@pytest.fixture
+def input_file(tmp_path):
+    input_file = tmp_path / 'input.pdf'
+    input_file.write_bytes(b'%PDF-1.7 pretend')
+    return input_file
+
+
+def make_result(work_folder, pageno):
+    prefix = f'{pageno + 1:06d}'
+    for name in ('visible.pdf', 'ocr_hocr.pdf', 'ocr_hocr.txt'):
+        (work_folder / f'{prefix}_{name}').write_bytes(b'data')
+    return PageResult(
+        pageno=pageno,
+        pdf_page_from_image=work_folder / f'{prefix}_visible.pdf',
+        ocr=work_folder / f'{prefix}_ocr_hocr.pdf',
+        text=work_folder / f'{prefix}_ocr_hocr.txt',
+        orientation_correction=90,
+    )
+
+
+def test_page_result_json():
+    result = PageResult(pageno=3)
+    assert PageResult.from_json(result.to_json()) == result
+
+
+def test_fingerprint(input_file):
+    options = Namespace(deskew=True, jobs=4, pages={3, 1, 2})
+    fingerprint = job_fingerprint(input_file, options)
+    assert fingerprint == job_fingerprint(
+        input_file, Namespace(deskew=True, jobs=1, pages={1, 2, 3})
+    )
+    assert fingerprint != job_fingerprint(
+        input_file, Namespace(deskew=False, jobs=4, pages={1, 2, 3})
+    )
+    # Values that depend on the machine the job runs on
+    assert fingerprint == job_fingerprint(
+        input_file,
+        Namespace(
+            deskew=True, jobs=2, pages={1, 2, 3}, tesseract_threads=2, memory_budget=1e3
+        ),
+    )
+
+
+def test_resume(tmp_path):
+    journal = CheckpointJournal(tmp_path, 'abc')
+    assert journal.open() == {}
+    first, second = make_result(tmp_path, 0), PageResult(pageno=1)
+    journal.record(first)
+    journal.record(second)
+    journal.close()
+
+    journal = CheckpointJournal(tmp_path, 'abc')
+    assert journal.open() == {0: first, 1: second}
+    journal.close()
+
+
+def test_resume_incomplete(tmp_path):
+    journal = CheckpointJournal(tmp_path, 'abc')
+    journal.open()
+    journal.record(make_result(tmp_path, 0))
+    missing = make_result(tmp_path, 1)
+    journal.record(missing)
+    journal.close()
+    missing.ocr.unlink()
+    with open(tmp_path / 'checkpoint.jsonl', 'a') as f:
+        f.write('{"pageno": 2, "ocr')  # simulate a crash while writing
+
+    journal = CheckpointJournal(tmp_path, 'abc')
+    assert list(journal.open()) == [0]
+    journal.close()
+
+
+def test_resume_other_job(tmp_path):
+    journal = CheckpointJournal(tmp_path, 'abc')
+    journal.open()
+    journal.record(make_result(tmp_path, 0))
+    journal.close()
+
+    journal = CheckpointJournal(tmp_path, 'def')
+    assert journal.open() == {}
+    journal.close()
+
+
+def test_resume_pipeline(multipage, outdir, caplog):
+    checkpoint_dir = outdir / 'checkpoint'
+    args = [
+        '--checkpoint-dir',
+        checkpoint_dir,
+        '--skip-text',
+        '--plugin',
+        'tests/plugins/tesseract_noop.py',
+    ]
+    check_ocrmypdf(multipage, outdir / 'first.pdf', *args)
+    assert (checkpoint_dir / 'checkpoint.jsonl').exists()
+
+    caplog.clear()
+    check_ocrmypdf(multipage, outdir / 'second.pdf', *args)
+    assert 'Resuming from checkpoint' in caplog.text
+
+
+def test_resume_pipeline_other_resources(multipage, outdir, caplog, monkeypatch):
+    checkpoint_dir = outdir / 'checkpoint'
+    args = [
+        '--checkpoint-dir',
+        checkpoint_dir,
+        '--skip-text',
+        '--output-type',
+        'pdf',
+        '--plugin',
+        'tests/plugins/tesseract_noop.py',
+    ]
+    check_ocrmypdf(multipage, outdir / 'first.pdf', '--jobs', '1', *args)
+
+    # Resumed on a machine with more CPUs and a memory limit
+    monkeypatch.setattr(_common, 'cgroup_memory_limit', lambda: 2_000_000_000)
+    caplog.clear()
+    caplog.set_level(logging.INFO)
+    check_ocrmypdf(multipage, outdir / 'second.pdf', '--jobs', '2', *args)
+    assert 'Resuming from checkpoint' in caplog.text
+    assert 'starting over' not in caplog.text
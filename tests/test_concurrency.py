@@ -5,10 +5,14 @@ from __future__ import annotations
 
 import os
 import platform
+import threading
+import time
 
 import pytest
 
 from ocrmypdf import ExitCode
+from ocrmypdf._concurrent import SerialExecutor, Stage
+from ocrmypdf.builtin_plugins.concurrency import StandardExecutor
 
 from .conftest import run_ocrmypdf_api
 
@@ -27,3 +31,72 @@ def test_simulate_oom_killer(multipage, no_outpdf):
         'tests/plugins/tesseract_simulate_oom_killer.py',
     )
     assert exitcode == ExitCode.child_process_error
+
+
+def test_memory_budget():
+    lock = threading.Lock()
+    in_use = 0
+    started = []
+
+    def task(cost):
+        nonlocal in_use
+        with lock:
+            in_use += cost
+            started.append((cost, in_use))
+        time.sleep(0.01)
+        with lock:
+            in_use -= cost
+        return cost
+
+    results = []
+    StandardExecutor()(
+        use_threads=True,
+        max_workers=4,
+        progress_kwargs=dict(total=8, disable=True),
+        task=task,
+        task_arguments=[(cost,) for cost in (150, 60, 60, 40, 40, 10, 10, 10)],
+        task_finished=lambda result, pbar: results.append(result),
+        task_memory=lambda cost: cost,
+        memory_budget=100,
+    )
+    assert sorted(results) == [10, 10, 10, 40, 40, 60, 60, 150]
+    # The task larger than the budget runs alone; the rest fit within it
+    assert started[0] == (150, 150)
+    assert all(total <= 100 for _cost, total in started[1:])
+
+
+def counting_stage(delay, counts):
+    lock = threading.Lock()
+    counts.update(running=0, peak=0)
+
+    def stage(value):
+        with lock:
+            counts['running'] += 1
+            counts['peak'] = max(counts['peak'], counts['running'])
+        time.sleep(delay)
+        with lock:
+            counts['running'] -= 1
+        return value
+
+    return stage
+
+
+@pytest.mark.parametrize('executor', [StandardExecutor(), SerialExecutor()])
+def test_stages(executor):
+    first, second = {}, {}
+    results = []
+    executor(
+        use_threads=True,
+        max_workers=2,
+        progress_kwargs=dict(total=12, disable=True),
+        task_arguments=[(n,) for n in range(12)],
+        task_finished=lambda result, pbar: results.append(result),
+        stages=[
+            Stage(counting_stage(0.001, first), 1),
+            Stage(counting_stage(0.01, second), 3),
+        ],
+    )
+    assert sorted(results) == list(range(12))
+    if isinstance(executor, StandardExecutor):
+        assert first['peak'] == 1
+        assert 1 < second['peak'] <= 3
@@ -11,9 +11,16 @@ from unittest.mock import patch
 
 import pikepdf
 import pytest
+from packaging.version import Version
 from PIL import Image, UnidentifiedImageError
 
-from ocrmypdf._exec.ghostscript import DuplicateFilter, rasterize_pdf
+from ocrmypdf._exec import libgs
+from ocrmypdf._exec.ghostscript import (
+    DuplicateFilter,
+    rasterize_pdf,
+    rasterize_pdf_pages,
+    save_page_image,
+)
 from ocrmypdf.exceptions import ColorConversionNeededError, ExitCode
 from ocrmypdf.helpers import Resolution
 
@@ -76,6 +83,78 @@ def test_rasterize_rotated(francais, outdir, caplog):
         assert im.info['dpi'] == forced_dpi.flip_axis()
 
 
+def test_rasterize_pages(resources, outdir):
+    dpi = Resolution(50.0, 50.0)
+    images = rasterize_pdf_pages(
+        resources / 'multipage.pdf',
+        outdir,
+        raster_device='pnggray',
+        raster_dpi=dpi,
+        first_page=2,
+        last_page=4,
+    )
+    assert [image.name for image in images] == [
+        '000002.png',
+        '000003.png',
+        '000004.png',
+    ]
+
+    for pageno, image in enumerate(images, start=2):
+        rasterize_pdf(
+            resources / 'multipage.pdf',
+            outdir / 'single.png',
+            raster_device='pnggray',
+            raster_dpi=dpi,
+            pageno=pageno,
+            page_dpi=Resolution(100.0, 100.0),
+            rotation=90,
+        )
+        save_page_image(
+            image,
+            outdir / 'batch.png',
+            raster_device='pnggray',
+            raster_dpi=dpi,
+            page_dpi=Resolution(100.0, 100.0),
+            rotation=90,
+        )
+        with (
+            Image.open(outdir / 'single.png') as single,
+            Image.open(outdir / 'batch.png') as batch,
+        ):
+            assert batch.size == single.size
+            assert batch.info['dpi'] == single.info['dpi']
+            assert batch.tobytes() == single.tobytes()
+
+
+@pytest.mark.parametrize(
+    'revision, version',
+    [(9540, '9.54.0'), (10021, '10.2.1'), (10050, '10.5.0')],
+)
+def test_libgs_revision_to_version(revision, version):
+    assert libgs._revision_to_version(revision) == Version(version)
+
+
+@pytest.mark.skipif(not libgs.available(), reason="Ghostscript library not found")
+@pytest.mark.parametrize('device', ['pngmono', 'pnggray', 'png16m'])
+def test_libgs_rasterize(resources, outdir, device):
+    kwargs = dict(
+        raster_device=device,
+        raster_dpi=Resolution(100.0, 100.0),
+        page_dpi=Resolution(200.0, 200.0),
+    )
+    rasterize_pdf(resources / 'francais.pdf', outdir / 'library.png', **kwargs)
+    with patch('ocrmypdf._exec.libgs.available', return_value=False):
+        rasterize_pdf(resources / 'francais.pdf', outdir / 'executable.png', **kwargs)
+
+    with (
+        Image.open(outdir / 'library.png') as library,
+        Image.open(outdir / 'executable.png') as executable,
+    ):
+        assert library.mode == executable.mode
+        assert library.info['dpi'] == executable.info['dpi']
+        assert library.tobytes() == executable.tobytes()
+
+
 def test_gs_render_failure(resources, outpdf, caplog):
     exitcode = run_ocrmypdf_api(
         resources / 'blank.pdf',
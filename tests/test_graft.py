@@ -3,11 +3,24 @@
 
 from __future__ import annotations
 
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 import pikepdf
+from pikepdf import Name
 
 import ocrmypdf
+from ocrmypdf._concurrent import SerialExecutor
+from ocrmypdf._graft import (
+    ImagePage,
+    OcrGrafter,
+    PartitionedGrafter,
+    ReorderBuffer,
+    _GraftRequest,
+    graft_partition,
+    merge_partitions,
+    partition_pages,
+)
+from ocrmypdf.hocrtransform import TextLayer
 
 
 def test_no_glyphless_graft(resources, outdir):
@@ -40,3 +53,289 @@ def test_links(resources, outpdf):
         p2 = pdf.pages[1]
         assert p1.Annots[0].A.D[0].objgen == p2.objgen
         assert p2.Annots[0].A.D[0].objgen == p1.objgen
+
+
+def test_reorder_buffer_in_order():
+    buf = ReorderBuffer(capacity=10)
+    assert list(buf.push(2, 'c')) == []
+    assert list(buf.push(1, 'b')) == []
+    assert list(buf.push(0, 'a')) == ['a', 'b', 'c']
+    assert list(buf.push(3, 'd')) == ['d']
+    assert len(buf) == 0
+
+
+def test_reorder_buffer_bounded():
+    buf = ReorderBuffer(capacity=2)
+    assert list(buf.push(1, 'b')) == []
+    assert list(buf.push(2, 'c')) == []
+    # Buffer is full waiting on item 0, so the oldest item is released early
+    assert list(buf.push(3, 'd')) == ['b']
+    # Items after the one released early are released in order as usual
+    assert list(buf.push(0, 'a')) == ['a', 'c', 'd']
+    assert list(buf.push(4, 'e')) == ['e']
+    assert len(buf) == 0
+    assert list(buf.drain()) == []
+
+
+def test_streaming_graft(resources, outpdf):
+    ocrmypdf.ocr(
+        resources / 'link.pdf',
+        outpdf,
+        redo_ocr=True,
+        oversample=200,
+        output_type='pdf',
+        streaming_graft=True,
+    )
+    with pikepdf.open(outpdf) as pdf:
+        p1 = pdf.pages[0]
+        p2 = pdf.pages[1]
+        assert p1.Annots[0].A.D[0].objgen == p2.objgen
+        assert p2.Annots[0].A.D[0].objgen == p1.objgen
+
+
+def test_graft_text_layer(outdir):
+    with pikepdf.new() as pdf:
+        for _ in range(3):
+            pdf.add_blank_page(page_size=(144, 72))
+        pdf.save(outdir / 'base.pdf')
+    layer = TextLayer(b'BT\n/f-0-0 12 Tf\n3 Tr\n[ <00680069> ] TJ\nET\n', 288, 144)
+    layer.write(outdir / 'text.layer')
+    context = Mock(
+        origin=outdir / 'base.pdf',
+        pdfinfo=[Mock(rotation=0)] * 3,
+        get_path=lambda name: outdir / name,
+        options=Mock(redo_ocr=False, keep_temporary_files=False),
+    )
+
+    with patch('ocrmypdf._graft.MAX_REPLACE_PAGES', 2):
+        grafter = OcrGrafter(context)
+        for pageno in range(3):
+            grafter.graft_page(
+                pageno=pageno,
+                image=None,
+                textpdf=outdir / 'text.layer',
+                autorotate_correction=0,
+            )
+        output = grafter.finalize()
+
+    with pikepdf.open(output) as pdf:
+        fonts = {page.Resources.Font['/f-0-0'].objgen for page in pdf.pages}
+        assert len(fonts) == 1, "glyphless font should be added only once"
+        for page in pdf.pages:
+            (xobj,) = page.Resources.XObject.values()
+            assert xobj.read_bytes().endswith(b'[ <00680069> ] TJ\nET\n')
+            assert b'q 0.5 0 0 0.5 0 0 cm' in page.Contents.read_bytes()
+
+
+def test_streaming_graft_writes_partitions(outdir):
+    with pikepdf.new() as pdf:
+        for _ in range(5):
+            pdf.add_blank_page(page_size=(144, 72))
+        pdf.save(outdir / 'base.pdf')
+    with pikepdf.open(outdir / 'base.pdf') as pdf:
+        objgens = [page.objgen for page in pdf.pages]
+    layer = TextLayer(b'BT\n/f-0-0 12 Tf\n3 Tr\n[ <0068> ] TJ\nET\n', 144, 72)
+    context = Mock(
+        origin=outdir / 'base.pdf',
+        pdfinfo=[Mock(rotation=0)] * 5,
+        get_path=lambda name: outdir / name,
+        options=Mock(redo_ocr=False, keep_temporary_files=False),
+    )
+
+    with patch('ocrmypdf._graft.MAX_STREAMING_PAGES', 2):
+        grafter = OcrGrafter(context, streaming=True)
+        for pageno in (1, 0, 2, 4, 3):
+            grafter.graft_page(
+                pageno=pageno, image=None, textpdf=layer, autorotate_correction=0
+            )
+        # Pages are written out once they are contiguous, not held to the end
+        assert [partition.pagenos for partition in grafter.partitions] == [
+            [0, 1],
+            [2, 3],
+        ]
+        output = grafter.finalize()
+
+    with pikepdf.open(output) as pdf:
+        assert [page.objgen for page in pdf.pages] == objgens
+        fonts = {page.Resources.Font['/f-0-0'].objgen for page in pdf.pages}
+        assert len(fonts) == 1, "partitions should share one glyphless font"
+        for page in pdf.pages:
+            assert len(page.Resources.XObject) == 1
+    assert not any(outdir.glob('*.part*.pdf'))
+
+
+def test_partition_pages():
+    assert partition_pages(99, 4) == [range(0, 99)]
+    assert partition_pages(250, 4) == [range(0, 125), range(125, 250)]
+    assert [len(pages) for pages in partition_pages(1000, 4)] == [250] * 4
+
+
+def test_graft_partitions(outdir):
+    with pikepdf.new() as pdf:
+        for _ in range(4):
+            pdf.add_blank_page(page_size=(144, 72))
+        for n, page in enumerate(pdf.pages):
+            link = pikepdf.Dictionary(
+                Type=Name.Annot,
+                Subtype=Name.Link,
+                Rect=[0, 0, 10, 10],
+                Dest=[pdf.pages[3 - n].obj, Name.Fit],
+            )
+            page.Annots = pdf.make_indirect([pdf.make_indirect(link)])
+        with pdf.open_outline() as outline:
+            outline.root.extend(pikepdf.OutlineItem(f'Page {n}', n) for n in range(4))
+        pdf.save(outdir / 'base.pdf')
+    with pikepdf.new() as pdf:
+        pdf.add_blank_page(page_size=(144, 72))
+        pdf.pages[0].Resources = pikepdf.Dictionary(
+            XObject=pikepdf.Dictionary(
+                Im0=pdf.make_stream(
+                    b'\x80',
+                    Type=Name.XObject,
+                    Subtype=Name.Image,
+                    Width=1,
+                    Height=1,
+                    BitsPerComponent=8,
+                    ColorSpace=Name.DeviceGray,
+                )
+            )
+        )
+        pdf.pages[0].Contents = pdf.make_stream(b'q 144 0 0 72 0 0 cm /Im0 Do Q')
+        image_page = ImagePage.from_page(pdf.pages[0])
+    layer = TextLayer(b'BT\n/f-0-0 12 Tf\n3 Tr\n[ <0068> ] TJ\nET\n', 144, 72)
+    context = Mock(
+        origin=outdir / 'base.pdf',
+        pdfinfo=[Mock(rotation=0)] * 4,
+        get_path=lambda name: outdir / name,
+        options=Mock(redo_ocr=False, keep_temporary_files=False),
+    )
+
+    # The first page is replaced by its image, and the last has no text
+    requests = [
+        _GraftRequest(0, image_page, layer, 0),
+        _GraftRequest(1, None, layer, 0),
+        _GraftRequest(2, None, layer, 0),
+        _GraftRequest(3, None, None, 90),
+    ]
+    partitions = graft_partition(context, requests[:2])
+    partitions += graft_partition(context, requests[2:])
+    output = merge_partitions(context, partitions)
+
+    with (
+        pikepdf.open(outdir / 'base.pdf') as base,
+        pikepdf.open(output) as pdf,
+    ):
+        assert [page.objgen for page in pdf.pages] == [
+            page.objgen for page in base.pages
+        ]
+        fonts = {
+            xobj.Resources.Font['/f-0-0'].objgen
+            for page in pdf.pages[:3]
+            for xobj in page.Resources.XObject.values()
+            if xobj.Subtype == Name.Form
+        }
+        fonts |= {page.Resources.Font['/f-0-0'].objgen for page in pdf.pages[:3]}
+        assert len(fonts) == 1, "partitions should share one glyphless font"
+        assert '/Im0' in pdf.pages[0].Resources.XObject
+        assert '/Annots' not in pdf.pages[0].obj
+        for n, page in enumerate(pdf.pages[1:], start=1):
+            assert page.Annots[0].Dest[0].objgen == pdf.pages[3 - n].objgen
+        assert '/XObject' not in pdf.pages[3].Resources
+        assert pdf.pages[3].Rotate == 270
+        with pdf.open_outline() as outline:
+            assert [item.destination[0].objgen for item in outline.root] == [
+                page.objgen for page in pdf.pages
+            ]
+    assert not any(outdir.glob('*.part*.pdf'))
+
+
+def test_graft_image_page(outdir):
+    with pikepdf.new() as pdf:
+        for _ in range(2):
+            pdf.add_blank_page(page_size=(144, 72))
+        pdf.save(outdir / 'base.pdf')
+    with pikepdf.open(outdir / 'base.pdf') as pdf:
+        objgen = pdf.pages[0].objgen
+    with pikepdf.new() as pdf:
+        pdf.add_blank_page(page_size=(144, 72))
+        image = pdf.make_stream(
+            b'\x80' * 8,
+            Type=Name.XObject,
+            Subtype=Name.Image,
+            Width=4,
+            Height=2,
+            BitsPerComponent=8,
+            ColorSpace=Name.DeviceGray,
+        )
+        pdf.pages[0].Resources = pikepdf.Dictionary(
+            XObject=pikepdf.Dictionary(Im0=image)
+        )
+        pdf.pages[0].Contents = pdf.make_stream(b'q 144 0 0 72 0 0 cm /Im0 Do Q')
+        image_page = ImagePage.from_page(pdf.pages[0])
+        # An image that refers to another object cannot be sent as bytes
+        image.SMask = pdf.make_stream(b'\xff' * 8)
+        assert ImagePage.from_page(pdf.pages[0]) is None
+    layer = TextLayer(b'BT\n/f-0-0 12 Tf\n3 Tr\n[ <0068> ] TJ\nET\n', 144, 72)
+    context = Mock(
+        origin=outdir / 'base.pdf',
+        pdfinfo=[Mock(rotation=0)] * 2,
+        get_path=lambda name: outdir / name,
+        options=Mock(redo_ocr=False, keep_temporary_files=False),
+    )
+
+    grafter = OcrGrafter(context)
+    grafter.graft_page(
+        pageno=0,
+        image=image_page,
+        textpdf=layer.compress(),
+        autorotate_correction=0,
+    )
+    output = grafter.finalize()
+
+    with pikepdf.open(output) as pdf:
+        page = pdf.pages[0]
+        assert page.objgen == objgen, "emplaced page should keep its references"
+        assert page.Resources.XObject.Im0.read_bytes() == b'\x80' * 8
+        text_xobj = next(
+            xobj for name, xobj in page.Resources.XObject.items() if name != '/Im0'
+        )
+        assert text_xobj.Filter == Name.FlateDecode
+        assert text_xobj.read_bytes() == layer.content
+        assert b'/Im0 Do' in page.Contents.read_bytes()
+
+
+def test_partitioned_grafter_grafts_early(outdir):
+    with pikepdf.new() as pdf:
+        for _ in range(4):
+            pdf.add_blank_page(page_size=(144, 72))
+        pdf.save(outdir / 'base.pdf')
+    layer = TextLayer(b'BT\n/f-0-0 12 Tf\n3 Tr\n[ <0068> ] TJ\nET\n', 144, 72)
+    context = Mock(
+        origin=outdir / 'base.pdf',
+        pdfinfo=[Mock(rotation=0)] * 4,
+        get_path=lambda name: outdir / name,
+        options=Mock(
+            redo_ocr=False, keep_temporary_files=False, jobs=2, progress_bar=False
+        ),
+    )
+
+    with patch('ocrmypdf._graft.MIN_PARTITION_PAGES', 2):
+        grafter = PartitionedGrafter(context, SerialExecutor())
+    assert grafter.partitions == [range(0, 2), range(2, 4)]
+    for pageno in (1, 3, 0):
+        grafter.graft_page(
+            pageno=pageno, image=None, textpdf=layer, autorotate_correction=0
+        )
+    # The first partition is complete, so it is grafted before finalize
+    assert list(grafter.early) == [0]
+    grafter.graft_page(pageno=2, image=None, textpdf=None, autorotate_correction=0)
+    output = grafter.finalize()
+
+    with pikepdf.open(output) as pdf:
+        assert len(pdf.pages) == 4
+        assert [len(page.Resources.get('/XObject', {})) for page in pdf.pages] == [
+            1,
+            1,
+            0,
+            1,
+        ]
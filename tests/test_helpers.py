@@ -55,6 +55,68 @@ def test_no_cpu_count(monkeypatch):
     assert invoked, "Patched function called during test"
 
 
+@pytest.mark.parametrize(
+    'files, limit',
+    [
+        ({'/sys/fs/cgroup/memory.max': '8589934592\n'}, 8589934592),
+        ({'/sys/fs/cgroup/memory.max': 'max\n'}, None),
+        ({'/sys/fs/cgroup/memory/memory.limit_in_bytes': '2147483648'}, 2147483648),
+        ({'/sys/fs/cgroup/memory/memory.limit_in_bytes': str(2**63 - 4096)}, None),
+        ({}, None),
+    ],
+)
+def test_cgroup_memory_limit(monkeypatch, files, limit):
+    def read_text(self):
+        try:
+            return files[str(self)]
+        except KeyError:
+            raise FileNotFoundError(self) from None
+
+    monkeypatch.setattr(Path, 'read_text', read_text)
+    assert helpers.cgroup_memory_limit() == limit
+
+
+@pytest.mark.parametrize(
+    'files, limit',
+    [
+        ({'/sys/fs/cgroup/cpu.max': '200000 100000\n'}, 2.0),
+        ({'/sys/fs/cgroup/cpu.max': 'max 100000\n'}, None),
+        (
+            {
+                '/sys/fs/cgroup/cpu/cpu.cfs_quota_us': '150000\n',
+                '/sys/fs/cgroup/cpu/cpu.cfs_period_us': '100000\n',
+            },
+            1.5,
+        ),
+        (
+            {
+                '/sys/fs/cgroup/cpu/cpu.cfs_quota_us': '-1\n',
+                '/sys/fs/cgroup/cpu/cpu.cfs_period_us': '100000\n',
+            },
+            None,
+        ),
+        ({}, None),
+    ],
+)
+def test_cgroup_cpu_limit(monkeypatch, files, limit):
+    def read_text(self):
+        try:
+            return files[str(self)]
+        except KeyError:
+            raise FileNotFoundError(self) from None
+
+    monkeypatch.setattr(Path, 'read_text', read_text)
+    assert helpers.cgroup_cpu_limit() == limit
+
+
+def test_available_cpu_count_cgroup(monkeypatch):
+    monkeypatch.setattr(multiprocessing, 'cpu_count', lambda: 16)
+    monkeypatch.setattr(helpers, 'cgroup_cpu_limit', lambda: 4.0)
+    assert helpers.available_cpu_count() <= 4
+    monkeypatch.setattr(helpers, 'cgroup_cpu_limit', lambda: 0.5)
+    assert helpers.available_cpu_count() == 1
+
+
 skipif_docker = pytest.mark.skipif(running_in_docker(), reason="fails on Docker")
 
 
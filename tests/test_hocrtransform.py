@@ -3,9 +3,11 @@
 
 from __future__ import annotations
 
+import pickle
 import re
 from io import StringIO
 
+import pikepdf
 import pytest
 from pdfminer.converter import TextConverter
 from pdfminer.layout import LAParams
@@ -18,6 +20,7 @@ from PIL import Image
 from ocrmypdf import hocrtransform
 from ocrmypdf._exec.tesseract import generate_hocr
 from ocrmypdf.helpers import check_pdf
+from ocrmypdf.hocrtransform._font import Courier
 
 from .conftest import check_ocrmypdf
 
@@ -94,3 +97,163 @@ def test_hocrtransform_matches_sandwich(resources, outdir):
     # Path('tess.txt').write_text(tess_txt)
 
     assert hocr_txt == tess_txt
+
+
+HOCR_PAGE = """<?xml version="1.0" encoding="UTF-8"?>
+<html xmlns="http://www.w3.org/1999/xhtml">
+ <body>
+  <div class='ocr_page' id='page_1' title='image "p.tif"; bbox 0 0 600 300'>
+   <p class='ocr_par' id='par_1_1' lang='eng' title="bbox 10 10 590 140">
+    <span class='ocr_line' title="bbox 10 10 590 60; baseline 0.01 -8">
+     <span class='ocrx_word' title='bbox 10 10 200 60; x_wconf 96'>ﬁ<em>n</em>e</span>
+     <span class='ocrx_word' title='x_wconf 90'>unplaced</span>
+     <span class='ocrx_word' title='bbox 300 10 590 60; x_wconf 87'>words</span>
+    </span>
+    <span class='ocr_header' id='line_1_2' title="bbox 10 80 590 140">
+     <span class='ocrx_word' title='bbox 10 80 590 140'>Heading</span>
+    </span>
+   </p>
+   <p class='ocr_par' id='par_1_2' dir='rtl' lang='heb' title="bbox 10 160 590 220">
+    <span class='ocr_line' id='line_1_3' title="bbox 10 160 590 220">
+     <span class='ocrx_word' title='bbox 300 160 590 220; x_wconf 80'>שלום</span>
+    </span>
+   </p>
+  </div>
+ </body>
+</html>
+"""
+
+
+def test_read_hocr(outdir):
+    (outdir / 'page.hocr').write_text(HOCR_PAGE, encoding='utf-8')
+    ocr_page = hocrtransform.HocrTransform.read_hocr(outdir / 'page.hocr')
+    assert (ocr_page.width, ocr_page.height) == (600, 300)
+    assert len(list(ocr_page.paragraphs())) == 2
+
+    lines = list(ocr_page.lines())
+    assert len(lines) == 3
+    assert lines[0].baseline == (0.01, -8)
+    assert lines[1].baseline == (0.0, 0.0)
+    assert [line.rtl for line in lines] == [False, False, True]
+    assert [ocr_page.word_text(n) for n in lines[0].words] == [
+        'fine',
+        'unplaced',
+        'words',
+    ]
+    assert ocr_page.word_box(1) is None
+    assert list(ocr_page.word_confidences) == [96, 90, 87, -1, 80]
+    assert ocr_page.word_text(4) == 'שלום'
+
+
+def test_read_hocr_without_lines(outdir):
+    (outdir / 'page.hocr').write_text(
+        HOCR_PAGE.replace('ocr_line', 'ocr_caption').replace('ocr_header', 'ocr_x'),
+        encoding='utf-8',
+    )
+    ocr_page = hocrtransform.HocrTransform.read_hocr(outdir / 'page.hocr')
+    # All words are rendered on one line the size of the page
+    (line,) = ocr_page.lines()
+    assert line.box == pikepdf.Rectangle(0, 0, 600, 300)
+    assert len(line.words) == 5
+
+
+def test_iter_hocr(outdir):
+    (outdir / 'page.hocr').write_text(HOCR_PAGE, encoding='utf-8')
+    items = list(hocrtransform.iter_hocr(outdir / 'page.hocr'))
+    assert [type(item).__name__ for item in items] == [
+        'HocrPage',
+        'HocrLine',
+        'HocrLine',
+        'HocrParagraph',
+        'HocrLine',
+        'HocrParagraph',
+    ]
+    assert items[0] == hocrtransform.HocrPage((0, 0, 600, 300), (0.0, 0.0), False)
+    assert items[1].baseline == (0.01, -8)
+    assert items[1].words == [
+        hocrtransform.HocrWord('fine', (10, 10, 200, 60), 96),
+        hocrtransform.HocrWord('unplaced', None, 90),
+        hocrtransform.HocrWord('words', (300, 10, 590, 60), 87),
+    ]
+    assert items[3] == hocrtransform.HocrParagraph((10, 10, 590, 140), True)
+    assert items[4].rtl and items[4].words[0].text == 'שלום'
+
+
+def test_iter_hocr_loose_words(outdir):
+    (outdir / 'page.hocr').write_text(
+        """<html><body><div class='ocr_page' title='bbox 0 0 100 100'>
+        <span class='ocr_line' title='bbox 0 0 100 10'>
+        <span class='ocrx_word' title='bbox 0 0 10 10'>a<b>b</b>c</span>
+        </span><p class='ocr_par'> </p></div></body></html>""",
+        encoding='utf-8',
+    )
+    # Lines outside of paragraphs are not lines, but their words are read
+    assert list(hocrtransform.iter_hocr(outdir / 'page.hocr')) == [
+        hocrtransform.HocrPage((0, 0, 100, 100), (0.0, 0.0), False),
+        hocrtransform.HocrWord('abc', (0, 0, 10, 10), -1),
+        hocrtransform.HocrParagraph(None, False),
+    ]
+
+
+@pytest.mark.parametrize(
+    'title, expected',
+    [
+        ('', hocrtransform.HocrTitle(None)),
+        (
+            'bbox 1 2 3 4; x_wconf 95',
+            hocrtransform.HocrTitle((1, 2, 3, 4), confidence=95),
+        ),
+        (
+            'bbox 0 0 9 9; baseline -0.015 -18; x_size 40',
+            hocrtransform.HocrTitle((0, 0, 9, 9), (-0.015, -18)),
+        ),
+    ],
+)
+def test_parse_title(title, expected):
+    assert hocrtransform.parse_title(title) == expected
+
+
+def test_ocr_page_renders_like_hocr(outdir):
+    (outdir / 'page.hocr').write_text(HOCR_PAGE, encoding='utf-8')
+    hocrtransform.HocrTransform(hocr_filename=outdir / 'page.hocr', dpi=300).to_pdf(
+        out_filename=outdir / 'hocr.pdf'
+    )
+    ocr_page = pickle.loads(
+        pickle.dumps(hocrtransform.HocrTransform.read_hocr(outdir / 'page.hocr'))
+    )
+    hocrtransform.HocrTransform(ocr_page=ocr_page, dpi=300).to_pdf(
+        out_filename=outdir / 'ocr_page.pdf'
+    )
+    with (
+        pikepdf.open(outdir / 'hocr.pdf') as hocr_pdf,
+        pikepdf.open(outdir / 'ocr_page.pdf') as ocr_page_pdf,
+    ):
+        assert hocr_pdf.pages[0].MediaBox == ocr_page_pdf.pages[0].MediaBox
+        assert (
+            hocr_pdf.pages[0].Contents.read_bytes()
+            == ocr_page_pdf.pages[0].Contents.read_bytes()
+        )
+
+
+def test_text_layer_matches_pdf(outdir):
+    (outdir / 'page.hocr').write_text(HOCR_PAGE, encoding='utf-8')
+    hocr = hocrtransform.HocrTransform(hocr_filename=outdir / 'page.hocr', dpi=300)
+    hocr.to_pdf(out_filename=outdir / 'hocr.pdf')
+    hocr.to_text_layer().write(outdir / 'hocr.layer')
+
+    layer = hocrtransform.TextLayer.read(outdir / 'hocr.layer')
+    with pikepdf.open(outdir / 'hocr.pdf') as pdf:
+        page = pdf.pages[0]
+        assert layer.content == page.Contents.read_bytes()
+        assert [0, 0, layer.width, layer.height] == page.MediaBox
+        assert pikepdf.Name(layer.font) in page.Resources.Font
+    assert hocrtransform.TextLayer.read(outdir / 'hocr.pdf') is None
+
+
+def test_text_layer_needs_glyphless_font(outdir):
+    (outdir / 'page.hocr').write_text(HOCR_PAGE, encoding='utf-8')
+    hocr = hocrtransform.HocrTransform(
+        hocr_filename=outdir / 'page.hocr', dpi=300, font=Courier()
+    )
+    with pytest.raises(hocrtransform.HocrTransformError):
+        hocr.to_text_layer()
@@ -0,0 +1,126 @@
+# SPDX-FileCopyrightText: 2024 James R. Barlow
+# SPDX-License-Identifier: MPL-2.0
+
+from __future__ import annotations
+
+from argparse import Namespace
+
+import pytest
+from PIL import Image
+
+from ocrmypdf._exec import tesseract
+from ocrmypdf.builtin_plugins.tesseract_ocr import (
+    TESSERACT_ORIENTATION_CONFIDENCE_SCALE,
+    TesseractOcrEngine,
+)
+from ocrmypdf.imageanalysis import (
+    ORIENTATION_CONFIDENCE_THRESHOLD,
+    SKEW_CONFIDENCE_THRESHOLD,
+    content_regions,
+    estimate_orientation,
+    estimate_skew,
+)
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture(scope='module')
+def linn(resources):
+    with Image.open(resources / 'linn.png') as im:
+        return im.convert('L')
+
+
+def rotated(im, angle):
+    return im.rotate(
+        angle, resample=Image.Resampling.BICUBIC, fillcolor=255, expand=angle % 90 == 0
+    )
+
+
+@pytest.mark.parametrize('angle', [-7.5, -2.0, 0.0, 0.5, 4.0])
+def test_estimate_skew(linn, angle):
+    estimate = estimate_skew(rotated(linn, angle))
+    assert estimate.angle == pytest.approx(-angle, abs=0.3)
+    assert estimate.confidence >= SKEW_CONFIDENCE_THRESHOLD
+
+
+def test_estimate_skew_blank():
+    assert estimate_skew(Image.new('L', (2550, 3300), 255)).confidence == 0
+
+
+def test_estimate_skew_too_large(linn):
+    estimate = estimate_skew(rotated(linn, 25))
+    assert estimate.confidence < SKEW_CONFIDENCE_THRESHOLD
+
+
+@pytest.mark.parametrize('angle', [0, 180])
+def test_estimate_orientation(linn, angle):
+    estimate = estimate_orientation(rotated(linn, angle + 3))
+    assert estimate.angle == angle
+    assert estimate.confidence >= ORIENTATION_CONFIDENCE_THRESHOLD
+
+
+def test_estimate_orientation_sideways(linn):
+    assert estimate_orientation(rotated(linn, 90)).confidence == 0
+
+
+def test_content_regions(linn):
+    regions = content_regions(linn)
+    # The heading and the body text
+    assert len(regions) == 2
+    assert regions[0][3] < regions[1][1]
+    for left, upper, right, lower in regions:
+        assert 0 <= left < right <= linn.width
+        assert 0 <= upper < lower <= linn.height
+
+
+def test_content_regions_blank():
+    page = Image.new('L', (2550, 3300), 255)
+    page.putpixel((100, 100), 0)  # dust
+    assert content_regions(page) == []
+
+
+@pytest.fixture
+def tess_options():
+    return Namespace(
+        tesseract_fast_analysis=True,
+        tesseract_threads=None,
+        tesseract_oem=None,
+        tesseract_non_ocr_timeout=180.0,
+        languages=['eng'],
+    )
+
+
+def test_engine_uses_estimates(linn, outdir, tess_options, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("Tesseract should not be needed")
+
+    monkeypatch.setattr(tesseract, 'get_deskew', fail)
+    monkeypatch.setattr(tesseract, 'get_orientation', fail)
+    linn_skewed = outdir / 'linn.tif'
+    rotated(linn, 2).save(linn_skewed)
+
+    assert TesseractOcrEngine.get_deskew(linn_skewed, tess_options) == -2.0
+    orientation = TesseractOcrEngine.get_orientation(linn_skewed, tess_options)
+    assert orientation.angle == 0
+    # Confidence is in Tesseract's units, to compare with --rotate-pages-threshold
+    assert orientation.confidence >= (
+        ORIENTATION_CONFIDENCE_THRESHOLD * TESSERACT_ORIENTATION_CONFIDENCE_SCALE
+    )
+
+
+@pytest.mark.parametrize('fast_analysis', [True, False])
+def test_engine_falls_back(linn, outdir, tess_options, monkeypatch, fast_analysis):
+    monkeypatch.setattr(tesseract, 'get_deskew', lambda *args, **kwargs: 1.5)
+    monkeypatch.setattr(
+        tesseract,
+        'get_orientation',
+        lambda *args, **kwargs: tesseract.OrientationConfidence(180, 15.0),
+    )
+    tess_options.tesseract_fast_analysis = fast_analysis
+    upside_down = outdir / 'linn.tif'
+    rotated(linn, 180).save(upside_down)
+    blank = outdir / 'blank.tif'
+    Image.new('L', (850, 1100), 255).save(blank)
+
+    assert TesseractOcrEngine.get_deskew(blank, tess_options) == 1.5
+    assert TesseractOcrEngine.get_orientation(upside_down, tess_options).angle == 180
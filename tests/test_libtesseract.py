@@ -0,0 +1,91 @@
+# SPDX-FileCopyrightText: 2024 James R. Barlow
+# SPDX-License-Identifier: MPL-2.0
+
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from ocrmypdf._exec import libtesseract
+from ocrmypdf._plugin_manager import get_parser_options_plugins
+from ocrmypdf.builtin_plugins.tesseract_ocr import TesseractOcrEngine
+from ocrmypdf.extra_plugins.libtesseract import LibTesseractOcrEngine
+from ocrmypdf.hocrtransform import HocrTransform
+
+PLUGIN = 'ocrmypdf.extra_plugins.libtesseract'
+
+
+def test_falls_back_to_executable(monkeypatch, resources):
+    monkeypatch.setattr(libtesseract, 'available', lambda: False)
+    _parser, _options, plugin_manager = get_parser_options_plugins(
+        ['--plugin', PLUGIN, str(resources / 'trivial.pdf'), 'out.pdf']
+    )
+    engine = plugin_manager.hook.get_ocr_engine()
+    assert type(engine) is TesseractOcrEngine
+
+
+def test_hocr_timeout_zero(outdir, resources):
+    libtesseract.generate_hocr(
+        input_file=resources / 'linn.png',
+        output_hocr=outdir / 'out.hocr',
+        output_text=outdir / 'out.txt',
+        languages=['eng'],
+        engine_mode=None,
+        tessconfig=[],
+        timeout=0,
+        pagesegmode=None,
+        thresholding=0,
+        user_words=None,
+        user_patterns=None,
+    )
+    assert (outdir / 'out.txt').read_text() == '[skipped page]'
+
+
+def test_non_ocr_timeout_zero(resources):
+    # Skipped without loading the library, as the executable would be stopped
+    image = resources / 'linn.png'
+    assert libtesseract.get_orientation(image, None, timeout=0) == (0, 0.0)
+    assert libtesseract.get_deskew(image, ['eng'], None, timeout=0) == 0.0
+
+
+def test_finished_in_time(monkeypatch):
+    monkeypatch.setattr(libtesseract.time, 'monotonic', lambda: 100.0)
+    assert libtesseract._finished_in_time(95.0, 10.0, 'Layout analysis')
+    assert not libtesseract._finished_in_time(85.0, 10.0, 'Layout analysis')
+
+
+def test_limit_threads(monkeypatch):
+    calls = []
+
+    class FakeLibrary:
+        @staticmethod
+        def omp_set_num_threads(threads):
+            calls.append(threads)
+
+    monkeypatch.setattr(libtesseract, '_local', threading.local())
+    for threads in (None, 4, 4, 2):
+        libtesseract._limit_threads(FakeLibrary(), threads)
+    assert calls == [4, 2]
+
+    # Tesseract built without OpenMP
+    libtesseract._limit_threads(object(), 3)
+
+
+@pytest.mark.skipif(not libtesseract.available(), reason="Tesseract library not found")
+def test_libtesseract_hocr(outdir, resources):
+    _parser, options, plugin_manager = get_parser_options_plugins(
+        ['--plugin', PLUGIN, str(resources / 'linn.pdf'), 'out.pdf']
+    )
+    engine = plugin_manager.hook.get_ocr_engine()
+    assert isinstance(engine, LibTesseractOcrEngine)
+
+    # The second page reuses the engine created for the first
+    for n in range(2):
+        engine.generate_hocr(
+            resources / 'linn.png', outdir / f'{n}.hocr', outdir / f'{n}.txt', options
+        )
+        assert 'Linn' in (outdir / f'{n}.txt').read_text()
+        HocrTransform(hocr_filename=outdir / f'{n}.hocr', dpi=300).to_pdf(
+            out_filename=outdir / f'{n}.pdf'
+        )
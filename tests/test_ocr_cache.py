@@ -0,0 +1,128 @@
+# SPDX-FileCopyrightText: 2024 James R. Barlow
+# SPDX-License-Identifier: MPL-2.0
+
+from __future__ import annotations
+
+import os
+from argparse import Namespace
+
+import pytest
+
+from ocrmypdf._ocr_cache import OcrResultCache, get_ocr_cache, take_lookup_counts
+
+
+class FakeEngine:
+    @staticmethod
+    def version():
+        return '1.0'
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return OcrResultCache(tmp_path / 'cache', max_bytes=1_000_000)
+
+
+@pytest.fixture
+def image(tmp_path):
+    image = tmp_path / 'ocr.png'
+    image.write_bytes(b'not really a png')
+    return image
+
+
+def make_options(**kwargs):
+    defaults = dict(
+        languages=['eng'],
+        pdf_renderer='hocr',
+        tesseract_oem=None,
+        tesseract_pagesegmode=None,
+        tesseract_thresholding=0,
+        tesseract_config=[],
+        user_words=None,
+        user_patterns=None,
+    )
+    defaults.update(kwargs)
+    return Namespace(**defaults)
+
+
+def test_key_depends_on_image_and_options(cache, image, tmp_path):
+    key = cache.key(image, FakeEngine(), make_options())
+    assert key == cache.key(image, FakeEngine(), make_options())
+    assert key != cache.key(image, FakeEngine(), make_options(languages=['deu']))
+    assert key != cache.key(image, FakeEngine(), make_options(tesseract_oem=1))
+
+    other_image = tmp_path / 'other.png'
+    other_image.write_bytes(b'a different image')
+    assert key != cache.key(other_image, FakeEngine(), make_options())
+
+
+def test_key_depends_on_config_file_content(cache, image, tmp_path):
+    config = tmp_path / 'test.cfg'
+    config.write_text('tessedit_char_whitelist 0123456789')
+    options = make_options(tesseract_config=[str(config)])
+    key = cache.key(image, FakeEngine(), options)
+    config.write_text('tessedit_char_whitelist ABC')
+    assert key != cache.key(image, FakeEngine(), options)
+
+
+def test_store_and_fetch(cache, tmp_path):
+    take_lookup_counts()
+    hocr, txt = tmp_path / 'page.hocr', tmp_path / 'page.txt'
+    hocr.write_text('<html/>')
+    txt.write_text('text')
+
+    assert not cache.fetch('ab' * 32, {'hocr': hocr, 'txt': txt})
+    cache.store('ab' * 32, {'hocr': hocr, 'txt': txt})
+    # A second store of the same entry must be harmless
+    cache.store('ab' * 32, {'hocr': hocr, 'txt': txt})
+
+    out_hocr, out_txt = tmp_path / 'out.hocr', tmp_path / 'out.txt'
+    assert cache.fetch('ab' * 32, {'hocr': out_hocr, 'txt': out_txt})
+    assert out_hocr.read_text() == '<html/>'
+    assert out_txt.read_text() == 'text'
+    assert take_lookup_counts() == (1, 1)
+    assert take_lookup_counts() == (0, 0)
+    assert not list(cache.folder.glob('.tmp-*'))
+
+
+def test_store_error_is_logged(cache, tmp_path, monkeypatch, caplog):
+    hocr = tmp_path / 'page.hocr'
+    hocr.write_text('<html/>')
+
+    def rename(src, dst):
+        raise PermissionError(13, 'Permission denied')
+
+    monkeypatch.setattr(os, 'rename', rename)
+    cache.store('ef' * 32, {'hocr': hocr})
+    assert 'Could not store OCR result' in caplog.text
+    assert not list(cache.folder.glob('.tmp-*'))
+
+
+def test_empty_result_not_stored(cache, tmp_path):
+    hocr, txt = tmp_path / 'page.hocr', tmp_path / 'page.txt'
+    hocr.write_text('')
+    txt.write_text('[skipped page]')
+    cache.store('cd' * 32, {'hocr': hocr, 'txt': txt})
+    assert not cache.fetch('cd' * 32, {'hocr': hocr, 'txt': txt})
+
+
+def test_evict_least_recently_used(tmp_path):
+    cache = OcrResultCache(tmp_path / 'cache', max_bytes=250)
+    result = tmp_path / 'result'
+    result.write_bytes(b'x' * 100)
+    for n, key in enumerate(['aa' * 32, 'bb' * 32, 'cc' * 32]):
+        cache.store(key, {'hocr': result})
+        os.utime(cache._entry(key), (n, n))
+    # Use the oldest entry so that it becomes the most recently used
+    assert cache.fetch('aa' * 32, {'hocr': tmp_path / 'out'})
+
+    cache.evict()
+    assert cache.evictions == 1
+    assert cache._entry('aa' * 32).exists()
+    assert not cache._entry('bb' * 32).exists()
+    assert cache._entry('cc' * 32).exists()
+
+
+def test_get_ocr_cache(tmp_path):
+    assert get_ocr_cache(Namespace(ocr_cache_dir=None)) is None
+    options = Namespace(ocr_cache_dir=tmp_path / 'cache', ocr_cache_size=1.0)
+    assert get_ocr_cache(options) is get_ocr_cache(options)
@@ -6,14 +6,25 @@ from __future__ import annotations
 import warnings
 from unittest.mock import Mock
 
+import img2pdf
+import pikepdf
 import pytest
 from PIL import Image
 from reportlab.lib.units import inch
 from reportlab.lib.utils import ImageReader
 from reportlab.pdfgen.canvas import Canvas
 
-from ocrmypdf import _pipeline, pdfinfo
+from ocrmypdf import _graft, _pipeline, hookimpl, pdfinfo
+from ocrmypdf._jobcontext import PageContext, PdfContext
+from ocrmypdf._pipelines._common import (
+    discard_page_images,
+    page_stages,
+    plan_page_tasks,
+    schedule_pages,
+)
+from ocrmypdf._plugin_manager import get_parser_options_plugins
 from ocrmypdf.helpers import Resolution
+from ocrmypdf.pluginspec import OcrEngine, OrientationConfidence, PageAnalysis
 
 warnings.filterwarnings(
     "ignore", category=DeprecationWarning, module="reportlab.lib.rl_safe_eval"
@@ -150,3 +161,381 @@ def test_dpi_needed(image, text, vector, result, rgb_image, outdir):
 )
 def test_enumerate_compress_ranges(name, input, output):
     assert output == tuple(_pipeline.enumerate_compress_ranges(input))
+
+
+def test_schedule_pages_largest_first(outdir):
+    c = Canvas(str(outdir / 'sizes.pdf'))
+    for size in (4, 8, 2, 6):
+        c.setPageSize((size * inch, size * inch))
+        c.showPage()
+    c.save()
+
+    _parser, options, plugin_manager = get_parser_options_plugins(
+        ['--force-ocr', '--oversample', '200', 'sizes.pdf', 'out.pdf']
+    )
+    options.pages = {0, 1, 3}
+    options.lossless_reconstruction = False
+    pi = pdfinfo.PdfInfo(outdir / 'sizes.pdf')
+    context = PdfContext(options, outdir, outdir / 'sizes.pdf', pi, plugin_manager)
+
+    pending, skipped = schedule_pages(context)
+    assert [pc.pageno for pc in pending] == [1, 3, 0]
+    assert skipped == [2]
+    costs = [_pipeline.estimate_page_cost(pc) for pc in pending]
+    assert costs == sorted(costs, reverse=True)
+
+    pending, skipped = schedule_pages(context, [0, 2])
+    assert [pc.pageno for pc in pending] == [0]
+    assert skipped == [2]
+
+
+def test_plan_raster_runs(outdir):
+    c = Canvas(str(outdir / 'runs.pdf'))
+    for _ in range(8):
+        c.showPage()
+    c.save()
+
+    _parser, options, plugin_manager = get_parser_options_plugins(
+        ['--force-ocr', 'runs.pdf', 'out.pdf']
+    )
+    pi = pdfinfo.PdfInfo(outdir / 'runs.pdf')
+    context = PdfContext(options, outdir, outdir / 'runs.pdf', pi, plugin_manager)
+    page_contexts = [
+        pc for (pc,) in context.get_page_context_args([0, 1, 2, 3, 4, 5, 7])
+    ]
+
+    runs = _pipeline.plan_raster_runs(page_contexts, max_pages=4)
+    # Pages 1-6 are split evenly, and page 8 on its own is not a run
+    assert [(run.first_pageno, run.last_pageno) for run in runs] == [(1, 3), (4, 6)]
+    assert all(run.input_file == outdir / 'runs.pdf' for run in runs)
+    assert not any(run.filter_vector for run in runs)
+
+    # The orientation preview is made from the page image, not rendered
+    options.rotate_pages = True
+    runs = _pipeline.plan_raster_runs(page_contexts, max_pages=8)
+    assert [(run.raster_device, run.first_pageno) for run in runs] == [('pngmono', 1)]
+
+
+def test_plan_page_tasks(outdir):
+    c = Canvas(str(outdir / 'runs.pdf'))
+    for _ in range(8):
+        c.showPage()
+    c.save()
+
+    _parser, options, plugin_manager = get_parser_options_plugins(
+        ['--force-ocr', '--jobs', '1', 'runs.pdf', 'out.pdf']
+    )
+    pi = pdfinfo.PdfInfo(outdir / 'runs.pdf')
+    context = PdfContext(options, outdir, outdir / 'runs.pdf', pi, plugin_manager)
+    page_contexts = [
+        pc for (pc,) in context.get_page_context_args([7, 0, 1, 2, 3, 4, 5])
+    ]
+
+    def describe(tasks):
+        return [
+            [
+                (arg.first_pageno, arg.last_pageno)
+                if isinstance(arg, _pipeline.RasterRun)
+                else arg.pageno
+                for arg in task
+            ]
+            for task in tasks
+        ]
+
+    # Each run is processed by the task that rasterizes it, and runs are short
+    # enough that the worker gets several
+    assert describe(plan_page_tasks(page_contexts, options)) == [
+        [7],
+        [(1, 2), 0, 1],
+        [(3, 4), 2, 3],
+        [(5, 6), 4, 5],
+    ]
+
+    class Rasterizer:
+        @hookimpl
+        def rasterize_pdf_page(self, output_file):
+            return output_file
+
+    # Runs are not rasterized if they would not be used
+    plugin_manager.register(Rasterizer())
+    assert not _pipeline.can_rasterize_runs(plugin_manager)
+    assert describe(plan_page_tasks(page_contexts, options)) == [
+        [pc.pageno] for pc in page_contexts
+    ]
+
+
+@pytest.mark.parametrize(
+    'image_jobs, ocr_jobs, npages, workers',
+    [
+        (None, None, 100, None),
+        (2, None, 100, (2, 6)),
+        (None, 6, 100, (2, 6)),
+        (3, 4, 100, (3, 4)),
+        (None, 8, 100, (1, 8)),
+        (2, None, 4, (2, 4)),
+    ],
+)
+def test_page_stages(image_jobs, ocr_jobs, npages, workers):
+    options = Mock(jobs=8, image_jobs=image_jobs, ocr_jobs=ocr_jobs)
+    stages = page_stages(options, npages, Mock(), Mock())
+    if workers is None:
+        assert stages is None
+    else:
+        assert tuple(stage.max_workers for stage in stages) == workers
+
+
+def test_plan_ocr_batches(outdir):
+    c = Canvas(str(outdir / 'small.pdf'))
+    for size in (2, 2, 2, 8, 2, 2, 2, 2):
+        c.setPageSize((size * inch, size * inch))
+        c.showPage()
+    c.save()
+
+    _parser, options, plugin_manager = get_parser_options_plugins(
+        [
+            '--force-ocr',
+            '--pdf-renderer',
+            'hocr',
+            '--ocr-batch-below',
+            '2',
+            'small.pdf',
+            'out.pdf',
+        ]
+    )
+    pi = pdfinfo.PdfInfo(outdir / 'small.pdf')
+    context = PdfContext(options, outdir, outdir / 'small.pdf', pi, plugin_manager)
+    page_contexts = [
+        pc for (pc,) in context.get_page_context_args([3, 0, 1, 2, 4, 5, 6, 7])
+    ]
+
+    def pagenos(batches):
+        return [tuple(pc.pageno for pc in batch) for batch in batches]
+
+    # The large page 4 is not batched, and splits the small pages into two runs
+    batches = _pipeline.plan_ocr_batches(page_contexts, max_pages=2)
+    assert pagenos(batches) == [(3,), (0,), (1, 2), (4, 5), (6, 7)]
+
+    options.ocr_batch_below = 0
+    batches = _pipeline.plan_ocr_batches(page_contexts, max_pages=2)
+    assert pagenos(batches) == [(pc.pageno,) for pc in page_contexts]
+
+
+def _passthrough_context(outdir, pdf_path, *args):
+    _parser, options, plugin_manager = get_parser_options_plugins(
+        ['--force-ocr', *args, str(pdf_path), 'out.pdf']
+    )
+    pi = pdfinfo.PdfInfo(pdf_path)
+    return PdfContext(options, outdir, pdf_path, pi, plugin_manager)
+
+
+def _scan_pdf(outdir, im, rotate=0):
+    im.save(outdir / 'scan.png', dpi=(100, 100))
+    with open(outdir / 'scan.pdf', 'wb') as f:
+        f.write(img2pdf.convert([outdir / 'scan.png']))
+    with pikepdf.open(outdir / 'scan.pdf', allow_overwriting_input=True) as pdf:
+        pdf.pages[0].Rotate = rotate
+        pdf.save()
+    return outdir / 'scan.pdf'
+
+
+@pytest.mark.parametrize('rotate', [0, 90, 270])
+@pytest.mark.parametrize('correction', [0, 90])
+def test_passthrough_image(outdir, rotate, correction, monkeypatch):
+    im = Image.new('L', (170, 220), 255)
+    im.paste(0, (20, 30, 60, 40))
+    context = _passthrough_context(outdir, _scan_pdf(outdir, im, rotate))
+    page_context = PageContext(context, 0)
+    assert _pipeline.get_passthrough_image(page_context.pageinfo) is not None
+    rasterizer = page_context.plugin_manager.hook.rasterize_pdf_page.get_hookimpls()
+    rasterize_pdf_page = Mock()
+    monkeypatch.setattr(rasterizer[-1], 'function', rasterize_pdf_page)
+
+    raster = _pipeline.rasterize(
+        context.origin, page_context, correction=correction, remove_vectors=False
+    )
+    rasterize_pdf_page.assert_not_called()
+    # Undo the rotation that /Rotate and the correction applied
+    expected = im.rotate((correction - rotate) % 360, expand=True)
+    with Image.open(raster) as result:
+        assert result.mode == 'L'
+        assert result.tobytes() == expected.tobytes()
+        assert result.info['dpi'] == Resolution(100.0, 100.0)
+
+
+def test_passthrough_image_needs_builtin_rasterizer(outdir):
+    pdf_path = _scan_pdf(outdir, Image.new('L', (170, 220), 255))
+    context = _passthrough_context(outdir, pdf_path)
+    assert _pipeline._can_pass_through(PageContext(context, 0))
+
+    # A plugin that rasterizes pages must be asked to, even for scanned pages
+    context = _passthrough_context(
+        outdir, pdf_path, '--plugin', 'tests/plugins/gs_raster_failure.py'
+    )
+    assert not _pipeline._can_pass_through(PageContext(context, 0))
+
+
+def test_passthrough_image_not_used(outdir, rgb_image):
+    c = Canvas(str(outdir / 'mixed.pdf'), pagesize=(2 * inch, 2 * inch))
+    # Image does not fill the page
+    c.drawImage(rgb_image, 0, 0, inch, inch)
+    c.showPage()
+    # Image fills the page, but the page also has text
+    c.drawImage(rgb_image, 0, 0, 2 * inch, 2 * inch)
+    c.drawString(10, 10, 'text')
+    c.showPage()
+    c.save()
+
+    pi = pdfinfo.PdfInfo(outdir / 'mixed.pdf')
+    assert [_pipeline.get_passthrough_image(page) for page in pi] == [None, None]
+
+
+@pytest.mark.parametrize('keep', [False, True])
+def test_discard_page_images(outdir, keep):
+    _parser, options, plugin_manager = get_parser_options_plugins(
+        ['--force-ocr', 'in.pdf', 'out.pdf']
+    )
+    options.keep_temporary_files = keep
+    for name in ['000001_ocr.tif', '000001_ocr_hocr.txt', '000002_ocr.tif']:
+        (outdir / name).touch()
+    page_context = Mock(options=options, work_folder=outdir, pageno=0)
+
+    discard_page_images(page_context)
+    assert (outdir / '000001_ocr.tif').exists() == keep
+    assert (outdir / '000001_ocr_hocr.txt').exists()
+    assert (outdir / '000002_ocr.tif').exists()
+
+
+def test_orientation_preview_from_page_image(outdir):
+    im = Image.new('1', (1200, 1800), 1)
+    im.paste(0, (100, 100, 300, 200))
+    im.save(outdir / '000001_rasterize.tif', dpi=(600, 600))
+    page_context = Mock(get_path=lambda name: outdir / f'000001_{name}')
+
+    preview = _pipeline.create_orientation_preview(
+        outdir / '000001_rasterize.tif', page_context
+    )
+    with Image.open(preview) as result:
+        assert result.mode == 'L'
+        assert result.size == (600, 900)
+        assert result.info['dpi'] == (300, 300)
+
+    _pipeline.rotate_page_image(outdir / '000001_rasterize.tif', 90)
+    with Image.open(outdir / '000001_rasterize.tif') as result:
+        assert result.size == (1800, 1200)
+        assert result.tobytes() == im.transpose(Image.Transpose.ROTATE_90).tobytes()
+        assert result.info['dpi'] == (600, 600)
+
+
+def test_preprocess_deskew_small_angle(outdir):
+    page_context = Mock(pageno=0, get_path=lambda name: outdir / name)
+    image = outdir / 'rasterize.tif'
+
+    assert _pipeline.preprocess_deskew(image, page_context, 0.01) == image
+    assert _pipeline.preprocess_deskew(image, page_context, -0.049) == image
+    assert not (outdir / 'pp_deskew.tif').exists()
+
+
+@pytest.mark.parametrize(
+    'orientation, deskew, needs_correction',
+    [
+        (None, None, False),
+        (OrientationConfidence(0, 20), 0.01, False),
+        (OrientationConfidence(180, 1), -0.02, False),
+        (OrientationConfidence(180, 20), None, True),
+        (None, 0.5, True),
+        (None, -0.05, True),
+    ],
+)
+def test_default_analyze_page(outdir, orientation, deskew, needs_correction):
+    _parser, options, _plugin_manager = get_parser_options_plugins(
+        ['--rotate-pages', '--deskew', 'in.pdf', 'out.pdf']
+    )
+    options.rotate_pages = orientation is not None
+    options.deskew = deskew is not None
+    options.rotate_pages_threshold = 14.0
+    engine = Mock()
+    engine.get_orientation.return_value = orientation
+    engine.get_deskew.return_value = deskew
+
+    analysis = OcrEngine.analyze_page(
+        engine, outdir / 'ocr.tif', outdir / 'out.hocr', outdir / 'out.txt', options
+    )
+    assert analysis == PageAnalysis(orientation, deskew, not needs_correction)
+    assert engine.generate_hocr.called != needs_correction
+
+
+def test_can_analyze_page_redo_ocr():
+    _parser, options, _plugin_manager = get_parser_options_plugins(
+        ['--redo-ocr', '--rotate-pages', '--pdf-renderer', 'hocr', 'in.pdf', 'out.pdf']
+    )
+    engine = Mock(supports_page_analysis=True)
+    plugin_manager = Mock()
+    plugin_manager.hook.get_ocr_engine.return_value = engine
+    page_context = Mock(options=options, plugin_manager=plugin_manager)
+
+    page_context.pageinfo.has_text = True
+    assert not _pipeline.can_analyze_page(page_context)
+    page_context.pageinfo.has_text = False
+    assert _pipeline.can_analyze_page(page_context)
+
+
+@pytest.mark.parametrize('keep', [False, True])
+def test_ocr_engine_ocr_page(outdir, keep):
+    _parser, options, _plugin_manager = get_parser_options_plugins(
+        ['--force-ocr', 'in.pdf', 'out.pdf']
+    )
+    options.keep_temporary_files = keep
+    page_context = Mock(options=options, get_path=lambda name: outdir / name)
+    engine = page_context.plugin_manager.hook.get_ocr_engine.return_value
+    engine.supports_ocr_page = True
+    engine.generate_ocr_page.return_value = None  # Skipped page
+
+    ocr_result, _text = _pipeline.ocr_engine_ocr_page(outdir / 'ocr.tif', page_context)
+    if keep:
+        # The hOCR file is kept, so it must be written
+        assert ocr_result == outdir / 'ocr_hocr.hocr'
+        engine.generate_hocr.assert_called_once()
+        engine.generate_ocr_page.assert_not_called()
+    else:
+        assert ocr_result is None
+        engine.generate_hocr.assert_not_called()
+        output = _pipeline.render_hocr_page(ocr_result, page_context)
+        assert output.stat().st_size == 0
+
+
+@pytest.mark.parametrize('keep', [False, True])
+def test_create_pdf_page_from_image_in_memory(outdir, keep):
+    _parser, options, plugin_manager = get_parser_options_plugins(
+        ['--force-ocr', 'in.pdf', 'out.pdf']
+    )
+    options.keep_temporary_files = keep
+    page_context = Mock(
+        options=options,
+        plugin_manager=plugin_manager,
+        pages_in_memory=True,
+        get_path=lambda name: outdir / name,
+        pageinfo=Mock(
+            width_inches=2,
+            height_inches=1,
+            rotation=0,
+            mediabox=(0, 0, 144, 72),
+            cropbox=(0, 0, 144, 72),
+            trimbox=(0, 0, 144, 72),
+        ),
+    )
+    Image.new('RGB', (200, 100), 'red').save(outdir / 'visible.jpg', dpi=(100, 100))
+
+    output = _pipeline.create_pdf_page_from_image(
+        outdir / 'visible.jpg', page_context, orientation_correction=0
+    )
+    if keep:
+        # Kept temporary files must be written
+        assert output == outdir / 'visible.pdf'
+        return
+    assert not (outdir / 'visible.pdf').exists()
+    options.keep_temporary_files = True
+    _pipeline.create_pdf_page_from_image(
+        outdir / 'visible.jpg', page_context, orientation_correction=0
+    )
+    with pikepdf.open(outdir / 'visible.pdf') as pdf:
+        assert output == _graft.ImagePage.from_page(pdf.pages[0])
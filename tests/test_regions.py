@@ -0,0 +1,135 @@
+# SPDX-FileCopyrightText: 2024 James R. Barlow
+# SPDX-License-Identifier: MPL-2.0
+
+from __future__ import annotations
+
+from argparse import Namespace
+from unittest.mock import Mock
+
+import pytest
+from PIL import Image, ImageDraw
+
+from ocrmypdf import _pipeline
+from ocrmypdf._regions import merge_region_hocr, merge_region_text, plan_ocr_regions
+from ocrmypdf.hocrtransform import HocrTransform
+
+# pylint: disable=redefined-outer-name
+
+HOCR_REGION = """<?xml version="1.0" encoding="UTF-8"?>
+<html xmlns="http://www.w3.org/1999/xhtml">
+ <head>
+  <title></title>
+ </head>
+ <body>
+  <div class='ocr_page' id='page_1' title='image "r.tif"; bbox 0 0 200 100'>
+   <div class='ocr_carea' id='block_1_1' title="bbox 10 20 190 80">
+    <p class='ocr_par' id='par_1_1' title="bbox 10 20 190 80">
+     <span class='ocr_line' id='line_1_1' title="bbox 10 20 190 80; baseline 0 -5">
+      <span class='ocrx_word' id='word_1_1' title='bbox 10 20 190 80'>{word}</span>
+     </span>
+    </p>
+   </div>
+  </div>
+ </body>
+</html>
+"""
+
+
+@pytest.fixture
+def page_context(outdir):
+    page_context = Mock()
+    page_context.options = Namespace(
+        redo_ocr=True, ocr_regions_below=0.5, pdf_renderer='hocr'
+    )
+    page_context.pageinfo.has_text = True
+    page_context.get_path = lambda name: outdir / f'000001_{name}'
+    return page_context
+
+
+@pytest.fixture
+def figure_page(outdir):
+    im = Image.new('L', (2550, 3300), 255)
+    ImageDraw.Draw(im).rectangle((300, 400, 900, 1000), fill=0)
+    ImageDraw.Draw(im).rectangle((1500, 2000, 2200, 2300), fill=80)
+    image = outdir / 'ocr.tif'
+    im.save(image, dpi=(300, 300))
+    return image
+
+
+def test_plan_ocr_regions(figure_page, page_context):
+    regions = plan_ocr_regions(figure_page, page_context)
+    assert len(regions) == 2
+    # Padded by 0.1 inch, in reading order
+    assert regions[0][:2] == pytest.approx((270, 370), abs=3)
+    assert regions[1][2:] == pytest.approx((2232, 2331), abs=3)
+
+    page_context.options.ocr_regions_below = 0.05
+    assert plan_ocr_regions(figure_page, page_context) is None
+    page_context.options.ocr_regions_below = 0  # The default
+    assert plan_ocr_regions(figure_page, page_context) is None
+    page_context.options.ocr_regions_below = 0.5
+    page_context.pageinfo.has_text = False
+    assert plan_ocr_regions(figure_page, page_context) is None
+
+
+def test_plan_ocr_regions_blank(outdir, page_context):
+    image = outdir / 'blank.tif'
+    Image.new('L', (850, 1100), 255).save(image, dpi=(100, 100))
+    assert plan_ocr_regions(image, page_context) == []
+
+
+def test_merge_region_hocr(outdir):
+    first, second, skipped = outdir / '1.hocr', outdir / '2.hocr', outdir / '3.hocr'
+    first.write_text(HOCR_REGION.format(word='first'))
+    second.write_text(HOCR_REGION.format(word='second'))
+    skipped.write_text('')
+    merged = outdir / 'page.hocr'
+    merge_region_hocr(
+        [
+            (first, (100, 50, 300, 150)),
+            (second, (1000, 2000, 1200, 2100)),
+            (skipped, (0, 0, 10, 10)),
+        ],
+        (2550, 3300),
+        merged,
+    )
+
+    hocr = merged.read_text()
+    assert "bbox 0 0 2550 3300" in hocr
+    assert 'title="bbox 110 70 290 130">first<' in hocr
+    assert 'title="bbox 1010 2020 1190 2080">second<' in hocr
+    assert 'id="word_1_1_1"' in hocr and 'id="word_1_1_2"' in hocr
+    transform = HocrTransform(hocr_filename=merged, dpi=300)
+    assert (transform.width, transform.height) == (612, 792)
+
+
+def test_merge_region_hocr_all_skipped(outdir):
+    skipped = outdir / 'skipped.hocr'
+    skipped.write_text('')
+    merged = outdir / 'page.hocr'
+    merge_region_hocr([(skipped, (0, 0, 10, 10))], (100, 100), merged)
+    assert merged.read_text() == ''
+
+
+def test_merge_region_text(outdir):
+    texts = [outdir / f'{n}.txt' for n in range(3)]
+    for text, content in zip(texts, ['first\n\f', '[skipped page]', 'second\n']):
+        text.write_text(content)
+    merge_region_text(texts, outdir / 'page.txt')
+    assert (outdir / 'page.txt').read_text() == 'first\n\nsecond'
+
+
+def test_ocr_engine_hocr_regions(figure_page, page_context):
+    def generate_hocr(input_file, output_hocr, output_text, options):
+        output_hocr.write_text(HOCR_REGION.format(word=input_file.stem))
+        output_text.write_text(input_file.stem)
+
+    engine = page_context.plugin_manager.hook.get_ocr_engine.return_value
+    engine.supports_hocr_batch = False
+    engine.generate_hocr.side_effect = generate_hocr
+    page_context.options.ocr_cache_dir = None
+
+    hocr, text = _pipeline.ocr_engine_hocr(figure_page, page_context)
+    assert engine.generate_hocr.call_count == 2
+    assert text.read_text() == '000001_ocr_region_001\n\n000001_ocr_region_002'
+    assert '000001_ocr_region_002' in hocr.read_text()
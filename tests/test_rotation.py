@@ -360,3 +360,32 @@ def test_simulated_scan(outdir):
         assert (
             pdf.pages[2].mediabox[2] < pdf.pages[2].mediabox[3]
         ), "Wrong orientation: Not portrait"
+
+
+def test_rotate_pages_one_pass(outdir):
+    canvas = Canvas(fspath(outdir / 'pages.pdf'), pagesize=(200, 300))
+    for n in range(3):
+        canvas.drawString(20, 150, f'Page {n + 1}')
+        canvas.showPage()
+    canvas.save()
+
+    check_ocrmypdf(
+        outdir / 'pages.pdf',
+        outdir / 'out.pdf',
+        '--force-ocr',
+        '--rotate-pages',
+        '--deskew',
+        '--output-type',
+        'pdf',
+        '--sidecar',
+        outdir / 'out.txt',
+        '--plugin',
+        'tests/plugins/tesseract_debug_analyze.py',
+    )
+
+    # Only the upright page is recognized during analysis; the others must be
+    # recognized again after they are rotated
+    pages = (outdir / 'out.txt').read_text().split('\f')
+    assert pages == ['analyzed', 'generated', 'generated']
+    with pikepdf.open(outdir / 'out.pdf') as pdf:
+        assert pdf.pages[1].mediabox[2] > pdf.pages[1].mediabox[3]
@@ -0,0 +1,150 @@
+# SPDX-FileCopyrightText: 2024 James R. Barlow
+# SPDX-License-Identifier: MPL-2.0
+
+from __future__ import annotations
+
+import http.client
+import json
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from ocrmypdf import _server
+from ocrmypdf._concurrent import setup_executor
+from ocrmypdf._server import (
+    JobManager,
+    QueueFullError,
+    RequestHandler,
+    ThreadingUnixHTTPServer,
+)
+from ocrmypdf.exceptions import ExitCode
+
+release = threading.Event()
+
+
+def fake_task(input_file: str, output_file: str, options: dict):
+    release.wait(timeout=10)
+    if options.get('fail'):
+        return ExitCode.input_file, ['bad input']
+    Path(output_file).write_bytes(b'%PDF ' + Path(input_file).read_bytes())
+    return ExitCode.ok, []
+
+
+def unix_connection(path: str) -> http.client.HTTPConnection:
+    conn = http.client.HTTPConnection('localhost')
+    conn.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.sock.connect(path)
+    return conn
+
+
+@pytest.fixture
+def server(tmp_path):
+    release.clear()
+    executor = ThreadPoolExecutor(max_workers=1)
+    manager = JobManager(max_jobs=1, queue_depth=1, executor=executor, task=fake_task)
+    handler = type(
+        'Handler', (RequestHandler,), dict(manager=manager, max_upload_bytes=1000)
+    )
+    socket_path = str(tmp_path / 'ocr.sock')
+    httpd = ThreadingUnixHTTPServer(socket_path, handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+
+    def request(method, url, body=None, options=None, headers=None):
+        conn = unix_connection(socket_path)
+        headers = dict(headers or {})
+        if options:
+            headers['X-OCRmyPDF-Options'] = json.dumps(options)
+        conn.request(method, url, body=body, headers=headers)
+        response = conn.getresponse()
+        return response.status, response.read()
+
+    yield request
+    release.set()
+    httpd.shutdown()
+    httpd.server_close()
+    manager.close()
+    executor.shutdown()
+
+
+def test_job_lifecycle(server):
+    status, body = server('POST', '/jobs', b'input')
+    assert status == 202
+    job_id = json.loads(body)['id']
+
+    status, body = server('GET', f'/jobs/{job_id}/output')
+    assert status == 409
+
+    release.set()
+    status, body = server('GET', f'/jobs/{job_id}/events')
+    events = [json.loads(line) for line in body.splitlines()]
+    assert events[-1]['status'] == 'done'
+    assert events[-1]['exit_code'] == 'ok'
+
+    status, body = server('GET', f'/jobs/{job_id}/output')
+    assert (status, body) == (200, b'%PDF input')
+
+    assert server('DELETE', f'/jobs/{job_id}')[0] == 204
+    assert server('GET', f'/jobs/{job_id}')[0] == 404
+
+
+def test_ocr_failure(server):
+    release.set()
+    status, body = server('POST', '/ocr', b'input', options={'fail': True})
+    assert status == 422
+    assert json.loads(body)['exit_code'] == 'input_file'
+    assert json.loads(body)['messages'] == ['bad input']
+
+
+def test_queue_full(server):
+    assert server('POST', '/jobs', b'first')[0] == 202
+    assert server('POST', '/jobs', b'second')[0] == 202
+    assert server('POST', '/jobs', b'third')[0] == 503
+
+
+def test_rejected_options(server):
+    status, body = server('POST', '/jobs', b'input', options={'sidecar': '/etc/x'})
+    assert status == 400
+    # Refused before the body is sent
+    assert server('POST', '/jobs', headers={'Content-Length': '1001'})[0] == 413
+
+
+def test_manager_queue_depth():
+    executor = ThreadPoolExecutor(max_workers=1)
+    manager = JobManager(max_jobs=1, queue_depth=0, executor=executor)
+    job = manager.create({})
+    with pytest.raises(QueueFullError):
+        manager.create({})
+    manager.abandon(job)
+    manager.abandon(manager.create({}))
+    executor.shutdown()
+
+
+def test_manager_shares_cpus(monkeypatch):
+    monkeypatch.setattr(_server, 'available_cpu_count', lambda: 8)
+    seen = []
+
+    def task(input_file, output_file, options):
+        seen.append(options)
+        return ExitCode.ok, []
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    manager = JobManager(max_jobs=2, queue_depth=0, executor=executor, task=task)
+    for options in ({}, {'jobs': 1}):
+        job = manager.create(options)
+        manager.start(job)
+        manager.wait_finished(job)
+    assert [options['jobs'] for options in seen] == [4, 1]
+    manager.close()
+    executor.shutdown()
+
+
+def test_worker_reuses_executor(monkeypatch):
+    monkeypatch.setattr(_server.signal, 'signal', lambda *args: None)
+    monkeypatch.setattr(_server, '_plugin_manager', None)
+    _server._worker_init([])
+    plugin_manager = _server._plugin_manager
+    assert setup_executor(plugin_manager) is setup_executor(plugin_manager)
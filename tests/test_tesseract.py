@@ -13,6 +13,8 @@ import pytest
 
 from ocrmypdf import pdfinfo
 from ocrmypdf._exec import tesseract
+from ocrmypdf._plugin_manager import get_parser_options_plugins
+from ocrmypdf.builtin_plugins import tesseract_ocr
 from ocrmypdf.exceptions import BadArgsError, ExitCode, MissingDependencyError
 
 from .conftest import check_ocrmypdf, run_ocrmypdf_api
@@ -151,3 +153,167 @@ def test_blocked_language(resources, no_outpdf):
     for bad_lang in ['osd', 'equ']:
         with pytest.raises(BadArgsError):
             run_ocrmypdf_api(infile, no_outpdf, '-l', bad_lang)
+
+
+HOCR_TWO_PAGES = """<?xml version="1.0" encoding="UTF-8"?>
+<html xmlns="http://www.w3.org/1999/xhtml">
+ <head>
+  <title></title>
+ </head>
+ <body>
+  <div class='ocr_page' id='page_1' title='image "a.tif"; bbox 0 0 100 100; ppageno 0'>
+   <span class='ocrx_word' id='word_1_1'>one</span>
+  </div>
+  <div class='ocr_page' id='page_2' title='image "b.tif"; bbox 0 0 100 100; ppageno 1'>
+   <span class='ocrx_word' id='word_2_1'>two</span>
+  </div>
+ </body>
+</html>
+"""
+
+
+def test_split_hocr_pages():
+    pages = tesseract.split_hocr_pages(HOCR_TWO_PAGES)
+    assert len(pages) == 2
+    assert 'one' in pages[0] and 'two' not in pages[0]
+    assert 'two' in pages[1] and 'one' not in pages[1]
+    for page in pages:
+        assert page.startswith('<?xml') and page.rstrip().endswith('</html>')
+    assert tesseract.split_hocr_pages('<html><body></body></html>') == []
+
+    # Cut off in the second page
+    truncated = HOCR_TWO_PAGES[: HOCR_TWO_PAGES.index('two')]
+    assert tesseract.split_hocr_pages(truncated) == []
+    pages = tesseract.split_hocr_pages(truncated, partial=True)
+    assert len(pages) == 1
+    assert 'one' in pages[0] and pages[0].rstrip().endswith('</html>')
+
+
+@pytest.fixture
+def hocr_batch(outdir):
+    return [
+        (outdir / f'{n}.tif', outdir / f'{n}.hocr', outdir / f'{n}.txt')
+        for n in range(2)
+    ]
+
+
+def _generate_hocr_batch(batch):
+    tesseract.generate_hocr_batch(
+        batch=batch,
+        languages=['eng'],
+        engine_mode=None,
+        tessconfig=[],
+        timeout=180.0,
+        pagesegmode=None,
+        thresholding=0,
+        user_words=None,
+        user_patterns=None,
+    )
+
+
+def test_generate_hocr_batch(monkeypatch, hocr_batch):
+    calls = []
+
+    def dummy_run(args, *, env=None, **kwargs):
+        calls.append(args)
+        # The run is limited as a single page would be
+        assert kwargs['timeout'] == 180.0
+        prefix = Path(args[-3])
+        prefix.with_suffix('.hocr').write_text(HOCR_TWO_PAGES)
+        prefix.with_suffix('.txt').write_text('one\n\ftwo\n\f')
+        return subprocess.CompletedProcess(args, 0, stdout=b'')
+
+    monkeypatch.setattr(tesseract, 'run', dummy_run)
+    _generate_hocr_batch(hocr_batch)
+    assert len(calls) == 1
+    image_list = Path(calls[0][-4]).read_text().splitlines()
+    assert image_list == [fspath(input_file) for input_file, _, _ in hocr_batch]
+    assert [hocr.read_text().count('ocr_page') for _, hocr, _ in hocr_batch] == [1, 1]
+    assert [text.read_text() for _, _, text in hocr_batch] == ['one\n', 'two\n']
+
+
+@pytest.mark.parametrize(
+    'error',
+    [
+        subprocess.CalledProcessError(1, 'tesseract', output=b'Image too large'),
+        subprocess.TimeoutExpired('tesseract', 360.0),
+    ],
+)
+def test_generate_hocr_batch_falls_back(monkeypatch, hocr_batch, error):
+    calls = []
+
+    def dummy_run(args, *, env=None, **kwargs):
+        calls.append(args)
+        raise error
+
+    monkeypatch.setattr(tesseract, 'run', dummy_run)
+    _generate_hocr_batch(hocr_batch)
+    # One attempt with all pages, then one for each page
+    assert len(calls) == 1 + len(hocr_batch)
+    assert [hocr.exists() for _, hocr, _ in hocr_batch] == [True, True]
+
+
+@pytest.mark.parametrize(
+    'jobs, npages, threads', [(16, 2, 8), (16, 100, 1), (4, 1, 4), (3, 2, 1)]
+)
+def test_tesseract_threads(jobs, npages, threads):
+    assert tesseract_ocr.tesseract_threads(jobs, npages) == threads
+
+
+def test_validate_plans_threads(monkeypatch):
+    _parser, options, _plugin_manager = get_parser_options_plugins(
+        ['--jobs', '16', 'in.pdf', 'out.pdf']
+    )
+    monkeypatch.delenv('OMP_THREAD_LIMIT', raising=False)
+    tesseract_ocr.validate(pdfinfo=[None, None], options=options, batch_pages=0)
+    assert options.tesseract_threads == 8
+    assert 'OMP_THREAD_LIMIT' not in os.environ
+
+    # In a batch, the CPUs are shared with the pages of the other documents
+    options.tesseract_threads = None
+    tesseract_ocr.validate(pdfinfo=[None, None], options=options, batch_pages=8)
+    assert options.tesseract_threads == 2
+
+    options.tesseract_threads = None
+    monkeypatch.setenv('OMP_THREAD_LIMIT', '3')
+    tesseract_ocr.validate(pdfinfo=[None, None], options=options, batch_pages=0)
+    assert options.tesseract_threads is None
+
+
+def test_thread_limit_env(monkeypatch, resources):
+    envs = []
+
+    def dummy_run(args, *, env=None, **kwargs):
+        envs.append(env)
+        raise subprocess.CalledProcessError(1, 'tesseract', output=b'Image too large')
+
+    monkeypatch.setattr(tesseract, 'run', dummy_run)
+    tesseract.get_orientation(resources / 'crom.png', None, 180.0, threads=8)
+    tesseract.get_orientation(resources / 'crom.png', None, 180.0)
+    assert envs[0]['OMP_THREAD_LIMIT'] == '8'
+    assert envs[1] is None
+
+
+def test_generate_hocr_batch_keeps_finished_pages(monkeypatch, hocr_batch):
+    calls = []
+
+    def dummy_run(args, *, env=None, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            # Stopped while recognizing the second image
+            prefix = Path(args[-3])
+            prefix.with_suffix('.hocr').write_text(
+                HOCR_TWO_PAGES[: HOCR_TWO_PAGES.index('two')]
+            )
+            prefix.with_suffix('.txt').write_text('one\n\f')
+            raise subprocess.TimeoutExpired('tesseract', 360.0)
+        raise subprocess.CalledProcessError(1, 'tesseract', output=b'Empty page!!')
+
+    monkeypatch.setattr(tesseract, 'run', dummy_run)
+    _generate_hocr_batch(hocr_batch)
+    # Only the second page is recognized again
+    assert len(calls) == 2
+    assert fspath(hocr_batch[1][0]) in calls[1]
+    assert 'one' in hocr_batch[0][1].read_text()
+    assert hocr_batch[0][2].read_text() == 'one\n'
+    assert hocr_batch[1][1].exists()
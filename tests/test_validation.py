@@ -76,6 +76,8 @@ def test_mutex_options():
         vd.check_options_ocr_behavior(make_opts(redo_ocr=True, skip_text=True))
     with pytest.raises(BadArgsError):
         vd.check_options_ocr_behavior(make_opts(redo_ocr=True, force_ocr=True))
+    with pytest.raises(BadArgsError):
+        vd.check_options_graft(make_opts(streaming_graft=True, parallel_graft=True))
 
 
 def test_optimizing(caplog):